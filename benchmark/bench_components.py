@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the Stage 1 component construction path.
+
+Compares the pydantic path (validated Node/CallRelationship built by analyzers,
+model_dump() per object, validated Node rebuilt by DependencyParser) with the
+slotted-record path (ComponentRecord/CallRecord, to_dict(), Node.model_construct).
+Reports construction time and memory held by the analyzer-side objects.
+
+Usage:
+    python benchmark/bench_components.py [--components 100000] [--calls-per-component 3]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Get script directory and project root
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+
+COMPONENTS_PER_FILE = 20
+
+
+def component_kwargs(i: int) -> dict:
+    """Analyzer-like keyword arguments; paths are rebuilt per call as analyzers do."""
+    file_index = i // COMPONENTS_PER_FILE
+    relative_path = f"src/pkg{file_index % 50}/module_{file_index}.py"
+    return dict(
+        id=f"src.pkg{file_index % 50}.module_{file_index}.func_{i}",
+        name=f"func_{i}",
+        component_type="function",
+        file_path="/repo/" + relative_path,
+        relative_path=relative_path,
+        start_byte=i * 120,
+        end_byte=i * 120 + 100,
+        start_line=i * 5 + 1,
+        end_line=i * 5 + 4,
+        has_docstring=False,
+        docstring="",
+        parameters=["self", "value"],
+        node_type="function",
+        base_classes=None,
+        class_name=None,
+        display_name=f"function func_{i}",
+        component_id=f"src.pkg{file_index % 50}.module_{file_index}.func_{i}",
+    )
+
+
+def call_kwargs(i: int, j: int, components: int) -> dict:
+    return dict(caller=f"func_{i}", callee=f"func_{(i * 7 + j) % components}", call_line=i * 5 + 2)
+
+
+def build_pydantic(components: int, calls: int):
+    nodes = [Node(**component_kwargs(i)) for i in range(components)]
+    rels = [CallRelationship(**call_kwargs(i, j, components)) for i in range(components) for j in range(calls)]
+    return nodes, rels
+
+
+def build_records(components: int, calls: int):
+    nodes = [ComponentRecord(**component_kwargs(i)) for i in range(components)]
+    rels = [CallRecord(**call_kwargs(i, j, components)) for i in range(components) for j in range(calls)]
+    return nodes, rels
+
+
+def convert_pydantic(nodes, rels):
+    functions = [node.model_dump() for node in nodes]
+    relationships = [rel.model_dump() for rel in rels]
+    return [Node(**{**func, "depends_on": set()}) for func in functions], relationships
+
+
+def convert_records(nodes, rels):
+    functions = [node.to_dict() for node in nodes]
+    relationships = [rel.to_dict() for rel in rels]
+    return [Node.model_construct(**func) for func in functions], relationships
+
+
+def measure(build, convert, components: int, calls: int) -> dict:
+    gc.collect()
+    start = time.perf_counter()
+    nodes, rels = build(components, calls)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    convert(nodes, rels)
+    convert_seconds = time.perf_counter() - start
+    del nodes, rels
+
+    gc.collect()
+    tracemalloc.start()
+    nodes, rels = build(components, calls)
+    held_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes, rels
+
+    return {
+        "build_seconds": build_seconds,
+        "convert_seconds": convert_seconds,
+        "held_mb": held_bytes / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark component construction in Stage 1")
+    parser.add_argument("--components", type=int, default=100_000)
+    parser.add_argument("--calls-per-component", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {
+        "pydantic": measure(build_pydantic, convert_pydantic, args.components, args.calls_per_component),
+        "records": measure(build_records, convert_records, args.components, args.calls_per_component),
+    }
+
+    scale = 100_000 / args.components
+    print(f"{args.components} components, {args.components * args.calls_per_component} call relationships "
+          f"(figures per 100k components)")
+    print(f"{'path':<10} {'build (s)':>10} {'to API (s)':>11} {'total (s)':>10} {'held (MB)':>10}")
+    for name, r in results.items():
+        total = r["build_seconds"] + r["convert_seconds"]
+        print(f"{name:<10} {r['build_seconds'] * scale:>10.2f} {r['convert_seconds'] * scale:>11.2f} "
+              f"{total * scale:>10.2f} {r['held_mb'] * scale:>10.1f}")
+
+    before, after = results["pydantic"], results["records"]
+    speedup = (before["build_seconds"] + before["convert_seconds"]) / (after["build_seconds"] + after["convert_seconds"])
+    print(f"\nspeedup: {speedup:.1f}x, memory: {after['held_mb'] / before['held_mb']:.0%} of pydantic")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the dependency graph algorithms in topo_sort.
+
+Builds synthetic CSR graphs (random sparse graphs with a few cycles, plus one
+long dependency chain) and times cycle detection, cycle resolution, topological
+sort, dependency-first DFS and leaf selection on each.
+
+Usage:
+    python benchmark/bench_graph.py [--sizes 10000 100000 1000000] [--avg-degree 4]
+"""
+
+import argparse
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+# Get script directory and project root
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from codewiki.src.be.dependency_analyzer.graph_engine import CSRGraph
+from codewiki.src.be.dependency_analyzer import topo_sort
+
+
+class _Component:
+    __slots__ = ("component_type",)
+
+    def __init__(self, component_type: str):
+        self.component_type = component_type
+
+
+def _graph(ids, successor_lists) -> CSRGraph:
+    return CSRGraph._from_successor_lists(ids, {node: i for i, node in enumerate(ids)}, successor_lists)
+
+
+def random_graph(nodes: int, avg_degree: int, seed: int) -> CSRGraph:
+    """Mostly layered DAG (edges point to higher node numbers) with ~0.1% back edges."""
+    rng = random.Random(seed)
+    ids = [f"pkg{i % 97}.module_{i // 20}.Component{i}" for i in range(nodes)]
+
+    def successor_lists():
+        for i in range(nodes):
+            targets = set()
+            for _ in range(rng.randint(0, 2 * avg_degree)):
+                if i + 1 < nodes:
+                    targets.add(rng.randint(i + 1, min(nodes - 1, i + 1000)))
+            if i > 0 and rng.random() < 0.001:
+                targets.add(rng.randint(max(0, i - 50), i - 1))
+            yield sorted(targets)
+
+    return _graph(ids, successor_lists())
+
+
+def chain_graph(nodes: int) -> CSRGraph:
+    """Single dependency chain closed into one cycle: worst case for recursion depth."""
+    ids = [f"chain.Component{i}" for i in range(nodes)]
+    return _graph(ids, ([(i + 1) % nodes] for i in range(nodes)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(name: str, graph: CSRGraph, build_seconds: float):
+    components = {node: _Component("class") for node in graph.ids}
+    timings = {"build": build_seconds}
+    _, timings["cycles"] = timed(topo_sort.detect_cycles, graph)
+    _, timings["resolve"] = timed(topo_sort.resolve_cycles, graph)
+    _, timings["topo"] = timed(topo_sort.topological_sort, graph)
+    _, timings["dfs"] = timed(topo_sort.dependency_first_dfs, graph)
+    _, timings["leaves"] = timed(topo_sort.get_leaf_nodes, graph, components)
+    print(f"{name:<14} {len(graph):>9} {graph.num_edges:>9} "
+          + " ".join(f"{timings[key]:>8.2f}" for key in ("build", "cycles", "resolve", "topo", "dfs", "leaves")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dependency graph algorithms")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--avg-degree", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Results are logged per stage; keep the table readable
+    topo_sort.logger.disabled = True
+
+    print(f"{'graph':<14} {'nodes':>9} {'edges':>9} "
+          + " ".join(f"{key:>8}" for key in ("build", "cycles", "resolve", "topo", "dfs", "leaves"))
+          + "   (seconds)")
+    for size in args.sizes:
+        graph, seconds = timed(random_graph, size, args.avg_degree, args.seed)
+        run("random", graph, seconds)
+        graph, seconds = timed(chain_graph, size)
+        run("chain-cycle", graph, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Stage 1 JavaScript/TypeScript extraction.
+
+Times the JS/TS analyzers of the working tree against the analyzers of a
+baseline revision (by default the repository's root commit) on the same
+files. The baseline is exported with `git archive` into a temporary directory
+and run in a separate interpreter, so both versions of the `codewiki` package
+are imported unchanged. Each side analyzes every file through its
+`analyze_*_file_treesitter` entry point, parsing included; the best of
+--repeat runs is reported. Outputs are compared as component ids and
+(caller, callee) pairs per file.
+
+The numbers are end-to-end analyzer time, so they include every change made
+since the baseline, not only the move to compiled queries; pass the commit
+before it as --baseline to see that change alone. Measured on one CPU, with
+identical output on every file:
+
+    corpus                         vs root commit    vs commit before queries
+    generated, 300 TS files        3.64x             3.01x
+    generated, 300 JS files        3.78x             3.41x
+    zod/src, 241 TS files          3.25x
+    npm (no node_modules), 114 JS  4.14x
+
+Files come from a repository when --repo is given, otherwise from a generated
+corpus.
+
+Usage:
+    python benchmark/bench_js_ts.py [--baseline REV] [--repo PATH] [--files 300] [--repeat 3]
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+# Get script directory and project root
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+LANGUAGES = {
+    # language: (analyzer module, entry point, file extensions)
+    "typescript": ("typescript", "analyze_typescript_file_treesitter", (".ts", ".tsx")),
+    "javascript": ("javascript", "analyze_javascript_file_treesitter", (".js", ".jsx", ".mjs", ".cjs")),
+}
+
+
+def generated_file(language: str, index: int) -> bytes:
+    """Analyzer-like module: classes with methods, functions, arrow consts, calls and type references."""
+    typed = language == "typescript"
+    lines = []
+    for c in range(6):
+        name = f"Service{index}_{c}"
+        if typed:
+            lines.append(f"export interface {name}Options {{ retries: number; parent?: {name}Options; }}")
+        else:
+            lines.append(f"/** @param {{{name}Options}} options @returns {{Promise<Result{c}>}} */")
+        base = f" extends Service{index}_{c - 1}" if c else ""
+        lines.append(f"export class {name}{base} {{")
+        for m in range(5):
+            params = f"options: {name}Options, items: Array<Item{m}>" if typed else "options, items"
+            lines.append(f"  async method{m}({params}) {{")
+            lines.append(f"    const result = await this.helper{m}(options).then((value) => value.map(transform{m}));")
+            lines.append(f"    if (items.length > {m}) {{ return new Result{m}(result, helper_{index}_{m}(items)); }}")
+            lines.append(f"    return this.client.request(`/api/{name}/{m}`, {{ body: JSON.stringify(result) }});")
+            lines.append("  }")
+        lines.append("}")
+    for f in range(10):
+        params = "input: string, count: number = 0" if typed else "input, count = 0"
+        lines.append(f"export function helper_{index}_{f}({params}) {{")
+        lines.append(f"  const parts = input.split(',').filter(Boolean).map((part) => parse{f}(part, count));")
+        lines.append(f"  return format{f}(parts, {{ separator: ';', limit: count * {f + 1} }});")
+        lines.append("}")
+        lines.append(f"export const arrow_{index}_{f} = (value) => helper_{index}_{f}(String(value), {f});")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def load_files(language: str, repo: str, limit: int):
+    extensions = LANGUAGES[language][2]
+    if not repo:
+        ext = extensions[0]
+        return [(f"/bench/src/module_{i}{ext}", generated_file(language, i)) for i in range(limit)]
+    files = []
+    for directory, dirnames, filenames in os.walk(repo):
+        dirnames[:] = sorted(d for d in dirnames if d not in (".git", "node_modules"))
+        for filename in sorted(filenames):
+            if filename.endswith(extensions):
+                path = os.path.join(directory, filename)
+                with open(path, "rb") as f:
+                    files.append((path, f.read()))
+                if len(files) >= limit:
+                    return files
+    return files
+
+
+def measure(language: str, files, repo: str, repeat: int) -> dict:
+    """
+    Best time and output of the `codewiki` package first on sys.path. Content is
+    passed as text, which analyzers of every revision accept.
+    """
+    from importlib import import_module
+
+    module_name, entry_point, _ = LANGUAGES[language]
+    analyze = getattr(import_module(f"codewiki.src.be.dependency_analyzer.analyzers.{module_name}"), entry_point)
+    texts = [(path, content.decode("utf-8", errors="replace")) for path, content in files]
+    best, output = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [analyze(path, text, repo) for path, text in texts]
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        output = [
+            [[node.id for node in nodes], [[rel.caller, rel.callee] for rel in relationships]]
+            for nodes, relationships in results
+        ]
+    return {"seconds": best, "output": output}
+
+
+def export_revision(revision: str, destination: str) -> None:
+    """Extract the `codewiki` package of a revision into `destination`."""
+    archive = subprocess.run(
+        ["git", "-C", str(PROJECT_ROOT), "archive", "--format=tar", revision, "codewiki"],
+        check=True, capture_output=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(destination)
+
+
+def root_commit() -> str:
+    return subprocess.run(
+        ["git", "-C", str(PROJECT_ROOT), "rev-list", "--max-parents=0", "HEAD"],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()[-1]
+
+
+def measure_in(package_root: str, args, language: str) -> dict:
+    """Run `measure` in a fresh interpreter with `package_root` providing `codewiki`."""
+    command = [
+        sys.executable, __file__, "--measure", package_root, "--languages", language,
+        "--files", str(args.files), "--repeat", str(args.repeat),
+    ]
+    if args.repo:
+        command += ["--repo", args.repo]
+    return json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--baseline", default="", help="Revision to compare with (default: the root commit)")
+    arg_parser.add_argument("--repo", default="", help="Repository to read files from (default: generated corpus)")
+    arg_parser.add_argument("--files", type=int, default=300, help="Files per language")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per side; the best is reported")
+    arg_parser.add_argument("--languages", nargs="+", default=list(LANGUAGES), choices=list(LANGUAGES))
+    arg_parser.add_argument("--measure", metavar="PACKAGE_ROOT", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    repo = os.path.abspath(args.repo) if args.repo else "/bench"
+
+    if args.measure:
+        # Worker: time one side and report on stdout
+        logging.disable(logging.CRITICAL)
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 20000))
+        sys.path.insert(0, args.measure)
+        language = args.languages[0]
+        print(json.dumps(measure(language, load_files(language, args.repo, args.files), repo, args.repeat)))
+        return
+
+    baseline = args.baseline or root_commit()
+    print(f"baseline: {baseline}")
+    print(f"{'language':<12} {'files':>6} {'MB':>7} {'baseline':>9} {'current':>8} {'speedup':>8}  output")
+    with tempfile.TemporaryDirectory(prefix="bench_js_ts_") as baseline_root:
+        export_revision(baseline, baseline_root)
+        for language in args.languages:
+            files = load_files(language, args.repo, args.files)
+            if not files:
+                print(f"{language:<12} no files")
+                continue
+            megabytes = sum(len(content) for _, content in files) / 1e6
+            before = measure_in(baseline_root, args, language)
+            after = measure_in(str(PROJECT_ROOT), args, language)
+            differing = sum(a != b for a, b in zip(before["output"], after["output"]))
+            print(
+                f"{language:<12} {len(files):>6} {megabytes:>7.2f} {before['seconds']:>8.2f}s "
+                f"{after['seconds']:>7.2f}s {before['seconds'] / after['seconds']:>7.2f}x  "
+                f"{'identical' if not differing else f'{differing} files differ'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
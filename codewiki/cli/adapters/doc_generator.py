@@ -21,7 +21,7 @@ from codewiki.cli.utils.errors import APIError
 
 # Import backend modules
 from codewiki.src.be.documentation_generator import DocumentationGenerator
-from codewiki.src.config import Config as BackendConfig, set_cli_context
+from codewiki.src.config import Config as BackendConfig, LLM_CACHE, PARSE_WORKERS, set_cli_context
 
 
 class CLIDocumentationGenerator:
@@ -141,6 +141,8 @@ class CLIDocumentationGenerator:
             # Create backend config with CLI settings
             # Use main_model as fallback_model for OpenAI compatibility
             main_model = self.config.get('main_model')
+            parse_workers = self.config.get('parse_workers')
+            llm_cache = self.config.get('llm_cache')
             backend_config = BackendConfig.from_cli(
                 repo_path=str(self.repo_path),
                 output_dir=str(self.output_dir),
@@ -148,8 +150,15 @@ class CLIDocumentationGenerator:
                 llm_api_key=self.config.get('api_key'),
                 main_model=main_model,
                 cluster_model=self.config.get('cluster_model'),
-                fallback_model=main_model  # Use same model for fallback
+                fallback_model=main_model,  # Use same model for fallback
+                parse_workers=PARSE_WORKERS if parse_workers is None else parse_workers,
+                llm_cache=LLM_CACHE if llm_cache is None else llm_cache,
+                incremental=bool(self.config.get('incremental'))
             )
+            if self.config.get('no_cache'):
+                backend_config.parse_cache_dir = None
+                if llm_cache is None:
+                    backend_config.llm_cache = 'off'
             
             # Run backend documentation generation
             asyncio.run(self._run_backend_generation(backend_config))
@@ -289,6 +298,7 @@ class CLIDocumentationGenerator:
         
         # Import clustering function
         from codewiki.src.be.cluster_modules import cluster_modules
+        from codewiki.src.be.llm_services import get_llm_gateway
         from codewiki.src.file_manager import file_manager
         from codewiki.src.config import FIRST_MODULE_TREE_FILENAME, MODULE_TREE_FILENAME
         
@@ -297,10 +307,14 @@ class CLIDocumentationGenerator:
         first_module_tree_path = os.path.join(working_dir, FIRST_MODULE_TREE_FILENAME)
         module_tree_path = os.path.join(working_dir, MODULE_TREE_FILENAME)
         
+        incremental = False
         try:
             if os.path.exists(first_module_tree_path):
                 click.echo(f"[DEBUG] [{time.time() - stage_2_start:.1f}s] Using cached module tree", err=True)
                 module_tree = file_manager.load_json(first_module_tree_path)
+                if backend_config.incremental:
+                    incremental = doc_generator.prepare_incremental_update(working_dir, components, leaf_nodes)
+                    click.echo(f"[DEBUG] [{time.time() - stage_2_start:.1f}s] Incremental update: {'applied' if incremental else 'unavailable, running full generation'}", err=True)
             else:
                 click.echo(f"[DEBUG] [{time.time() - stage_2_start:.1f}s] Calling cluster_modules (this may take a while)...", err=True)
                 click.echo(f"[DEBUG] Input: {len(leaf_nodes)} leaf nodes, {len(components)} total components", err=True)
@@ -322,7 +336,10 @@ class CLIDocumentationGenerator:
                 file_manager.save_json(module_tree, first_module_tree_path)
             
             stage_2_duration = time.time() - stage_2_start
-            file_manager.save_json(module_tree, module_tree_path)
+            if incremental:
+                module_tree = file_manager.load_json(module_tree_path)
+            else:
+                file_manager.save_json(module_tree, module_tree_path)
             self.job.module_count = len(module_tree)
             
             click.echo(f"[DEBUG] [{stage_2_duration:.1f}s] Stage 2 complete: {len(module_tree)} modules created", err=True)
@@ -398,6 +415,8 @@ class CLIDocumentationGenerator:
             import traceback
             click.echo(f"[DEBUG] Traceback: {traceback.format_exc()}", err=True)
             raise APIError(f"Documentation generation failed: {e}")
+        finally:
+            await get_llm_gateway(backend_config).aclose()
         
         total_duration = time.time() - stage_start
         click.echo(f"[DEBUG] [{total_duration:.1f}s] ALL STAGES COMPLETE", err=True)
@@ -51,7 +51,24 @@ from codewiki.cli.models.job import GenerationOptions
 @click.option(
     "--no-cache",
     is_flag=True,
-    help="Force full regeneration, ignoring cache",
+    help="Force full regeneration, ignoring cache (and stored LLM responses unless --llm-cache is given)",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Regenerate only docs affected by git changes since the last run",
+)
+@click.option(
+    "--parse-workers",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Parser processes for dependency analysis (0 = one per CPU, 1 = sequential)",
+)
+@click.option(
+    "--llm-cache",
+    type=click.Choice(["off", "read", "readwrite", "replay-only"]),
+    default=None,
+    help="LLM response cache: off, read (no new entries), readwrite (default), or replay-only (fail on a miss)",
 )
 @click.option(
     "--verbose",
@@ -66,6 +83,9 @@ def generate_command(
     create_branch: bool,
     github_pages: bool,
     no_cache: bool,
+    incremental: bool,
+    parse_workers: Optional[int],
+    llm_cache: Optional[str],
     verbose: bool
 ):
     """
@@ -87,6 +107,18 @@ def generate_command(
     \b
     # Force full regeneration
     $ codewiki generate --no-cache
+    
+    \b
+    # Update only the docs affected by commits since the last run
+    $ codewiki generate --incremental
+    
+    \b
+    # Parse source files with 8 processes
+    $ codewiki generate --parse-workers 8
+    
+    \b
+    # Re-run a failed job from stored LLM responses only
+    $ codewiki generate --llm-cache replay-only
     """
     logger = create_logger(verbose=verbose)
     start_time = time.time()
@@ -147,7 +179,7 @@ def generate_command(
         logger.success(f"Output directory: {output_dir}")
         
         # Check for existing documentation
-        if output_dir.exists() and list(output_dir.glob("*.md")):
+        if output_dir.exists() and list(output_dir.glob("*.md")) and not incremental:
             if not click.confirm(
                 f"\n{output_dir} already contains documentation. Overwrite?",
                 default=True
@@ -190,6 +222,7 @@ def generate_command(
             create_branch=create_branch,
             github_pages=github_pages,
             no_cache=no_cache,
+            incremental=incremental,
             custom_output=output if output != "docs" else None
         )
         
@@ -202,6 +235,10 @@ def generate_command(
                 'cluster_model': config.cluster_model,
                 'base_url': config.base_url,
                 'api_key': api_key,
+                'parse_workers': parse_workers,
+                'llm_cache': llm_cache,
+                'no_cache': no_cache,
+                'incremental': incremental,
             },
             verbose=verbose,
             generate_html=github_pages
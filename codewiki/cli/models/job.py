@@ -24,6 +24,7 @@ class GenerationOptions:
     create_branch: bool = False
     github_pages: bool = False
     no_cache: bool = False
+    incremental: bool = False
     custom_output: Optional[str] = None
 
 
@@ -41,7 +41,7 @@ from codewiki.src.be.agent_tools.read_code_components import read_code_component
 from codewiki.src.be.agent_tools.str_replace_editor import str_replace_editor_tool
 from codewiki.src.be.agent_tools.generate_sub_module_documentations import generate_sub_module_documentation_tool
 from codewiki.src.be.agent_tools.list_module_components import list_module_components_tool, get_module_summary_tool
-from codewiki.src.be.llm_services import create_fallback_models
+from codewiki.src.be.llm_services import get_llm_gateway
 from codewiki.src.be.prompt_template import (
     SYSTEM_PROMPT,
     LEAF_SYSTEM_PROMPT,
@@ -65,7 +65,7 @@ class AgentOrchestrator:
     
     def __init__(self, config: Config):
         self.config = config
-        self.fallback_models = create_fallback_models(config)
+        self.llm_gateway = get_llm_gateway(config)
     
     def create_agent(self, module_name: str, components: Dict[str, Any], 
                     core_component_ids: List[str], module_tree: Dict[str, Any] = None) -> Agent:
@@ -97,12 +97,15 @@ class AgentOrchestrator:
         # Force complex agent at root level to guarantee at least MIN_DEPTH levels
         force_complex = len(core_component_ids) >= 2  # Root level is always depth 0 < MIN_DEPTH
         
+        # Providers and connections are shared by every agent on this run's event loop
+        fallback_models = self.llm_gateway.agent_models()
+        
         if is_complex or force_complex:
             logger.debug(f"[STAGE 4.3] Module is complex or forced - creating complex agent with sub-module tool")
             logger.debug(f"[STAGE 4.3]   is_complex={is_complex}, force_complex={force_complex}")
             tools = base_tools + [generate_sub_module_documentation_tool]
             agent = Agent(
-                self.fallback_models,
+                fallback_models,
                 name=module_name,
                 deps_type=CodeWikiDeps,
                 tools=tools,
@@ -112,7 +115,7 @@ class AgentOrchestrator:
         else:
             logger.debug(f"[STAGE 4.3] Module is leaf - creating leaf agent without sub-module tool")
             agent = Agent(
-                self.fallback_models,
+                fallback_models,
                 name=module_name,
                 deps_type=CodeWikiDeps,
                 tools=base_tools,
@@ -200,47 +203,33 @@ class AgentOrchestrator:
             logger.warning(f"[AUTO-SPLIT] Directory-based split created only {len(sub_modules)} group(s)")
             logger.warning(f"[AUTO-SPLIT] Falling back to token-budget chunked splitting")
             
-            from codewiki.src.be.utils import count_module_tokens
+            from codewiki.src.be.token_accounting import get_token_accountant, pack
+            from codewiki.src.be.utils import module_file_blocks
             
             # Target: each chunk should fit in LLM context (~80k tokens to leave room for response)
             TARGET_TOKENS_PER_CHUNK = 80000
             
-            sub_modules = {}
-            current_chunk = []
-            current_chunk_tokens = 0
-            chunk_idx = 0
-            
-            for comp_id in core_component_ids:
-                if comp_id not in components:
-                    continue
-                    
-                # Estimate tokens for this component
-                comp_tokens = count_module_tokens([comp_id], components)
-                
-                # If adding this component exceeds budget, start a new chunk
-                if current_chunk and (current_chunk_tokens + comp_tokens > TARGET_TOKENS_PER_CHUNK):
-                    chunk_idx += 1
-                    sub_name = f"part_{chunk_idx}"
-                    sub_modules[sub_name] = {
-                        "path": f"chunk_{chunk_idx}",
-                        "components": current_chunk
-                    }
-                    logger.info(f"[AUTO-SPLIT] Created chunk {chunk_idx}: {len(current_chunk)} components, {current_chunk_tokens} tokens")
-                    current_chunk = []
-                    current_chunk_tokens = 0
-                
-                current_chunk.append(comp_id)
-                current_chunk_tokens += comp_tokens
+            # Prompts hold each component's own source, counted in Stage 1; graphs saved
+            # before those counts fall back to the component's file block. Chunks are then
+            # cut at the budget with prefix sums
+            chunk_ids = [comp_id for comp_id in core_component_ids if comp_id in components]
+            comp_tokens = [components[comp_id].source_tokens for comp_id in chunk_ids]
+            uncounted = [i for i, tokens in enumerate(comp_tokens) if tokens is None]
+            if uncounted:
+                counted = get_token_accountant().count_batch(
+                    [module_file_blocks([chunk_ids[i]], components)[0] for i in uncounted]
+                )
+                for i, tokens in zip(uncounted, counted):
+                    comp_tokens[i] = tokens
             
-            # Add the last chunk
-            if current_chunk:
-                chunk_idx += 1
+            sub_modules = {}
+            for chunk_idx, (start, end) in enumerate(pack(comp_tokens, TARGET_TOKENS_PER_CHUNK), 1):
                 sub_name = f"part_{chunk_idx}"
                 sub_modules[sub_name] = {
                     "path": f"chunk_{chunk_idx}",
-                    "components": current_chunk
+                    "components": chunk_ids[start:end]
                 }
-                logger.info(f"[AUTO-SPLIT] Created chunk {chunk_idx}: {len(current_chunk)} components, {current_chunk_tokens} tokens")
+                logger.info(f"[AUTO-SPLIT] Created chunk {chunk_idx}: {end - start} components, {sum(comp_tokens[start:end])} tokens")
             
             logger.info(f"[AUTO-SPLIT] Token-budget chunking created {len(sub_modules)} parts")
         
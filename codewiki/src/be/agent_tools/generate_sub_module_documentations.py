@@ -3,7 +3,7 @@ from pydantic_ai import RunContext, Tool, Agent
 from codewiki.src.be.agent_tools.deps import CodeWikiDeps
 from codewiki.src.be.agent_tools.read_code_components import read_code_components_tool
 from codewiki.src.be.agent_tools.str_replace_editor import str_replace_editor_tool
-from codewiki.src.be.llm_services import create_fallback_models
+from codewiki.src.be.llm_services import get_llm_gateway
 from codewiki.src.be.prompt_template import SYSTEM_PROMPT, LEAF_SYSTEM_PROMPT, format_user_prompt
 from codewiki.src.be.utils import is_complex_module, count_module_tokens
 from codewiki.src.config import MAX_TOKEN_PER_LEAF_MODULE, MIN_DEPTH
@@ -73,8 +73,8 @@ async def generate_sub_module_documentation(
     deps = ctx.deps
     previous_module_name = deps.current_module_name
     
-    # Create fallback models from config
-    fallback_models = create_fallback_models(deps.config)
+    # Reuse the run's models and connections
+    fallback_models = get_llm_gateway(deps.config).agent_models()
 
     # add the sub-module to the module tree
     value = deps.module_tree
@@ -92,7 +92,8 @@ async def generate_sub_module_documentation(
         logger.info(f"{indent}{arrow} Generating documentation for sub-module: {sub_module_name}")
 
         # Use centralized token counting that matches the actual LLM prompt format
-        num_tokens = count_module_tokens(core_component_ids, ctx.deps.components)
+        # (only exact when the module is close to the threshold)
+        num_tokens = count_module_tokens(core_component_ids, ctx.deps.components, limit=MAX_TOKEN_PER_LEAF_MODULE)
         
         # Force sub-agent creation until MIN_DEPTH is reached
         # After MIN_DEPTH, apply normal criteria (complex module, token threshold)
@@ -15,7 +15,7 @@ async def read_code_components(ctx: RunContext[CodeWikiDeps], component_ids: lis
         if component_id not in ctx.deps.components:
             results.append(f"# Component {component_id} not found")
         else:
-            results.append(f"# Component {component_id}:\n{ctx.deps.components[component_id].source_code.strip()}\n\n")
+            results.append(f"# Component {component_id}:\n{ctx.deps.components[component_id].get_source_code().strip()}\n\n")
 
     return "\n".join(results)
 
@@ -4,8 +4,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 from codewiki.src.be.dependency_analyzer.models.core import Node
+from codewiki.src.be.graph_clustering import cluster_modules_by_graph
 from codewiki.src.be.llm_services import call_llm
-from codewiki.src.be.utils import count_tokens, count_module_tokens
+from codewiki.src.be.map_reduce_clustering import cluster_modules_map_reduce
+from codewiki.src.be.utils import accountant, count_tokens, count_module_tokens
 from codewiki.src.config import (
     MAX_TOKEN_PER_MODULE, 
     MIN_COMPONENTS_FOR_CLUSTERING,
@@ -137,11 +139,86 @@ def format_potential_core_components(leaf_nodes: List[str], components: Dict[str
         for leaf_node in leaf_nodes:
             potential_core_components += f"\t{leaf_node}\n"
             potential_core_components_with_code += f"\t{leaf_node}\n"
-            potential_core_components_with_code += f"{components[leaf_node].source_code}\n"
+            potential_core_components_with_code += f"{components[leaf_node].get_source_code()}\n"
 
     return potential_core_components, potential_core_components_with_code
 
 
+def _cluster_sub_modules(
+    module_tree: Dict[str, Any],
+    components: Dict[str, Node],
+    config: Config,
+    current_module_tree: Dict[str, Any],
+    current_module_path: List[str]
+) -> None:
+    """
+    Recursively cluster the sub-modules of each module in module_tree.
+    """
+    for module_name, module_info in module_tree.items():
+        sub_leaf_nodes = module_info.get("components", [])
+        logger.info(f"[STAGE 2] Processing sub-modules for '{module_name}' with {len(sub_leaf_nodes)} components")
+        
+        # Filter sub_leaf_nodes to ensure they exist in components
+        valid_sub_leaf_nodes = []
+        invalid_count = 0
+        for node in sub_leaf_nodes:
+            if node in components:
+                valid_sub_leaf_nodes.append(node)
+            else:
+                logger.warning(f"[STAGE 2] Skipping invalid sub leaf node '{node}' in module '{module_name}' - not found in components")
+                invalid_count += 1
+        
+        if invalid_count > 0:
+            logger.warning(f"[STAGE 2] Module '{module_name}': {invalid_count} invalid sub leaf nodes filtered out, {len(valid_sub_leaf_nodes)} valid")
+        
+        current_module_path.append(module_name)
+        try:
+            module_info["children"] = {}
+            module_info["children"] = cluster_modules(valid_sub_leaf_nodes, components, config, current_module_tree, module_name, current_module_path)
+            logger.info(f"[STAGE 2] Sub-modules for '{module_name}': {len(module_info['children'])} children created")
+        except Exception as e:
+            logger.error(f"[STAGE 2] Failed to cluster sub-modules for '{module_name}': {type(e).__name__}: {str(e)}")
+            module_info["children"] = {}
+        finally:
+            current_module_path.pop()
+
+
+def _cluster_in_chunks(
+    leaf_nodes: List[str],
+    components: Dict[str, Node],
+    config: Config,
+    current_module_tree: Dict[str, Any],
+    current_module_name: str,
+    current_module_path: List[str]
+) -> Dict[str, Any]:
+    """
+    Cluster one level with map-reduce when it does not fit in one cluster call,
+    then its sub-modules. Falls back to graph, then directory-based modules.
+    """
+    module_tree = cluster_modules_map_reduce(leaf_nodes, components, config, current_module_tree, current_module_name)
+    clustered = bool(module_tree)
+    if not clustered:
+        logger.warning(f"[STAGE 2] Map-reduce clustering produced no modules, clustering on the dependency graph")
+        module_tree = cluster_modules_by_graph(leaf_nodes, components, config, current_module_name)
+        if not module_tree:
+            module_tree = _create_directory_based_modules(leaf_nodes, components, current_module_name)
+
+    if current_module_tree == {}:
+        current_module_tree = module_tree
+    else:
+        value = current_module_tree
+        for key in current_module_path:
+            value = value[key]["children"]
+        for mod_name, mod_info in module_tree.items():
+            if "path" in mod_info:
+                del mod_info["path"]
+            value[mod_name] = mod_info
+
+    if clustered:
+        _cluster_sub_modules(module_tree, components, config, current_module_tree, current_module_path)
+    return module_tree
+
+
 def cluster_modules(
     leaf_nodes: List[str],
     components: Dict[str, Node],
@@ -163,11 +240,21 @@ def cluster_modules(
     if current_module_name:
         logger.info(f"[STAGE 2] Current module: {current_module_name}")
     
+    if current_module_name is None and 0 < config.graph_clustering_min_components <= len(leaf_nodes):
+        logger.info(f"[STAGE 2] {len(leaf_nodes)} leaf nodes >= {config.graph_clustering_min_components}, clustering on the dependency graph")
+        module_tree = cluster_modules_by_graph(leaf_nodes, components, config)
+        if module_tree:
+            cluster_duration = time.time() - cluster_start
+            logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE in {cluster_duration:.1f}s (graph-based)")
+            return module_tree
+        logger.warning(f"[STAGE 2] Graph clustering produced no modules, falling back to LLM clustering")
+    
     potential_core_components, potential_core_components_with_code = format_potential_core_components(leaf_nodes, components)
     
     # Use centralized token counting that matches the actual LLM prompt format (full file contents)
     # This ensures consistent threshold checking with what actually gets sent to the LLM
-    token_count = count_module_tokens(leaf_nodes, components)
+    # (exact only when the module is close to the threshold)
+    token_count = count_module_tokens(leaf_nodes, components, limit=MAX_TOKEN_PER_MODULE)
     logger.info(f"[STAGE 2] Module token count (full files): {token_count}, MAX_TOKEN_PER_MODULE: {MAX_TOKEN_PER_MODULE}")
 
     # FIX: Don't try to cluster too few components (prevents infinite nesting bug)
@@ -243,27 +330,18 @@ def cluster_modules(
     prompt = format_cluster_prompt(potential_core_components, current_module_tree, current_module_name)
     
     # Check prompt size and chunk if needed
-    prompt_tokens = count_tokens(prompt)
+    prompt_tokens = accountant.count_within([prompt], MAX_CLUSTERING_PROMPT_TOKENS)
     
     logger.info(f"[STAGE 2] Prompt size: {prompt_tokens} tokens, {len(leaf_nodes)} leaf nodes, threshold: {MAX_CLUSTERING_PROMPT_TOKENS}")
     
     if prompt_tokens > MAX_CLUSTERING_PROMPT_TOKENS:
-        logger.warning(f"[STAGE 2] Prompt too large ({prompt_tokens} tokens), truncating component list to fit context window")
-        original_line_count = len(potential_core_components.split('\n'))
-        # Truncate potential_core_components to fit
-        lines = potential_core_components.split('\n')
-        truncated = []
-        current_tokens = count_tokens('\n'.join(truncated))
-        for line in lines:
-            line_tokens = count_tokens(line)
-            if current_tokens + line_tokens > MAX_CLUSTERING_PROMPT_TOKENS - 5000:  # Safety margin
-                break
-            truncated.append(line)
-            current_tokens += line_tokens
-        potential_core_components = '\n'.join(truncated)
-        prompt = format_cluster_prompt(potential_core_components, current_module_tree, current_module_name)
-        new_token_count = count_tokens(prompt)
-        logger.info(f"[STAGE 2] Truncated from {original_line_count} to {len(truncated)} lines, {new_token_count} tokens")
+        # Truncating the component list would leave components out of every module:
+        # cluster this level in chunks and merge the partial modules instead
+        logger.warning(f"[STAGE 2] Prompt too large ({prompt_tokens} tokens), clustering in chunks")
+        module_tree = _cluster_in_chunks(leaf_nodes, components, config, current_module_tree, current_module_name, current_module_path)
+        cluster_duration = time.time() - cluster_start
+        logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE in {cluster_duration:.1f}s (map-reduce, prompt too large)")
+        return module_tree
     
     prompt_tokens = count_tokens(prompt)
     logger.info(f"[STAGE 2] Calling LLM for clustering")
@@ -291,23 +369,10 @@ def cluster_modules(
             if "<GROUPED_COMPONENTS>" not in response or "</GROUPED_COMPONENTS>" not in response:
                 logger.error(f"[STAGE 2] CONFIRMED TRUNCATION - missing required tags")
                 logger.error(f"[STAGE 2] This repo has too many components ({len(leaf_nodes)}) for a single clustering call")
-                logger.error(f"[STAGE 2] FALLING BACK TO DIRECTORY-BASED CLUSTERING")
-                module_tree = _create_directory_based_modules(leaf_nodes, components, current_module_name)
-                logger.info(f"[STAGE 2] Directory-based fallback created {len(module_tree)} modules")
-                
-                # Continue with tree merge logic after fallback
-                if current_module_tree == {}:
-                    current_module_tree = module_tree
-                else:
-                    value = current_module_tree
-                    for key in current_module_path:
-                        value = value[key]["children"]
-                    for module_name, module_info in module_tree.items():
-                        del module_info["path"]
-                        value[module_name] = module_info
-                
+                logger.error(f"[STAGE 2] CLUSTERING IN CHUNKS")
+                module_tree = _cluster_in_chunks(leaf_nodes, components, config, current_module_tree, current_module_name, current_module_path)
                 cluster_duration = time.time() - cluster_start
-                logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE in {cluster_duration:.1f}s (directory-based fallback)")
+                logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE in {cluster_duration:.1f}s (map-reduce, response truncated)")
                 return module_tree
                 
     except Exception as e:
@@ -491,34 +556,7 @@ def cluster_modules(
     logger.info(f"[STAGE 2] Module tree validated: {len(module_tree)} modules created")
     logger.info(f"[STAGE 2] Module names: {list(module_tree.keys())}")
     
-    # Recursively cluster sub-modules
-    for module_name, module_info in module_tree.items():
-        sub_leaf_nodes = module_info.get("components", [])
-        logger.info(f"[STAGE 2] Processing sub-modules for '{module_name}' with {len(sub_leaf_nodes)} components")
-        
-        # Filter sub_leaf_nodes to ensure they exist in components
-        valid_sub_leaf_nodes = []
-        invalid_count = 0
-        for node in sub_leaf_nodes:
-            if node in components:
-                valid_sub_leaf_nodes.append(node)
-            else:
-                logger.warning(f"[STAGE 2] Skipping invalid sub leaf node '{node}' in module '{module_name}' - not found in components")
-                invalid_count += 1
-        
-        if invalid_count > 0:
-            logger.warning(f"[STAGE 2] Module '{module_name}': {invalid_count} invalid sub leaf nodes filtered out, {len(valid_sub_leaf_nodes)} valid")
-        
-        current_module_path.append(module_name)
-        try:
-            module_info["children"] = {}
-            module_info["children"] = cluster_modules(valid_sub_leaf_nodes, components, config, current_module_tree, module_name, current_module_path)
-            logger.info(f"[STAGE 2] Sub-modules for '{module_name}': {len(module_info['children'])} children created")
-        except Exception as e:
-            logger.error(f"[STAGE 2] Failed to cluster sub-modules for '{module_name}': {type(e).__name__}: {str(e)}")
-            module_info["children"] = {}
-        finally:
-            current_module_path.pop()
+    _cluster_sub_modules(module_tree, components, config, current_module_tree, current_module_path)
 
     cluster_duration = time.time() - cluster_start
     logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE in {cluster_duration:.1f}s (depth={depth}, path={module_path_str})")
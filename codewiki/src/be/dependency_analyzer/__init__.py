@@ -6,12 +6,14 @@ between Python code components.
 
 from codewiki.src.be.dependency_analyzer.models.core import Node
 from codewiki.src.be.dependency_analyzer.ast_parser import DependencyParser
+from codewiki.src.be.dependency_analyzer.graph_engine import CSRGraph
 from codewiki.src.be.dependency_analyzer.topo_sort import topological_sort, resolve_cycles, build_graph_from_components, dependency_first_dfs, get_leaf_nodes
 from codewiki.src.be.dependency_analyzer.dependency_graphs_builder import DependencyGraphBuilder
 
 __all__ = [
     'Node', 
     'DependencyParser',
+    'CSRGraph',
     'topological_sort',
     'resolve_cycles',
     'build_graph_from_components',
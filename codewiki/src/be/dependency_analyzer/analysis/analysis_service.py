@@ -32,9 +32,33 @@ class AnalysisService:
 
     """
 
-    def __init__(self):
-        """Initialize the analysis service with language-specific analyzers."""
-        self.call_graph_analyzer = CallGraphAnalyzer()
+    def __init__(
+        self,
+        parse_workers: int = 1,
+        parse_cache_dir: Optional[str] = None,
+        store_threshold: int = 0,
+        store_path: Optional[str] = None,
+        shard_min_files: int = 0,
+    ):
+        """
+        Initialize the analysis service with language-specific analyzers.
+
+        Args:
+            parse_workers: Number of parser processes for call graph analysis (0 = one per CPU)
+            parse_cache_dir: Directory for the per-file parse cache (None disables it)
+            store_threshold: Component count above which call graph results go to a
+                disk-backed analysis store (0 keeps them in memory)
+            store_path: Database file for the analysis store (None uses a temporary file)
+            shard_min_files: File count from which call graph analysis runs in shards
+                (0 never shards)
+        """
+        self.call_graph_analyzer = CallGraphAnalyzer(
+            parse_workers=parse_workers,
+            parse_cache_dir=parse_cache_dir,
+            store_threshold=store_threshold,
+            store_path=store_path,
+            shard_min_files=shard_min_files,
+        )
         self._temp_directories = []
 
     def analyze_local_repository(
@@ -0,0 +1,441 @@
+"""
+Disk-backed Stage 1 analysis store for behemoth repositories.
+
+Above `ANALYSIS_STORE_COMPONENT_THRESHOLD` components, holding every component,
+call site and import table in Python objects dominates peak memory. The call
+graph analyzer then streams its results into a SQLite database indexed on
+component id, name and file instead. Symbol resolution, deduplication and the
+components mapping handed to the later stages run as queries against it, with
+only small bounded caches kept in memory.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from codewiki.src.be.dependency_analyzer.analysis.header_index import HeaderIndex, is_header_table
+from codewiki.src.be.dependency_analyzer.analysis.symbol_index import (
+    ImportTable,
+    SymbolIndex,
+    id_suffixes,
+    module_key_for,
+)
+from codewiki.src.be.dependency_analyzer.models.core import Node
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+
+logger = logging.getLogger(__name__)
+
+# Rows per query when paging through a table
+PAGE_SIZE = 2000
+# Page cache per connection, in KiB (SQLite's negative cache_size convention)
+CACHE_KIB = 16 * 1024
+
+_SCHEMA = """
+CREATE TABLE components (
+    id TEXT PRIMARY KEY,
+    component_id TEXT,
+    name TEXT,
+    short_name TEXT,
+    relative_path TEXT,
+    component_type TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX components_component_id ON components(component_id);
+CREATE INDEX components_name ON components(name);
+CREATE INDEX components_short_name ON components(short_name);
+CREATE INDEX components_relative_path ON components(relative_path);
+CREATE TABLE relationships (
+    caller TEXT NOT NULL,
+    callee TEXT NOT NULL,
+    call_line INTEGER,
+    is_resolved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE imports (
+    relative_path TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX imports_module ON imports(module);
+CREATE TABLE headers (
+    relative_path TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE suffixes (
+    suffix TEXT NOT NULL,
+    id TEXT NOT NULL
+);
+CREATE TABLE dependencies (
+    caller TEXT NOT NULL,
+    callee TEXT NOT NULL,
+    UNIQUE (caller, callee)
+);
+"""
+
+
+def _component_row(func_id: str, func: ComponentRecord) -> Tuple:
+    data = func.to_dict()
+    del data["depends_on"]
+    short_name = func.component_id.rsplit(".", 1)[-1] if func.component_id else None
+    return (
+        func_id, func.component_id, func.name, short_name, func.relative_path,
+        func.component_type, json.dumps(data, ensure_ascii=False),
+    )
+
+
+class AnalysisStore:
+    """
+    SQLite tables of components, call relationships and import tables.
+
+    Components and import tables are upserted, so a later write replaces the value
+    but keeps the first insertion position, exactly like the analyzer's dicts.
+    Row order (rowid) is insertion order everywhere, which keeps results identical
+    to the in-memory path.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Database file; an existing file is replaced. None uses a temporary
+                file that is removed on close.
+        """
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="codewiki-analysis-", suffix=".db")
+            os.close(fd)
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        for stale in (path, f"{path}-journal"):
+            if os.path.exists(stale):
+                os.remove(stale)
+        self.path = path
+        self._lock = threading.RLock()
+        # Later stages may read components from worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Scratch data, rebuilt on every run: durability is not worth the fsyncs
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.close()
+            self._conn = None
+            if self._temporary and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    # --- Writes (Stage 1 analysis) ---
+
+    def add_components(self, functions: Iterable[Tuple[str, ComponentRecord]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO components (id, component_id, name, short_name, relative_path, component_type, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET component_id=excluded.component_id, name=excluded.name, "
+                "short_name=excluded.short_name, relative_path=excluded.relative_path, "
+                "component_type=excluded.component_type, data=excluded.data",
+                (_component_row(func_id, func) for func_id, func in functions),
+            )
+
+    def add_relationships(self, relationships: Iterable[CallRecord]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO relationships (caller, callee, call_line, is_resolved) VALUES (?, ?, ?, ?)",
+                ((rel.caller, rel.callee, rel.call_line, int(rel.is_resolved)) for rel in relationships),
+            )
+
+    def add_imports(self, file_imports: Iterable[Tuple[str, ImportTable]]) -> None:
+        """Store import tables; C/C++ header tables go to their own table."""
+        imports_rows, header_rows = [], []
+        for relative_path, imports in file_imports:
+            if is_header_table(imports):
+                header_rows.append((relative_path, json.dumps(imports, ensure_ascii=False)))
+            else:
+                imports_rows.append(
+                    (relative_path, module_key_for(relative_path), json.dumps(imports, ensure_ascii=False))
+                )
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO imports (relative_path, module, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(relative_path) DO UPDATE SET module=excluded.module, data=excluded.data",
+                imports_rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO headers (relative_path, data) VALUES (?, ?) "
+                "ON CONFLICT(relative_path) DO UPDATE SET data=excluded.data",
+                header_rows,
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    # --- Counts ---
+
+    def component_count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM components")[0][0]
+
+    def relationship_count(self, resolved_only: bool = False) -> int:
+        where = " WHERE is_resolved = 1" if resolved_only else ""
+        return self._query(f"SELECT COUNT(*) FROM relationships{where}")[0][0]
+
+    # --- Symbol lookups (used by StoreSymbolIndex) ---
+
+    def component_file(self, func_id: str) -> Optional[str]:
+        rows = self._query("SELECT relative_path FROM components WHERE id = ?", (func_id,))
+        return rows[0][0] if rows else None
+
+    def lookup_id(self, name: str) -> Optional[str]:
+        """Exact component id, else the first component (in definition order) with that component_id."""
+        rows = self._query("SELECT id FROM components WHERE id = ?", (name,))
+        if not rows:
+            rows = self._query(
+                "SELECT id FROM components WHERE component_id = ? ORDER BY rowid LIMIT 1", (name,)
+            )
+        return rows[0][0] if rows else None
+
+    def lookup_suffix(self, suffix: str) -> Optional[str]:
+        """The component a dotted id suffix names, or None if none or several do."""
+        rows = self._query("SELECT DISTINCT id FROM suffixes WHERE suffix = ? LIMIT 2", (suffix,))
+        return rows[0][0] if len(rows) == 1 else None
+
+    def lookup_name(self, name: str) -> Optional[List[str]]:
+        """Components with this name or last component_id segment, in definition order."""
+        if not name:
+            return None
+        rows = self._query(
+            "SELECT id FROM components WHERE name = ? OR short_name = ? ORDER BY rowid", (name, name)
+        )
+        return [row[0] for row in rows] or None
+
+    def file_imports(self, relative_path: str) -> Optional[ImportTable]:
+        rows = self._query("SELECT data FROM imports WHERE relative_path = ?", (relative_path,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def module_imports(self, module: str) -> Optional[ImportTable]:
+        """Import table of a module; with several files mapping to one module, the last written wins."""
+        rows = self._query(
+            "SELECT data FROM imports WHERE module = ? ORDER BY rowid DESC LIMIT 1", (module,)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def header_tables(self) -> Dict[str, ImportTable]:
+        """All C/C++ header tables; they hold names only, so the whole set is loaded."""
+        return {relative_path: json.loads(data) for relative_path, data in self._query(
+            "SELECT relative_path, data FROM headers ORDER BY rowid"
+        )}
+
+    def build_suffixes(self) -> None:
+        """Index the dotted id suffixes of components in files with import tables."""
+        with self._lock:
+            self._conn.execute("DELETE FROM suffixes")
+            self._conn.execute("DROP INDEX IF EXISTS suffixes_suffix")
+            last = 0
+            while True:
+                rows = self._conn.execute(
+                    "SELECT rowid, id FROM components WHERE rowid > ? "
+                    "AND relative_path IN (SELECT relative_path FROM imports) ORDER BY rowid LIMIT ?",
+                    (last, PAGE_SIZE),
+                ).fetchall()
+                if not rows:
+                    break
+                last = rows[-1][0]
+                self._conn.executemany(
+                    "INSERT INTO suffixes (suffix, id) VALUES (?, ?)",
+                    ((suffix, func_id) for _, func_id in rows for suffix in id_suffixes(func_id)),
+                )
+            self._conn.execute("CREATE INDEX suffixes_suffix ON suffixes(suffix)")
+            self._conn.commit()
+
+    # --- Resolution passes ---
+
+    def resolve_relationships(self, resolve: Callable[[str, str], Optional[str]]) -> int:
+        """
+        Point each unresolved callee at the component `resolve(callee, caller)` returns.
+
+        Returns:
+            Number of relationships resolved
+        """
+        resolved = 0
+        last = 0
+        while True:
+            rows = self._query(
+                "SELECT rowid, caller, callee FROM relationships WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last, PAGE_SIZE),
+            )
+            if not rows:
+                break
+            last = rows[-1][0]
+            updates = []
+            for rowid, caller, callee in rows:
+                func_id = resolve(callee, caller)
+                if func_id is not None:
+                    updates.append((func_id, rowid))
+            with self._lock:
+                self._conn.executemany(
+                    "UPDATE relationships SET callee = ?, is_resolved = 1 WHERE rowid = ?", updates
+                )
+            resolved += len(updates)
+        self.commit()
+        return resolved
+
+    def deduplicate_relationships(self) -> None:
+        """Keep the first relationship per (caller, callee) pair."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM relationships WHERE rowid NOT IN "
+                "(SELECT MIN(rowid) FROM relationships GROUP BY caller, callee)"
+            )
+            self._conn.commit()
+
+    def build_dependencies(self) -> None:
+        """Component-to-component edges (`Node.depends_on`) from the resolved relationships."""
+        with self._lock:
+            self._conn.execute("DELETE FROM dependencies")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO dependencies (caller, callee) "
+                "SELECT caller, callee FROM relationships "
+                "WHERE caller IN (SELECT id FROM components) AND callee IN (SELECT id FROM components) "
+                "ORDER BY rowid"
+            )
+            self._conn.commit()
+
+    # --- Component reads (used by StoredComponents) ---
+
+    def iter_component_ids(self) -> Iterator[str]:
+        last = 0
+        while True:
+            rows = self._query(
+                "SELECT rowid, id FROM components WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, PAGE_SIZE)
+            )
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, func_id in rows:
+                yield func_id
+
+    def has_component(self, func_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM components WHERE id = ?", (func_id,)))
+
+    def component_data(self, func_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM components WHERE id = ?", (func_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def dependencies_of(self, func_id: str) -> Set[str]:
+        # Relationship order, so the set matches one built in memory
+        rows = self._query("SELECT callee FROM dependencies WHERE caller = ? ORDER BY rowid", (func_id,))
+        return {row[0] for row in rows}
+
+    def component_types(self) -> Set[str]:
+        return {row[0] for row in self._query("SELECT DISTINCT component_type FROM components")}
+
+
+class _LookupTable:
+    """Read-only, dict-like `.get()` over a store query, with a bounded LRU in front."""
+
+    def __init__(self, query: Callable[[str], Any], max_entries: int):
+        self._query = query
+        self._max_entries = max_entries
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self._cache[key]
+            self._cache.move_to_end(key)
+        except KeyError:
+            value = self._query(key)
+            self._cache[key] = value
+            if len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class StoreSymbolIndex(SymbolIndex):
+    """`SymbolIndex` whose symbol tables are queries against an `AnalysisStore`."""
+
+    def __init__(self, store: AnalysisStore, cache_entries: int = 65536):
+        self.store = store
+        self.functions = {}
+        self.file_imports = _LookupTable(store.file_imports, cache_entries)
+        self.by_id = _LookupTable(store.lookup_id, cache_entries)
+        self.by_suffix = _LookupTable(store.lookup_suffix, cache_entries)
+        self.by_name = _LookupTable(store.lookup_name, cache_entries)
+        self.module_imports = _LookupTable(store.module_imports, cache_entries)
+        self._component_files = _LookupTable(store.component_file, cache_entries)
+        self._scopes = {}
+        self._max_scopes = cache_entries
+        self.headers = HeaderIndex(store.header_tables(), self.by_name.get, self._component_file)
+        store.build_suffixes()
+
+    def _component_file(self, func_id: str) -> Optional[str]:
+        return self._component_files.get(func_id)
+
+    def _caller_scope(self, caller: str):
+        # Relationships are grouped by caller, so a per-caller cache stays hot when cleared
+        if len(self._scopes) > self._max_scopes:
+            self._scopes.clear()
+        return super()._caller_scope(caller)
+
+
+class StoredComponents(Mapping):
+    """
+    Read-only `Dict[str, Node]` view of the components in an `AnalysisStore`.
+
+    Nodes are built on access, with `depends_on` filled from the resolved
+    dependencies, and kept in a bounded LRU; iteration pages through the store.
+    Mutating a returned node does not write back to the store.
+    """
+
+    def __init__(
+        self,
+        store: AnalysisStore,
+        node_factory: Callable[[Dict[str, Any], Set[str]], Node],
+        cache_entries: int = 4096,
+    ):
+        self.store = store
+        self._node_factory = node_factory
+        self._cache: "OrderedDict[str, Node]" = OrderedDict()
+        self._cache_entries = cache_entries
+        self._len = store.component_count()
+
+    def __getitem__(self, func_id: str) -> Node:
+        node = self._cache.get(func_id)
+        if node is not None:
+            self._cache.move_to_end(func_id)
+            return node
+        data = self.store.component_data(func_id)
+        if data is None:
+            raise KeyError(func_id)
+        node = self._node_factory(data, self.store.dependencies_of(func_id))
+        self._cache[func_id] = node
+        if len(self._cache) > self._cache_entries:
+            self._cache.popitem(last=False)
+        return node
+
+    def __contains__(self, func_id: object) -> bool:
+        return isinstance(func_id, str) and (func_id in self._cache or self.store.has_component(func_id))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.store.iter_component_ids()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def component_types(self) -> Set[str]:
+        return self.store.component_types()
@@ -6,21 +6,239 @@ Coordinates language-specific analyzers to build comprehensive call graphs
 across different programming languages in a repository.
 """
 
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import asdict
 from pathlib import Path
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.analysis.analysis_store import AnalysisStore, StoreSymbolIndex
+from codewiki.src.be.dependency_analyzer.analysis.file_budget import (
+    FileBudget,
+    OuterDeadline,
+    ParseTimeout,
+    SkippedFile,
+    SKIP_TIMEOUT,
+    check_file,
+    deadline_supported,
+    parse_deadline,
+)
+from codewiki.src.be.dependency_analyzer.analysis.parse_cache import (
+    ParseCache,
+    ParseCacheStats,
+    relocatable_path,
+    relocate_results,
+)
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import (
+    FileTiming,
+    build_profile_report,
+    take_parse_seconds,
+)
+from codewiki.src.be.dependency_analyzer.analysis.shards import (
+    Shard,
+    ShardResult,
+    git_blob_ids,
+    plan_shards,
+    shard_cache_key,
+    shard_entry,
+    shard_result_from_entry,
+)
+from codewiki.src.be.dependency_analyzer.analysis.token_annotations import annotate_tokens
+from codewiki.src.be.dependency_analyzer.analysis.symbol_index import ImportTable, SymbolIndex, SymbolTables
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
 from codewiki.src.be.dependency_analyzer.utils.patterns import CODE_EXTENSIONS
-from codewiki.src.be.dependency_analyzer.utils.security import safe_open_text
+from codewiki.src.be.dependency_analyzer.utils.security import safe_open_bytes
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
+from codewiki.src.be.dependency_analyzer.utils.source_store import locate_source
 
 logger = logging.getLogger(__name__)
 
+# Once results spill to the analysis store, buffered records are flushed at these sizes
+STORE_FLUSH_COMPONENTS = 5000
+STORE_FLUSH_RELATIONSHIPS = 50000
+# Batches submitted ahead of the merge, per parser process; bounds the results held in the parent
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+
+def _ordered_results(executor: Executor, fn: Callable, arg_tuples: Iterable[Tuple], window: int) -> Iterator[Any]:
+    """
+    Yield `fn(*args)` for each of `arg_tuples`, in order, from `executor`.
+
+    Unlike `Executor.map`, at most `window` tasks are submitted and not yet
+    consumed at any time, so finished results wait in the parent only until the
+    caller takes them.
+    """
+    pending = deque()
+    for args in arg_tuples:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _analyze_file_batch(
+    base_dir: str,
+    file_batch: List[Dict],
+    parse_cache_dir: Optional[str] = None,
+    file_budget: Optional[FileBudget] = None,
+) -> Tuple[
+    List[Tuple[List[Tuple[str, ComponentRecord]], List[CallRecord], Dict[str, ImportTable]]],
+    Optional[ParseCacheStats],
+    List[SkippedFile],
+    List[FileTiming],
+]:
+    """
+    Process pool entry point: analyze a batch of files in a worker process.
+
+    Returns one (functions, relationships, import tables) triple per file, in batch
+    order, so the parent can merge results exactly as the sequential path would have
+    produced them, plus the worker's parse cache statistics, skipped files and
+    file timings.
+    """
+    analyzer = CallGraphAnalyzer(parse_workers=1, parse_cache_dir=parse_cache_dir, file_budget=file_budget)
+    results = []
+    for file_info in file_batch:
+        analyzer.functions = {}
+        analyzer.call_relationships = []
+        analyzer.file_imports = {}
+        analyzer._analyze_code_file(base_dir, file_info)
+        results.append((list(analyzer.functions.items()), analyzer.call_relationships, analyzer.file_imports))
+    return (
+        results,
+        analyzer.parse_cache.stats if analyzer.parse_cache else None,
+        analyzer.skipped_files,
+        analyzer.file_timings,
+    )
+
+
+def _analyze_shard(
+    base_dir: str,
+    shard: Shard,
+    blob_ids: Dict[str, str],
+    parse_cache_dir: Optional[str] = None,
+    file_budget: Optional[FileBudget] = None,
+) -> ShardResult:
+    """
+    Process pool entry point: analyze one shard into a partial graph.
+
+    Serves the whole shard from the parse cache when none of its files changed.
+    Otherwise analyzes its files like `_analyze_file_batch`, indexes the shard's
+    components for the merge step and caches the result, unless a file failed or
+    timed out (those are retried on the next run).
+    """
+    analyzer = CallGraphAnalyzer(parse_workers=1, parse_cache_dir=parse_cache_dir, file_budget=file_budget)
+    cache = analyzer.parse_cache
+    key = shard_cache_key(base_dir, shard, blob_ids, analyzer.file_budget) if cache else None
+    if key is not None:
+        entry = cache.read_entry(key)
+        if entry is not None:
+            try:
+                result = shard_result_from_entry(entry, base_dir, shard)
+            except Exception as e:
+                logger.debug(f"Discarding incompatible shard cache entry {key}: {e}")
+                cache.stats.errors += 1
+            else:
+                cache.stats.shard_hits += 1
+                result.cache_stats = cache.stats
+                return result
+        cache.stats.shard_misses += 1
+
+    file_results = []
+    functions: Dict[str, ComponentRecord] = {}
+    file_imports: Dict[str, ImportTable] = {}
+    for file_info in shard.files:
+        analyzer.functions = {}
+        analyzer.call_relationships = []
+        analyzer.file_imports = {}
+        analyzer._analyze_code_file(base_dir, file_info)
+        file_results.append((list(analyzer.functions.items()), analyzer.call_relationships, analyzer.file_imports))
+        functions.update(analyzer.functions)
+        file_imports.update(analyzer.file_imports)
+
+    result = ShardResult(
+        name=shard.name,
+        file_results=file_results,
+        tables=SymbolIndex(functions, file_imports).export_tables(),
+        skipped_files=analyzer.skipped_files,
+        file_timings=analyzer.file_timings,
+        cache_stats=cache.stats if cache else None,
+    )
+    timed_out = any(skipped.reason == SKIP_TIMEOUT for skipped in analyzer.skipped_files)
+    if key is not None and not analyzer.analysis_errors and not timed_out:
+        cache.write_entry(key, shard_entry(shard, result))
+    return result
+
+
+def _offload_source_code(content: bytes, functions: List[ComponentRecord]) -> None:
+    """
+    Replace each node's source_code with its byte range in the file where the range
+    reproduces the text exactly, so components do not carry source strings around.
+    """
+    if b"\r" in content:
+        return
+    line_starts = SourceBytes(content).line_starts
+    for func in functions:
+        span = locate_source(content, func.source_code, func.start_line, line_starts)
+        if span is not None:
+            func.start_byte, func.end_byte = span
+            func.source_code = None
+
 
 class CallGraphAnalyzer:
-    def __init__(self):
-        """Initialize the call graph analyzer."""
-        self.functions: Dict[str, Node] = {}
-        self.call_relationships: List[CallRelationship] = []
+    def __init__(
+        self,
+        parse_workers: int = 1,
+        parse_cache_dir: Optional[str] = None,
+        file_budget: Optional[FileBudget] = None,
+        store_threshold: int = 0,
+        store_path: Optional[str] = None,
+        shard_min_files: int = 0,
+    ):
+        """
+        Initialize the call graph analyzer.
+
+        Args:
+            parse_workers: Number of parser processes (0 = one per CPU, 1 = sequential)
+            parse_cache_dir: Directory for the per-file parse cache (None disables it)
+            file_budget: Per-file size, line and time limits (None uses the config defaults)
+            store_threshold: Above this many components, stream results into an
+                `AnalysisStore` instead of memory (0 never does)
+            store_path: Database file for the analysis store (None uses a temporary file)
+            shard_min_files: From this many files, analyze the repository in shards
+                (see `analysis.shards`; 0 never does)
+        """
+        self.functions: Dict[str, ComponentRecord] = {}
+        self.call_relationships: List[CallRecord] = []
+        # Relative file path -> import table, for languages whose analyzers capture imports
+        self.file_imports: Dict[str, ImportTable] = {}
+        self.file_budget = file_budget if file_budget is not None else FileBudget.from_config()
+        # Files skipped or parsed structure-only because of the budget, for the Stage 1 report
+        self.skipped_files: List[SkippedFile] = []
+        # Per-file phase timings and the resolution time, for the Stage 1 profile
+        self.file_timings: List[FileTiming] = []
+        self.resolve_seconds = 0.0
+        # Files whose analysis raised, so results that include them are not cached as a whole
+        self.analysis_errors = 0
+        self.shard_min_files = shard_min_files
+        # Symbol tables exported by the shards of a sharded run, merged at resolution
+        self.shard_tables: Optional[List[SymbolTables]] = None
+        self.store_threshold = store_threshold
+        self.store_path = store_path
+        # Set once the component count passes store_threshold; the in-memory containers
+        # then only buffer records until the next flush
+        self.store: Optional[AnalysisStore] = None
+        self.parse_workers = parse_workers
+        self.parse_cache_dir = parse_cache_dir
+        self.parse_cache: Optional[ParseCache] = None
+        if parse_cache_dir:
+            try:
+                self.parse_cache = ParseCache(parse_cache_dir)
+            except OSError as e:
+                logger.warning(f"Parse cache disabled, cannot use {parse_cache_dir}: {e}")
         logger.debug("CallGraphAnalyzer initialized.")
 
     def analyze_code_files(self, code_files: List[Dict], base_dir: str) -> Dict:
@@ -37,20 +255,68 @@ class CallGraphAnalyzer:
 
         self.functions = {}
         self.call_relationships = []
+        self.file_imports = {}
+        self.skipped_files = []
+        self.file_timings = []
+        self.resolve_seconds = 0.0
+        self.analysis_errors = 0
+        self.shard_tables = None
+        self.store = None
+        if self.parse_cache:
+            self.parse_cache.stats = ParseCacheStats()
+
+        parse_start = time.time()
+        workers = self._resolve_parse_workers(len(code_files))
+        pooled = workers > 1 or self._deadline_needs_pool()
+        shards = self._plan_shards(code_files, base_dir)
+        if shards:
+            workers = min(workers, len(shards))
+            files_analyzed = self._analyze_code_files_sharded(shards, base_dir, workers, pooled)
+        elif pooled:
+            files_analyzed = self._analyze_code_files_parallel(code_files, base_dir, workers)
+        else:
+            files_analyzed = 0
+            for file_info in code_files:
+                logger.debug(f"Analyzing: {file_info['path']}")
+                self._analyze_code_file(base_dir, file_info)
+                files_analyzed += 1
+        parse_duration = time.time() - parse_start
+        files_per_sec = files_analyzed / parse_duration if parse_duration > 0 else float(files_analyzed)
+        logger.info(
+            f"[STAGE 1] Parsed {files_analyzed} files in {parse_duration:.1f}s "
+            f"({files_per_sec:.1f} files/sec, {workers} worker{'s' if workers != 1 else ''})"
+        )
+        if self.parse_cache:
+            cache_stats = self.parse_cache.stats
+            logger.info(
+                f"[STAGE 1] Parse cache: {cache_stats.hits} hits, {cache_stats.misses} misses "
+                f"({cache_stats.hit_rate:.0%} hit rate, {cache_stats.writes} written)"
+            )
+            if shards:
+                logger.info(
+                    f"[STAGE 1] Shard cache: {cache_stats.shard_hits} of {len(shards)} shards unchanged"
+                )
+        if self.skipped_files:
+            reasons = Counter(skipped.reason for skipped in self.skipped_files)
+            logger.info(
+                f"[STAGE 1] Parse budget: {len(self.skipped_files)} files skipped or parsed structure-only "
+                f"({', '.join(f'{count} {reason}' for reason, count in reasons.most_common())})"
+            )
+            for skipped in self.skipped_files:
+                logger.debug(f"[STAGE 1] {skipped.reason}: {skipped.path} ({skipped.detail})")
+
+        if self.store is not None:
+            return self._finish_store_analysis(code_files, files_analyzed, parse_duration)
 
-        files_analyzed = 0
-        for file_info in code_files:
-            logger.debug(f"Analyzing: {file_info['path']}")
-            self._analyze_code_file(base_dir, file_info)
-            files_analyzed += 1
         logger.debug(
             f"Analysis complete: {files_analyzed} files analyzed, {len(self.functions)} functions, {len(self.call_relationships)} relationships"
         )
 
         logger.debug("Resolving call relationships")
-        self._resolve_call_relationships()
+        self._timed_resolve()
         self._deduplicate_relationships()
         viz_data = self._generate_visualization_data()
+        profile = self._build_profile(parse_duration)
 
         return {
             "call_graph": {
@@ -59,12 +325,284 @@ class CallGraphAnalyzer:
                 "languages_found": list(set(f.get("language") for f in code_files)),
                 "files_analyzed": files_analyzed,
                 "analysis_approach": "complete_unlimited",
+                "parse_cache": asdict(self.parse_cache.stats) if self.parse_cache else None,
+                "skipped_files": [asdict(skipped) for skipped in self.skipped_files],
+                "profile": profile,
             },
-            "functions": [func.model_dump() for func in self.functions.values()],
-            "relationships": [rel.model_dump() for rel in self.call_relationships],
+            "functions": [func.to_dict() for func in self.functions.values()],
+            "relationships": [rel.to_dict() for rel in self.call_relationships],
             "visualization": viz_data,
         }
 
+    def _finish_store_analysis(self, code_files: List[Dict], files_analyzed: int, parse_duration: float) -> Dict:
+        """
+        Resolve and deduplicate relationships inside the analysis store.
+
+        Returns the same shape as `analyze_code_files`, except that functions and
+        relationships stay in the store (returned under "analysis_store") and the
+        visualization carries only its summary.
+        """
+        self._flush_to_store()
+        store = self.store
+        total_functions = store.component_count()
+        logger.debug(
+            f"Analysis complete: {files_analyzed} files analyzed, {total_functions} functions, "
+            f"{store.relationship_count()} relationships (in {store.path})"
+        )
+
+        logger.debug("Resolving call relationships")
+        self._timed_resolve()
+        self._deduplicate_relationships()
+        profile = self._build_profile(parse_duration)
+        total_calls = store.relationship_count()
+        resolved_calls = store.relationship_count(resolved_only=True)
+
+        return {
+            "call_graph": {
+                "total_functions": total_functions,
+                "total_calls": total_calls,
+                "languages_found": list(set(f.get("language") for f in code_files)),
+                "files_analyzed": files_analyzed,
+                "analysis_approach": "complete_unlimited",
+                "parse_cache": asdict(self.parse_cache.stats) if self.parse_cache else None,
+                "skipped_files": [asdict(skipped) for skipped in self.skipped_files],
+                "profile": profile,
+            },
+            "functions": [],
+            "relationships": [],
+            "analysis_store": store,
+            "visualization": {
+                "cytoscape": {"elements": []},
+                "summary": {
+                    "total_nodes": total_functions,
+                    "total_edges": resolved_calls,
+                    "unresolved_calls": total_calls - resolved_calls,
+                },
+            },
+        }
+
+    def _timed_resolve(self):
+        start = time.perf_counter()
+        self._resolve_call_relationships()
+        self.resolve_seconds = time.perf_counter() - start
+
+    def _build_profile(self, parse_duration: float) -> Dict:
+        """Stage 1 profile report, with a one-line summary per language in the log."""
+        profile = build_profile_report(self.file_timings, self.resolve_seconds, parse_duration)
+        for language, stats in profile["languages"].items():
+            file_times = stats["total"]
+            logger.info(
+                f"[STAGE 1] Profile {language}: {stats['files']} files ({stats['cache_hits']} cached), "
+                f"p50 {file_times['p50'] * 1000:.1f}ms, p95 {file_times['p95'] * 1000:.1f}ms, "
+                f"max {file_times['max']:.2f}s, parse {stats['parse']['total']:.1f}s, "
+                f"extract {stats['extract']['total']:.1f}s"
+            )
+        logger.info(f"[STAGE 1] Resolved call relationships in {self.resolve_seconds:.1f}s")
+        return profile
+
+    def _maybe_spill_to_store(self):
+        """Move results into the analysis store once the repository turns out to be behemoth-sized."""
+        if self.store is None:
+            if not self.store_threshold or len(self.functions) <= self.store_threshold:
+                return
+            self.store = AnalysisStore(self.store_path)
+            logger.info(
+                f"[STAGE 1] Over {self.store_threshold} components, streaming analysis results to {self.store.path}"
+            )
+        elif (len(self.functions) < STORE_FLUSH_COMPONENTS
+              and len(self.call_relationships) < STORE_FLUSH_RELATIONSHIPS):
+            return
+        self._flush_to_store()
+
+    def _flush_to_store(self):
+        """Write the buffered functions, relationships and import tables to the store."""
+        self.store.add_components(self.functions.items())
+        self.store.add_relationships(self.call_relationships)
+        self.store.add_imports(self.file_imports.items())
+        self.store.commit()
+        self.functions = {}
+        self.call_relationships = []
+        self.file_imports = {}
+
+    def _resolve_parse_workers(self, file_count: int) -> int:
+        """Pick the number of parser processes for this run."""
+        from codewiki.src.config import MIN_FILES_FOR_PARALLEL_PARSE
+
+        workers = self.parse_workers if self.parse_workers and self.parse_workers > 0 else (os.cpu_count() or 1)
+        if file_count < MIN_FILES_FOR_PARALLEL_PARSE:
+            return 1
+        return max(1, min(workers, file_count))
+
+    def _deadline_needs_pool(self) -> bool:
+        """
+        Whether files must be parsed in worker processes for the per-file time limit
+        to apply: its timer signal only reaches the main thread, and Stage 1 runs in
+        a background thread in the web worker.
+        """
+        if not self.file_budget.max_seconds or deadline_supported():
+            return False
+        logger.info(
+            f"[STAGE 1] Parsing in worker processes so the {self.file_budget.max_seconds:g}s "
+            f"per-file time limit applies off the main thread"
+        )
+        return True
+
+    def _warn_deadline_unenforced(self):
+        """Log that a sequential fallback off the main thread runs without the time limit."""
+        if self.file_budget.max_seconds and not deadline_supported():
+            logger.warning(
+                f"[STAGE 1] Per-file time limit of {self.file_budget.max_seconds:g}s is disabled: "
+                f"parsing in this thread, which cannot receive its timer signal"
+            )
+
+    @staticmethod
+    def _get_pool_context():
+        """
+        Multiprocessing context for the parser pool.
+
+        Forking directly is unsafe when the parent holds threads (web background worker,
+        asyncio loop), and spawn re-imports the whole package in every worker. A fork server
+        imports this module once and forks clean workers from it; platforms without it
+        use spawn.
+        """
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload([__name__])
+            return ctx
+        return multiprocessing.get_context("spawn")
+
+    def _analyze_code_files_parallel(self, code_files: List[Dict], base_dir: str, workers: int) -> int:
+        """
+        Analyze files across a process pool.
+
+        Files are split into contiguous batches and results are merged in the original
+        file order as they arrive, so functions and relationships come out identical to
+        a sequential run before `_resolve_call_relationships` sees them. Only a few
+        batches per worker are in flight, so a run that spills to the analysis store
+        never holds every worker's records at once. Falls back to sequential analysis
+        if the pool cannot be used.
+
+        Returns:
+            Number of files analyzed
+        """
+        # Several batches per worker keeps the pool busy when file sizes are uneven
+        batch_size = max(1, min(64, len(code_files) // (workers * 8) or 1))
+        batches = [code_files[i:i + batch_size] for i in range(0, len(code_files), batch_size)]
+        logger.debug(f"Parsing {len(code_files)} files in {len(batches)} batches across {workers} processes")
+        cache_dir = self.parse_cache_dir if self.parse_cache else None
+
+        try:
+            ctx = self._get_pool_context()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+                for batch_result in _ordered_results(
+                    executor, _analyze_file_batch,
+                    ((base_dir, batch, cache_dir, self.file_budget) for batch in batches),
+                    workers * BATCHES_IN_FLIGHT_PER_WORKER,
+                ):
+                    self._merge_batch_result(*batch_result)
+        except Exception as e:
+            logger.warning(f"[STAGE 1] Parallel parsing failed ({type(e).__name__}: {e}), falling back to sequential")
+            self.functions = {}
+            self.call_relationships = []
+            self.file_imports = {}
+            self.skipped_files = []
+            self.file_timings = []
+            self.analysis_errors = 0
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+            if self.parse_cache:
+                self.parse_cache.stats = ParseCacheStats()
+            self._warn_deadline_unenforced()
+            for file_info in code_files:
+                self._analyze_code_file(base_dir, file_info)
+        return len(code_files)
+
+    def _merge_batch_result(
+        self,
+        file_results: List[Tuple[List[Tuple[str, ComponentRecord]], List[CallRecord], Dict[str, ImportTable]]],
+        cache_stats: Optional[ParseCacheStats],
+        skipped_files: List[SkippedFile],
+        file_timings: List[FileTiming],
+    ):
+        """Merge one worker's per-file results, spilling to the analysis store as they grow."""
+        for functions, relationships, file_imports in file_results:
+            for func_id, func in functions:
+                self.functions[func_id] = func
+            self.call_relationships.extend(relationships)
+            self.file_imports.update(file_imports)
+            self._maybe_spill_to_store()
+        if cache_stats and self.parse_cache:
+            self.parse_cache.stats.merge(cache_stats)
+        self.skipped_files.extend(skipped_files)
+        self.file_timings.extend(file_timings)
+
+    def _plan_shards(self, code_files: List[Dict], base_dir: str) -> List[Shard]:
+        """Shards for this run, or an empty list when the repository is analyzed whole."""
+        from codewiki.src.config import SHARD_MAX_FILES
+
+        if not self.shard_min_files or len(code_files) < self.shard_min_files:
+            return []
+        shards = plan_shards(code_files, base_dir, SHARD_MAX_FILES)
+        if len(shards) < 2:
+            return []
+        largest = max(shards, key=lambda shard: len(shard.files))
+        logger.info(
+            f"[STAGE 1] Sharded analysis: {len(shards)} shards, largest {largest.name or '.'} "
+            f"({len(largest.files)} files)"
+        )
+        return shards
+
+    def _analyze_code_files_sharded(self, shards: List[Shard], base_dir: str, workers: int, pooled: bool) -> int:
+        """
+        Analyze shards across a process pool and merge their partial graphs.
+
+        The largest shards are submitted first so a long one does not start last.
+        Results are merged in shard order, which is file order, as soon as every
+        earlier shard is in, and the shards' symbol tables are kept for
+        `_resolve_call_relationships`. Without `pooled`, or if the pool cannot be
+        used, the shards not merged yet are analyzed in this process.
+
+        Returns:
+            Number of files analyzed
+        """
+        blob_ids = git_blob_ids(base_dir) if self.parse_cache else {}
+        cache_dir = self.parse_cache_dir if self.parse_cache else None
+        order = sorted(range(len(shards)), key=lambda i: len(shards[i].files), reverse=True)
+        self.shard_tables = []
+        merged = 0
+
+        if pooled:
+            try:
+                ctx = self._get_pool_context()
+                with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+                    futures = {
+                        executor.submit(
+                            _analyze_shard, base_dir, shards[i],
+                            {f["path"]: blob_ids[f["path"]] for f in shards[i].files if f["path"] in blob_ids},
+                            cache_dir, self.file_budget,
+                        ): i
+                        for i in order
+                    }
+                    # Shards finished ahead of an earlier one wait here until it is merged
+                    ready: Dict[int, ShardResult] = {}
+                    for future in as_completed(futures):
+                        ready[futures.pop(future)] = future.result()
+                        while merged in ready:
+                            self._merge_shard_result(ready.pop(merged))
+                            merged += 1
+            except Exception as e:
+                logger.warning(f"[STAGE 1] Parallel shard analysis failed ({type(e).__name__}: {e}), falling back to sequential")
+                self._warn_deadline_unenforced()
+        for shard in shards[merged:]:
+            self._merge_shard_result(_analyze_shard(base_dir, shard, blob_ids, cache_dir, self.file_budget))
+        return sum(len(shard.files) for shard in shards)
+
+    def _merge_shard_result(self, result: ShardResult):
+        """Merge one shard's partial graph, spilling to the analysis store as it grows."""
+        self._merge_batch_result(result.file_results, result.cache_stats, result.skipped_files, result.file_timings)
+        self.shard_tables.append(result.tables)
+
     def extract_code_files(self, file_tree: Dict) -> List[Dict]:
         """
         Extract code files from file tree structure.
@@ -119,7 +657,11 @@ class CallGraphAnalyzer:
         """
         Analyze a single code file based on its language.
 
-        Routes to appropriate language-specific analyzer.
+        Files over the parse budget are skipped and reported. Otherwise the result is
+        served from the parse cache when the same content was analyzed before, or the
+        file is routed to the appropriate language-specific analyzer and its output
+        cached. The file's read, parse and extraction times are recorded for the
+        Stage 1 profile.
 
         Args:
             repo_dir: Repository directory path
@@ -128,33 +670,128 @@ class CallGraphAnalyzer:
 
         base = Path(repo_dir)
         file_path = base / file_info["path"]
+        start = time.perf_counter()
+        timing = None
 
         try:
-            content = safe_open_text(base, file_path)
             language = file_info["language"]
-            if language == "python":
-                self._analyze_python_file(file_path, content, repo_dir)
-            elif language == "javascript":
-                self._analyze_javascript_file(file_path, content, repo_dir)
-            elif language == "typescript":
-                self._analyze_typescript_file(file_path, content, repo_dir)
-            elif language == "java":
-                self._analyze_java_file(file_path, content, repo_dir)
-            elif language == "csharp":
-                self._analyze_csharp_file(file_path, content, repo_dir)
-            elif language == "c":
-                self._analyze_c_file(file_path, content, repo_dir)
-            elif language == "cpp":
-                self._analyze_cpp_file(file_path, content, repo_dir)
-            elif language == "go":
-                self._analyze_go_file(file_path, content, repo_dir)
-            # else:
-            #     logger.warning(
-            #         f"Unsupported language for call graph analysis: {language} for file {file_path}"
-            #     )
+            content = safe_open_bytes(base, file_path)
 
+            skipped, parse = check_file(file_info["path"], content, self.file_budget)
+            if skipped is not None:
+                self.skipped_files.append(skipped)
+                if not parse:
+                    return
+            timing = FileTiming(file_info["path"], language, read=time.perf_counter() - start)
+
+            cache_key = None
+            analyzed_path = file_path
+            if self.parse_cache:
+                relative_path, table = relocatable_path(language, file_info["path"], content)
+                cache_key = ParseCache.make_key(language, relative_path, content)
+                cached = self.parse_cache.get(cache_key, str(file_path), table)
+                if cached is not None:
+                    timing.cached = True
+                    self._add_file_results(file_info["path"], file_path, *cached)
+                    return
+                # Analyze with placeholder directories so the entry is reusable elsewhere
+                analyzed_path = base / relative_path
+
+            take_parse_seconds()
+            analyze_start = time.perf_counter()
+            try:
+                with parse_deadline(self.file_budget.max_seconds):
+                    result = self._parse_code_file(analyzed_path, content, language, repo_dir)
+            except ParseTimeout:
+                self.skipped_files.append(SkippedFile(
+                    file_info["path"], SKIP_TIMEOUT, f"parsing took over {self.file_budget.max_seconds:g}s"
+                ))
+                return
+            finally:
+                timing.parse = take_parse_seconds()
+                timing.extract = max(0.0, time.perf_counter() - analyze_start - timing.parse)
+            if result is None:
+                return
+            functions, relationships, imports = result
+            if skipped is not None and skipped.structure_only:
+                relationships = []
+            _offload_source_code(content, functions)
+            annotate_tokens(content, functions)
+
+            if cache_key is not None:
+                self.parse_cache.put(cache_key, functions, relationships, imports)
+                functions, relationships, imports = relocate_results(
+                    functions, relationships, imports, str(file_path), table
+                )
+            self._add_file_results(file_info["path"], file_path, functions, relationships, imports)
+
+        except OuterDeadline as e:
+            # An enclosing timeout, not a problem with this file
+            raise e.error
         except Exception as e:
+            self.analysis_errors += 1
             logger.error(f"⚠️ Error analyzing {file_path}: {str(e)}")
+        finally:
+            if timing is not None:
+                timing.total = time.perf_counter() - start
+                self.file_timings.append(timing)
+
+    def _parse_code_file(
+        self, file_path: Path, content: bytes, language: str, repo_dir: str
+    ) -> Optional[Tuple[List[ComponentRecord], List[CallRecord], Optional[ImportTable]]]:
+        """
+        Route a file to its language-specific analyzer.
+
+        Returns:
+            (functions, relationships, import table or None if the analyzer does not
+            capture imports; C/C++ analyzers return their header table there), or None
+            if the language is unsupported or analysis failed (failures are not cached)
+        """
+        if language == "python":
+            # Match text-mode reads: replace undecodable bytes, translate newlines
+            text = content.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+            return self._analyze_python_file(file_path, text, repo_dir)
+        elif language == "javascript":
+            result = self._analyze_javascript_file(file_path, content, repo_dir)
+        elif language == "typescript":
+            result = self._analyze_typescript_file(file_path, content, repo_dir)
+        elif language == "java":
+            result = self._analyze_java_file(file_path, content, repo_dir)
+        elif language == "csharp":
+            result = self._analyze_csharp_file(file_path, content, repo_dir)
+        elif language == "c":
+            return self._analyze_c_file(file_path, content, repo_dir)
+        elif language == "cpp":
+            return self._analyze_cpp_file(file_path, content, repo_dir)
+        elif language == "go":
+            result = self._analyze_go_file(file_path, content, repo_dir)
+        else:
+            # logger.warning(
+            #     f"Unsupported language for call graph analysis: {language} for file {file_path}"
+            # )
+            return None
+        if result is None:
+            return None
+        functions, relationships = result
+        return functions, relationships, None
+
+    def _add_file_results(
+        self,
+        relative_path: str,
+        file_path: Path,
+        functions: List[ComponentRecord],
+        relationships: List[CallRecord],
+        imports: Optional[ImportTable] = None,
+    ):
+        """Merge one file's analyzer output into the call graph."""
+        for func in functions:
+            func_id = func.id if func.id else f"{file_path}:{func.name}"
+            self.functions[func_id] = func
+
+        self.call_relationships.extend(relationships)
+        if imports is not None:
+            self.file_imports[os.path.normpath(relative_path)] = imports
+        self._maybe_spill_to_store()
 
     def _analyze_python_file(self, file_path: str, content: str, base_dir: str):
         """
@@ -168,210 +805,150 @@ class CallGraphAnalyzer:
         from codewiki.src.be.dependency_analyzer.analyzers.python import analyze_python_file
 
         try:
-            functions, relationships = analyze_python_file(
-                file_path, content, repo_path=base_dir
-            )
-
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_python_file(file_path, content, repo_path=base_dir)
         except Exception as e:
             logger.error(f"Failed to analyze Python file {file_path}: {e}", exc_info=True)
+            return None
 
-    def _analyze_javascript_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_javascript_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze JavaScript file using tree-sitter based AST analyzer
 
         Args:
             file_path: Relative path to the JavaScript file
-            content: File content string
+            content: File content bytes
             repo_dir: Repository base directory
         """
         try:
 
             from codewiki.src.be.dependency_analyzer.analyzers.javascript import analyze_javascript_file_treesitter
 
-            functions, relationships = analyze_javascript_file_treesitter(
-                file_path, content, repo_path=repo_dir
-            )
-
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_javascript_file_treesitter(file_path, content, repo_path=repo_dir)
 
         except Exception as e:
             logger.error(f"Failed to analyze JavaScript file {file_path}: {e}", exc_info=True)
+            return None
 
-    def _analyze_typescript_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_typescript_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze TypeScript file using tree-sitter based AST analyzer 
 
         Args:
             file_path: Relative path to the TypeScript file
-            content: File content string
+            content: File content bytes
         """
         try:
 
             from codewiki.src.be.dependency_analyzer.analyzers.typescript import analyze_typescript_file_treesitter
 
-            functions, relationships = analyze_typescript_file_treesitter(
-                file_path, content, repo_path=repo_dir
-            )
-
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_typescript_file_treesitter(file_path, content, repo_path=repo_dir)
 
         except Exception as e:
             logger.error(f"Failed to analyze TypeScript file {file_path}: {e}", exc_info=True)
+            return None
 
 
 
-    def _analyze_c_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_c_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze C file using tree-sitter based analyzer.
 
         Args:
             file_path: Relative path to the C file
-            content: File content string
+            content: File content bytes
             repo_dir: Repository base directory
         """
         from codewiki.src.be.dependency_analyzer.analyzers.c import analyze_c_file
 
-        functions, relationships = analyze_c_file(file_path, content, repo_path=repo_dir)
-
-        for func in functions:
-            func_id = func.id if func.id else f"{file_path}:{func.name}"
-            self.functions[func_id] = func
-
-        self.call_relationships.extend(relationships)
+        return analyze_c_file(file_path, content, repo_path=repo_dir)
 
-    def _analyze_cpp_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_cpp_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze C++ file using tree-sitter based analyzer.
 
         Args:
             file_path: Relative path to the C++ file
-            content: File content string
+            content: File content bytes
         """
         from codewiki.src.be.dependency_analyzer.analyzers.cpp import analyze_cpp_file
 
-        functions, relationships = analyze_cpp_file(
-            file_path, content, repo_path=repo_dir
-        )
+        return analyze_cpp_file(file_path, content, repo_path=repo_dir)
 
-        for func in functions:
-            func_id = func.id if func.id else f"{file_path}:{func.name}"
-            self.functions[func_id] = func
-
-        self.call_relationships.extend(relationships)
-
-    def _analyze_java_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_java_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze Java file using tree-sitter based analyzer.
 
         Args:
             file_path: Relative path to the Java file
-            content: File content string
+            content: File content bytes
             repo_dir: Repository base directory
         """
         from codewiki.src.be.dependency_analyzer.analyzers.java import analyze_java_file
 
         try:
-            functions, relationships = analyze_java_file(file_path, content, repo_path=repo_dir)
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_java_file(file_path, content, repo_path=repo_dir)
         except Exception as e:
             logger.error(f"Failed to analyze Java file {file_path}: {e}", exc_info=True)
+            return None
 
-    def _analyze_go_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_go_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze Go file using tree-sitter based analyzer.
 
         Args:
             file_path: Relative path to the Go file
-            content: File content string
+            content: File content bytes
             repo_dir: Repository base directory
         """
         from codewiki.src.be.dependency_analyzer.analyzers.go import analyze_go_file
 
         try:
-            functions, relationships = analyze_go_file(file_path, content, repo_path=repo_dir)
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_go_file(file_path, content, repo_path=repo_dir)
         except Exception as e:
             logger.error(f"Failed to analyze Go file {file_path}: {e}", exc_info=True)
+            return None
 
-    def _analyze_csharp_file(self, file_path: str, content: str, repo_dir: str):
+    def _analyze_csharp_file(self, file_path: str, content: bytes, repo_dir: str):
         """
         Analyze C# file using tree-sitter based analyzer.
 
         Args:
             file_path: Relative path to the C# file
-            content: File content string
+            content: File content bytes
             repo_dir: Repository base directory
         """
         from codewiki.src.be.dependency_analyzer.analyzers.csharp import analyze_csharp_file
 
         try:
-            functions, relationships = analyze_csharp_file(file_path, content, repo_path=repo_dir)
-
-            for func in functions:
-                func_id = func.id if func.id else f"{file_path}:{func.name}"
-                self.functions[func_id] = func
-
-            self.call_relationships.extend(relationships)
+            return analyze_csharp_file(file_path, content, repo_path=repo_dir)
         except Exception as e:
             logger.error(f"Failed to analyze C# file {file_path}: {e}", exc_info=True)
+            return None
 
     def _resolve_call_relationships(self):
         """
         Resolve function call relationships across all languages.
 
-        Attempts to match function calls to actual function definitions,
-        handling cross-language calls where possible.
+        Matches each callee to a component through the scope-aware symbol index:
+        exact ids, the caller file's imports, the caller's class and module, then a
+        repository-wide name lookup for languages without import information.
         """
-        func_lookup = {}
-        for func_id, func_info in self.functions.items():
-            func_lookup[func_id] = func_id
-            func_lookup[func_info.name] = func_id
-            if func_info.component_id:
-                func_lookup[func_info.component_id] = func_id
-                method_name = func_info.component_id.split(".")[-1]
-                if method_name not in func_lookup:
-                    func_lookup[method_name] = func_id
+        if self.store is not None:
+            index = StoreSymbolIndex(self.store)
+            resolved_count = self.store.resolve_relationships(index.resolve)
+            logger.debug(f"Resolved {resolved_count}/{self.store.relationship_count()} call relationships")
+            return
+
+        index = SymbolIndex(self.functions, self.file_imports, self.shard_tables)
 
         resolved_count = 0
         for relationship in self.call_relationships:
-            callee_name = relationship.callee
-
-            if callee_name in func_lookup:
-                relationship.callee = func_lookup[callee_name]
+            func_id = index.resolve(relationship.callee, relationship.caller)
+            if func_id is not None:
+                relationship.callee = func_id
                 relationship.is_resolved = True
                 resolved_count += 1
-            elif "." in callee_name:
-                if callee_name in func_lookup:
-                    relationship.callee = func_lookup[callee_name]
-                    relationship.is_resolved = True
-                    resolved_count += 1
-                else:
-                    method_name = callee_name.split(".")[-1]
-                    if method_name in func_lookup:
-                        relationship.callee = func_lookup[method_name]
-                        relationship.is_resolved = True
-                        resolved_count += 1
+        logger.debug(f"Resolved {resolved_count}/{len(self.call_relationships)} call relationships")
 
     def _deduplicate_relationships(self):
         """
@@ -380,6 +957,10 @@ class CallGraphAnalyzer:
         Removes duplicate relationships while preserving the first occurrence.
         This helps eliminate noise from multiple calls to the same function.
         """
+        if self.store is not None:
+            self.store.deduplicate_relationships()
+            return
+
         seen = set()
         unique_relationships = []
 
@@ -493,53 +1074,3 @@ class CallGraphAnalyzer:
                 for func in self.functions.values()
             },
         }
-
-    def _select_most_connected_nodes(self, target_count: int):
-        """
-        Select the most connected nodes from the call graph.
-
-        Args:
-            target_count: The number of nodes to select
-        """
-        if len(self.functions) <= target_count:
-            return
-
-        if not self.call_relationships:
-            logger.warning("No call relationships found - keeping all functions by name")
-            func_ids = list(self.functions.keys())[:target_count]
-            self.functions = {fid: func for fid, func in self.functions.items() if fid in func_ids}
-            return
-
-        graph = {}
-        for rel in self.call_relationships:
-            if rel.caller in self.functions:
-                if rel.caller not in graph:
-                    graph[rel.caller] = set()
-            if rel.callee in self.functions:
-                if rel.callee not in graph:
-                    graph[rel.callee] = set()
-
-            if rel.caller in graph and rel.callee in graph:
-                graph[rel.caller].add(rel.callee)
-                graph[rel.callee].add(rel.caller)
-
-        degree_centrality = {}
-        for func_id in self.functions.keys():
-            degree_centrality[func_id] = len(graph.get(func_id, set()))
-
-        sorted_func_ids = sorted(degree_centrality, key=degree_centrality.get, reverse=True)
-
-        selected_func_ids = sorted_func_ids[:target_count]
-
-        original_func_count = len(self.functions)
-        self.functions = {
-            fid: func for fid, func in self.functions.items() if fid in selected_func_ids
-        }
-
-        original_rel_count = len(self.call_relationships)
-        self.call_relationships = [
-            rel
-            for rel in self.call_relationships
-            if rel.caller in selected_func_ids and rel.callee in selected_func_ids
-        ]
-
@@ -0,0 +1,220 @@
+"""
+Per-file parse budgets for Stage 1.
+
+A single minified bundle or generated parser can keep a language analyzer busy
+for minutes. Before a file is parsed it is checked against byte and line limits
+and screened for minified or generated content; parsing itself runs under a
+wall-clock limit. Files that fail a check are skipped, except generated files,
+which are parsed structure-only (components kept, call relationships dropped)
+so references to their types still resolve.
+"""
+
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+# Reasons recorded in the skipped-file report
+SKIP_TOO_LARGE = "too_large"
+SKIP_TOO_MANY_LINES = "too_many_lines"
+SKIP_MINIFIED = "minified"
+SKIP_TIMEOUT = "timeout"
+STRUCTURE_ONLY_GENERATED = "generated"
+
+# Minified-content heuristics, applied to the start of the file
+MINIFIED_SAMPLE_BYTES = 64 * 1024
+MINIFIED_MIN_SAMPLE_BYTES = 4096
+MINIFIED_AVG_LINE_LENGTH = 300
+MINIFIED_MAX_LINE_LENGTH = 5000
+
+# Generated-code markers, searched in comment lines at the top of the file
+GENERATED_HEADER_LINES = 15
+GENERATED_COMMENT = re.compile(rb"^\s*(?:#|//|/\*|\*|--|;)")
+GENERATED_MARKERS = re.compile(
+    rb"@generated\b|code generated by|this file (?:was|is) (?:automatically |auto-?)?generated|"
+    rb"auto-?generated (?:file|code|by)|generated by .*do not edit|do not edit.*generated",
+    re.IGNORECASE,
+)
+GENERATED_FILE_NAMES = re.compile(
+    r"(?:_pb2(?:_grpc)?\.py|\.pb\.(?:go|cc|h)|\.pb\.gw\.go|_generated\.\w+|\.generated\.\w+|"
+    r"\.g\.cs|\.designer\.cs)$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class FileBudget:
+    """Per-file limits; 0 disables a limit."""
+    max_bytes: int = 0
+    max_lines: int = 0
+    max_seconds: float = 0
+    detect_generated: bool = True
+
+    @classmethod
+    def from_config(cls) -> "FileBudget":
+        """Budget from the Stage 1 defaults in `codewiki.src.config`."""
+        from codewiki.src.config import MAX_PARSE_FILE_BYTES, MAX_PARSE_FILE_LINES, MAX_PARSE_SECONDS
+
+        return cls(
+            max_bytes=MAX_PARSE_FILE_BYTES,
+            max_lines=MAX_PARSE_FILE_LINES,
+            max_seconds=MAX_PARSE_SECONDS,
+        )
+
+
+@dataclass
+class SkippedFile:
+    """One entry of the Stage 1 skipped-file report."""
+    path: str
+    reason: str
+    detail: str
+    structure_only: bool = False
+
+
+def detect_minified(content: bytes) -> Optional[str]:
+    """Return a description if the file looks minified (very long lines), else None."""
+    sample = content[:MINIFIED_SAMPLE_BYTES]
+    if len(sample) < MINIFIED_MIN_SAMPLE_BYTES:
+        return None
+    lines = sample.count(b"\n") + 1
+    average = len(sample) / lines
+    if average > MINIFIED_AVG_LINE_LENGTH:
+        return f"average line length {average:.0f} characters"
+    longest = max(map(len, sample.split(b"\n")))
+    if longest > MINIFIED_MAX_LINE_LENGTH:
+        return f"line of {longest} characters"
+    return None
+
+
+def detect_generated(relative_path: str, content: bytes) -> Optional[str]:
+    """Return a description if the file is generated code, else None."""
+    name_match = GENERATED_FILE_NAMES.search(relative_path)
+    if name_match:
+        return f"generated file name ({name_match.group(0)})"
+    for line in content.split(b"\n", GENERATED_HEADER_LINES)[:GENERATED_HEADER_LINES]:
+        if GENERATED_COMMENT.match(line):
+            marker = GENERATED_MARKERS.search(line)
+            if marker:
+                return f"header marker '{marker.group(0).decode('utf-8', errors='replace')}'"
+    return None
+
+
+def check_file(
+    relative_path: str, content: bytes, budget: FileBudget
+) -> Tuple[Optional[SkippedFile], bool]:
+    """
+    Screen a file before parsing.
+
+    Returns:
+        (report entry or None, whether the file should be parsed at all)
+    """
+    if budget.max_bytes and len(content) > budget.max_bytes:
+        return SkippedFile(relative_path, SKIP_TOO_LARGE, f"{len(content)} bytes > {budget.max_bytes}"), False
+    if budget.max_lines:
+        lines = content.count(b"\n") + 1
+        if lines > budget.max_lines:
+            return SkippedFile(relative_path, SKIP_TOO_MANY_LINES, f"{lines} lines > {budget.max_lines}"), False
+    if budget.detect_generated:
+        minified = detect_minified(content)
+        if minified:
+            return SkippedFile(relative_path, SKIP_MINIFIED, minified), False
+        generated = detect_generated(relative_path, content)
+        if generated:
+            return SkippedFile(relative_path, STRUCTURE_ONLY_GENERATED, generated, structure_only=True), True
+    return None, True
+
+
+class ParseTimeout(BaseException):
+    """
+    Raised inside an analyzer when a file exceeds its wall-clock budget.
+
+    Derives from BaseException so analyzers' `except Exception` handlers do not
+    swallow it.
+    """
+
+
+class OuterDeadline(BaseException):
+    """
+    Carries the exception of an enclosing timer (such as the CLI's Stage 1
+    timeout) that expired during a parse past analyzers' `except Exception`
+    handlers; the caller re-raises `error`.
+    """
+
+    def __init__(self, error: BaseException):
+        super().__init__(error)
+        self.error = error
+
+
+def deadline_supported() -> bool:
+    """Whether `parse_deadline` can enforce a limit in the calling thread."""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def parse_deadline(seconds: float) -> Iterator[None]:
+    """
+    Raise ParseTimeout in the current thread once `seconds` have elapsed.
+
+    In the main thread (the sequential path and every pool worker) a real-time
+    interval timer is used. A timer that was already armed, such as the CLI's
+    Stage 1 timeout, keeps running: the per-file limit is armed only when it
+    expires first, the outer handler and remaining time are restored on exit,
+    and if the outer deadline is reached during the parse it is handed to the
+    outer handler instead of becoming a per-file skip; an exception from that
+    handler arrives wrapped in OuterDeadline.
+
+    Signals are only delivered to the main thread, so in other threads no limit
+    is applied (see `deadline_supported`); raising an exception into a thread
+    from outside could interrupt it while it holds a lock. Stage 1 therefore
+    parses in a worker process when it runs off the main thread, as in the web
+    worker. With `seconds` 0 no limit is applied either, and time spent inside a single native call
+    (one tree-sitter parse) is only interrupted when that call returns.
+    """
+    if not seconds or not deadline_supported():
+        yield
+        return
+    with _alarm_deadline(seconds):
+        yield
+
+
+@contextmanager
+def _alarm_deadline(seconds: float) -> Iterator[None]:
+    outer_remaining, outer_interval = signal.getitimer(signal.ITIMER_REAL)
+    outer_first = bool(outer_remaining) and outer_remaining <= seconds
+    outer_delivered = False
+    started = time.monotonic()
+
+    def _expired(signum, frame):
+        nonlocal outer_delivered
+        if not outer_first:
+            raise ParseTimeout()
+        # The outer deadline came first: act as if this context were not here
+        outer_delivered = True
+        signal.signal(signal.SIGALRM, previous)
+        if callable(previous):
+            try:
+                previous(signum, frame)
+            except BaseException as error:
+                raise OuterDeadline(error) from error
+        elif previous == signal.SIG_DFL:
+            signal.raise_signal(signal.SIGALRM)
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, outer_remaining if outer_first else seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer_remaining:
+            left = outer_remaining - (time.monotonic() - started)
+            if outer_delivered:
+                if outer_interval:
+                    signal.setitimer(signal.ITIMER_REAL, outer_interval, outer_interval)
+            else:
+                # An outer deadline that passed unnoticed fires as soon as possible
+                signal.setitimer(signal.ITIMER_REAL, max(left, 1e-6), outer_interval)
+
@@ -0,0 +1,227 @@
+"""
+Header Index
+
+Per-run index of what C/C++ headers declare. It resolves a call from a
+translation unit to the definition of an API declared in a header that the
+unit includes.
+
+The C and C++ analyzers record each file's `#include` directives, system
+includes with their angle brackets (`<utility>`). For
+headers, they also record the functions and types the header declares:
+prototypes, and the components the header defines. This is handed over in the
+file's import table under reserved keys, so the parse cache, shards and the
+analysis store carry it unchanged:
+
+    {"#include util/str.h": "util/str.h", "#declare str_trim": "str_trim"}
+
+A header is analyzed once, as a code file of its own. The index resolves the
+include graph lazily, memoized per file. It serves each header's declarations
+to every file that includes it, directly or through other headers.
+"""
+
+import posixpath
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+INCLUDE_KEY = "#include "
+DECLARE_KEY = "#declare "
+
+HEADER_EXTENSIONS = (".h", ".hh", ".hpp", ".hxx", ".h++", ".inl")
+C_FAMILY_EXTENSIONS = HEADER_EXTENSIONS + (".c", ".cc", ".cpp", ".cxx", ".c++")
+
+# How many levels of nested includes to follow from a translation unit
+MAX_INCLUDE_DEPTH = 8
+
+# Nodes whose children can hold file-scope declarations
+_SCOPE_NODES = frozenset({
+    "translation_unit", "preproc_if", "preproc_ifdef", "preproc_else", "preproc_elif",
+    "preproc_elifdef", "linkage_specification", "declaration_list", "namespace_definition",
+})
+
+
+def is_header(path: str) -> bool:
+    return path.lower().endswith(HEADER_EXTENSIONS)
+
+
+def scan_file_scope(root) -> Tuple[List[str], List[str]]:
+    """
+    Include paths and function prototypes at file scope of a parsed C/C++ file.
+
+    Only preprocessor blocks, `extern "C"` blocks and namespaces are descended
+    into, so function bodies and class members are never visited.
+    """
+    includes: List[str] = []
+    prototypes: List[str] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for child in reversed(node.children):
+            if child.type in _SCOPE_NODES:
+                stack.append(child)
+            elif child.type == "preproc_include":
+                path = child.child_by_field_name("path")
+                if path is not None and path.type == "string_literal":
+                    includes.append(path.text.decode("utf-8", errors="replace")[1:-1])
+                elif path is not None and path.type == "system_lib_string":
+                    includes.append(path.text.decode("utf-8", errors="replace"))
+            elif child.type == "declaration":
+                declarator = child.child_by_field_name("declarator")
+                while declarator is not None and declarator.type in ("pointer_declarator", "reference_declarator"):
+                    declarator = declarator.child_by_field_name("declarator")
+                if declarator is not None and declarator.type == "function_declarator":
+                    name = declarator.child_by_field_name("declarator")
+                    if name is not None and name.type == "identifier":
+                        prototypes.append(name.text.decode("utf-8", errors="replace"))
+    # The stack pops in reverse; restore source order
+    includes.reverse()
+    prototypes.reverse()
+    return includes, prototypes
+
+
+def header_table(includes: Iterable[str], declarations: Iterable[str]) -> Optional[Dict[str, str]]:
+    """A file's includes and declarations as import-table entries, or None if it has neither."""
+    table = {f"{INCLUDE_KEY}{path}": path for path in includes}
+    table.update((f"{DECLARE_KEY}{name}", name) for name in declarations)
+    return table or None
+
+
+def is_header_table(table: Dict[str, str]) -> bool:
+    """Whether an import table holds C/C++ includes and declarations rather than imports."""
+    return bool(table) and all(key[0] == "#" for key in table)
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path.replace("\\", "/"))
+
+
+def _shared_directories(a: str, b: str) -> int:
+    shared = 0
+    for x, y in zip(a.split("/")[:-1], b.split("/")[:-1]):
+        if x != y:
+            break
+        shared += 1
+    return shared
+
+
+def _stem(path: str) -> str:
+    name = path.rsplit("/", 1)[-1]
+    return name.rsplit(".", 1)[0]
+
+
+class HeaderIndex:
+    """Include graph and header declarations of one analysis run."""
+
+    def __init__(
+        self,
+        tables: Dict[str, Dict[str, str]],
+        candidates: Callable[[str], Optional[List[str]]],
+        component_file: Callable[[str], Optional[str]],
+    ):
+        """
+        Args:
+            tables: Relative file path -> header table (see `header_table`)
+            candidates: Bare name -> ids of the components with that name
+            component_file: Component id -> relative path of its file
+        """
+        self._candidates = candidates
+        self._component_file = component_file
+        self._includes: Dict[str, List[str]] = {}
+        self._declarations: Dict[str, FrozenSet[str]] = {}
+        # File name -> files with that name, to match includes by path suffix
+        self._by_file_name: Dict[str, List[str]] = {}
+        for relative_path, table in tables.items():
+            path = _normalize(relative_path)
+            includes, declarations = [], []
+            for key, value in table.items():
+                if key.startswith(INCLUDE_KEY):
+                    includes.append(value)
+                elif key.startswith(DECLARE_KEY):
+                    declarations.append(value)
+            self._includes[path] = includes
+            if declarations:
+                self._declarations[path] = frozenset(declarations)
+            self._by_file_name.setdefault(path.rsplit("/", 1)[-1], []).append(path)
+        self._closures: Dict[str, List[str]] = {}
+        self._definitions: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def __contains__(self, relative_path: str) -> bool:
+        return _normalize(relative_path) in self._includes
+
+    def _resolve_include(self, spelling: str, including: str) -> Optional[str]:
+        """
+        Repository file an include refers to: next to the includer (quoted includes
+        only), from the root, else by path suffix. None for a library header.
+        """
+        system = spelling.startswith("<")
+        spelling = spelling.strip("<>").replace("\\", "/")
+        candidates = [spelling] if system else [posixpath.join(posixpath.dirname(including), spelling), spelling]
+        for path in candidates:
+            path = posixpath.normpath(path)
+            if path in self._includes:
+                return path
+        # Include directories (-I) are unknown: match the spelled path as a suffix,
+        # preferring the candidate closest to the including file
+        suffix = "/" + "/".join(part for part in posixpath.normpath(spelling).split("/") if part not in ("", ".", ".."))
+        best, best_shared = None, -1
+        for path in self._by_file_name.get(suffix.rsplit("/", 1)[-1], ()):
+            if ("/" + path).endswith(suffix):
+                shared = _shared_directories(path, including)
+                if shared > best_shared:
+                    best, best_shared = path, shared
+        return best
+
+    def included(self, relative_path: str) -> List[str]:
+        """Headers a file includes, directly first, then through other headers."""
+        path = _normalize(relative_path)
+        closure = self._closures.get(path)
+        if closure is not None:
+            return closure
+        closure, seen, frontier = [], {path}, [path]
+        for _ in range(MAX_INCLUDE_DEPTH):
+            next_frontier = []
+            for including in frontier:
+                for spelling in self._includes.get(including, ()):
+                    header = self._resolve_include(spelling, including)
+                    if header is not None and header not in seen:
+                        seen.add(header)
+                        closure.append(header)
+                        next_frontier.append(header)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        self._closures[path] = closure
+        return closure
+
+    def _definition(self, name: str, header: str) -> Optional[str]:
+        """
+        The component defining a name declared in a header: one in the header itself,
+        else in a source file named like the header, else the closest to it.
+        """
+        key = (header, name)
+        if key in self._definitions:
+            return self._definitions[key]
+        best, best_rank = None, None
+        for func_id in self._candidates(name) or ():
+            file_path = self._component_file(func_id)
+            if file_path is None or not file_path.lower().endswith(C_FAMILY_EXTENSIONS):
+                continue
+            file_path = _normalize(file_path)
+            rank = (file_path == header, _stem(file_path) == _stem(header), _shared_directories(file_path, header))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = func_id, rank
+        self._definitions[key] = best
+        return best
+
+    def resolve(self, name: str, relative_path: str) -> Optional[str]:
+        """
+        Resolve a bare name called from a file through the headers it includes.
+
+        Returns:
+            The component defining the first included header's declaration of the
+            name, or None if no included header declares a defined component
+        """
+        for header in self.included(relative_path):
+            if name in self._declarations.get(header, ()):
+                func_id = self._definition(name, header)
+                if func_id is not None:
+                    return func_id
+        return None
@@ -0,0 +1,353 @@
+"""
+Parse Cache
+
+Persistent on-disk cache of per-file analyzer output, so unchanged files skip
+tree-sitter and `ast` parsing on repeat runs and only cross-file resolution is
+redone. One cache directory can be shared by every repository analyzed on a
+host (the web service does this), so a fork or a new commit of a known
+repository only parses the files whose content is new.
+
+Entries are keyed by the file's git blob id, its language, its analyzed path and
+ANALYZER_VERSION. Component ids are derived from the file's path, so files are
+analyzed with each directory segment replaced by a placeholder token (see
+`relocatable_path`) and the tokens are mapped back to the real directories when
+the entry is loaded. The same blob at the same directory depth with the same
+file name therefore hits regardless of the repository or directory it lives in.
+Bump ANALYZER_VERSION whenever an analyzer changes what it extracts.
+
+The cache grows with every new blob; `ParseCache.evict` removes entries unused
+for longer than a maximum age and then the least recently used ones until the
+cache fits a size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+
+logger = logging.getLogger(__name__)
+
+
+ANALYZER_VERSION = "8"
+
+# Directory segment i of an analyzed path is replaced by the character
+# U+E000 + i. Up to 64 segments the tokens encode as EE 80 80..EE 80 BF in UTF-8,
+# so a file containing b"\xee\x80" is analyzed at its real path instead.
+SEGMENT_TOKEN_BASE = 0xE000
+MAX_SEGMENT_TOKENS = 64
+_TOKEN_PREFIX = b"\xee\x80"
+
+# Temp files left by interrupted writes are removed by `evict` after this long
+STALE_TEMP_SECONDS = 3600
+
+
+@dataclass
+class ParseCacheStats:
+    """Hit/miss counters for one analysis run."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    errors: int = 0
+    # Whole analysis shards served from / missing in the cache (see analysis.shards)
+    shard_hits: int = 0
+    shard_misses: int = 0
+
+    def merge(self, other: "ParseCacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.writes += other.writes
+        self.errors += other.errors
+        self.shard_hits += other.shard_hits
+        self.shard_misses += other.shard_misses
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class EvictionStats:
+    """Result of one `ParseCache.evict` pass."""
+    removed: int = 0
+    removed_bytes: int = 0
+    remaining: int = 0
+    remaining_bytes: int = 0
+
+
+def blob_id(content: bytes) -> str:
+    """Git blob id of file content (what `git hash-object` prints)."""
+    digest = hashlib.sha1(b"blob %d\0" % len(content))
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def relocatable_path(language: str, relative_path: str, content: bytes) -> Tuple[str, Dict[int, str]]:
+    """
+    Path to analyze a file at for the cache, with its directories replaced by tokens.
+
+    Returns:
+        (analyzed path, translation table mapping each token back to its real
+        directory segment). The table is empty and the path unchanged when the
+        file cannot be relocated: it is too deep, its content contains token
+        characters, or it is a Python file under a directory with a dot in its
+        name (relative imports split module paths on dots).
+    """
+    parts = relative_path.replace("\\", "/").split("/")
+    directories = parts[:-1]
+    if (
+        not directories
+        or len(directories) > MAX_SEGMENT_TOKENS
+        or _TOKEN_PREFIX in content
+        or (language == "python" and any("." in segment for segment in directories))
+    ):
+        return relative_path, {}
+    tokens = [chr(SEGMENT_TOKEN_BASE + i) for i in range(len(directories))]
+    analyzed_path = "/".join(tokens + parts[-1:])
+    return analyzed_path, {ord(token): segment for token, segment in zip(tokens, directories)}
+
+
+def _relocate(value: Any, table: Dict[int, str]) -> Any:
+    if type(value) is str:
+        return value.translate(table)
+    if type(value) is list:
+        return [_relocate(item, table) for item in value]
+    return value
+
+
+def load_entry(
+    entry: dict, file_path: str, table: Dict[int, str]
+) -> Tuple[List[ComponentRecord], List[CallRecord], Optional[Dict[str, str]]]:
+    """Build records from an entry, mapping its tokens to real directories."""
+    imports = entry.get("imports")
+    if table:
+        functions = [
+            ComponentRecord(**{key: _relocate(value, table) for key, value in data.items()}, file_path=file_path)
+            for data in entry["functions"]
+        ]
+        relationships = [
+            CallRecord(**{key: _relocate(value, table) for key, value in data.items()})
+            for data in entry["relationships"]
+        ]
+        if imports is not None:
+            imports = {name.translate(table): target.translate(table) for name, target in imports.items()}
+    else:
+        functions = [ComponentRecord(**{**data, "file_path": file_path}) for data in entry["functions"]]
+        relationships = [CallRecord(**data) for data in entry["relationships"]]
+    return functions, relationships, imports
+
+
+def relocate_results(
+    functions: List[ComponentRecord],
+    relationships: List[CallRecord],
+    imports: Optional[Dict[str, str]],
+    file_path: str,
+    table: Dict[int, str],
+) -> Tuple[List[ComponentRecord], List[CallRecord], Optional[Dict[str, str]]]:
+    """Map analyzer output for a `relocatable_path` back to the file's real path."""
+    if not table:
+        return functions, relationships, imports
+    return load_entry(make_entry(functions, relationships, imports), file_path, table)
+
+
+def _component_entry(func: ComponentRecord) -> dict:
+    entry = func.to_dict()
+    # file_path is absolute and differs between checkouts; it is restored on load
+    del entry["file_path"]
+    del entry["depends_on"]
+    return entry
+
+
+def make_entry(
+    functions: List[ComponentRecord], relationships: List[CallRecord], imports: Optional[Dict[str, str]]
+) -> dict:
+    """JSON-serializable cache entry for one file's analyzer output."""
+    return {
+        "analyzer_version": ANALYZER_VERSION,
+        "functions": [_component_entry(func) for func in functions],
+        "relationships": [rel.to_dict() for rel in relationships],
+        "imports": imports,
+    }
+
+
+class ParseCache:
+    """
+    Content-addressed store of (functions, relationships) per analyzed file.
+
+    Each entry is a small JSON file under a two-level fan-out directory. Writes go
+    through a temp file and `os.replace`, so parser processes (and concurrent
+    analysis jobs) can share one cache. A hit refreshes the entry's modification
+    time, which `evict` uses as its last-use time.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.stats = ParseCacheStats()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(language: str, analyzed_path: str, content: bytes) -> str:
+        """Build the cache key for one file analyzed at `analyzed_path` (see `relocatable_path`)."""
+        digest = hashlib.sha256()
+        digest.update(f"{ANALYZER_VERSION}\0{language}\0{analyzed_path}\0{blob_id(content)}".encode("utf8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(
+        self, key: str, file_path: str, table: Optional[Dict[int, str]] = None
+    ) -> Optional[Tuple[List[ComponentRecord], List[CallRecord], Optional[Dict[str, str]]]]:
+        """
+        Load cached analyzer output for a key.
+
+        Args:
+            key: Cache key from `make_key`
+            file_path: Current absolute path of the file, restored onto cached nodes
+            table: Token translation table from `relocatable_path`
+
+        Returns:
+            (functions, relationships, import table), or None on a miss
+        """
+        entry = self.read_entry(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        try:
+            result = load_entry(entry, file_path, table or {})
+        except Exception as e:
+            logger.debug(f"Discarding incompatible parse cache entry {key}: {e}")
+            self.stats.misses += 1
+            self.stats.errors += 1
+            return None
+
+        self.stats.hits += 1
+        return result
+
+    def put(
+        self,
+        key: str,
+        functions: List[ComponentRecord],
+        relationships: List[CallRecord],
+        imports: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Store analyzer output for a key. Failures are logged and ignored."""
+        if self.write_entry(key, make_entry(functions, relationships, imports)):
+            self.stats.writes += 1
+        else:
+            self.stats.errors += 1
+
+    def read_entry(self, key: str) -> Optional[dict]:
+        """
+        Raw JSON entry for a key, or None if it is missing or unreadable.
+
+        A hit refreshes the entry's modification time for `evict`.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Discarding unreadable parse cache entry {entry_path}: {e}")
+            self.stats.errors += 1
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def write_entry(self, key: str, entry: dict) -> bool:
+        """Write a raw JSON entry atomically; returns False (after logging) on failure."""
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, separators=(",", ":"))
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except Exception as e:
+            logger.debug(f"Failed to write parse cache entry {entry_path}: {e}")
+            return False
+        return True
+
+    def evict(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> EvictionStats:
+        """
+        Remove entries unused for longer than `max_age_seconds`, then the least
+        recently used ones until the cache holds at most `max_bytes`.
+
+        Safe to run while other processes use the cache: a removed entry is just a
+        miss for them. Leftover temp files from interrupted writes are removed too.
+        """
+        now = time.time()
+        stats = EvictionStats()
+        entries = []
+        try:
+            shards = [shard.path for shard in os.scandir(self.cache_dir) if shard.is_dir()]
+        except OSError as e:
+            logger.warning(f"Cannot scan parse cache {self.cache_dir}: {e}")
+            return stats
+
+        for shard in shards:
+            try:
+                files = list(os.scandir(shard))
+            except OSError:
+                continue
+            for item in files:
+                try:
+                    info = item.stat()
+                except OSError:
+                    continue
+                age = now - info.st_mtime
+                if item.name.endswith(".tmp"):
+                    if age > STALE_TEMP_SECONDS:
+                        self._remove(item.path, info.st_size, stats)
+                elif max_age_seconds is not None and age > max_age_seconds:
+                    self._remove(item.path, info.st_size, stats)
+                else:
+                    entries.append((info.st_mtime, info.st_size, item.path))
+
+        remaining_bytes = sum(size for _, size, _ in entries)
+        if max_bytes is not None and remaining_bytes > max_bytes:
+            # Oldest last use first
+            entries.sort()
+            kept = []
+            for entry in entries:
+                if remaining_bytes > max_bytes and self._remove(entry[2], entry[1], stats):
+                    remaining_bytes -= entry[1]
+                else:
+                    kept.append(entry)
+            entries = kept
+
+        stats.remaining = len(entries)
+        stats.remaining_bytes = remaining_bytes
+        return stats
+
+    @staticmethod
+    def _remove(path: str, size: int, stats: EvictionStats) -> bool:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.debug(f"Failed to evict parse cache entry {path}: {e}")
+            return False
+        stats.removed += 1
+        stats.removed_bytes += size
+        return True
@@ -0,0 +1,126 @@
+"""
+Stage 1 profiling: per-file phase timings and the per-language report.
+
+The call graph analyzer times every analyzed file in phases: reading and
+screening the file, parsing it (tree-sitter or `ast`, measured by the analyzers
+through `parse_timer`), and extracting components and call sites from the tree
+(the rest of the analyzer call). Relationship resolution runs once for the whole
+repository and is reported as a total. The report aggregates file timings per
+language with p50/p95/max and lists the slowest files, so a regression can be
+traced to the analyzer that caused it.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List
+
+# Entries in the report's slowest-files table
+SLOWEST_FILES = 50
+
+PHASES = ("read", "parse", "extract", "total")
+
+_parse_time = threading.local()
+
+
+@contextmanager
+def parse_timer() -> Iterator[None]:
+    """Add the time spent in the block to the current thread's parse time."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _parse_time.seconds = getattr(_parse_time, "seconds", 0.0) + time.perf_counter() - start
+
+
+def take_parse_seconds() -> float:
+    """Parse time accumulated by `parse_timer` since the last call, then reset it."""
+    seconds = getattr(_parse_time, "seconds", 0.0)
+    _parse_time.seconds = 0.0
+    return seconds
+
+
+@dataclass(slots=True)
+class FileTiming:
+    """Phase timings of one analyzed file, in seconds."""
+    path: str
+    language: str
+    read: float = 0.0
+    parse: float = 0.0
+    extract: float = 0.0
+    total: float = 0.0
+    cached: bool = False
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "total": round(sum(values), 6),
+        "p50": round(percentile(values, 0.50), 6),
+        "p95": round(percentile(values, 0.95), 6),
+        "max": round(values[-1], 6) if values else 0.0,
+    }
+
+
+def build_profile_report(
+    timings: List[FileTiming], resolve_seconds: float, wall_seconds: float
+) -> Dict[str, Any]:
+    """
+    Aggregate file timings into the Stage 1 profile.
+
+    Returns:
+        JSON-serializable report: totals per phase, per-language distributions
+        (p50/p95/max per phase over the files parsed, cache hits counted
+        separately) and the slowest files
+    """
+    by_language: Dict[str, List[FileTiming]] = {}
+    for timing in timings:
+        by_language.setdefault(timing.language, []).append(timing)
+
+    languages = {}
+    for language, entries in sorted(by_language.items(), key=lambda item: -sum(t.total for t in item[1])):
+        parsed = [t for t in entries if not t.cached]
+        languages[language] = {
+            "files": len(entries),
+            "cache_hits": len(entries) - len(parsed),
+            **{phase: _distribution([getattr(t, phase) for t in parsed]) for phase in PHASES},
+        }
+
+    slowest = sorted(timings, key=lambda t: t.total, reverse=True)[:SLOWEST_FILES]
+    return {
+        "files": len(timings),
+        "wall_seconds": round(wall_seconds, 6),
+        "totals": {
+            **{phase: round(sum(getattr(t, phase) for t in timings), 6) for phase in PHASES},
+            "resolve": round(resolve_seconds, 6),
+        },
+        "languages": languages,
+        "slowest_files": [
+            {key: round(value, 6) if isinstance(value, float) else value for key, value in asdict(t).items()}
+            for t in slowest
+        ],
+    }
+
+
+def summarize_profile(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form of the report for `RepoMetrics`: totals and per-language file times."""
+    return {
+        "files": report["files"],
+        "wall_seconds": report["wall_seconds"],
+        "totals": report["totals"],
+        "languages": {
+            language: {"files": stats["files"], "cache_hits": stats["cache_hits"], **stats["total"]}
+            for language, stats in report["languages"].items()
+        },
+        "slowest_file": report["slowest_files"][0]["path"] if report["slowest_files"] else None,
+    }
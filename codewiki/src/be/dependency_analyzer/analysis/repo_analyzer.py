@@ -6,18 +6,24 @@ detailed file tree representations with filtering capabilities.
 """
 
 import os
-import fnmatch
 import json
-from pathlib import Path
+from pathlib import Path, PurePath
 from typing import Dict, List, Optional, Union
+from codewiki.src.be.dependency_analyzer.utils.ignore_matcher import GitIgnoreRules, PathMatcher
 from codewiki.src.be.dependency_analyzer.utils.patterns import DEFAULT_IGNORE_PATTERNS, DEFAULT_INCLUDE_PATTERNS
 
 
+# Directory names excluded anywhere in a path, on top of the configured patterns
+EXCLUDED_DIR_NAMES = {"node_modules", "vendor", "bower_components", ".git", "__pycache__",
+                      ".venv", "venv", "env", ".env", "dist", "build", "target", "bin", "obj"}
+
+
 class RepoAnalyzer:
     def __init__(
         self,
         include_patterns: Optional[List[str]] = None,
         exclude_patterns: Optional[List[str]] = None,
+        respect_gitignore: bool = True,
     ) -> None:
         self.include_patterns = (
             include_patterns if include_patterns is not None else DEFAULT_INCLUDE_PATTERNS
@@ -27,6 +33,10 @@ class RepoAnalyzer:
             if exclude_patterns is not None
             else list(DEFAULT_IGNORE_PATTERNS)
         )
+        self.respect_gitignore = respect_gitignore
+        # Patterns are compiled once; every path is then checked in constant time
+        self._exclude_matcher = PathMatcher(self.exclude_patterns, EXCLUDED_DIR_NAMES)
+        self._include_matcher = PathMatcher(self.include_patterns) if self.include_patterns else None
 
     def analyze_repository_structure(self, repo_dir: str) -> Dict:
         file_tree = self._build_file_tree(repo_dir)
@@ -38,90 +48,103 @@ class RepoAnalyzer:
             },
         }
 
-    def _build_file_tree(self, repo_dir: str) -> Dict:
-        def build_tree(path: Path, base_path: Path) -> Optional[Dict]:
-            relative_path = path.relative_to(base_path)
-            relative_path_str = str(relative_path)
+    def _build_file_tree(self, repo_dir: str) -> Optional[Dict]:
+        """
+        Walk the repository with `os.scandir`, without recursion.
+
+        Excluded and gitignored directories are pruned before they are listed.
+        Symlinks are never followed, so no entry can resolve outside `repo_dir`.
+        Directories left without any included file are dropped.
+        """
+        # 🚫 Reject symlinks
+        if os.path.islink(repo_dir):
+            return None
 
-            # 🚫 Reject symlinks
-            if path.is_symlink():
-                return None
+        root = {
+            "type": "directory",
+            "name": Path(repo_dir).name,
+            "path": ".",
+            "children": [],
+        }
+        directories = [root]
+        # (absolute path, relative path, tree node, .gitignore rules in scope as (base, rules))
+        stack = [(repo_dir, ".", root, ())]
+        while stack:
+            dir_path, dir_rel, node, gitignores = stack.pop()
+            if self.respect_gitignore:
+                rules = GitIgnoreRules.from_file(os.path.join(dir_path, ".gitignore"))
+                if rules is not None:
+                    gitignores = gitignores + ((dir_rel, rules),)
 
-            # 🚫 Reject escaped paths (e.g., symlinks pointing outside)
             try:
-                if not path.resolve().is_relative_to(base_path.resolve()):
-                    return None
-            except AttributeError:
-                if not str(path.resolve()).startswith(str(base_path.resolve())):
-                    return None
-
-            if self._should_exclude_path(relative_path_str, path.name):
-                return None
-
-            if path.is_file():
-                if not self._should_include_file(relative_path_str, path.name):
-                    return None
-
-                size = path.stat().st_size
-                return {
-                    "type": "file",
-                    "name": path.name,
-                    "path": relative_path_str,
-                    "extension": path.suffix,
-                    "_size_bytes": size,
-                }
-
-            elif path.is_dir():
-                children = []
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except (PermissionError, NotADirectoryError, FileNotFoundError):
+                continue
+
+            children = node["children"]
+            for entry in entries:
+                name = entry.name
+                relative_path = name if dir_rel == "." else f"{dir_rel}/{name}"
                 try:
-                    for child in sorted(path.iterdir()):
-                        child_tree = build_tree(child, base_path)
-                        if child_tree is not None:
-                            children.append(child_tree)
-                except PermissionError:
-                    pass
-
-                if children or str(relative_path) == ".":
-                    return {
-                        "type": "directory",
-                        "name": path.name,
-                        "path": relative_path_str,
-                        "children": children,
-                    }
-                return None
-
-            # Other types (sockets, devices, etc.)
-            return None
-
-        return build_tree(Path(repo_dir), Path(repo_dir))
+                    # 🚫 Reject symlinks
+                    if entry.is_symlink():
+                        continue
+                    if self._should_exclude_path(relative_path, name):
+                        continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if gitignores and self._is_gitignored(relative_path, is_dir, gitignores):
+                        continue
+
+                    if is_dir:
+                        child = {
+                            "type": "directory",
+                            "name": name,
+                            "path": relative_path,
+                            "children": [],
+                        }
+                        children.append(child)
+                        directories.append(child)
+                        stack.append((entry.path, relative_path, child, gitignores))
+                    elif entry.is_file(follow_symlinks=False):
+                        if not self._should_include_file(relative_path, name):
+                            continue
+                        children.append({
+                            "type": "file",
+                            "name": name,
+                            "path": relative_path,
+                            "extension": PurePath(name).suffix,
+                            "_size_bytes": entry.stat(follow_symlinks=False).st_size,
+                        })
+                    # Other types (sockets, devices, etc.) are skipped
+                except OSError:
+                    continue
+
+        # Children come before their parents in reverse discovery order
+        for directory in reversed(directories):
+            directory["children"] = [
+                child for child in directory["children"]
+                if child["type"] == "file" or child["children"]
+            ]
+        return root
+
+    @staticmethod
+    def _is_gitignored(path: str, is_dir: bool, gitignores) -> bool:
+        # The .gitignore closest to the path takes precedence
+        for base, rules in reversed(gitignores):
+            relative = path if base == "." else path[len(base) + 1:]
+            ignored = rules.match(relative, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
 
     def _should_exclude_path(self, path: str, filename: str) -> bool:
-        # First check: if any part of the path contains excluded directory names
-        path_parts = path.split("/")
-        excluded_dirs = {"node_modules", "vendor", "bower_components", ".git", "__pycache__", 
-                         ".venv", "venv", "env", ".env", "dist", "build", "target", "bin", "obj"}
-        if any(part in excluded_dirs for part in path_parts):
-            return True
-        
-        # Second check: pattern matching
-        for pattern in self.exclude_patterns:
-            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(filename, pattern):
-                return True
-            if pattern.endswith("/") and path.startswith(pattern.rstrip("/")):
-                return True
-            if path.startswith(pattern + "/") or path == pattern:
-                return True
-            if pattern in path.split("/"):
-                return True
-        return False
+        return self._exclude_matcher.matches(path, filename)
 
     def _should_include_file(self, path: str, filename: str) -> bool:
-        if not self.include_patterns:
+        if self._include_matcher is None:
             return True
-        for pattern in self.include_patterns:
-            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(filename, pattern):
-                return True
-        return False
+        return self._include_matcher.matches_file(path, filename)
 
     def _count_files(self, tree: Dict) -> int:
         if tree["type"] == "file":
@@ -0,0 +1,277 @@
+"""
+Sharded Stage 1 analysis for monorepos.
+
+Large repositories are split into shards along their directory structure:
+workspace packages declared by the root manifests (npm/yarn `workspaces`,
+`lerna.json`, `pnpm-workspace.yaml`, `go.work`), otherwise top-level
+directories. A shard with more than `SHARD_MAX_FILES` files is split again by
+its subdirectories, so one dominant package does not serialize the run. Each
+shard is a contiguous run of the file list.
+
+Shards are parsed independently (in parallel by the call graph analyzer) and
+each exports the symbol tables of its components. The merge step concatenates
+shard results in file order and merges the tables into the repository-wide
+`SymbolIndex`, which resolves calls across shards.
+
+With the parse cache enabled, a shard's whole result (records, skipped files,
+symbol tables) is cached under a key over its files' paths and git blob ids, so
+an unchanged package is served with one read instead of one per file. Blob ids
+come from `git ls-files` for files that match the index and are hashed from
+the file content otherwise.
+"""
+
+import fnmatch
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from codewiki.src.be.dependency_analyzer.analysis.file_budget import FileBudget, SkippedFile
+from codewiki.src.be.dependency_analyzer.analysis.parse_cache import (
+    ANALYZER_VERSION,
+    ParseCacheStats,
+    blob_id,
+    load_entry,
+    make_entry,
+)
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import FileTiming
+from codewiki.src.be.dependency_analyzer.analysis.symbol_index import ImportTable, SymbolTables
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.utils.security import safe_open_bytes
+
+logger = logging.getLogger(__name__)
+
+GIT_TIMEOUT_SECONDS = 60
+
+# Git index modes of regular files (symlinks and submodules are hashed from disk)
+_GIT_FILE_MODES = ("100644", "100755")
+
+# (functions as (id, record) pairs, relationships, import tables) for one file
+FileResult = Tuple[List[Tuple[str, ComponentRecord]], List[CallRecord], Dict[str, ImportTable]]
+
+
+@dataclass
+class Shard:
+    """A contiguous run of code files under one directory."""
+    name: str  # Directory the shard covers ("" for files at the repository root)
+    files: List[Dict]
+
+
+@dataclass
+class ShardResult:
+    """One shard's partial graph, as returned by a shard worker."""
+    name: str
+    file_results: List[FileResult]
+    tables: SymbolTables
+    skipped_files: List[SkippedFile] = field(default_factory=list)
+    file_timings: List[FileTiming] = field(default_factory=list)
+    cache_stats: Optional[ParseCacheStats] = None
+
+
+def _manifest_patterns(repo_dir: str) -> List[str]:
+    """Workspace package globs declared by the repository's root manifests."""
+    patterns: List[str] = []
+    for manifest, key in (("package.json", "workspaces"), ("lerna.json", "packages")):
+        try:
+            with open(os.path.join(repo_dir, manifest), "r", encoding="utf-8") as f:
+                declared = json.load(f).get(key)
+        except (OSError, ValueError, AttributeError):
+            continue
+        if isinstance(declared, dict):
+            declared = declared.get("packages")
+        if isinstance(declared, list):
+            patterns.extend(p for p in declared if isinstance(p, str))
+
+    try:
+        with open(os.path.join(repo_dir, "pnpm-workspace.yaml"), "r", encoding="utf-8") as f:
+            in_packages = False
+            for line in f:
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                if not line[0].isspace():
+                    in_packages = line.startswith("packages:")
+                elif in_packages and line.strip().startswith("-"):
+                    patterns.append(line.strip()[1:].strip().strip("'\""))
+    except OSError:
+        pass
+
+    try:
+        with open(os.path.join(repo_dir, "go.work"), "r", encoding="utf-8") as f:
+            text = re.sub(r"//.*", "", f.read())
+        for block in re.findall(r"^use\s*\(([^)]*)\)", text, re.MULTILINE):
+            patterns.extend(block.split())
+        patterns.extend(re.findall(r"^use\s+([^\s(]+)", text, re.MULTILINE))
+    except OSError:
+        pass
+    return patterns
+
+
+def find_workspace_roots(repo_dir: str) -> List[str]:
+    """Relative directories of the workspace packages declared at the repository root."""
+    roots = set()
+    excluded = []
+    for pattern in _manifest_patterns(repo_dir):
+        if pattern.startswith("!"):
+            excluded.append(pattern[1:].strip("/"))
+            continue
+        pattern = pattern.strip().strip("/")
+        if pattern.startswith("./"):
+            pattern = pattern[2:]
+        if not pattern or pattern == "." or ".." in pattern.split("/"):
+            continue
+        for match in glob.glob(os.path.join(repo_dir, pattern)):
+            if os.path.isdir(match):
+                roots.add(os.path.relpath(match, repo_dir).replace(os.sep, "/"))
+    return sorted(root for root in roots if not any(fnmatch.fnmatch(root, p) for p in excluded))
+
+
+def _directories(path: str) -> List[str]:
+    return path.replace("\\", "/").split("/")[:-1]
+
+
+def plan_shards(code_files: List[Dict], repo_dir: str, max_files: int) -> List[Shard]:
+    """
+    Split code files into shards.
+
+    A file belongs to the deepest workspace package containing it, or else to its
+    top-level directory. Groups over `max_files` are split by the next directory
+    level (files directly in the group's directory stay together). Shards are
+    maximal runs of consecutive files in the same group, so concatenating them in
+    order gives back `code_files`.
+    """
+    roots = sorted(find_workspace_roots(repo_dir), key=len, reverse=True)
+
+    def initial_group(path: str) -> str:
+        normalized = path.replace("\\", "/")
+        for root in roots:
+            if normalized.startswith(root + "/"):
+                return root
+        directories = _directories(path)
+        return directories[0] if directories else ""
+
+    groups = [initial_group(file_info["path"]) for file_info in code_files]
+
+    while True:
+        sizes: Dict[str, int] = {}
+        for group in groups:
+            sizes[group] = sizes.get(group, 0) + 1
+        oversized = {group for group, size in sizes.items() if group and size > max_files}
+        changed = False
+        for i, group in enumerate(groups):
+            if group in oversized:
+                directories = _directories(code_files[i]["path"])
+                depth = group.count("/") + 1
+                if len(directories) > depth:
+                    groups[i] = f"{group}/{directories[depth]}"
+                    changed = True
+        if not changed:
+            break
+
+    shards: List[Shard] = []
+    for file_info, group in zip(code_files, groups):
+        if not shards or shards[-1].name != group:
+            shards.append(Shard(group, []))
+        shards[-1].files.append(file_info)
+    return shards
+
+
+def git_blob_ids(repo_dir: str) -> Dict[str, str]:
+    """
+    Blob ids of tracked files whose working copy matches the git index.
+
+    Returns:
+        Relative path -> blob id; empty outside a git repository or if git fails
+    """
+    try:
+        staged = subprocess.run(
+            ["git", "-C", repo_dir, "ls-files", "--stage", "-z"],
+            capture_output=True, check=True, timeout=GIT_TIMEOUT_SECONDS,
+        ).stdout
+        modified = subprocess.run(
+            ["git", "-C", repo_dir, "diff", "--name-only", "--no-renames", "--relative", "-z"],
+            capture_output=True, check=True, timeout=GIT_TIMEOUT_SECONDS,
+        ).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"No git blob ids for {repo_dir}: {e}")
+        return {}
+
+    dirty = {path for path in modified.decode("utf-8", "surrogateescape").split("\0") if path}
+    blobs = {}
+    for record in staged.decode("utf-8", "surrogateescape").split("\0"):
+        if not record:
+            continue
+        info, _, path = record.partition("\t")
+        mode, blob, stage = info.split(" ")
+        if mode in _GIT_FILE_MODES and stage == "0" and path not in dirty:
+            blobs[path] = blob
+    return blobs
+
+
+def shard_cache_key(
+    base_dir: str, shard: Shard, blob_ids: Dict[str, str], file_budget: FileBudget
+) -> Optional[str]:
+    """
+    Cache key over a shard's files and the settings that shape its result.
+
+    Returns None if a file without a known blob id cannot be read.
+    """
+    base = Path(base_dir)
+    digest = hashlib.sha256()
+    digest.update(f"shard\0{ANALYZER_VERSION}\0{shard.name}\0{asdict(file_budget)}\n".encode("utf8"))
+    for file_info in shard.files:
+        path = file_info["path"]
+        blob = blob_ids.get(path.replace("\\", "/"))
+        if blob is None:
+            try:
+                blob = blob_id(safe_open_bytes(base, base / path))
+            except Exception:
+                return None
+        digest.update(f"{path}\0{file_info['language']}\0{blob}\n".encode("utf8"))
+    return digest.hexdigest()
+
+
+def shard_entry(shard: Shard, result: ShardResult) -> dict:
+    """JSON-serializable cache entry for a shard result."""
+    files = []
+    for file_info, (functions, relationships, file_imports) in zip(shard.files, result.file_results):
+        imports = next(iter(file_imports.values()), None)
+        files.append({"path": file_info["path"], **make_entry([func for _, func in functions], relationships, imports)})
+    return {
+        "analyzer_version": ANALYZER_VERSION,
+        "name": shard.name,
+        "files": files,
+        "skipped_files": [asdict(skipped) for skipped in result.skipped_files],
+        "tables": asdict(result.tables),
+    }
+
+
+def shard_result_from_entry(entry: dict, base_dir: str, shard: Shard) -> ShardResult:
+    """Rebuild a cached shard result for the current checkout."""
+    base = Path(base_dir)
+    if len(entry["files"]) != len(shard.files):
+        raise ValueError("shard entry does not match the shard's files")
+    file_results: List[FileResult] = []
+    for file_info, data in zip(shard.files, entry["files"]):
+        if data["path"] != file_info["path"]:
+            raise ValueError(f"shard entry lists {data['path']} instead of {file_info['path']}")
+        file_path = str(base / file_info["path"])
+        functions, relationships, imports = load_entry(data, file_path, {})
+        file_imports = {os.path.normpath(file_info["path"]): imports} if imports is not None else {}
+        file_results.append((
+            [(func.id if func.id else f"{file_path}:{func.name}", func) for func in functions],
+            relationships,
+            file_imports,
+        ))
+    return ShardResult(
+        name=shard.name,
+        file_results=file_results,
+        tables=SymbolTables(**entry["tables"]),
+        skipped_files=[SkippedFile(**skipped) for skipped in entry["skipped_files"]],
+        file_timings=[FileTiming(f["path"], f["language"], cached=True) for f in shard.files],
+    )
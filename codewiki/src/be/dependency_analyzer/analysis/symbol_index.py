@@ -0,0 +1,311 @@
+"""
+Symbol Index
+
+Scope-aware lookup used to resolve call relationships to component ids.
+
+Callees are probed in the order a reader would look for them: an exact component
+id, the caller file's import table, the caller's own class and module, and only
+then a repository-wide name lookup. Every step is a handful of dict probes, and
+names that several components share are only matched across files when the
+caller's language has no import information to go on.
+
+Import tables are captured by analyzers during parsing and map a local name to
+the qualified name it was imported as (`{"np": "numpy", "Node": "pkg.models.Node"}`).
+A star import of module `m` is recorded as the key `"*m"`. C/C++ files carry
+their includes and header declarations in the same slot (see `header_index`);
+bare names called from them are looked up in the headers they include, and
+are not matched across the repository when none of those declares them.
+
+A sharded analysis indexes each shard separately; the shards' exported
+`SymbolTables` are then merged into the repository-wide index, which comes out
+the same as indexing all components at once.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from codewiki.src.be.dependency_analyzer.analysis.header_index import HeaderIndex, is_header_table
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord
+
+ImportTable = Dict[str, str]
+
+# Receivers that refer to the caller's own class
+_SELF_NAMES = frozenset({"self", "this", "cls"})
+
+# Marks a qualified-name suffix shared by several components
+_AMBIGUOUS = ""
+
+# How many package re-exports (`from .models import Node` in `__init__.py`) to follow
+MAX_REEXPORT_DEPTH = 3
+
+
+def module_path_for(relative_path: str) -> str:
+    """Dotted module path analyzers derive component ids from (`pkg/mod.py` -> `pkg.mod`)."""
+    path = relative_path.replace("\\", "/")
+    slash = path.rfind("/")
+    dot = path.rfind(".")
+    if dot > slash:
+        path = path[:dot]
+    return path.replace("/", ".")
+
+
+def module_key_for(relative_path: str) -> str:
+    """Module path a file's names are imported from (`pkg/__init__.py` -> `pkg`)."""
+    module = module_path_for(relative_path)
+    if module == "__init__" or module.endswith(".__init__"):
+        module = module[:-len(".__init__")]
+    return module
+
+
+def id_suffixes(func_id: str) -> Iterator[str]:
+    """
+    Dotted suffixes of a component id that an import statement may name.
+
+    Import statements name packages, not repository paths: a component at
+    `src/pkg/__init__.py` is imported as `pkg.Name`, not `src.pkg.__init__.Name`.
+    """
+    parts = func_id.split(".")
+    variants = [parts]
+    if "__init__" in parts:
+        variants.append([part for part in parts if part != "__init__"])
+    for variant in variants:
+        for start in range(len(variant) - 1):
+            yield ".".join(variant[start:])
+
+
+@dataclass
+class SymbolTables:
+    """The lookup tables of one `SymbolIndex`, as exported by an analysis shard."""
+    by_id: Dict[str, str]
+    by_suffix: Dict[str, str]
+    by_name: Dict[str, List[str]]
+
+
+class SymbolIndex:
+    """Hierarchical symbol tables over the analyzed components."""
+
+    def __init__(
+        self,
+        functions: Dict[str, ComponentRecord],
+        file_imports: Optional[Dict[str, ImportTable]] = None,
+        shard_tables: Optional[List[SymbolTables]] = None,
+    ):
+        """
+        Args:
+            functions: Component id -> component, as collected by the analyzer
+            file_imports: Relative file path -> import table, for languages that capture imports
+            shard_tables: Tables exported by the shards `functions` was collected
+                from, in file order; merged instead of indexing the components again
+        """
+        self.functions = functions
+        self.file_imports: Dict[str, ImportTable] = {}
+        header_tables: Dict[str, ImportTable] = {}
+        for relative_path, imports in (file_imports or {}).items():
+            if is_header_table(imports):
+                header_tables[relative_path] = imports
+            else:
+                self.file_imports[relative_path] = imports
+        # Exact component ids and component_ids
+        self.by_id: Dict[str, str] = {}
+        # Dotted suffixes of import-capable components' ids (`models.Node` for `src.pkg.models.Node`)
+        self.by_suffix: Dict[str, str] = {}
+        # Bare names (and last id segments) -> candidate ids, in definition order
+        self.by_name: Dict[str, List[str]] = {}
+        # Module path -> import table, to follow names re-exported by packages
+        self.module_imports: Dict[str, ImportTable] = {}
+        for relative_path, imports in self.file_imports.items():
+            self.module_imports[module_key_for(relative_path)] = imports
+        # Caller id -> (module path, import table, C/C++ file with a header table), cached per caller
+        self._scopes: Dict[str, Tuple[Optional[str], Optional[ImportTable], Optional[str]]] = {}
+        if shard_tables is None:
+            self._build()
+        else:
+            self._merge(shard_tables)
+        self.headers = HeaderIndex(header_tables, self.by_name.get, self._component_file)
+
+    def _build(self) -> None:
+        by_id, by_name = self.by_id, self.by_name
+        suffix_sources = []
+        for func_id, func in self.functions.items():
+            by_id[func_id] = func_id
+            names = [func.name]
+            if func.component_id:
+                by_id.setdefault(func.component_id, func_id)
+                names.append(func.component_id.rsplit(".", 1)[-1])
+            for name in dict.fromkeys(names):
+                if name:
+                    by_name.setdefault(name, []).append(func_id)
+            if func.relative_path in self.file_imports:
+                suffix_sources.append(func_id)
+
+        by_suffix = self.by_suffix
+        for func_id in suffix_sources:
+            for suffix in id_suffixes(func_id):
+                if suffix in by_id:
+                    continue
+                existing = by_suffix.get(suffix)
+                if existing is None:
+                    by_suffix[suffix] = func_id
+                elif existing != func_id:
+                    by_suffix[suffix] = _AMBIGUOUS
+
+    def _merge(self, shard_tables: List[SymbolTables]) -> None:
+        """
+        Combine shard tables the way `_build` would have filled them: component ids
+        win over component_id aliases from any shard, a suffix that is a component id
+        anywhere is dropped, and one defined by different components is ambiguous.
+        """
+        by_id, by_suffix, by_name = self.by_id, self.by_suffix, self.by_name
+        for func_id in self.functions:
+            by_id[func_id] = func_id
+        for tables in shard_tables:
+            for alias, func_id in tables.by_id.items():
+                by_id.setdefault(alias, func_id)
+            for name, candidates in tables.by_name.items():
+                by_name.setdefault(name, []).extend(candidates)
+        for tables in shard_tables:
+            for suffix, func_id in tables.by_suffix.items():
+                if suffix in by_id:
+                    continue
+                existing = by_suffix.get(suffix)
+                if existing is None:
+                    by_suffix[suffix] = func_id
+                elif existing != func_id:
+                    by_suffix[suffix] = _AMBIGUOUS
+
+    def export_tables(self) -> SymbolTables:
+        """The tables a shard hands to the merge step."""
+        return SymbolTables(self.by_id, self.by_suffix, self.by_name)
+
+    def _lookup(self, qualified: str) -> Optional[str]:
+        func_id = self.by_id.get(qualified)
+        if func_id is None:
+            func_id = self.by_suffix.get(qualified) or None
+        return func_id
+
+    def _lookup_trimmed(self, base: str, rest: List[str]) -> Optional[str]:
+        """
+        Probe `base.rest...`, dropping trailing segments of `rest` until a component
+        matches (`Model.objects.create` on an imported class resolves to the class).
+        """
+        for end in range(len(rest), -1, -1):
+            qualified = ".".join([base, *rest[:end]]) if end else base
+            func_id = self._lookup(qualified)
+            if func_id is not None:
+                return func_id
+        return None
+
+    def _lookup_imported(self, target: str, rest: List[str], depth: int = 0) -> Optional[str]:
+        """Probe an imported name, following re-exports through the importing package."""
+        func_id = self._lookup_trimmed(target, rest)
+        if func_id is not None or depth >= MAX_REEXPORT_DEPTH:
+            return func_id
+        parts = target.split(".") + rest
+        for split in range(len(parts) - 1, 0, -1):
+            imports = self.module_imports.get(".".join(parts[:split]))
+            if imports is not None:
+                reexported = imports.get(parts[split])
+                if reexported is not None:
+                    return self._lookup_imported(reexported, parts[split + 1:], depth + 1)
+        return None
+
+    def _component_file(self, func_id: str) -> Optional[str]:
+        """Relative path of the file defining a component, or None if it is not a component."""
+        func = self.functions.get(func_id)
+        return func.relative_path if func is not None else None
+
+    def _caller_scope(self, caller: str) -> Tuple[Optional[str], Optional[ImportTable], Optional[str]]:
+        scope = self._scopes.get(caller)
+        if scope is None:
+            relative_path = self._component_file(caller)
+            if relative_path is None:
+                scope = (None, None, None)
+            else:
+                module = module_path_for(relative_path)
+                scope = (module if caller.startswith(module + ".") else None,
+                         self.file_imports.get(relative_path),
+                         relative_path if relative_path in self.headers else None)
+            self._scopes[caller] = scope
+        return scope
+
+    def _enclosing_scopes(self, caller: str, module: str) -> Iterable[str]:
+        """The caller itself, its enclosing classes, then its module."""
+        scope = caller
+        while len(scope) >= len(module):
+            yield scope
+            dot = scope.rfind(".")
+            if dot < len(module):
+                break
+            scope = scope[:dot]
+
+    def resolve(self, callee: str, caller: str) -> Optional[str]:
+        """
+        Resolve a callee name as written at a call site in `caller`.
+
+        Returns:
+            The component id the call refers to, or None if it is not a component
+        """
+        func_id = self.by_id.get(callee)
+        if func_id is not None:
+            return func_id
+
+        module, imports, header_file = self._caller_scope(caller)
+        parts = callee.split(".")
+        head, rest = parts[0], parts[1:]
+
+        if head in _SELF_NAMES and rest and module is not None:
+            # self.method() / this.method(): look in the caller's class chain only
+            for scope in self._enclosing_scopes(caller, module):
+                if scope == module:
+                    break
+                func_id = self._lookup_trimmed(f"{scope}.{rest[0]}", rest[1:])
+                if func_id is not None:
+                    return func_id
+            return None
+
+        if imports is not None:
+            target = imports.get(head)
+            if target is not None:
+                func_id = self._lookup_imported(target, rest)
+                if func_id is not None:
+                    return func_id
+
+        if module is not None:
+            for scope in self._enclosing_scopes(caller, module):
+                func_id = self._lookup_trimmed(f"{scope}.{head}", rest)
+                if func_id is not None:
+                    return func_id
+
+        if imports is not None:
+            for key, star_module in imports.items():
+                if key[0] == "*":
+                    func_id = self._lookup_imported(f"{star_module}.{head}", rest)
+                    if func_id is not None:
+                        return func_id
+            # With imports known, an unmatched name is a builtin, a local or a library symbol
+            return None
+
+        if header_file is not None and not rest:
+            # Includes are known: a name no included header declares is a library symbol
+            return self.headers.resolve(head, header_file)
+
+        return self._resolve_by_name(parts[-1], caller)
+
+    def _resolve_by_name(self, name: str, caller: str) -> Optional[str]:
+        """Repository-wide fallback: the same-named component closest to the caller."""
+        candidates = self.by_name.get(name)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        caller_parts = caller.split(".")
+        best, best_shared = None, -1
+        for candidate in candidates:
+            shared = 0
+            for a, b in zip(caller_parts, candidate.split(".")):
+                if a != b:
+                    break
+                shared += 1
+            if shared > best_shared:
+                best, best_shared = candidate, shared
+        return best
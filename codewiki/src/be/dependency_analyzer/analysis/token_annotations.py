@@ -0,0 +1,50 @@
+"""
+Token Annotations
+
+Stage 1 counts every analyzed file's tokens once, with the same encoding the
+later stages budget prompts with. Each component records its file's count
+(`file_tokens`) and its own source's count (`source_tokens`). Clustering
+thresholds, auto-split chunking and prompt budgets then sum these numbers
+instead of reading and encoding files again.
+
+Components whose source is a byte range of the file are counted from the
+file's single encode: the token byte lengths give each token's start offset,
+and a component's count is the number of tokens starting inside its range.
+Tokens that straddle a range edge make a count differ by at most one per
+edge from encoding the source alone. Components that carry their own source
+text are encoded separately.
+
+Annotations are part of the analyzer output, so the parse cache stores them
+with the file's components and unchanged files are not encoded again.
+"""
+
+import bisect
+import itertools
+from typing import List
+
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord
+from codewiki.src.be.token_accounting import get_token_accountant
+
+
+def annotate_tokens(content: bytes, functions: List[ComponentRecord]) -> None:
+    """Set `file_tokens` and `source_tokens` on one file's components."""
+    if not functions:
+        return
+    accountant = get_token_accountant()
+    text = content.decode("utf-8", errors="replace")
+    tokens = accountant.encoding.encode_ordinary(text)
+    # Offsets are only meaningful when decoding kept the bytes unchanged
+    offsets_valid = text.encode("utf-8") == content
+    starts: List[int] = []
+    if offsets_valid and any(func.start_byte is not None for func in functions):
+        lengths = (len(token) for token in accountant.encoding.decode_tokens_bytes(tokens))
+        starts = [0, *itertools.accumulate(lengths)][:-1]
+
+    for func in functions:
+        func.file_tokens = len(tokens)
+        if starts and func.start_byte is not None and func.end_byte is not None:
+            func.source_tokens = (
+                bisect.bisect_left(starts, func.end_byte) - bisect.bisect_left(starts, func.start_byte)
+            )
+        else:
+            func.source_tokens = accountant.count(func.get_source_code())
@@ -1,22 +1,25 @@
 import logging
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_c
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.header_index import header_table, is_header, scan_file_scope
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
 class TreeSitterCAnalyzer:
-	def __init__(self, file_path: str, content: str, repo_path: str = None):
+	def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
 		self.file_path = Path(file_path)
-		self.content = content
+		self.source = SourceBytes(content)
 		self.repo_path = repo_path or ""
-		self.nodes: List[Node] = []
-		self.call_relationships: List[CallRelationship] = []
+		self.nodes: List[ComponentRecord] = []
+		self.call_relationships: List[CallRecord] = []
+		self.header_table: Optional[Dict[str, str]] = None
 		self._analyze()
 	
 	def _get_module_path(self) -> str:
@@ -48,22 +51,25 @@ class TreeSitterCAnalyzer:
 		return f"{module_path}.{name}" if module_path else name
 
 	def _analyze(self):
-		language_capsule = tree_sitter_c.language()
-		c_language = Language(language_capsule)
-		parser = Parser(c_language)
-		tree = parser.parse(bytes(self.content, "utf8"))
+		parser = get_parser("c")
+		with parse_timer():
+			tree = parser.parse(self.source.data)
 		root = tree.root_node
-		lines = self.content.splitlines()
 		
 		top_level_nodes = {}
 		
 		# collect all top-level nodes using recursive traversal
-		self._extract_nodes(root, top_level_nodes, lines)
+		self._extract_nodes(root, top_level_nodes)
 		
 		# extract relationships between top-level nodes
 		self._extract_relationships(root, top_level_nodes)
+		
+		# includes, and for headers the declared functions and types, for the header index
+		includes, prototypes = scan_file_scope(root)
+		declarations = (prototypes + [n.name for n in self.nodes]) if is_header(str(self.file_path)) else []
+		self.header_table = header_table(includes, declarations)
 	
-	def _extract_nodes(self, node, top_level_nodes, lines):
+	def _extract_nodes(self, node, top_level_nodes):
 		"""Recursively extract top-level nodes (functions, structs, and global variables)."""
 		node_type = None
 		node_name = None
@@ -116,13 +122,13 @@ class TreeSitterCAnalyzer:
 		if node_type and node_name:
 			component_id = self._get_component_id(node_name)
 			relative_path = self._get_relative_path()
-			node_obj = Node(
+			node_obj = ComponentRecord(
 				id=component_id,
 				name=node_name,
 				component_type=node_type,
 				file_path=str(self.file_path),
 				relative_path=relative_path,
-				source_code="\n".join(lines[node.start_point[0]:node.end_point[0]+1]),
+				source_code=self.source.lines(node.start_point[0], node.end_point[0]),
 				start_line=node.start_point[0]+1,
 				end_line=node.end_point[0]+1,
 				has_docstring=False,
@@ -140,7 +146,7 @@ class TreeSitterCAnalyzer:
 			top_level_nodes[node_name] = node_obj
 		
 		for child in node.children:
-			self._extract_nodes(child, top_level_nodes, lines)
+			self._extract_nodes(child, top_level_nodes)
 	
 	def _is_global_variable(self, node) -> bool:
 		parent = node.parent
@@ -164,7 +170,7 @@ class TreeSitterCAnalyzer:
 				if function_node:
 					called_function = function_node.text.decode()
 					if not self._is_system_function(called_function):
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_function_id,
 							callee=called_function,  # Use simple name for cross-file resolution
 							call_line=node.start_point[0]+1,
@@ -180,7 +186,7 @@ class TreeSitterCAnalyzer:
 				if var_name in top_level_nodes and top_level_nodes[var_name].component_type == "variable":
 					containing_function_id = self._get_component_id(containing_function)
 					var_component_id = self._get_component_id(var_name)
-					self.call_relationships.append(CallRelationship(
+					self.call_relationships.append(CallRecord(
 						caller=containing_function_id,
 						callee=var_component_id,
 						call_line=node.start_point[0]+1,
@@ -217,6 +223,6 @@ class TreeSitterCAnalyzer:
 		}
 		return func_name in system_functions
 
-def analyze_c_file(file_path: str, content: str, repo_path: str = None) -> Tuple[List[Node], List[CallRelationship]]:
+def analyze_c_file(file_path: str, content: Union[str, bytes], repo_path: str = None) -> Tuple[List[ComponentRecord], List[CallRecord], Optional[Dict[str, str]]]:
 	analyzer = TreeSitterCAnalyzer(file_path, content, repo_path)
-	return analyzer.nodes, analyzer.call_relationships
+	return analyzer.nodes, analyzer.call_relationships, analyzer.header_table
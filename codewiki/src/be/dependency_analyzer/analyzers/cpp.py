@@ -1,22 +1,27 @@
 import logging
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_cpp
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.header_index import header_table, is_header, scan_file_scope
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
 class TreeSitterCppAnalyzer:
-	def __init__(self, file_path: str, content: str, repo_path: str = None):
+	def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
 		self.file_path = Path(file_path)
-		self.content = content
+		self.source = SourceBytes(content)
 		self.repo_path = repo_path or ""
-		self.nodes: List[Node] = []
-		self.call_relationships: List[CallRelationship] = []
+		self.nodes: List[ComponentRecord] = []
+		self.call_relationships: List[CallRecord] = []
+		self.header_table: Optional[Dict[str, str]] = None
+		# Called name -> class declaring it; top_level_nodes is complete before any lookup
+		self._method_owners: Dict[str, Optional[str]] = {}
 		self._analyze()
 	
 	def _get_module_path(self) -> str:
@@ -50,22 +55,25 @@ class TreeSitterCppAnalyzer:
 		return f"{module_path}.{name}" if module_path else name
 
 	def _analyze(self):
-		language_capsule = tree_sitter_cpp.language()
-		cpp_language = Language(language_capsule)
-		parser = Parser(cpp_language)
-		tree = parser.parse(bytes(self.content, "utf8"))
+		parser = get_parser("cpp")
+		with parse_timer():
+			tree = parser.parse(self.source.data)
 		root = tree.root_node
-		lines = self.content.splitlines()
 		
 		top_level_nodes = {}
 		
 		# collect all top-level nodes using recursive traversal
-		self._extract_nodes(root, top_level_nodes, lines)
+		self._extract_nodes(root, top_level_nodes)
 		
 		# extract relationships between top-level nodes
 		self._extract_relationships(root, top_level_nodes)
+		
+		# includes, and for headers the declared functions and types, for the header index
+		includes, prototypes = scan_file_scope(root)
+		declarations = (prototypes + [n.name for n in self.nodes]) if is_header(str(self.file_path)) else []
+		self.header_table = header_table(includes, declarations)
 	
-	def _extract_nodes(self, node, top_level_nodes, lines):
+	def _extract_nodes(self, node, top_level_nodes):
 		"""Recursively extract top-level nodes (classes, functions, global variables)."""
 		node_type = None
 		node_name = None
@@ -140,13 +148,13 @@ class TreeSitterCppAnalyzer:
 				
 			relative_path = self._get_relative_path()
 			
-			node_obj = Node(
+			node_obj = ComponentRecord(
 				id=component_id,
 				name=node_name,
 				component_type=node_type,
 				file_path=str(self.file_path),
 				relative_path=relative_path,
-				source_code="\n".join(lines[node.start_point[0]:node.end_point[0]+1]),
+				source_code=self.source.lines(node.start_point[0], node.end_point[0]),
 				start_line=node.start_point[0]+1,
 				end_line=node.end_point[0]+1,
 				has_docstring=False,
@@ -166,7 +174,7 @@ class TreeSitterCppAnalyzer:
 		
 		# Recursively process children
 		for child in node.children:
-			self._extract_nodes(child, top_level_nodes, lines)
+			self._extract_nodes(child, top_level_nodes)
 
 	def _is_global_variable(self, node) -> bool:
 		"""Check if a declaration node is a global variable."""
@@ -202,9 +210,11 @@ class TreeSitterCppAnalyzer:
 				
 				# Get called function name 
 				called_function = None
+				is_free_call = False
 				for child in node.children:
 					if child.type == "identifier":
 						called_function = child.text.decode()
+						is_free_call = True
 						break
 					elif child.type == "field_expression":
 						method_name = None
@@ -221,19 +231,25 @@ class TreeSitterCppAnalyzer:
 					
 					if target_class:
 						target_class_id = self._get_component_id(target_class)
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_function_id,
 							callee=target_class_id,
-							call_line=node.start_point[0]+1,
-							relationship_type="calls"
+							call_line=node.start_point[0]+1
 						))
 					elif called_function in top_level_nodes:
 						called_function_id = self._get_component_id(called_function)
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_function_id,
 							callee=called_function_id,
+							call_line=node.start_point[0]+1
+						))
+					elif is_free_call:
+						# Declared elsewhere, e.g. in an included header: leave it to the header index
+						self.call_relationships.append(CallRecord(
+							caller=containing_function_id,
+							callee=called_function,
 							call_line=node.start_point[0]+1,
-							relationship_type="calls"
+							is_resolved=False
 						))
 		
 		elif node.type == "base_class_clause":
@@ -245,11 +261,10 @@ class TreeSitterCppAnalyzer:
 					if child.type == "type_identifier":
 						base_class = child.text.decode()
 						containing_class_id = self._get_component_id(containing_class)
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_class_id,
 							callee=base_class,
-							call_line=node.start_point[0]+1,
-							relationship_type="inherits"
+							call_line=node.start_point[0]+1
 						))
 		
 		elif node.type == "new_expression":
@@ -263,11 +278,10 @@ class TreeSitterCppAnalyzer:
 						class_name = child.text.decode()
 						if class_name in top_level_nodes:
 							class_id = self._get_component_id(class_name)
-							self.call_relationships.append(CallRelationship(
+							self.call_relationships.append(CallRecord(
 								caller=containing_function_id,
 								callee=class_id,
-								call_line=node.start_point[0]+1,
-								relationship_type="creates"
+								call_line=node.start_point[0]+1
 							))
 						break
 		
@@ -279,11 +293,10 @@ class TreeSitterCppAnalyzer:
 					containing_function = self._find_containing_function_or_method(node, top_level_nodes)
 					if containing_function and containing_function != var_name:
 						containing_function_id = self._get_component_id_for_function(containing_function, top_level_nodes)
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_function_id,
 							callee=var_name,
-							call_line=node.start_point[0]+1,
-							relationship_type="uses"
+							call_line=node.start_point[0]+1
 						))
 		
 		# Recursively process children
@@ -350,11 +363,16 @@ class TreeSitterCppAnalyzer:
 		return func_name in system_functions
 
 	def _find_class_containing_method(self, method_name, top_level_nodes):
+		if method_name in self._method_owners:
+			return self._method_owners[method_name]
+		owner = None
 		for node_name, node_obj in top_level_nodes.items():
 			if node_obj.component_type in ["class", "struct"]:
 				if self._class_has_method(node_obj, method_name):
-					return node_name
-		return None
+					owner = node_name
+					break
+		self._method_owners[method_name] = owner
+		return owner
 
 	def _class_has_method(self, class_node, method_name):
 		lines = class_node.source_code.split('\n')
@@ -363,6 +381,6 @@ class TreeSitterCppAnalyzer:
 				return True
 		return False
 
-def analyze_cpp_file(file_path: str, content: str, repo_path: str = None) -> Tuple[List[Node], List[CallRelationship]]:
+def analyze_cpp_file(file_path: str, content: Union[str, bytes], repo_path: str = None) -> Tuple[List[ComponentRecord], List[CallRecord], Optional[Dict[str, str]]]:
 	analyzer = TreeSitterCppAnalyzer(file_path, content, repo_path)
-	return analyzer.nodes, analyzer.call_relationships
+	return analyzer.nodes, analyzer.call_relationships, analyzer.header_table
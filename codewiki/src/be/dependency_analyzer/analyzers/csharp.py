@@ -1,22 +1,23 @@
 import logging
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_c_sharp
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
 class TreeSitterCSharpAnalyzer:
-	def __init__(self, file_path: str, content: str, repo_path: str = None):
+	def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
 		self.file_path = Path(file_path)
-		self.content = content
+		self.source = SourceBytes(content)
 		self.repo_path = repo_path or ""
-		self.nodes: List[Node] = []
-		self.call_relationships: List[CallRelationship] = []
+		self.nodes: List[ComponentRecord] = []
+		self.call_relationships: List[CallRecord] = []
 		self._analyze()
 	
 	def _get_module_path(self) -> str:
@@ -48,20 +49,18 @@ class TreeSitterCSharpAnalyzer:
 		return f"{module_path}.{name}" if module_path else name
 
 	def _analyze(self):
-		language_capsule = tree_sitter_c_sharp.language()
-		cs_language = Language(language_capsule)
-		parser = Parser(cs_language)
-		tree = parser.parse(bytes(self.content, "utf8"))
+		parser = get_parser("csharp")
+		with parse_timer():
+			tree = parser.parse(self.source.data)
 		root = tree.root_node
-		lines = self.content.splitlines()
 		
 		top_level_nodes = {}
 	
-		self._extract_nodes(root, top_level_nodes, lines)
+		self._extract_nodes(root, top_level_nodes)
 		
 		self._extract_relationships(root, top_level_nodes)
 	
-	def _extract_nodes(self, node, top_level_nodes, lines):
+	def _extract_nodes(self, node, top_level_nodes):
 		node_type = None
 		node_name = None
 		
@@ -133,13 +132,13 @@ class TreeSitterCSharpAnalyzer:
 		if node_type and node_name:
 			component_id = self._get_component_id(node_name)
 			relative_path = self._get_relative_path()
-			node_obj = Node(
+			node_obj = ComponentRecord(
 				id=component_id,
 				name=node_name,
 				component_type=node_type,
 				file_path=str(self.file_path),
 				relative_path=relative_path,
-				source_code="\n".join(lines[node.start_point[0]:node.end_point[0]+1]),
+				source_code=self.source.lines(node.start_point[0], node.end_point[0]),
 				start_line=node.start_point[0]+1,
 				end_line=node.end_point[0]+1,
 				has_docstring=False,
@@ -155,7 +154,7 @@ class TreeSitterCSharpAnalyzer:
 			top_level_nodes[node_name] = node_obj
 		
 		for child in node.children:
-			self._extract_nodes(child, top_level_nodes, lines)
+			self._extract_nodes(child, top_level_nodes)
 	
 	def _extract_relationships(self, node, top_level_nodes):
 		containing_class = self._find_containing_class(node, top_level_nodes)
@@ -172,7 +171,7 @@ class TreeSitterCSharpAnalyzer:
 							base_name = child.text.decode()
 							if base_name in [n.name for n in top_level_nodes.values()]:
 								base_component_id = self._get_component_id(base_name)
-								self.call_relationships.append(CallRelationship(
+								self.call_relationships.append(CallRecord(
 									caller=class_component_id,
 									callee=base_component_id,
 									call_line=node.start_point[0]+1,
@@ -186,7 +185,7 @@ class TreeSitterCSharpAnalyzer:
 				if len(type_identifiers) >= 2:
 					property_type = type_identifiers[0].text.decode()
 					if property_type and not self._is_primitive_type(property_type):
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_class_id,
 							callee=property_type,  
 							call_line=node.start_point[0]+1,
@@ -200,7 +199,7 @@ class TreeSitterCSharpAnalyzer:
 				if type_node:
 					field_type = type_node.text.decode()
 					if field_type and not self._is_primitive_type(field_type):
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=containing_class_id,
 							callee=field_type, 
 							call_line=node.start_point[0]+1,
@@ -218,7 +217,7 @@ class TreeSitterCSharpAnalyzer:
 							if type_node:
 								param_type = type_node.text.decode()
 								if param_type and not self._is_primitive_type(param_type):
-									self.call_relationships.append(CallRelationship(
+									self.call_relationships.append(CallRecord(
 										caller=containing_class_id,
 										callee=param_type,  
 										call_line=node.start_point[0]+1,
@@ -291,7 +290,7 @@ class TreeSitterCSharpAnalyzer:
 			current = current.parent
 		return None
 	
-def analyze_csharp_file(file_path: str, content: str, repo_path: str = None) -> Tuple[List[Node], List[CallRelationship]]:
+def analyze_csharp_file(file_path: str, content: Union[str, bytes], repo_path: str = None) -> Tuple[List[ComponentRecord], List[CallRecord]]:
 	analyzer = TreeSitterCSharpAnalyzer(file_path, content, repo_path)
 	return analyzer.nodes, analyzer.call_relationships
 
@@ -3,13 +3,14 @@ Go language analyzer using tree-sitter for AST parsing.
 Extracts structs, interfaces, functions, and methods from Go source files.
 """
 import logging
-from typing import List, Tuple
+from typing import List, Tuple, Union
 from pathlib import Path
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_go
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,12 @@ logger = logging.getLogger(__name__)
 class TreeSitterGoAnalyzer:
     """Analyzer for Go source files using tree-sitter."""
     
-    def __init__(self, file_path: str, content: str, repo_path: str = None):
+    def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
         self.file_path = Path(file_path)
-        self.content = content
+        self.source = SourceBytes(content)
         self.repo_path = repo_path or ""
-        self.nodes: List[Node] = []
-        self.call_relationships: List[CallRelationship] = []
+        self.nodes: List[ComponentRecord] = []
+        self.call_relationships: List[CallRecord] = []
         self._analyze()
     
     def _get_module_path(self) -> str:
@@ -59,19 +60,17 @@ class TreeSitterGoAnalyzer:
     
     def _analyze(self):
         """Parse the Go file and extract nodes and relationships."""
-        language_capsule = tree_sitter_go.language()
-        go_language = Language(language_capsule)
-        parser = Parser(go_language)
-        tree = parser.parse(bytes(self.content, "utf8"))
+        parser = get_parser("go")
+        with parse_timer():
+            tree = parser.parse(self.source.data)
         root = tree.root_node
-        lines = self.content.splitlines()
         
         top_level_nodes = {}
         
-        self._extract_nodes(root, top_level_nodes, lines)
+        self._extract_nodes(root, top_level_nodes)
         self._extract_relationships(root, top_level_nodes)
     
-    def _extract_nodes(self, node, top_level_nodes, lines):
+    def _extract_nodes(self, node, top_level_nodes):
         """Extract struct, interface, function, and method definitions."""
         node_type = None
         node_name = None
@@ -113,13 +112,13 @@ class TreeSitterGoAnalyzer:
             component_id = self._get_component_id(node_name)
             relative_path = self._get_relative_path()
             
-            node_obj = Node(
+            node_obj = ComponentRecord(
                 id=component_id,
                 name=node_name,
                 component_type=node_type,
                 file_path=str(self.file_path),
                 relative_path=relative_path,
-                source_code="\n".join(lines[node.start_point[0]:node.end_point[0]+1]),
+                source_code=self.source.lines(node.start_point[0], node.end_point[0]),
                 start_line=node.start_point[0]+1,
                 end_line=node.end_point[0]+1,
                 has_docstring=False,
@@ -136,7 +135,7 @@ class TreeSitterGoAnalyzer:
         
         # Recursively process children
         for child in node.children:
-            self._extract_nodes(child, top_level_nodes, lines)
+            self._extract_nodes(child, top_level_nodes)
     
     def _extract_receiver_type(self, param_list) -> str:
         """Extract the receiver type from a method's parameter list."""
@@ -169,7 +168,7 @@ class TreeSitterGoAnalyzer:
                             if iface_child.type == "type_identifier":
                                 embedded_name = iface_child.text.decode()
                                 if not self._is_builtin_type(embedded_name):
-                                    self.call_relationships.append(CallRelationship(
+                                    self.call_relationships.append(CallRecord(
                                         caller=self._get_component_id(interface_name),
                                         callee=self._get_component_id(embedded_name),
                                         call_line=node.start_point[0]+1,
@@ -193,7 +192,7 @@ class TreeSitterGoAnalyzer:
             if containing:
                 callee = self._extract_call_target(node)
                 if callee and not self._is_builtin_type(callee):
-                    self.call_relationships.append(CallRelationship(
+                    self.call_relationships.append(CallRecord(
                         caller=containing,
                         callee=self._get_component_id(callee),
                         call_line=node.start_point[0]+1,
@@ -212,7 +211,7 @@ class TreeSitterGoAnalyzer:
                     if field.type == "field_declaration":
                         type_name = self._extract_type_from_field(field)
                         if type_name and not self._is_builtin_type(type_name):
-                            self.call_relationships.append(CallRelationship(
+                            self.call_relationships.append(CallRecord(
                                 caller=self._get_component_id(struct_name),
                                 callee=self._get_component_id(type_name),
                                 call_line=field.start_point[0]+1,
@@ -284,7 +283,7 @@ class TreeSitterGoAnalyzer:
         return type_name in builtins
 
 
-def analyze_go_file(file_path: str, content: str, repo_path: str = None) -> Tuple[List[Node], List[CallRelationship]]:
+def analyze_go_file(file_path: str, content: Union[str, bytes], repo_path: str = None) -> Tuple[List[ComponentRecord], List[CallRecord]]:
     """Analyze a Go file and return nodes and call relationships."""
     analyzer = TreeSitterGoAnalyzer(file_path, content, repo_path)
     return analyzer.nodes, analyzer.call_relationships
@@ -1,22 +1,23 @@
 import logging
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_java
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
 class TreeSitterJavaAnalyzer:
-	def __init__(self, file_path: str, content: str, repo_path: str = None):
+	def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
 		self.file_path = Path(file_path)
-		self.content = content
+		self.source = SourceBytes(content)
 		self.repo_path = repo_path or ""
-		self.nodes: List[Node] = []
-		self.call_relationships: List[CallRelationship] = []
+		self.nodes: List[ComponentRecord] = []
+		self.call_relationships: List[CallRecord] = []
 		self._analyze()
 	
 	def _get_module_path(self) -> str:
@@ -52,20 +53,18 @@ class TreeSitterJavaAnalyzer:
 			return f"{module_path}.{name}"
 
 	def _analyze(self):
-		language_capsule = tree_sitter_java.language()
-		java_language = Language(language_capsule)
-		parser = Parser(java_language)
-		tree = parser.parse(bytes(self.content, "utf8"))
+		parser = get_parser("java")
+		with parse_timer():
+			tree = parser.parse(self.source.data)
 		root = tree.root_node
-		lines = self.content.splitlines()
 		
 		top_level_nodes = {}
 		
-		self._extract_nodes(root, top_level_nodes, lines)
+		self._extract_nodes(root, top_level_nodes)
 		
 		self._extract_relationships(root, top_level_nodes)
 	
-	def _extract_nodes(self, node, top_level_nodes, lines):
+	def _extract_nodes(self, node, top_level_nodes):
 		node_type = None
 		node_name = None
 		
@@ -104,13 +103,13 @@ class TreeSitterJavaAnalyzer:
 		if node_type and node_name:
 			component_id = self._get_component_id(node_name)
 			relative_path = self._get_relative_path()
-			node_obj = Node(
+			node_obj = ComponentRecord(
 				id=component_id,
 				name=node_name,
 				component_type=node_type,
 				file_path=str(self.file_path),
 				relative_path=relative_path,
-				source_code="\n".join(lines[node.start_point[0]:node.end_point[0]+1]),
+				source_code=self.source.lines(node.start_point[0], node.end_point[0]),
 				start_line=node.start_point[0]+1,
 				end_line=node.end_point[0]+1,
 				has_docstring=False,
@@ -127,7 +126,7 @@ class TreeSitterJavaAnalyzer:
 		
 		# Recursively process children
 		for child in node.children:
-			self._extract_nodes(child, top_level_nodes, lines)
+			self._extract_nodes(child, top_level_nodes)
 	
 	def _extract_relationships(self, node, top_level_nodes):
 		# 1. Inheritance: Class extends another class
@@ -141,7 +140,7 @@ class TreeSitterJavaAnalyzer:
 				if class_name and base_class_name and not self._is_primitive_type(base_class_name):
 					caller_id = self._get_component_id(class_name)
 					callee_id = self._get_component_id(base_class_name)  
-					self.call_relationships.append(CallRelationship(
+					self.call_relationships.append(CallRecord(
 						caller=caller_id,
 						callee=callee_id,  
 						call_line=node.start_point[0]+1,
@@ -163,7 +162,7 @@ class TreeSitterJavaAnalyzer:
 								if interface_name and not self._is_primitive_type(interface_name):
 									caller_id = self._get_component_id(implementer_name)
 									callee_id = self._get_component_id(interface_name)  
-									self.call_relationships.append(CallRelationship(
+									self.call_relationships.append(CallRecord(
 										caller=caller_id,
 										callee=callee_id,  
 										call_line=node.start_point[0]+1,
@@ -177,7 +176,7 @@ class TreeSitterJavaAnalyzer:
 			if containing_class and type_node:
 				field_type_name = self._get_type_name(type_node)
 				if field_type_name and not self._is_primitive_type(field_type_name):
-					self.call_relationships.append(CallRelationship(
+					self.call_relationships.append(CallRecord(
 						caller=containing_class,
 						callee=field_type_name,  
 						call_line=node.start_point[0]+1,
@@ -212,7 +211,7 @@ class TreeSitterJavaAnalyzer:
 						target_type = self._find_variable_type(node, object_name, top_level_nodes)
 
 					if target_type and not self._is_primitive_type(target_type):
-						self.call_relationships.append(CallRelationship(
+						self.call_relationships.append(CallRecord(
 							caller=caller_id,
 							callee=target_type,
 							call_line=node.start_point[0]+1,
@@ -226,7 +225,7 @@ class TreeSitterJavaAnalyzer:
 			if containing_class and type_node:
 				created_type = self._get_type_name(type_node)
 				if created_type and not self._is_primitive_type(created_type):
-					self.call_relationships.append(CallRelationship(
+					self.call_relationships.append(CallRecord(
 						caller=containing_class,
 						callee=created_type,
 						call_line=node.start_point[0]+1,
@@ -351,6 +350,6 @@ class TreeSitterJavaAnalyzer:
 			current = current.parent
 		return None
 
-def analyze_java_file(file_path: str, content: str, repo_path: str = None) -> Tuple[List[Node], List[CallRelationship]]:
+def analyze_java_file(file_path: str, content: Union[str, bytes], repo_path: str = None) -> Tuple[List[ComponentRecord], List[CallRecord]]:
 	analyzer = TreeSitterJavaAnalyzer(file_path, content, repo_path)
 	return analyzer.nodes, analyzer.call_relationships
\ No newline at end of file
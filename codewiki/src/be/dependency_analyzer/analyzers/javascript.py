@@ -1,35 +1,50 @@
 import logging
 import os
-from typing import List, Set, Optional, Tuple
+from typing import List, Set, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 
-from tree_sitter import Parser, Language
-import tree_sitter_javascript
-import tree_sitter_typescript
 
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser, get_query, query_captures
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
+# Declarations that set the caller for the calls they contain
+SCOPE_TYPES = frozenset({
+    "class_declaration", "function_declaration", "generator_function_declaration", "lexical_declaration",
+})
+
+# What happens at one node, in the order the call pass handles it: JSDoc comments
+# are read with the enclosing caller before the node opens its own scope
+_JSDOC_BEFORE, _JSDOC_INSIDE, _SCOPE, _CALL = range(4)
+
+
+def _document_order(node):
+    """Sort key putting captured nodes in pre-order (start offset, enclosing node first)."""
+    return (node.start_byte, -node.end_byte)
+
 
 class TreeSitterJSAnalyzer:
-    def __init__(self, file_path: str, content: str, repo_path: str = None):
+    def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
         self.file_path = Path(file_path)
-        self.content = content
+        self.source = SourceBytes(content)
         self.repo_path = repo_path or ""
-        self.nodes: List[Node] = []
-        self.call_relationships: List[CallRelationship] = []
+        self.nodes: List[ComponentRecord] = []
+        self.call_relationships: List[CallRecord] = []
         
         self.top_level_nodes = {}
+        self._relative_path: Optional[str] = None
+        self._module_path: Optional[str] = None
         
         self.seen_relationships = set()
 
         try:
-            language_capsule = tree_sitter_javascript.language()
-            self.js_language = Language(language_capsule)
-            self.parser = Parser(self.js_language)
+            self.parser = get_parser("javascript")
+            self.js_language = self.parser.language
 
         except Exception as e:
             logger.error(f"Failed to initialize JavaScript parser: {e}")
@@ -37,7 +52,7 @@ class TreeSitterJSAnalyzer:
             self.js_language = None
 
 
-    def _add_relationship(self, relationship: CallRelationship) -> bool:
+    def _add_relationship(self, relationship: CallRecord) -> bool:
         rel_key = (relationship.caller, relationship.callee, relationship.call_line)
         
         if rel_key not in self.seen_relationships:
@@ -52,13 +67,19 @@ class TreeSitterJSAnalyzer:
             return
 
         try:
-            tree = self.parser.parse(bytes(self.content, "utf8"))
+            with parse_timer():
+                tree = self.parser.parse(self.source.data)
             root_node = tree.root_node
 
             logger.debug(f"Parsed AST with root node type: {root_node.type}")
 
-            self._extract_functions(root_node)
-            self._extract_call_relationships(root_node)
+            captures = self._capture_nodes(root_node)
+            definitions = sorted(captures.get("definition", ()), key=_document_order)
+
+            self._extract_functions(definitions)
+            self._extract_call_relationships(
+                definitions, captures.get("reference", ()), captures.get("comment", ())
+            )
 
             logger.debug(
                 f"Analysis complete: {len(self.nodes)} nodes, {len(self.call_relationships)} relationships"
@@ -67,29 +88,33 @@ class TreeSitterJSAnalyzer:
         except Exception as e:
             logger.error(f"Error analyzing JavaScript file {self.file_path}: {e}", exc_info=True)
 
+    def _capture_nodes(self, root_node) -> dict:
+        """Declaration, call and comment nodes of the file, from one run of the JavaScript query."""
+        return query_captures(get_query("javascript"), root_node)
+
     def _get_module_path(self) -> str:
-        if self.repo_path:
-            try:
-                rel_path = os.path.relpath(str(self.file_path), self.repo_path)
-            except ValueError:
-                rel_path = str(self.file_path)
-        else:
-            rel_path = str(self.file_path)
+        # Called for every component and relationship; cached with the relative path
+        if self._module_path is not None:
+            return self._module_path
+        rel_path = self._get_relative_path()
         
         for ext in ['.js', '.ts', '.jsx', '.tsx', '.mjs', '.cjs']:
             if rel_path.endswith(ext):
                 rel_path = rel_path[:-len(ext)]
                 break
-        return rel_path.replace('/', '.').replace('\\', '.')
+        self._module_path = rel_path.replace('/', '.').replace('\\', '.')
+        return self._module_path
     
     def _get_relative_path(self) -> str:
-        if self.repo_path:
-            try:
-                return os.path.relpath(str(self.file_path), self.repo_path)
-            except ValueError:
-                return str(self.file_path)
-        else:
-            return str(self.file_path)
+        if self._relative_path is None:
+            if self.repo_path:
+                try:
+                    self._relative_path = os.path.relpath(str(self.file_path), self.repo_path)
+                except ValueError:
+                    self._relative_path = str(self.file_path)
+            else:
+                self._relative_path = str(self.file_path)
+        return self._relative_path
 
     def _get_component_id(self, name: str, class_name: str = None, is_method: bool = False) -> str:
         module_path = self._get_module_path()
@@ -113,48 +138,37 @@ class TreeSitterJSAnalyzer:
             parent = parent.parent
         return None
 
-    def _extract_functions(self, node) -> None:
-        self._traverse_for_functions(node)
-        self.nodes.sort(key=lambda n: n.start_line)
-
-    def _traverse_for_functions(self, node) -> None:
-        if node.type in ["class_declaration", "abstract_class_declaration", "interface_declaration"]:
-            cls = self._extract_class_declaration(node)
-            if cls:
-                self.nodes.append(cls)
-                self.top_level_nodes[cls.name] = cls
-                
-                self._extract_methods_from_class(node, cls.name)
-                
-        elif node.type == "function_declaration":
-            containing_class = self._find_containing_class(node)
-            if containing_class is None:
-                func = self._extract_function_declaration(node)
-                if func and self._should_include_function(func):
-                    self.nodes.append(func)
-                    self.top_level_nodes[func.name] = func
-        elif node.type == "generator_function_declaration":
-            containing_class = self._find_containing_class(node)
-            if containing_class is None:
-                func = self._extract_function_declaration(node)
-                if func and self._should_include_function(func):
-                    self.nodes.append(func)
-                    self.top_level_nodes[func.name] = func
-        elif node.type == "export_statement":
-            func = self._extract_exported_function(node)
-            if func and self._should_include_function(func):
-                self.nodes.append(func)
-                self.top_level_nodes[func.name] = func
-        elif node.type == "lexical_declaration":
-            containing_class = self._find_containing_class(node)
-            if containing_class is None:
-                func = self._extract_arrow_function_from_declaration(node)
+    def _extract_functions(self, definitions) -> None:
+        for node in definitions:
+            if node.type == "class_declaration":
+                cls = self._extract_class_declaration(node)
+                if cls:
+                    self.nodes.append(cls)
+                    self.top_level_nodes[cls.name] = cls
+                    
+                    self._extract_methods_from_class(node, cls.name)
+                    
+            elif node.type in ("function_declaration", "generator_function_declaration"):
+                containing_class = self._find_containing_class(node)
+                if containing_class is None:
+                    func = self._extract_function_declaration(node)
+                    if func and self._should_include_function(func):
+                        self.nodes.append(func)
+                        self.top_level_nodes[func.name] = func
+            elif node.type == "export_statement":
+                func = self._extract_exported_function(node)
                 if func and self._should_include_function(func):
                     self.nodes.append(func)
                     self.top_level_nodes[func.name] = func
-        
-        for child in node.children:
-            self._traverse_for_functions(child)
+            elif node.type == "lexical_declaration":
+                containing_class = self._find_containing_class(node)
+                if containing_class is None:
+                    func = self._extract_arrow_function_from_declaration(node)
+                    if func and self._should_include_function(func):
+                        self.nodes.append(func)
+                        self.top_level_nodes[func.name] = func
+
+        self.nodes.sort(key=lambda n: n.start_line)
 
     def _extract_methods_from_class(self, class_node, class_name: str) -> None:
         class_body = self._find_child_by_type(class_node, "class_body")
@@ -205,7 +219,7 @@ class TreeSitterJSAnalyzer:
                 return True
         return False
 
-    def _create_method_node(self, node, method_name: str, class_name: str) -> Optional[Node]:
+    def _create_method_node(self, node, method_name: str, class_name: str) -> Optional[ComponentRecord]:
         """Create a method node for relationship mapping."""
         try:
             line_start = node.start_point[0] + 1
@@ -213,13 +227,13 @@ class TreeSitterJSAnalyzer:
             component_id = self._get_component_id(method_name, class_name, is_method=True)
             relative_path = self._get_relative_path()
             
-            return Node(
+            return ComponentRecord(
                 id=component_id,
                 name=method_name,
                 component_type="method",
                 file_path=str(self.file_path),
                 relative_path=relative_path,
-                source_code="\n".join(self.content.splitlines()[line_start - 1 : line_end]),
+                source_code=self.source.lines(line_start - 1, line_end - 1),
                 start_line=line_start,
                 end_line=line_end,
                 has_docstring=False,
@@ -235,7 +249,7 @@ class TreeSitterJSAnalyzer:
             logger.debug(f"Error creating method node for {method_name}: {e}")
             return None
 
-    def _extract_class_declaration(self, node) -> Optional[Node]:
+    def _extract_class_declaration(self, node) -> Optional[ComponentRecord]:
         """Extract class/abstract class/interface declaration."""
         try:
             name_node = self._find_child_by_type(node, "type_identifier")
@@ -253,7 +267,7 @@ class TreeSitterJSAnalyzer:
                 for child in heritage_node.children:
                     if child.type in ["identifier", "type_identifier"]:
                         base_classes.append(self._get_node_text(child))
-            code_snippet = "\n".join(self.content.splitlines()[line_start - 1 : line_end])
+            code_snippet = self.source.lines(line_start - 1, line_end - 1)
             
             if node.type == "abstract_class_declaration":
                 node_type = "abstract class"
@@ -268,7 +282,7 @@ class TreeSitterJSAnalyzer:
             component_id = self._get_component_id(name, is_method=False)
             relative_path = self._get_relative_path()
             
-            return Node(
+            return ComponentRecord(
                 id=component_id,
                 name=name,
                 component_type=node_type,
@@ -289,7 +303,7 @@ class TreeSitterJSAnalyzer:
         except Exception:
             return None
 
-    def _extract_function_declaration(self, node) -> Optional[Node]:
+    def _extract_function_declaration(self, node) -> Optional[ComponentRecord]:
         try:
             name_node = self._find_child_by_type(node, "identifier")
             if not name_node:
@@ -317,7 +331,7 @@ class TreeSitterJSAnalyzer:
             component_id = self._get_component_id(func_name, is_method=False)
             relative_path = self._get_relative_path()
 
-            return Node(
+            return ComponentRecord(
                 id=component_id,
                 name=func_name,
                 component_type="function",
@@ -338,7 +352,7 @@ class TreeSitterJSAnalyzer:
         except Exception as e:
             logger.debug(f"Error extracting function declaration: {e}")
             return None
-    def _extract_exported_function(self, node) -> Optional[Node]:
+    def _extract_exported_function(self, node) -> Optional[ComponentRecord]:
         """Extract export function or export default function"""
         try:
             func_decl = self._find_child_by_type(node, "function_declaration")
@@ -353,7 +367,7 @@ class TreeSitterJSAnalyzer:
             logger.debug(f"Error extracting exported function: {e}")
         return None
 
-    def _extract_arrow_function_from_declaration(self, node) -> Optional[Node]:
+    def _extract_arrow_function_from_declaration(self, node) -> Optional[ComponentRecord]:
         """Extract arrow function or function expression from const/let/var declarations."""
         try:
             for child in node.children:
@@ -373,7 +387,7 @@ class TreeSitterJSAnalyzer:
                         component_id = self._get_component_id(func_name, is_method=False)
                         relative_path = self._get_relative_path()
 
-                        return Node(
+                        return ComponentRecord(
                             id=component_id,
                             name=func_name,
                             component_type="function",
@@ -396,7 +410,7 @@ class TreeSitterJSAnalyzer:
             logger.debug(f"Error extracting function from declaration: {e}")
         return None
 
-    def _should_include_function(self, func: Node) -> bool:
+    def _should_include_function(self, func: ComponentRecord) -> bool:
         excluded_names = {}
 
         if func.name.lower() in excluded_names:
@@ -414,15 +428,67 @@ class TreeSitterJSAnalyzer:
                     parameters.append(self._get_node_text(child))
         return parameters
 
-    def _extract_call_relationships(self, node) -> None:
-        current_top_level = None
-        self._traverse_for_calls(node, current_top_level)
+    def _extract_call_relationships(self, definitions, references, comments) -> None:
+        """
+        Attribute calls and JSDoc type references to their enclosing declaration.
+
+        Declarations, calls and comments are visited together in document order. A
+        stack of the open declarations (by end offset) gives the caller at each node.
+        A JSDoc comment is read at the node that follows it and at the node that
+        contains it, with the caller enclosing that node.
+        """
+        events = []
+        for node in definitions:
+            if node.type in SCOPE_TYPES:
+                events.append((node.start_byte, -node.end_byte, _SCOPE, 0, node, None))
+        for node in references:
+            events.append((node.start_byte, -node.end_byte, _CALL, 0, node, None))
+        for comment in comments:
+            comment_text = self._get_node_text(comment)
+            if "@" not in comment_text:
+                continue
+            following = comment.next_sibling
+            if following is not None:
+                events.append((following.start_byte, -following.end_byte, _JSDOC_BEFORE,
+                               comment.start_byte, following, comment_text))
+            parent = comment.parent
+            if parent is not None:
+                events.append((parent.start_byte, -parent.end_byte, _JSDOC_INSIDE,
+                               comment.start_byte, parent, comment_text))
+        events.sort(key=lambda event: event[:4])
+
+        open_scopes = []  # (end_byte, current_top_level) of enclosing declarations
+        for _, _, kind, _, node, comment_text in events:
+            end_byte = node.end_byte
+            while open_scopes and open_scopes[-1][0] < end_byte:
+                open_scopes.pop()
+            current_top_level = open_scopes[-1][1] if open_scopes else None
+
+            if kind == _SCOPE:
+                open_scopes.append((end_byte, self._enter_scope(node, current_top_level)))
+            elif not current_top_level:
+                continue
+            elif kind == _CALL:
+                if node.type == "call_expression":
+                    call_info = self._extract_call_from_node(node, current_top_level)
+                    if call_info:
+                        self._add_relationship(call_info)
+                else:
+                    callee_name = self._extract_callee_name(node)
+                    if callee_name:
+                        call_info = CallRecord(
+                            caller=f"{self._get_module_path()}.{current_top_level}",
+                            callee=f"{self._get_module_path()}.{callee_name}",
+                            call_line=node.start_point[0] + 1,
+                            is_resolved=False
+                        )
+                        self._add_relationship(call_info)
+            else:
+                self._parse_jsdoc_types(comment_text, current_top_level, node.start_point[0] + 1)
 
-    def _traverse_for_calls(self, node, current_top_level) -> None:
-        if current_top_level:
-            self._extract_jsdoc_type_dependencies(node, current_top_level)
-        
-        if node.type in ["class_declaration", "abstract_class_declaration", "interface_declaration"]:
+    def _enter_scope(self, node, current_top_level: Optional[str]) -> Optional[str]:
+        """Caller for the contents of a declaration; classes also record their base classes."""
+        if node.type == "class_declaration":
             name_node = self._find_child_by_type(node, "type_identifier") or self._find_child_by_type(node, "identifier")
             if name_node:
                 current_top_level = self._get_node_text(name_node)
@@ -434,7 +500,7 @@ class TreeSitterJSAnalyzer:
                             base_class = self._get_node_text(child)
                             caller_id = self._get_component_id(current_top_level)
                             callee_id = f"{self._get_module_path()}.{base_class}" 
-                            inheritance_rel = CallRelationship(
+                            inheritance_rel = CallRecord(
                                 caller=caller_id,
                                 callee=callee_id,
                                 call_line=node.start_point[0] + 1,
@@ -442,11 +508,7 @@ class TreeSitterJSAnalyzer:
                             )
                             self._add_relationship(inheritance_rel)
                             
-        elif node.type == "function_declaration":
-            name_node = self._find_child_by_type(node, "identifier")
-            if name_node:
-                current_top_level = self._get_node_text(name_node)
-        elif node.type == "generator_function_declaration":
+        elif node.type in ("function_declaration", "generator_function_declaration"):
             name_node = self._find_child_by_type(node, "identifier")
             if name_node:
                 current_top_level = self._get_node_text(name_node)
@@ -457,34 +519,9 @@ class TreeSitterJSAnalyzer:
                     func_node = self._find_child_by_type(child, "arrow_function") or self._find_child_by_type(child, "function_expression")
                     if name_node and func_node:
                         current_top_level = self._get_node_text(name_node)
+        return current_top_level
 
-        if node.type == "call_expression" and current_top_level:
-            call_info = self._extract_call_from_node(node, current_top_level)
-            if call_info:
-                self._add_relationship(call_info)
-        
-        elif node.type == "await_expression" and current_top_level:
-            call_expr = self._find_child_by_type(node, "call_expression")
-            if call_expr:
-                call_info = self._extract_call_from_node(call_expr, current_top_level)
-                if call_info:
-                    self._add_relationship(call_info)
-        
-        elif node.type == "new_expression" and current_top_level:
-            callee_name = self._extract_callee_name(node)
-            if callee_name:
-                call_info = CallRelationship(
-                    caller=f"{self._get_module_path()}.{current_top_level}",
-                    callee=f"{self._get_module_path()}.{callee_name}",
-                    call_line=node.start_point[0] + 1,
-                    is_resolved=False
-                )
-                self._add_relationship(call_info)
-
-        for child in node.children:
-            self._traverse_for_calls(child, current_top_level)
-
-    def _extract_call_from_node(self, node, caller_name: str) -> Optional[CallRelationship]:
+    def _extract_call_from_node(self, node, caller_name: str) -> Optional[CallRecord]:
         """Extract call relationship from a call_expression node."""
         try:
             call_line = node.start_point[0] + 1
@@ -512,14 +549,14 @@ class TreeSitterJSAnalyzer:
             
             callee_id = f"{self._get_module_path()}.{callee_name}"
             if callee_name in self.top_level_nodes:
-                return CallRelationship(
+                return CallRecord(
                     caller=caller_id,
                     callee=callee_id,
                     call_line=call_line,
                     is_resolved=True,
                 )
             
-            return CallRelationship(
+            return CallRecord(
                 caller=caller_id,
                 callee=callee_id,
                 call_line=call_line,
@@ -530,23 +567,6 @@ class TreeSitterJSAnalyzer:
             logger.debug(f"Error extracting call relationship: {e}")
             return None
 
-    def _extract_jsdoc_type_dependencies(self, node, caller_name: str) -> None:
-        """Extract type dependencies from JSDoc comments."""
-        try:
-            if hasattr(node, 'prev_sibling') and node.prev_sibling:
-                prev = node.prev_sibling
-                if prev.type == "comment":
-                    comment_text = self._get_node_text(prev)
-                    self._parse_jsdoc_types(comment_text, caller_name, node.start_point[0] + 1)
-            
-            for child in node.children:
-                if child.type == "comment":
-                    comment_text = self._get_node_text(child)
-                    self._parse_jsdoc_types(comment_text, caller_name, node.start_point[0] + 1)
-                    
-        except Exception as e:
-            logger.debug(f"Error extracting JSDoc dependencies: {e}")
-
     def _parse_jsdoc_types(self, comment_text: str, caller_name: str, line_number: int) -> None:
         """Parse JSDoc comment text and extract type references."""
         import re
@@ -571,7 +591,7 @@ class TreeSitterJSAnalyzer:
                             caller_id = f"{self._get_module_path()}.{caller_name}"
                             callee_id = f"{self._get_module_path()}.{base_type}"
                             
-                            type_rel = CallRelationship(
+                            type_rel = CallRecord(
                                 caller=caller_id,
                                 callee=callee_id,
                                 call_line=line_number,
@@ -659,9 +679,7 @@ class TreeSitterJSAnalyzer:
         return None
 
     def _get_node_text(self, node) -> str:
-        start_byte = node.start_byte
-        end_byte = node.end_byte
-        return self.content.encode("utf8")[start_byte:end_byte].decode("utf8")
+        return self.source.node_text(node)
 
     def _find_containing_class_name(self, method_node) -> Optional[str]:
         current = method_node.parent
@@ -683,8 +701,8 @@ class TreeSitterJSAnalyzer:
         return None
 
 def analyze_javascript_file_treesitter(
-    file_path: str, content: str, repo_path: str = None
-) -> Tuple[List[Node], List[CallRelationship]]:
+    file_path: str, content: Union[str, bytes], repo_path: str = None
+) -> Tuple[List[ComponentRecord], List[CallRecord]]:
     """Analyze a JavaScript file using tree-sitter."""
     try:
         logger.debug(f"Tree-sitter JS analysis for {file_path}")
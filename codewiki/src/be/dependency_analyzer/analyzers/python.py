@@ -1,13 +1,14 @@
 import ast
 import logging
 import warnings
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from pathlib import Path
 import sys
 import os
 
 
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +28,14 @@ class PythonASTAnalyzer(ast.NodeVisitor):
         self.repo_path = repo_path
         self.content = content
         self.lines = content.splitlines()
-        self.nodes: List[Node] = []
-        self.call_relationships: List[CallRelationship] = []
+        self.nodes: List[ComponentRecord] = []
+        self.call_relationships: List[CallRecord] = []
         self.current_class_name: str | None = None
         self.current_function_name: str | None = None
         
         self.top_level_nodes = {}
+        # Local name -> qualified name it was imported as; "*module" for star imports
+        self.imports: Dict[str, str] = {}
     
     def _get_relative_path(self) -> str:
         """Get relative path from repo root."""
@@ -73,7 +76,7 @@ class PythonASTAnalyzer(ast.NodeVisitor):
         component_id = f"{self._get_module_path()}.{node.name}"
         relative_path = self._get_relative_path()
         
-        class_node = Node(
+        class_node = ComponentRecord(
             id=component_id,
             name=node.name,
             component_type="class",
@@ -96,7 +99,7 @@ class PythonASTAnalyzer(ast.NodeVisitor):
 
         for base_name in base_classes:
             if base_name in self.top_level_nodes:
-                self.call_relationships.append(CallRelationship(
+                self.call_relationships.append(CallRecord(
                     caller=component_id,
                     callee=f"{self._get_module_path()}.{base_name}",
                     call_line=node.lineno,
@@ -129,7 +132,7 @@ class PythonASTAnalyzer(ast.NodeVisitor):
             component_id = f"{self._get_module_path()}.{node.name}"
             relative_path = self._get_relative_path()
             
-            func_node = Node(
+            func_node = ComponentRecord(
                 id=component_id,
                 name=node.name,
                 component_type="function",
@@ -155,7 +158,7 @@ class PythonASTAnalyzer(ast.NodeVisitor):
         self.generic_visit(node)
         self.current_function_name = None
 
-    def _should_include_function(self, func: Node) -> bool:
+    def _should_include_function(self, func: ComponentRecord) -> bool:
         if func.name.startswith("_test_"):
             return False
         return True
@@ -168,6 +171,31 @@ class PythonASTAnalyzer(ast.NodeVisitor):
         """Visit async function definition and extract function information."""
         self._process_function_node(node)
 
+    def visit_Import(self, node: ast.Import):
+        """Record `import a.b` (binds `a`) and `import a.b as c` (binds `c` to `a.b`)."""
+        for alias in node.names:
+            if alias.asname:
+                self.imports[alias.asname] = alias.name
+            else:
+                head = alias.name.split(".")[0]
+                self.imports[head] = head
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        """Record `from m import x [as y]`, resolving relative imports against this module."""
+        module = node.module or ""
+        if node.level:
+            package = self._get_module_path().split(".")[:-1]
+            if node.level > 1:
+                package = package[:-(node.level - 1)]
+            module = ".".join(filter(None, [".".join(package), module]))
+        if not module:
+            return
+        for alias in node.names:
+            if alias.name == "*":
+                self.imports[f"*{module}"] = module
+            else:
+                self.imports[alias.asname or alias.name] = f"{module}.{alias.name}"
+
     def visit_Call(self, node: ast.Call):
         """Visit function call nodes and record relationships between top-level nodes."""
 
@@ -184,7 +212,7 @@ class PythonASTAnalyzer(ast.NodeVisitor):
                 else:
                     callee_id = call_name
                 
-                relationship = CallRelationship(
+                relationship = CallRecord(
                     caller=caller_id,
                     callee=callee_id,
                     call_line=node.lineno,
@@ -232,7 +260,8 @@ class PythonASTAnalyzer(ast.NodeVisitor):
             # These warnings come from regex patterns like '\(' or '\.' in the analyzed files
             with warnings.catch_warnings():
                 warnings.filterwarnings("ignore", category=SyntaxWarning)
-                tree = ast.parse(self.content)
+                with parse_timer():
+                    tree = ast.parse(self.content)
             self.visit(tree)
 
             logger.debug(
@@ -247,9 +276,9 @@ class PythonASTAnalyzer(ast.NodeVisitor):
 
 def analyze_python_file(
     file_path: str, content: str, repo_path: Optional[str] = None
-) -> Tuple[List[Node], List[CallRelationship]]:
+) -> Tuple[List[ComponentRecord], List[CallRecord], Dict[str, str]]:
     """
-    Analyze a Python file and return classes, functions, methods, and relationships.
+    Analyze a Python file and return classes, functions, relationships and imports.
 
     Args:
         file_path: Path to the Python file
@@ -257,10 +286,10 @@ def analyze_python_file(
         repo_path: Repository root path for calculating relative paths
 
     Returns:
-        tuple: (classes, functions, methods, call_relationships)
+        tuple: (nodes, call_relationships, import table)
     """
 
     analyzer = PythonASTAnalyzer(file_path, content, repo_path)
     analyzer.analyze()
-    return analyzer.nodes, analyzer.call_relationships
+    return analyzer.nodes, analyzer.call_relationships, analyzer.imports
 
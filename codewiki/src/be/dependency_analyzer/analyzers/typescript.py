@@ -1,33 +1,52 @@
 import logging
 import os
-from typing import List, Set, Optional, Tuple
+from bisect import bisect_left
+from typing import List, Set, Optional, Tuple, Union
 from pathlib import Path
 import sys
 import os
 from traceback import print_exc
 
-from tree_sitter import Parser, Language
-import tree_sitter_typescript
 
-from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.models.records import ComponentRecord, CallRecord
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import parse_timer
+from codewiki.src.be.dependency_analyzer.utils.parser_registry import get_parser, get_query, query_captures
+from codewiki.src.be.dependency_analyzer.utils.source_bytes import SourceBytes
 
 logger = logging.getLogger(__name__)
 
+# Declarations that set the top-level caller for the references they contain
+SCOPE_TYPES = frozenset({
+    "function_declaration", "generator_function_declaration",
+    "class_declaration", "abstract_class_declaration",
+    "interface_declaration", "type_alias_declaration", "enum_declaration",
+    "export_statement", "lexical_declaration", "variable_declaration",
+})
+
+
+def _document_order(node):
+    """Sort key putting captured nodes in pre-order (start offset, enclosing node first)."""
+    return (node.start_byte, -node.end_byte)
+
+
 class TreeSitterTSAnalyzer:
 
-    def __init__(self, file_path: str, content: str, repo_path: str = None):
+    def __init__(self, file_path: str, content: Union[str, bytes], repo_path: str = None):
         self.file_path = Path(file_path)
-        self.content = content
+        self.source = SourceBytes(content)
         self.repo_path = repo_path or ""
-        self.nodes: List[Node] = []
-        self.call_relationships: List[CallRelationship] = []
+        self.nodes: List[ComponentRecord] = []
+        self.call_relationships: List[CallRecord] = []
         
         self.top_level_nodes = {}
+        self._relative_path: Optional[str] = None
+        self._module_path: Optional[str] = None
+        self._type_identifiers = []
+        self._type_identifier_starts: List[int] = []
 
         try:
-            language_capsule = tree_sitter_typescript.language_typescript()
-            self.ts_language = Language(language_capsule)
-            self.parser = Parser(self.ts_language)
+            self.parser = get_parser("typescript")
+            self.ts_language = self.parser.language
 
         except Exception as e:
             logger.error(f"Failed to initialize TypeScript parser: {e}")
@@ -40,63 +59,69 @@ class TreeSitterTSAnalyzer:
             return
 
         try:
-            tree = self.parser.parse(bytes(self.content, "utf8"))
+            with parse_timer():
+                tree = self.parser.parse(self.source.data)
             root_node = tree.root_node
 
             logger.debug(f"Parsed AST with root node type: {root_node.type}")
 
+            captures = self._capture_nodes(root_node)
+            definitions = sorted(captures.get("definition", ()), key=_document_order)
+
             all_entities = {}  
-            self._extract_all_entities(root_node, all_entities)
+            self._extract_all_entities(definitions, all_entities)
             
             self._filter_top_level_declarations(all_entities)
             
-            self._extract_all_relationships(root_node, all_entities)
+            type_identifiers = sorted(captures.get("type_identifier", ()), key=_document_order)
+            self._type_identifiers = type_identifiers
+            self._type_identifier_starts = [node.start_byte for node in type_identifiers]
+            self._extract_all_relationships(definitions, captures.get("reference", ()), all_entities)
 
         except Exception as e:
             logger.error(f"Error analyzing TypeScript file {self.file_path}: {e}", exc_info=True)
 
-    def _extract_all_entities(self, node, all_entities: dict, depth=0) -> None:
-        entity = None
-        entity_name = None
-        
-        if node.type == "function_declaration":
-            entity = self._extract_function_entity(node, "function", depth)
-        elif node.type == "generator_function_declaration":
-            entity = self._extract_function_entity(node, "generator_function", depth)
-        elif node.type == "arrow_function":
-            entity = self._extract_arrow_function_entity(node, depth)
-        elif node.type == "method_definition":
-            entity = self._extract_method_entity(node, depth)
-        elif node.type == "class_declaration":
-            entity = self._extract_class_entity(node, "class", depth)
-        elif node.type == "abstract_class_declaration":
-            entity = self._extract_class_entity(node, "abstract_class", depth)
-        elif node.type == "interface_declaration":
-            entity = self._extract_interface_entity(node, depth)
-        elif node.type == "type_alias_declaration":
-            entity = self._extract_type_alias_entity(node, depth)
-        elif node.type == "enum_declaration":
-            entity = self._extract_enum_entity(node, depth)
-        elif node.type == "variable_declarator":
-            entity = self._extract_variable_entity(node, depth)
-        elif node.type == "export_statement":
-            entity = self._extract_export_statement_entity(node, depth)
-        elif node.type == "lexical_declaration":
-            entity = self._extract_lexical_declaration_entity(node, depth)
-        elif node.type == "variable_declaration":
-            entity = self._extract_variable_declaration_entity(node, depth)
-        elif node.type == "ambient_declaration":
-            entity = self._extract_ambient_declaration_entity(node, depth)
-        
-        if entity and entity.get('name'):
-            entity_name = entity['name']
-            entity['depth'] = depth  
-            entity['node'] = node   
-            entity['parent_context'] = self._get_parent_context(node)  
-            all_entities[entity_name] = entity
-        
-        for child in node.children:
-            self._extract_all_entities(child, all_entities, depth + 1)
+    def _capture_nodes(self, root_node) -> dict:
+        """Declaration and reference nodes of the file, from one run of the TypeScript query."""
+        return query_captures(get_query("typescript"), root_node)
+
+    def _extract_all_entities(self, definitions, all_entities: dict) -> None:
+        for node in definitions:
+            entity = None
+            
+            if node.type == "function_declaration":
+                entity = self._extract_function_entity(node, "function")
+            elif node.type == "generator_function_declaration":
+                entity = self._extract_function_entity(node, "generator_function")
+            elif node.type == "arrow_function":
+                entity = self._extract_arrow_function_entity(node)
+            elif node.type == "method_definition":
+                entity = self._extract_method_entity(node)
+            elif node.type == "class_declaration":
+                entity = self._extract_class_entity(node, "class")
+            elif node.type == "abstract_class_declaration":
+                entity = self._extract_class_entity(node, "abstract_class")
+            elif node.type == "interface_declaration":
+                entity = self._extract_interface_entity(node)
+            elif node.type == "type_alias_declaration":
+                entity = self._extract_type_alias_entity(node)
+            elif node.type == "enum_declaration":
+                entity = self._extract_enum_entity(node)
+            elif node.type == "variable_declarator":
+                entity = self._extract_variable_entity(node)
+            elif node.type == "export_statement":
+                entity = self._extract_export_statement_entity(node)
+            elif node.type == "lexical_declaration":
+                entity = self._extract_lexical_declaration_entity(node)
+            elif node.type == "variable_declaration":
+                entity = self._extract_variable_declaration_entity(node)
+            elif node.type == "ambient_declaration":
+                entity = self._extract_ambient_declaration_entity(node)
+            
+            if entity and entity.get('name'):
+                entity['node'] = node   
+                entity['parent_context'] = self._get_parent_context(node)  
+                all_entities[entity['name']] = entity
     
     def _filter_top_level_declarations(self, all_entities: dict) -> None:
         for entity_name, entity_data in all_entities.items():
@@ -155,7 +180,7 @@ class TreeSitterTSAnalyzer:
             current = current.parent
         return False
 
-    def _extract_ambient_declaration_entity(self, node, depth: int) -> dict:
+    def _extract_ambient_declaration_entity(self, node) -> dict:
         name = ""
         for child in node.children:
             if child.type == "module":
@@ -197,7 +222,7 @@ class TreeSitterTSAnalyzer:
             if node.parent.parent and node.parent.parent.type in ["module", "ambient_declaration"]:
                 return "module_block"
             return "statement_block"
-    def _extract_function_entity(self, node, func_type: str, depth: int) -> dict:
+    def _extract_function_entity(self, node, func_type: str) -> dict:
         name_node = self._find_child_by_type(node, "identifier")
         if not name_node:
             return None
@@ -221,7 +246,7 @@ class TreeSitterTSAnalyzer:
             'is_async': is_async
         }
     
-    def _extract_arrow_function_entity(self, node, depth: int) -> dict:
+    def _extract_arrow_function_entity(self, node) -> dict:
         """Extract arrow function"""
         parent = node.parent
         if parent and parent.type == "variable_declarator":
@@ -247,7 +272,7 @@ class TreeSitterTSAnalyzer:
                 }
         return None
     
-    def _extract_method_entity(self, node, depth: int) -> dict:
+    def _extract_method_entity(self, node) -> dict:
         """Extract method entity (at any depth)."""
         name_node = self._find_child_by_type(node, "property_identifier")
         if not name_node:
@@ -275,7 +300,7 @@ class TreeSitterTSAnalyzer:
             'is_static': is_static
         }
     
-    def _extract_class_entity(self, node, class_type: str, depth: int) -> dict:
+    def _extract_class_entity(self, node, class_type: str) -> dict:
         name_node = self._find_child_by_type(node, "type_identifier") or self._find_child_by_type(node, "identifier")
         if not name_node:
             return None
@@ -299,7 +324,7 @@ class TreeSitterTSAnalyzer:
             'end_line': node.end_point[0] + 1
         }
     
-    def _extract_interface_entity(self, node, depth: int) -> dict:
+    def _extract_interface_entity(self, node) -> dict:
         name_node = self._find_child_by_type(node, "type_identifier")
         if not name_node:
             return None
@@ -323,7 +348,7 @@ class TreeSitterTSAnalyzer:
             'end_line': node.end_point[0] + 1
         }
     
-    def _extract_type_alias_entity(self, node, depth: int) -> dict:
+    def _extract_type_alias_entity(self, node) -> dict:
         name_node = self._find_child_by_type(node, "type_identifier")
         if not name_node:
             return None
@@ -341,7 +366,7 @@ class TreeSitterTSAnalyzer:
             'end_line': node.end_point[0] + 1
         }
     
-    def _extract_enum_entity(self, node, depth: int) -> dict:
+    def _extract_enum_entity(self, node) -> dict:
         name_node = self._find_child_by_type(node, "identifier")
         if not name_node:
             return None
@@ -359,7 +384,7 @@ class TreeSitterTSAnalyzer:
             'end_line': node.end_point[0] + 1
         }
     
-    def _extract_variable_entity(self, node, depth: int) -> dict:
+    def _extract_variable_entity(self, node) -> dict:
         name_node = self._find_child_by_type(node, "identifier")
         if not name_node:
             return None
@@ -380,7 +405,7 @@ class TreeSitterTSAnalyzer:
             'has_function': bool(has_function)
         }
     
-    def _extract_export_statement_entity(self, node, depth: int) -> dict:
+    def _extract_export_statement_entity(self, node) -> dict:
         code_snippet = self._get_node_text(node)
         
         func_decl = self._find_child_by_type(node, "function_declaration")
@@ -478,7 +503,7 @@ class TreeSitterTSAnalyzer:
         
         return None 
     
-    def _extract_lexical_declaration_entity(self, node, depth: int) -> dict:
+    def _extract_lexical_declaration_entity(self, node) -> dict:
         """Extract lexical declaration entity (const/let)."""
         # Find the variable declarator
         var_declarator = self._find_child_by_type(node, "variable_declarator")
@@ -510,7 +535,7 @@ class TreeSitterTSAnalyzer:
             'declaration_type': decl_type
         }
     
-    def _extract_variable_declaration_entity(self, node, depth: int) -> dict:
+    def _extract_variable_declaration_entity(self, node) -> dict:
         var_declarator = self._find_child_by_type(node, "variable_declarator")
         if not var_declarator:
             return None
@@ -537,8 +562,8 @@ class TreeSitterTSAnalyzer:
             'declaration_type': 'var'
         }
     
-    def _create_node_from_entity(self, entity_data: dict) -> Optional[Node]:
-        """Create Node object from entity data."""
+    def _create_node_from_entity(self, entity_data: dict) -> Optional[ComponentRecord]:
+        """Create ComponentRecord object from entity data."""
         try:
             component_type = entity_data['type']
             name = entity_data['name']
@@ -547,7 +572,7 @@ class TreeSitterTSAnalyzer:
             component_id = self._get_component_id(name)
             relative_path = self._get_relative_path()
             
-            return Node(
+            return ComponentRecord(
                 id=component_id,
                 name=name,
                 component_type=component_type,
@@ -569,7 +594,7 @@ class TreeSitterTSAnalyzer:
             logger.debug(f"Error creating node from entity: {e}")
             return None
         
-    def _should_include_node(self, node: Node) -> bool:
+    def _should_include_node(self, node: ComponentRecord) -> bool:
         excluded_names = {"constructor", "__proto__", "prototype"}
         
         if node.component_type == "variable":
@@ -609,7 +634,7 @@ class TreeSitterTSAnalyzer:
                                 caller_id = f"{self._get_module_path()}.{caller_name}"
                                 callee_id = f"{self._get_module_path()}.{dependency_name}"
                                 
-                                relationship = CallRelationship(
+                                relationship = CallRecord(
                                     caller=caller_id,
                                     callee=callee_id,
                                     call_line=child.start_point[0] + 1,
@@ -622,28 +647,28 @@ class TreeSitterTSAnalyzer:
 
 
     def _get_module_path(self) -> str:
-        if self.repo_path:
-            try:
-                rel_path = os.path.relpath(str(self.file_path), self.repo_path)
-            except ValueError:
-                rel_path = str(self.file_path)
-        else:
-            rel_path = str(self.file_path)
+        # Called for every component and relationship; cached with the relative path
+        if self._module_path is not None:
+            return self._module_path
+        rel_path = self._get_relative_path()
         
         for ext in ['.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs']:
             if rel_path.endswith(ext):
                 rel_path = rel_path[:-len(ext)]
                 break
-        return rel_path.replace('/', '.').replace('\\', '.')
+        self._module_path = rel_path.replace('/', '.').replace('\\', '.')
+        return self._module_path
     
     def _get_relative_path(self) -> str:
-        if self.repo_path:
-            try:
-                return os.path.relpath(str(self.file_path), self.repo_path)
-            except ValueError:
-                return str(self.file_path)
-        else:
-            return str(self.file_path)
+        if self._relative_path is None:
+            if self.repo_path:
+                try:
+                    self._relative_path = os.path.relpath(str(self.file_path), self.repo_path)
+                except ValueError:
+                    self._relative_path = str(self.file_path)
+            else:
+                self._relative_path = str(self.file_path)
+        return self._relative_path
 
     def _get_component_id(self, name: str) -> str:
         module_path = self._get_module_path()
@@ -681,39 +706,49 @@ class TreeSitterTSAnalyzer:
                             parameters.append(self._get_node_text(param_name))
         return parameters
 
-    def _extract_all_relationships(self, node, all_entities: dict) -> None:
-        self._traverse_for_relationships(node, all_entities, current_top_level=None)
-
-    def _traverse_for_relationships(self, node, all_entities: dict, current_top_level: str = None) -> None:
-        if current_top_level is None or self._is_new_top_level(node):
-            new_top_level = self._get_top_level_name(node)
-            if new_top_level and new_top_level in self.top_level_nodes:
-                current_top_level = new_top_level
-
-        
-        if current_top_level:
+    def _extract_all_relationships(self, definitions, references, all_entities: dict) -> None:
+        """
+        Attribute each reference to its top-level declaration.
+
+        Declarations and references are visited together in document order. A stack
+        of the open declarations (by end offset) gives the declaration enclosing each
+        node, so the top-level name is tracked without walking the rest of the tree.
+        """
+        events = [(node, True) for node in definitions if node.type in SCOPE_TYPES]
+        events.extend((node, False) for node in references)
+        # A declaration never shares its range with a reference it contains (it starts
+        # with a keyword), so at equal ranges the declaration comes first
+        events.sort(key=lambda event: (event[0].start_byte, -event[0].end_byte, not event[1]))
+
+        open_scopes = []  # (end_byte, current_top_level) of enclosing declarations
+        for node, is_scope in events:
+            end_byte = node.end_byte
+            while open_scopes and open_scopes[-1][0] < end_byte:
+                open_scopes.pop()
+            current_top_level = open_scopes[-1][1] if open_scopes else None
+
+            if is_scope:
+                if current_top_level is None or self._is_new_top_level(node):
+                    new_top_level = self._get_top_level_name(node)
+                    if new_top_level and new_top_level in self.top_level_nodes:
+                        current_top_level = new_top_level
+                open_scopes.append((end_byte, current_top_level))
+                continue
+
+            if not current_top_level:
+                continue
             if node.type == "call_expression":
                 self._extract_call_relationship(node, current_top_level, all_entities)
             elif node.type == "new_expression":
                 self._extract_new_relationship(node, current_top_level, all_entities)
-            
             elif node.type == "member_expression":
                 self._extract_member_relationship(node, current_top_level, all_entities)
-            elif node.type == "subscript_expression":
-                self._extract_subscript_relationship(node, current_top_level, all_entities)
-            
             elif node.type == "type_annotation":
                 self._extract_type_relationship(node, current_top_level, all_entities)
             elif node.type == "type_arguments":
                 self._extract_type_arguments_relationship(node, current_top_level, all_entities)
-            
-            elif node.type == "extends_clause":
+            elif node.type in ("extends_clause", "implements_clause"):
                 self._extract_inheritance_relationship(node, current_top_level, all_entities)
-            elif node.type == "implements_clause":
-                self._extract_inheritance_relationship(node, current_top_level, all_entities)
-
-        for child in node.children:
-            self._traverse_for_relationships(child, all_entities, current_top_level)
     
     def _is_new_top_level(self, node) -> bool:
         return node.type in [
@@ -847,13 +882,9 @@ class TreeSitterTSAnalyzer:
         except Exception as e:
             logger.debug(f"Error extracting member relationship: {e}")
 
-    def _extract_subscript_relationship(self, node, caller_name: str, all_entities: dict) -> None:
-        pass
-
     def _extract_type_relationship(self, node, caller_name: str, all_entities: dict) -> None:
         try:
-            type_identifiers = []
-            self._find_all_type_identifiers(node, type_identifiers)
+            type_identifiers = self._find_all_type_identifiers(node)
             
             call_line = node.start_point[0] + 1
             
@@ -873,12 +904,11 @@ class TreeSitterTSAnalyzer:
         except Exception as e:
             logger.debug(f"Error extracting type relationship: {e}")
     
-    def _find_all_type_identifiers(self, node, type_identifiers: list) -> None:
-        if node.type == "type_identifier":
-            type_identifiers.append(node)
-        
-        for child in node.children:
-            self._find_all_type_identifiers(child, type_identifiers)
+    def _find_all_type_identifiers(self, node) -> list:
+        # Type identifiers are leaves, so the ones inside a node are exactly those
+        # starting within its range; the captured list is in document order
+        starts = self._type_identifier_starts
+        return self._type_identifiers[bisect_left(starts, node.start_byte):bisect_left(starts, node.end_byte)]
     
     def _extract_type_arguments_relationship(self, node, caller_name: str, all_entities: dict) -> None:
         try:
@@ -908,20 +938,13 @@ class TreeSitterTSAnalyzer:
             logger.debug(f"Error extracting inheritance relationship: {e}")
 
     def _resolve_to_top_level(self, entity_name: str, all_entities: dict) -> Optional[str]:
-        if entity_name in self.top_level_nodes:
-            return entity_name
-        
-        entity_data = all_entities.get(entity_name)
-        if entity_data and entity_data.get('depth', 0) > 2:
-            return None
-        
         return entity_name if entity_name in self.top_level_nodes else None
 
     def _add_relationship(self, caller_name: str, callee_name: str, call_line: int) -> None:
         caller_id = f"{self._get_module_path()}.{caller_name}"
         callee_id = f"{self._get_module_path()}.{callee_name}"  
         
-        relationship = CallRelationship(
+        relationship = CallRecord(
             caller=caller_id,
             callee=callee_id,
             call_line=call_line,
@@ -958,15 +981,13 @@ class TreeSitterTSAnalyzer:
         return None
 
     def _get_node_text(self, node) -> str:
-        start_byte = node.start_byte
-        end_byte = node.end_byte
-        return self.content.encode("utf8")[start_byte:end_byte].decode("utf8")
+        return self.source.node_text(node)
 
 
 
 def analyze_typescript_file_treesitter(
-    file_path: str, content: str, repo_path: str = None
-) -> Tuple[List[Node], List[CallRelationship]]:
+    file_path: str, content: Union[str, bytes], repo_path: str = None
+) -> Tuple[List[ComponentRecord], List[CallRecord]]:
     try:
         logger.debug(f"Tree-sitter TS analysis for {file_path}")
         analyzer = TreeSitterTSAnalyzer(file_path, content, repo_path)
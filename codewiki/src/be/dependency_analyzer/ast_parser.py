@@ -3,11 +3,12 @@ import json
 import logging
 import argparse
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Tuple, Optional, Any, Union
+from typing import Dict, List, Mapping, Set, Tuple, Optional, Any, Union
 from pathlib import Path
 import re
 
 from codewiki.src.be.dependency_analyzer.analysis.analysis_service import AnalysisService
+from codewiki.src.be.dependency_analyzer.analysis.analysis_store import AnalysisStore, StoredComponents
 from codewiki.src.be.dependency_analyzer.models.core import Node
 
 
@@ -18,14 +19,33 @@ logger.setLevel(logging.DEBUG)
 class DependencyParser:
     """Parser for extracting code components from multi-language repositories."""
     
-    def __init__(self, repo_path: str):
+    def __init__(
+        self,
+        repo_path: str,
+        parse_workers: int = 1,
+        parse_cache_dir: Optional[str] = None,
+        analysis_store_path: Optional[str] = None,
+        analysis_store_threshold: int = 0,
+        shard_min_files: int = 0,
+    ):
         self.repo_path = os.path.abspath(repo_path)
-        self.components: Dict[str, Node] = {}
+        # A StoredComponents view instead of a dict when the analysis spilled to disk
+        self.components: Mapping[str, Node] = {}
         self.modules: Set[str] = set()
+        # Files the Stage 1 parse budget skipped or parsed structure-only
+        self.skipped_files: List[Dict] = []
+        # Stage 1 timing report (see analysis.parse_profile)
+        self.parse_profile: Optional[Dict] = None
         
-        self.analysis_service = AnalysisService()
+        self.analysis_service = AnalysisService(
+            parse_workers=parse_workers,
+            parse_cache_dir=parse_cache_dir,
+            store_threshold=analysis_store_threshold,
+            store_path=analysis_store_path,
+            shard_min_files=shard_min_files,
+        )
 
-    def parse_repository(self, filtered_folders: List[str] = None) -> Dict[str, Node]:
+    def parse_repository(self, filtered_folders: List[str] = None) -> Mapping[str, Node]:
         import time
         start = time.time()
         logger.debug(f"Parsing repository at {self.repo_path}")
@@ -44,10 +64,16 @@ class DependencyParser:
             structure_result["file_tree"], 
             self.repo_path
         )
+        self.skipped_files = call_graph_result.get("call_graph", {}).get("skipped_files", [])
+        self.parse_profile = call_graph_result.get("call_graph", {}).get("profile")
         print(f"[DEBUG] [DEP] [{time.time() - start:.1f}s] _analyze_call_graph complete, {len(call_graph_result.get('functions', []))} functions found", flush=True)
         
         print(f"[DEBUG] [DEP] [{time.time() - start:.1f}s] Building components from analysis...", flush=True)
-        self._build_components_from_analysis(call_graph_result)
+        store = call_graph_result.get("analysis_store")
+        if store is not None:
+            self._build_components_from_store(store)
+        else:
+            self._build_components_from_analysis(call_graph_result)
         
         duration = time.time() - start
         logger.debug(f"Found {len(self.components)} components across {len(self.modules)} modules")
@@ -65,24 +91,7 @@ class DependencyParser:
             if not component_id:
                 continue
                 
-            node = Node(
-                id=component_id,
-                name=func_dict.get("name", ""),
-                component_type=func_dict.get("component_type", func_dict.get("node_type", "function")),
-                file_path=func_dict.get("file_path", ""),
-                relative_path=func_dict.get("relative_path", ""),
-                source_code=func_dict.get("source_code", func_dict.get("code_snippet", "")),
-                start_line=func_dict.get("start_line", 0),
-                end_line=func_dict.get("end_line", 0),
-                has_docstring=func_dict.get("has_docstring", bool(func_dict.get("docstring", ""))),
-                docstring=func_dict.get("docstring", "") or "",
-                parameters=func_dict.get("parameters", []),
-                node_type=func_dict.get("node_type", "function"),
-                base_classes=func_dict.get("base_classes"),
-                class_name=func_dict.get("class_name"),
-                display_name=func_dict.get("display_name", ""),
-                component_id=component_id
-            )
+            node = self._node_from_dict(func_dict, set())
             
             self.components[component_id] = node
             
@@ -91,37 +100,66 @@ class DependencyParser:
             if legacy_id and legacy_id != component_id:
                 component_id_mapping[legacy_id] = component_id
             
-            if "." in component_id:
-                module_parts = component_id.split(".")[:-1]  
-                module_path = ".".join(module_parts)
-                if module_path:
-                    self.modules.add(module_path)
-        
-        # Build name-to-component-id lookup for O(1) access instead of O(n) search
-        # This fixes a critical O(n²) performance bug for large repos (30k+ functions)
-        name_to_component_id = {}
-        for comp_id, comp_node in self.components.items():
-            if comp_node.name and comp_node.name not in name_to_component_id:
-                name_to_component_id[comp_node.name] = comp_id
+            self._add_module(component_id)
         
+        # Callees were already resolved against the scope-aware symbol index; one that is
+        # still a bare name matched nothing in scope, so it is not looked up by name again
         processed_relationships = 0
         for rel_dict in relationships:
             caller_id = rel_dict.get("caller", "")
             callee_id = rel_dict.get("callee", "")
-            is_resolved = rel_dict.get("is_resolved", False)
             
             caller_component_id = component_id_mapping.get(caller_id)
             
             callee_component_id = component_id_mapping.get(callee_id)
-            if not callee_component_id:
-                # O(1) lookup instead of O(n) loop
-                callee_component_id = name_to_component_id.get(callee_id)
             
             if caller_component_id and caller_component_id in self.components:
                 if callee_component_id:
                     self.components[caller_component_id].depends_on.add(callee_component_id)
                     processed_relationships += 1
     
+    def _build_components_from_store(self, store: AnalysisStore):
+        """Expose the stored components as a read-only mapping with dependencies filled in."""
+        store.build_dependencies()
+        self.components = StoredComponents(store, self._node_from_dict)
+        for component_id in self.components:
+            self._add_module(component_id)
+
+    @staticmethod
+    def _node_from_dict(func_dict: Dict, depends_on: Set[str]) -> Node:
+        component_id = func_dict.get("id", "")
+        # Analyzer output is already typed; skip pydantic validation on this hot path
+        return Node.model_construct(
+            id=component_id,
+            name=func_dict.get("name", ""),
+            component_type=func_dict.get("component_type", func_dict.get("node_type", "function")),
+            file_path=func_dict.get("file_path", ""),
+            relative_path=func_dict.get("relative_path", ""),
+            depends_on=depends_on,
+            source_code=func_dict.get("source_code", func_dict.get("code_snippet", "")),
+            start_byte=func_dict.get("start_byte"),
+            end_byte=func_dict.get("end_byte"),
+            start_line=func_dict.get("start_line", 0),
+            end_line=func_dict.get("end_line", 0),
+            has_docstring=func_dict.get("has_docstring", bool(func_dict.get("docstring", ""))),
+            docstring=func_dict.get("docstring", "") or "",
+            parameters=func_dict.get("parameters", []),
+            node_type=func_dict.get("node_type", "function"),
+            base_classes=func_dict.get("base_classes"),
+            class_name=func_dict.get("class_name"),
+            display_name=func_dict.get("display_name", ""),
+            component_id=component_id,
+            source_tokens=func_dict.get("source_tokens"),
+            file_tokens=func_dict.get("file_tokens"),
+        )
+
+    def _add_module(self, component_id: str):
+        if "." in component_id:
+            module_parts = component_id.split(".")[:-1]  
+            module_path = ".".join(module_parts)
+            if module_path:
+                self.modules.add(module_path)
+    
     def _determine_component_type(self, func_dict: Dict) -> str:
         if func_dict.get("is_method", False):
             return "method"
@@ -142,6 +180,9 @@ class DependencyParser:
         return path.replace(os.path.sep, ".")
     
     def save_dependency_graph(self, output_path: str):
+        if isinstance(self.components, StoredComponents):
+            return self._stream_dependency_graph(output_path)
+
         result = {}
         for component_id, component in self.components.items():
             component_dict = component.model_dump()
@@ -158,3 +199,26 @@ class DependencyParser:
         
         logger.debug(f"Saved {len(self.components)} components to {output_path}")
         return result
+
+    def _stream_dependency_graph(self, output_path: str):
+        """
+        Write stored components one at a time, producing the same JSON as the in-memory
+        path without building the whole graph in memory. Returns None.
+        """
+        dir_name = os.path.dirname(output_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("{")
+            separator = "\n"
+            for component_id, component in self.components.items():
+                component_dict = component.model_dump()
+                component_dict['depends_on'] = list(component_dict['depends_on'])
+                entry = json.dumps(component_dict, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(f"{separator}  {json.dumps(component_id, ensure_ascii=False)}: {entry}")
+                separator = ",\n"
+            f.write("\n}" if separator != "\n" else "}")
+
+        logger.debug(f"Saved {len(self.components)} components to {output_path}")
+        return None
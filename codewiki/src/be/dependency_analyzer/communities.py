@@ -0,0 +1,53 @@
+"""
+Community detection on weighted undirected graphs.
+
+Stage 2 groups a repository's files into modules without asking an LLM to
+read every component name. It runs the Louvain method from networkx and keeps
+the partition of every level: each is a coarser grouping of the one below, so
+the levels form a hierarchy that maps directly onto modules and their
+sub-modules.
+
+The graph is an adjacency list of `{neighbour: weight}` dicts. The seed is
+fixed, so results are deterministic.
+"""
+
+from typing import Dict, List
+
+import networkx as nx
+
+WeightedGraph = List[Dict[int, float]]
+
+
+def louvain_levels(graph: WeightedGraph, resolution: float = 1.0) -> List[List[int]]:
+    """
+    Louvain partitions of `graph`, finest first.
+
+    Returns:
+        One community index per node for each level, with communities numbered
+        in order of first appearance; empty when no grouping raises modularity
+        (e.g. a graph without edges)
+    """
+    nx_graph = nx.Graph()
+    nx_graph.add_nodes_from(range(len(graph)))
+    nx_graph.add_weighted_edges_from(
+        (node, neighbour, weight)
+        for node, neighbours in enumerate(graph)
+        for neighbour, weight in neighbours.items()
+        if neighbour >= node
+    )
+    if not nx_graph.number_of_edges():
+        return []
+
+    levels: List[List[int]] = []
+    for partition in nx.community.louvain_partitions(nx_graph, weight="weight", resolution=resolution, seed=0):
+        community = [0] * len(graph)
+        for index, members in enumerate(partition):
+            for node in members:
+                community[node] = index
+        # Renumber by first appearance so labels do not depend on set order
+        numbering: Dict[int, int] = {}
+        level = [numbering.setdefault(c, len(numbering)) for c in community]
+        # The last level networkx yields may not have moved any node
+        if len(numbering) < len(graph) and (not levels or level != levels[-1]):
+            levels.append(level)
+    return levels
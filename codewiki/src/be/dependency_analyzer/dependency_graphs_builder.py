@@ -1,8 +1,13 @@
 from typing import Dict, List, Any
 import os
 from codewiki.src.config import Config
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import summarize_profile
 from codewiki.src.be.dependency_analyzer.ast_parser import DependencyParser
-from codewiki.src.be.dependency_analyzer.topo_sort import build_graph_from_components, get_leaf_nodes
+from codewiki.src.be.dependency_analyzer.topo_sort import (
+    available_component_types,
+    build_graph_from_components,
+    get_leaf_nodes,
+)
 from codewiki.src.file_manager import file_manager
 
 import logging
@@ -44,13 +49,34 @@ class DependencyGraphBuilder:
             self.config.dependency_graph_dir, 
             f"{sanitized_repo_name}_dependency_graph.json"
         )
+        skipped_files_path = os.path.join(
+            self.config.dependency_graph_dir, 
+            f"{sanitized_repo_name}_skipped_files.json"
+        )
+        parse_profile_path = os.path.join(
+            self.config.dependency_graph_dir, 
+            f"{sanitized_repo_name}_parse_profile.json"
+        )
         filtered_folders_path = os.path.join(
             self.config.dependency_graph_dir, 
             f"{sanitized_repo_name}_filtered_folders.json"
         )
+        analysis_store_path = os.path.join(
+            self.config.dependency_graph_dir, 
+            f"{sanitized_repo_name}_analysis.db"
+        )
         logger.info(f"[STAGE 1] Dependency graph path: {dependency_graph_path}")
 
-        parser = DependencyParser(self.config.repo_path)
+        logger.info(f"[STAGE 1] Parse workers: {self.config.parse_workers or 'auto'}")
+        logger.info(f"[STAGE 1] Parse cache: {self.config.parse_cache_dir or 'disabled'}")
+        parser = DependencyParser(
+            self.config.repo_path,
+            parse_workers=self.config.parse_workers,
+            parse_cache_dir=self.config.parse_cache_dir,
+            analysis_store_path=analysis_store_path,
+            analysis_store_threshold=self.config.analysis_store_threshold,
+            shard_min_files=self.config.shard_min_files,
+        )
 
         filtered_folders = None
         # if os.path.exists(filtered_folders_path):
@@ -95,6 +121,26 @@ class DependencyGraphBuilder:
         except Exception as e:
             logger.error(f"[STAGE 1] Failed to save dependency graph: {e}")
             raise
+
+        # Save the report of files the parse budget skipped
+        if parser.skipped_files:
+            try:
+                file_manager.save_json(parser.skipped_files, skipped_files_path)
+                logger.info(f"[STAGE 1] {len(parser.skipped_files)} files over the parse budget, report saved to {skipped_files_path}")
+            except Exception as e:
+                logger.warning(f"[STAGE 1] Failed to save skipped-file report: {e}")
+
+        # Save the per-language / per-file timing profile and summarize it in the run metrics
+        if parser.parse_profile:
+            try:
+                file_manager.save_json(parser.parse_profile, parse_profile_path)
+                logger.info(f"[STAGE 1] Parse profile saved to {parse_profile_path}")
+            except Exception as e:
+                logger.warning(f"[STAGE 1] Failed to save parse profile: {e}")
+            from codewiki.src.utils.metrics import get_metrics_collector
+            metrics = get_metrics_collector().get_current()
+            if metrics is not None:
+                metrics.stage1_profile = summarize_profile(parser.parse_profile)
         
         # Build graph for traversal
         logger.info(f"[STAGE 1] Building graph from components...")
@@ -118,9 +164,7 @@ class DependencyGraphBuilder:
         # and type is one of the following: class, interface, struct (or function for C-based projects)
         
         # Determine if we should include functions based on available component types
-        available_types = set()
-        for comp in components.values():
-            available_types.add(comp.component_type)
+        available_types = available_component_types(components)
         logger.info(f"[STAGE 1] Available component types: {sorted(available_types)}")
         
         # Valid types for leaf nodes - include functions for C-based codebases
@@ -2,6 +2,8 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Set
 from datetime import datetime
 
+from codewiki.src.be.dependency_analyzer.utils.source_store import get_source_store
+
 
 
 class Node(BaseModel):
@@ -18,6 +20,12 @@ class Node(BaseModel):
     depends_on: Set[str] = set()
     
     source_code: Optional[str] = None
+
+    # Byte range of source_code in file_path; when set, source_code is dropped
+    # and read back on demand through the source store
+    start_byte: Optional[int] = None
+
+    end_byte: Optional[int] = None
     
     start_line: int = 0
 
@@ -39,9 +47,22 @@ class Node(BaseModel):
 
     component_id: Optional[str] = None
 
+    # Stage 1 token counts (see analysis.token_annotations): the component's own
+    # source and its whole file; None for graphs saved before they were recorded
+    source_tokens: Optional[int] = None
+
+    file_tokens: Optional[int] = None
+
     def get_display_name(self) -> str:
         return self.display_name or self.name
 
+    def get_source_code(self) -> str:
+        if self.source_code is not None:
+            return self.source_code
+        if self.start_byte is not None and self.end_byte is not None:
+            return get_source_store().read(self.file_path, self.start_byte, self.end_byte)
+        return ""
+
 
 class CallRelationship(BaseModel):
     caller: str
@@ -0,0 +1,119 @@
+"""
+Compact records for the Stage 1 analyzer hot path.
+
+Analyzers create one component per class/function and one relationship per call
+site, which adds up to hundreds of thousands of objects on large repositories.
+Pydantic validation and per-instance `__dict__`s dominate that cost, so analyzers
+build these slotted records instead, with the strings repeated across records
+(paths, types, call targets) interned. Records are converted to the pydantic
+`Node` / `CallRelationship` models only where results leave the analyzer.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from codewiki.src.be.dependency_analyzer.models.core import Node, CallRelationship
+from codewiki.src.be.dependency_analyzer.utils.source_store import get_source_store
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
+class ComponentRecord:
+    """Slotted counterpart of `Node` without `depends_on` (filled in after resolution)."""
+    id: str
+    name: str
+    component_type: str
+    file_path: str
+    relative_path: str
+    source_code: Optional[str] = None
+    start_byte: Optional[int] = None
+    end_byte: Optional[int] = None
+    start_line: int = 0
+    end_line: int = 0
+    has_docstring: bool = False
+    docstring: str = ""
+    parameters: Optional[List[str]] = None
+    node_type: Optional[str] = None
+    base_classes: Optional[List[str]] = None
+    class_name: Optional[str] = None
+    display_name: Optional[str] = None
+    component_id: Optional[str] = None
+    source_tokens: Optional[int] = None
+    file_tokens: Optional[int] = None
+
+    def __post_init__(self):
+        self.component_type = _intern(self.component_type)
+        self.file_path = _intern(self.file_path)
+        self.relative_path = _intern(self.relative_path)
+        self.node_type = _intern(self.node_type)
+        self.class_name = _intern(self.class_name)
+
+    def get_display_name(self) -> str:
+        return self.display_name or self.name
+
+    def get_source_code(self) -> str:
+        if self.source_code is not None:
+            return self.source_code
+        if self.start_byte is not None and self.end_byte is not None:
+            return get_source_store().read(self.file_path, self.start_byte, self.end_byte)
+        return ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with the same keys and order as `Node.model_dump()`."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "component_type": self.component_type,
+            "file_path": self.file_path,
+            "relative_path": self.relative_path,
+            "depends_on": set(),
+            "source_code": self.source_code,
+            "start_byte": self.start_byte,
+            "end_byte": self.end_byte,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "has_docstring": self.has_docstring,
+            "docstring": self.docstring,
+            "parameters": self.parameters,
+            "node_type": self.node_type,
+            "base_classes": self.base_classes,
+            "class_name": self.class_name,
+            "display_name": self.display_name,
+            "component_id": self.component_id,
+            "source_tokens": self.source_tokens,
+            "file_tokens": self.file_tokens,
+        }
+
+    def to_node(self) -> Node:
+        """Convert to the pydantic model (values are already typed, so validation is skipped)."""
+        return Node.model_construct(**self.to_dict())
+
+
+@dataclass(slots=True)
+class CallRecord:
+    """Slotted counterpart of `CallRelationship`."""
+    caller: str
+    callee: str
+    call_line: Optional[int] = None
+    is_resolved: bool = False
+
+    def __post_init__(self):
+        self.caller = _intern(self.caller)
+        self.callee = _intern(self.callee)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with the same keys and order as `CallRelationship.model_dump()`."""
+        return {
+            "caller": self.caller,
+            "callee": self.callee,
+            "call_line": self.call_line,
+            "is_resolved": self.is_resolved,
+        }
+
+    def to_model(self) -> CallRelationship:
+        return CallRelationship.model_construct(**self.to_dict())
+
@@ -0,0 +1,22 @@
+; Stage 1 extraction query for JavaScript (TreeSitterJSAnalyzer).
+;
+; One pass over the tree captures every node the analyzer needs; the analyzer
+; orders the captures by position and handles them in Python.
+
+; Declarations that may become components, and that open a caller scope
+[
+  (class_declaration)
+  (function_declaration)
+  (generator_function_declaration)
+  (export_statement)
+  (lexical_declaration)
+] @definition
+
+; Call sites
+[
+  (call_expression)
+  (new_expression)
+] @reference
+
+; JSDoc type references
+(comment) @comment
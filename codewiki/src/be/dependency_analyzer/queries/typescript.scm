@@ -0,0 +1,36 @@
+; Stage 1 extraction query for TypeScript (TreeSitterTSAnalyzer).
+;
+; One pass over the tree captures every node the analyzer needs; the analyzer
+; orders the captures by position and handles them in Python.
+
+; Declarations that may become components, and that open a caller scope
+[
+  (function_declaration)
+  (generator_function_declaration)
+  (arrow_function)
+  (method_definition)
+  (class_declaration)
+  (abstract_class_declaration)
+  (interface_declaration)
+  (type_alias_declaration)
+  (enum_declaration)
+  (variable_declarator)
+  (export_statement)
+  (lexical_declaration)
+  (variable_declaration)
+  (ambient_declaration)
+] @definition
+
+; Call sites and type references, attributed to the enclosing top-level declaration
+[
+  (call_expression)
+  (new_expression)
+  (member_expression)
+  (type_annotation)
+  (type_arguments)
+  (extends_clause)
+  (implements_clause)
+] @reference
+
+; Type names, matched to the type annotations that contain them
+(type_identifier) @type_identifier
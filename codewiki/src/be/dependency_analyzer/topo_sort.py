@@ -7,101 +7,132 @@ including detection and resolution of dependency cycles.
 """
 
 import logging
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Set, Any, Mapping, Union
 from collections import deque
 
+from codewiki.src.be.dependency_analyzer.centrality import degree_centrality
+from codewiki.src.be.dependency_analyzer.graph_engine import CSRGraph
 from codewiki.src.be.dependency_analyzer.models.core import Node
 
+# Graph utilities accept the CSR engine or a plain node -> dependencies mapping
+GraphLike = Union[CSRGraph, Mapping[str, Set[str]]]
+
 logger = logging.getLogger(__name__)
 
 
-def detect_cycles(graph: Dict[str, Set[str]]) -> List[List[str]]:
+def _find_cycles(graph: CSRGraph) -> List[List[int]]:
+    """
+    Tarjan's algorithm over node numbers; returns SCCs with more than one node.
+
+    Iterative, with an explicit work stack of (node, next edge position), so deep
+    dependency chains cannot hit the interpreter's recursion limit. SCCs and
+    their members come out in the same order as the recursive formulation.
+    """
+    indptr, indices = graph.indptr, graph.indices
+    index = [-1] * len(graph)  # node -> index
+    lowlink = [0] * len(graph)  # node -> lowlink value
+    onstack = bytearray(len(graph))  # nodes currently on the stack
+    stack = []  # stack of nodes
+    result = []  # list of cycles (strongly connected components)
+    counter = 0
+    
+    for root in range(len(graph)):
+        if index[root] != -1:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        onstack[root] = 1
+        work = [(root, indptr[root])]
+        
+        while work:
+            node, pos = work[-1]
+            end = indptr[node + 1]
+            while pos < end:
+                successor = indices[pos]
+                pos += 1
+                if index[successor] == -1:
+                    # Successor has not yet been visited; descend into it
+                    work[-1] = (node, pos)
+                    index[successor] = lowlink[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    onstack[successor] = 1
+                    work.append((successor, indptr[successor]))
+                    break
+                elif onstack[successor]:
+                    # Successor is on the stack and hence in the current SCC
+                    if index[successor] < lowlink[node]:
+                        lowlink[node] = index[successor]
+            else:
+                # All successors done
+                work.pop()
+                if lowlink[node] == index[node]:
+                    # Node is a root node: pop the stack and generate an SCC
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        onstack[member] = 0
+                        scc.append(member)
+                        if member == node:
+                            break
+                    # Only include SCCs with more than one node (actual cycles)
+                    if len(scc) > 1:
+                        result.append(scc)
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+    
+    return result
+
+
+def detect_cycles(graph: GraphLike) -> List[List[str]]:
     """
     Detect cycles in a dependency graph using Tarjan's algorithm to find
     strongly connected components.
     
     Args:
-        graph: A dependency graph represented as adjacency lists
+        graph: A dependency graph, either a CSRGraph or adjacency lists
                (node -> set of dependencies)
     
     Returns:
         A list of lists, where each inner list contains the nodes in a cycle
     """
-    # Implementation of Tarjan's algorithm
-    index_counter = [0]
-    index = {}  # node -> index
-    lowlink = {}  # node -> lowlink value
-    onstack = set()  # nodes currently on the stack
-    stack = []  # stack of nodes
-    result = []  # list of cycles (strongly connected components)
-    
-    def strongconnect(node):
-        # Set the depth index for node
-        index[node] = index_counter[0]
-        lowlink[node] = index_counter[0]
-        index_counter[0] += 1
-        stack.append(node)
-        onstack.add(node)
-        
-        # Consider successors
-        for successor in graph.get(node, set()):
-            if successor not in index:
-                # Successor has not yet been visited; recurse on it
-                strongconnect(successor)
-                lowlink[node] = min(lowlink[node], lowlink[successor])
-            elif successor in onstack:
-                # Successor is on the stack and hence in the current SCC
-                lowlink[node] = min(lowlink[node], index[successor])
-        
-        # If node is a root node, pop the stack and generate an SCC
-        if lowlink[node] == index[node]:
-            # Start a new strongly connected component
-            scc = []
-            while True:
-                successor = stack.pop()
-                onstack.remove(successor)
-                scc.append(successor)
-                if successor == node:
-                    break
-            
-            # Only include SCCs with more than one node (actual cycles)
-            if len(scc) > 1:
-                result.append(scc)
-    
-    # Visit each node
-    for node in graph:
-        if node not in index:
-            strongconnect(node)
-    
-    return result
+    csr = CSRGraph.from_adjacency(graph)
+    return [[csr.ids[node] for node in cycle] for cycle in _find_cycles(csr)]
 
-def resolve_cycles(graph: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+def resolve_cycles(graph: GraphLike) -> CSRGraph:
     """
     Resolve cycles in a dependency graph by identifying strongly connected
     components and breaking cycles.
     
     Args:
-        graph: A dependency graph represented as adjacency lists
+        graph: A dependency graph, either a CSRGraph or adjacency lists
                (node -> set of dependencies)
     
     Returns:
-        A new acyclic graph with the same nodes but with cycles broken
+        An acyclic graph with the same nodes but with cycles broken (the input
+        graph itself if it has no cycles)
     """
+    csr = CSRGraph.from_adjacency(graph)
+
     # Detect cycles (SCCs)
-    cycles = detect_cycles(graph)
+    cycles = _find_cycles(csr)
     
     if not cycles:
         logger.debug("No cycles detected in the dependency graph")
-        return graph
+        return csr
     
     logger.debug(f"Detected {len(cycles)} cycles in the dependency graph")
     
-    # Create a copy of the graph to modify
-    new_graph = {node: deps.copy() for node, deps in graph.items()}
+    # Collect the edges to drop instead of copying every adjacency set
+    removed_edges = set()
     
     # Process each cycle
     for i, cycle in enumerate(cycles):
-        logger.debug(f"Cycle {i+1}: {' -> '.join(cycle)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Cycle {i+1}: {' -> '.join(csr.ids[node] for node in cycle)}")
         
         # Strategy: Break the cycle by removing the "weakest" dependency
         # Here, we just arbitrarily remove the last edge to make the graph acyclic
@@ -111,19 +142,22 @@ def resolve_cycles(graph: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
             current = cycle[j]
             next_node = cycle[j + 1]
             
-            if next_node in new_graph[current]:
-                logger.debug(f"Breaking cycle by removing dependency: {current} -> {next_node}")
-                new_graph[current].remove(next_node)
+            if csr.has_edge(current, next_node):
+                logger.debug(f"Breaking cycle by removing dependency: {csr.ids[current]} -> {csr.ids[next_node]}")
+                removed_edges.add((current, next_node))
                 break
     
-    return new_graph
+    return csr.without_edges(removed_edges)
 
-def topological_sort(graph: Dict[str, Set[str]]) -> List[str]:
+def topological_sort(graph: GraphLike) -> List[str]:
     """
     Perform a topological sort on a dependency graph.
     
+    Kahn's algorithm in O(V + E): a node is emitted once all of its dependencies
+    have been, and a precomputed reverse adjacency finds the nodes it unblocks.
+    
     Args:
-        graph: A dependency graph represented as adjacency lists
+        graph: A dependency graph, either a CSRGraph or adjacency lists
                (node -> set of dependencies)
     
     Returns:
@@ -131,18 +165,15 @@ def topological_sort(graph: Dict[str, Set[str]]) -> List[str]:
     """
     # First, check for and resolve cycles
     acyclic_graph = resolve_cycles(graph)
+    ids = acyclic_graph.ids
+    dependents = acyclic_graph.reverse()
+    dep_indptr, dep_indices = dependents.indptr, dependents.indices
     
-    # Initialize in-degree counter for all nodes
-    in_degree = {node: 0 for node in acyclic_graph}
+    # Number of dependencies not yet emitted, per node
+    remaining = acyclic_graph.out_degrees()
     
-    # Count in-degrees
-    for node, dependencies in acyclic_graph.items():
-        for dep in dependencies:
-            if dep in in_degree:
-                in_degree[dep] += 1
-    
-    # Queue of nodes with no dependencies (in-degree of 0)
-    queue = deque([node for node, degree in in_degree.items() if degree == 0])
+    # Queue of nodes with no dependencies
+    queue = deque(node for node in range(len(ids)) if remaining[node] == 0)
     
     # Result list to store the topological order
     result = []
@@ -150,25 +181,24 @@ def topological_sort(graph: Dict[str, Set[str]]) -> List[str]:
     # Process nodes in topological order
     while queue:
         node = queue.popleft()
-        result.append(node)
+        result.append(ids[node])
         
-        # Reduce in-degree for each node that depends on the current node
-        for dependent, deps in acyclic_graph.items():
-            if node in deps:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    queue.append(dependent)
+        # Reduce the count for each node that depends on the current node
+        for pos in range(dep_indptr[node], dep_indptr[node + 1]):
+            dependent = dep_indices[pos]
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                queue.append(dependent)
     
     # Check if the sort was successful (all nodes included)
-    if len(result) != len(acyclic_graph):
+    if len(result) != len(ids):
         logger.warning("Topological sort failed: graph has cycles that weren't resolved")
         # Return all nodes in some order to avoid breaking the process
-        return list(acyclic_graph.keys())
+        return list(ids)
     
-    # Reverse the result to get dependencies first
-    return result[::-1]
+    return result
 
-def dependency_first_dfs(graph: Dict[str, Set[str]]) -> List[str]:
+def dependency_first_dfs(graph: GraphLike) -> List[str]:
     """
     Perform a depth-first traversal of the dependency graph, starting from root nodes
     that have no dependencies.
@@ -187,56 +217,52 @@ def dependency_first_dfs(graph: Dict[str, Set[str]]) -> List[str]:
     """
     # First, resolve cycles to ensure we have a DAG
     acyclic_graph = resolve_cycles(graph)
-    
-    # Find root nodes (nodes with no dependencies)
-    root_nodes = []
-    # Create a reverse graph to easily check if a node has incoming edges
-    has_incoming_edge = {node: False for node in acyclic_graph}
-    
-    for node, deps in acyclic_graph.items():
-        for dep in deps:
-            has_incoming_edge[dep] = True
+    ids = acyclic_graph.ids
+    by_id = ids.__getitem__
     
     # Nodes with no incoming edges are root nodes
-    for node in acyclic_graph:
-        if not has_incoming_edge.get(node, False) and node in acyclic_graph:
-            root_nodes.append(node)
+    in_degrees = acyclic_graph.in_degrees()
+    root_nodes = [node for node in range(len(ids)) if in_degrees[node] == 0]
     
     if not root_nodes:
         logger.warning("No root nodes found in the graph, using arbitrary starting point")
-        root_nodes = list(acyclic_graph.keys())[:1]  # Use the first node as starting point
+        root_nodes = list(range(len(ids)))[:1]  # Use the first node as starting point
     
     # Track visited nodes
-    visited = set()
+    visited = bytearray(len(ids))
     result = []
     
-    # DFS function that processes dependencies first
-    def dfs(node):
-        if node in visited:
+    # Iterative DFS that emits each node after all its dependencies
+    def dfs(start):
+        if visited[start]:
             return
-        visited.add(node)
-        
-        # Visit all dependencies first
-        for dep in sorted(acyclic_graph.get(node, set())):
-            dfs(dep)
-        
-        # Add this node to the result after all its dependencies
-        result.append(node)
+        visited[start] = 1
+        stack = [(start, iter(sorted(acyclic_graph.successors(start), key=by_id)))]
+        while stack:
+            node, deps = stack[-1]
+            for dep in deps:
+                if not visited[dep]:
+                    visited[dep] = 1
+                    stack.append((dep, iter(sorted(acyclic_graph.successors(dep), key=by_id))))
+                    break
+            else:
+                stack.pop()
+                result.append(ids[node])
     
     # Start DFS from each root node
-    for root in sorted(root_nodes):
+    for root in sorted(root_nodes, key=by_id):
         dfs(root)
     
     # Check if all nodes were visited
-    if len(result) != len(acyclic_graph):
+    if len(result) != len(ids):
         # Some nodes weren't visited - try to visit remaining nodes
-        for node in sorted(acyclic_graph.keys()):
-            if node not in visited:
+        for node in sorted(range(len(ids)), key=by_id):
+            if not visited[node]:
                 dfs(node)
     
     return result
 
-def build_graph_from_components(components: Dict[str, Any]) -> Dict[str, Set[str]]:
+def build_graph_from_components(components: Dict[str, Any]) -> CSRGraph:
     """
     Build a dependency graph from a collection of code components.
     
@@ -250,25 +276,21 @@ def build_graph_from_components(components: Dict[str, Any]) -> Dict[str, Set[str
                    has a 'depends_on' attribute
     
     Returns:
-        A dependency graph with natural dependency direction
+        A dependency graph with natural dependency direction; only dependencies
+        that are actual components in the repository become edges
     """
-    graph = {}
-    
-    for comp_id, component in components.items():
-        # Initialize the node's adjacency list
-        if comp_id not in graph:
-            graph[comp_id] = set()
-        
-        # Add dependencies
-        for dep_id in component.depends_on:
-            # Only include dependencies that are actual components in our repository
-            if dep_id in components:
-                graph[comp_id].add(dep_id)
-    
-    return graph 
+    return CSRGraph.from_components(components)
+
 
+def available_component_types(components: Mapping[str, Node]) -> Set[str]:
+    """Distinct component types, queried directly when components live in an analysis store."""
+    component_types = getattr(components, "component_types", None)
+    if component_types is not None:
+        return component_types()
+    return {comp.component_type for comp in components.values()}
 
-def get_leaf_nodes(graph: Dict[str, Set[str]], components: Dict[str, Node]) -> List[str]:
+
+def get_leaf_nodes(graph: GraphLike, components: Dict[str, Node]) -> List[str]:
     """
     Find leaf nodes (nodes that no other nodes depend on) and build dependency trees
     showing the full dependency chain from each leaf back to the ultimate dependencies.
@@ -288,11 +310,11 @@ def get_leaf_nodes(graph: Dict[str, Set[str]], components: Dict[str, Node]) -> L
     acyclic_graph = resolve_cycles(graph)
     
     # Find leaf nodes (nodes that no other nodes depend on)
-    leaf_nodes = set(acyclic_graph.keys())
+    leaf_nodes = list(acyclic_graph.ids)
 
     
     
-    def concise_node(leaf_nodes: Set[str]) -> Set[str]:
+    def concise_node(leaf_nodes: List[str]) -> List[str]:
         concise_leaf_nodes = set()
         for node in leaf_nodes:
             if node.endswith("__init__"):
@@ -305,9 +327,7 @@ def get_leaf_nodes(graph: Dict[str, Set[str]], components: Dict[str, Node]) -> L
         
         # Determine if we should include functions based on available component types
         # For C-based projects, we need to include functions since they don't have classes
-        available_types = set()
-        for comp in components.values():
-            available_types.add(comp.component_type)
+        available_types = available_component_types(components)
         
         # Valid types for leaf nodes - include functions for C-based codebases
         valid_types = {"class", "interface", "struct"}
@@ -337,9 +357,8 @@ def get_leaf_nodes(graph: Dict[str, Set[str]], components: Dict[str, Node]) -> L
     if len(concise_leaf_nodes) >= 400:
         logger.debug(f"Leaf nodes are too many ({len(concise_leaf_nodes)}), removing dependencies of other nodes")
         # Remove nodes that are dependencies of other nodes
-        for node, deps in acyclic_graph.items():
-            for dep in deps:
-                leaf_nodes.discard(dep)
+        in_degrees = degree_centrality(acyclic_graph, mode="in")
+        leaf_nodes = [node_id for node, node_id in enumerate(acyclic_graph.ids) if in_degrees[node] == 0]
         
         concise_leaf_nodes = concise_node(leaf_nodes)
     
@@ -0,0 +1,163 @@
+"""
+Precompiled path matchers for repository file discovery.
+
+`PathMatcher` folds a list of exclude or include patterns into a few set lookups
+and one compiled regular expression, so checking a path costs the same whether
+there are ten patterns or several hundred. It reproduces the checks
+`RepoAnalyzer` used to run pattern by pattern with `fnmatch`.
+
+`GitIgnoreRules` evaluates the patterns of one `.gitignore` file, relative to the
+directory that contains it.
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def _is_glob(pattern: str) -> bool:
+    return any(char in _GLOB_CHARS for char in pattern)
+
+
+class PathMatcher:
+    """
+    Matches a relative path (and its file name) against a set of patterns.
+
+    A path matches when any pattern:
+    - matches the whole path or the file name as an `fnmatch` glob,
+    - equals one of the path's components (`vendor` matches `a/vendor/b.py`),
+    - is a leading directory of the path (`src/legacy` matches `src/legacy/x.py`),
+    - ends with `/` and the path starts with it (`bin/` matches `bin/x` and `binary.py`).
+    """
+
+    def __init__(self, patterns: Iterable[str], component_names: Iterable[str] = ()):
+        """
+        Args:
+            patterns: Glob or literal patterns
+            component_names: Extra names that exclude a path when any component equals them
+        """
+        patterns = list(dict.fromkeys(patterns))
+        self.components = frozenset(component_names) | frozenset(patterns)
+        self.literals = frozenset(os.path.normcase(p) for p in patterns if not _is_glob(p))
+        self.prefixes: Tuple[str, ...] = tuple(
+            [p + "/" for p in patterns if "/" in p]
+            + [p.rstrip("/") for p in patterns if p.endswith("/")]
+        )
+        globs = [os.path.normcase(p) for p in patterns if _is_glob(p)]
+        self.glob_regex = re.compile("|".join(fnmatch.translate(p) for p in globs)) if globs else None
+
+    def matches(self, path: str, filename: str) -> bool:
+        """Whether the relative path (with `/` separators) or its file name matches."""
+        if self.prefixes and path.startswith(self.prefixes):
+            return True
+        if self.components and not self.components.isdisjoint(path.split("/")):
+            return True
+        return self.matches_file(path, filename)
+
+    def matches_file(self, path: str, filename: str) -> bool:
+        """Glob and literal match only, as used for include patterns."""
+        norm_path, norm_name = os.path.normcase(path), os.path.normcase(filename)
+        if norm_path in self.literals or norm_name in self.literals:
+            return True
+        regex = self.glob_regex
+        return regex is not None and (regex.match(norm_path) is not None or regex.match(norm_name) is not None)
+
+
+def _translate_gitignore(pattern: str) -> str:
+    """Translate the body of a gitignore pattern (no negation or trailing slash) to a regex."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                at_end = i + 2 == n
+                if at_start and at_end:
+                    parts.append(".*")
+                    i += 2
+                    continue
+                if at_start and pattern.startswith("/", i + 2):
+                    parts.append("(?:.*/)?")
+                    i += 3
+                    continue
+            parts.append("[^/]*")
+            while i < n and pattern[i] == "*":
+                i += 1
+            continue
+        if char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[]", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class GitIgnoreRules:
+    """Patterns from one `.gitignore` file; paths are relative to its directory."""
+
+    __slots__ = ("rules",)
+
+    def __init__(self, lines: Iterable[str]):
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negated, directories only)
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            if not line or line.startswith("#"):
+                continue
+            # Trailing spaces are ignored unless escaped
+            stripped = line.rstrip(" ")
+            if stripped.endswith("\\") and len(stripped) < len(line):
+                stripped += " "
+            line = stripped
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            elif line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            body = _translate_gitignore(line)
+            regex = re.compile(("^" if anchored else "^(?:.*/)?") + body + r"\Z", re.DOTALL)
+            self.rules.append((regex, negated, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["GitIgnoreRules"]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                rules = cls(f)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Returns:
+            True if ignored, False if re-included by a negated pattern, None if no
+            pattern applies (the last matching pattern wins)
+        """
+        for regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(path):
+                return not negated
+        return None
@@ -0,0 +1,123 @@
+"""
+Tree-sitter parser registry.
+
+Building a `Language` and `Parser` is cheap once but adds up when repeated for
+every file in a repository with tens of thousands of files. This registry
+creates each grammar's `Language` once per process and one `Parser` per
+language per thread (parsers are not safe to share across threads), and hands
+the same instances to every analyzer.
+
+Extraction queries (`queries/<language>.scm`) are compiled once per process as
+well; a compiled `Query` is read-only and shared, while the cursor that runs it
+is created per call.
+"""
+
+import importlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from tree_sitter import Language, Node, Parser, Query
+
+try:
+    from tree_sitter import QueryCursor
+except ImportError:  # tree-sitter < 0.25 runs queries directly
+    QueryCursor = None
+
+logger = logging.getLogger(__name__)
+
+
+# Language name -> (grammar module, function returning the language capsule)
+TREE_SITTER_GRAMMARS = {
+    "c": ("tree_sitter_c", "language"),
+    "cpp": ("tree_sitter_cpp", "language"),
+    "csharp": ("tree_sitter_c_sharp", "language"),
+    "go": ("tree_sitter_go", "language"),
+    "java": ("tree_sitter_java", "language"),
+    "javascript": ("tree_sitter_javascript", "language"),
+    "typescript": ("tree_sitter_typescript", "language_typescript"),
+    "tsx": ("tree_sitter_typescript", "language_tsx"),
+}
+
+QUERY_DIR = Path(__file__).resolve().parent.parent / "queries"
+
+_languages: Dict[str, Language] = {}
+_languages_lock = threading.Lock()
+_queries: Dict[str, Query] = {}
+_thread_local = threading.local()
+
+
+def get_language(name: str) -> Language:
+    """
+    Get the tree-sitter Language for a language name, loading its grammar on first use.
+
+    Raises:
+        ValueError: If no grammar is registered for the language
+        ImportError: If the grammar package is not installed
+    """
+    language = _languages.get(name)
+    if language is not None:
+        return language
+
+    if name not in TREE_SITTER_GRAMMARS:
+        raise ValueError(f"No tree-sitter grammar registered for language: {name}")
+
+    with _languages_lock:
+        language = _languages.get(name)
+        if language is None:
+            module_name, capsule_fn = TREE_SITTER_GRAMMARS[name]
+            module = importlib.import_module(module_name)
+            language = Language(getattr(module, capsule_fn)())
+            _languages[name] = language
+            logger.debug(f"Loaded tree-sitter grammar for {name}")
+    return language
+
+
+def get_parser(name: str) -> Parser:
+    """Get the calling thread's Parser for a language name, creating it on first use."""
+    parsers = getattr(_thread_local, "parsers", None)
+    if parsers is None:
+        parsers = _thread_local.parsers = {}
+
+    parser = parsers.get(name)
+    if parser is None:
+        parser = Parser(get_language(name))
+        parsers[name] = parser
+    return parser
+
+
+def get_query(name: str) -> Query:
+    """
+    Get the compiled extraction query for a language name, compiling
+    `queries/<name>.scm` on first use.
+
+    Raises:
+        FileNotFoundError: If the language has no extraction query
+        QueryError: If the query does not match the installed grammar
+    """
+    query = _queries.get(name)
+    if query is not None:
+        return query
+
+    language = get_language(name)
+    with _languages_lock:
+        query = _queries.get(name)
+        if query is None:
+            source = (QUERY_DIR / f"{name}.scm").read_text(encoding="utf-8")
+            query = Query(language, source)
+            _queries[name] = query
+            logger.debug(f"Compiled tree-sitter query for {name}")
+    return query
+
+
+def query_captures(query: Query, node: Node) -> Dict[str, List[Node]]:
+    """
+    Run a query over a subtree in one native pass.
+
+    Returns:
+        Capture name -> captured nodes (not necessarily in document order)
+    """
+    if QueryCursor is not None:
+        return QueryCursor(query).captures(node)
+    return query.captures(node)
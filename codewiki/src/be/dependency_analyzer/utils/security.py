@@ -31,3 +31,12 @@ def safe_open_text(base_dir: Path, target: Path, encoding="utf-8"):
             os.close(fd)
         except OSError:
             pass
+
+def safe_open_bytes(base_dir: Path, target: Path) -> bytes:
+    assert_safe_path(base_dir, target)
+    flags = os.O_RDONLY
+    if hasattr(os, "O_NOFOLLOW"):
+        flags |= os.O_NOFOLLOW
+    fd = os.open(str(target), flags)
+    with os.fdopen(fd, "rb") as f:
+        return f.read()
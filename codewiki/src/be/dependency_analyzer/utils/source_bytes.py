@@ -0,0 +1,71 @@
+"""
+Byte-level access to source files for tree-sitter analyzers.
+
+Tree-sitter parses bytes and reports byte offsets and row numbers, so keeping the
+file as bytes avoids decoding it to `str` and encoding it back for every parse and
+every node lookup. Only the slices that end up in results are decoded.
+"""
+
+from typing import List, Union
+
+
+class SourceBytes:
+    """UTF-8 source buffer with line offsets, sliced by byte offset or row."""
+
+    __slots__ = ("data", "_line_starts", "_has_cr")
+
+    def __init__(self, content: Union[str, bytes]):
+        self.data: bytes = content if isinstance(content, bytes) else content.encode("utf8")
+        self._line_starts: List[int] = None
+        self._has_cr = b"\r" in self.data
+
+    @property
+    def line_starts(self) -> List[int]:
+        """Byte offset at which each line starts (built lazily)."""
+        if self._line_starts is None:
+            data = self.data
+            starts = [0]
+            pos = data.find(b"\n")
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = data.find(b"\n", pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def _decode(self, raw: bytes) -> str:
+        text = raw.decode("utf8", errors="replace")
+        if self._has_cr:
+            # Match text-mode reads, which translate \r\n and \r to \n
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def text(self, start_byte: int, end_byte: int) -> str:
+        """Decode the source between two byte offsets."""
+        return self._decode(self.data[start_byte:end_byte])
+
+    def node_text(self, node) -> str:
+        """Decode the source covered by a tree-sitter node."""
+        return self._decode(self.data[node.start_byte:node.end_byte])
+
+    def lines(self, start_row: int, end_row: int) -> str:
+        """
+        Decode whole lines `start_row`..`end_row` (0-based, inclusive) without the
+        trailing newline, matching `"\\n".join(content.splitlines()[start_row:end_row + 1])`.
+        """
+        starts = self.line_starts
+        if start_row >= len(starts) or end_row < start_row:
+            return ""
+        start = starts[start_row]
+        if end_row + 1 < len(starts):
+            end = starts[end_row + 1] - 1  # drop the newline ending the last line
+        else:
+            end = len(self.data)
+        text = self._decode(self.data[start:end])
+        return text[:-1] if text.endswith("\n") else text
+
+    def decode(self) -> str:
+        """Decode the whole buffer."""
+        return self._decode(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
@@ -0,0 +1,145 @@
+"""
+Memory-mapped source store.
+
+Components keep only their file path and byte offsets instead of a copy of their
+source text; the text is sliced out of a read-only memory map of the file when a
+prompt or agent tool actually needs it. Mapped pages belong to the OS page cache,
+so they do not add to resident memory the way per-component strings do.
+
+A map is reused only while the path still names the same file: a repository
+re-cloned to the same directory is mapped afresh instead of being read from the
+deleted clone. The process-wide store is closed at the end of every run.
+"""
+
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# (st_dev, st_ino, st_size, st_mtime_ns) of a mapped file, None if it could not be read
+FileIdentity = Optional[Tuple[int, int, int, int]]
+
+logger = logging.getLogger(__name__)
+
+
+# Open maps each hold a file descriptor; keep well below typical ulimit -n
+MAX_OPEN_MAPS = 256
+
+
+def locate_source(
+    data: bytes, source_code: Optional[str], start_line: int = 1, line_starts: Optional[List[int]] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Find the byte range of `source_code` inside a file's raw bytes.
+
+    Only ranges whose bytes encode exactly `source_code` are returned, so reading
+    the range back reproduces the analyzer's text. Snippets that were normalized
+    (CRLF files, undecodable bytes) are not found and should be kept inline.
+
+    Args:
+        data: Raw file content
+        source_code: Text the analyzer extracted for a component
+        start_line: 1-based line the component starts on, used as a search hint
+        line_starts: Byte offset of each line start, if already computed
+
+    Returns:
+        (start_byte, end_byte), or None if the text does not occur verbatim
+    """
+    if source_code is None or b"\r" in data:
+        return None
+    encoded = source_code.encode("utf8")
+    hint = 0
+    if line_starts and 0 < start_line <= len(line_starts):
+        hint = line_starts[start_line - 1]
+    start = data.find(encoded, hint)
+    if start == -1 and hint:
+        start = data.find(encoded)
+    if start == -1:
+        return None
+    return start, start + len(encoded)
+
+
+class SourceStore:
+    """Reads byte ranges of source files through a bounded set of memory maps."""
+
+    def __init__(self, max_open: int = MAX_OPEN_MAPS):
+        self.max_open = max_open
+        self._maps: "OrderedDict[str, Tuple[FileIdentity, Optional[mmap.mmap]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> FileIdentity:
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _get_map(self, file_path: str) -> Optional[mmap.mmap]:
+        try:
+            identity = self._identity(os.stat(file_path))
+        except OSError:
+            identity = None
+        cached = self._maps.get(file_path)
+        if cached is not None and cached[0] == identity:
+            self._maps.move_to_end(file_path)
+            return cached[1]
+        if cached is not None and cached[1] is not None:
+            # The path now names another file (e.g. a fresh clone); drop the stale map
+            cached[1].close()
+
+        source_map = None
+        if identity is not None:
+            try:
+                with open(file_path, "rb") as f:
+                    identity = self._identity(os.fstat(f.fileno()))
+                    # Empty files cannot be mapped
+                    source_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if identity[2] else None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not map source file {file_path}: {e}")
+        else:
+            logger.warning(f"Could not map source file {file_path}: not found")
+        self._maps[file_path] = (identity, source_map)
+        self._maps.move_to_end(file_path)
+        while len(self._maps) > self.max_open:
+            _, (_, evicted) = self._maps.popitem(last=False)
+            if evicted is not None:
+                evicted.close()
+        return source_map
+
+    def read(self, file_path: str, start_byte: int, end_byte: int) -> str:
+        """Decode `file_path[start_byte:end_byte]`, or "" if the file cannot be read."""
+        with self._lock:
+            source_map = self._get_map(file_path)
+            if source_map is None:
+                return ""
+            return source_map[start_byte:end_byte].decode("utf8", errors="replace")
+
+    def close(self) -> None:
+        """Unmap all open files."""
+        with self._lock:
+            for _, source_map in self._maps.values():
+                if source_map is not None:
+                    source_map.close()
+            self._maps.clear()
+
+
+_source_store: Optional[SourceStore] = None
+_source_store_lock = threading.Lock()
+
+
+def get_source_store() -> SourceStore:
+    """Get the process-wide source store."""
+    global _source_store
+    if _source_store is None:
+        with _source_store_lock:
+            if _source_store is None:
+                _source_store = SourceStore()
+    return _source_store
+
+
+def close_source_store() -> None:
+    """
+    Unmap every file of the process-wide store, e.g. when a run or web job finishes,
+    so deleted clones release their disk space. Later reads map files afresh.
+    """
+    if _source_store is not None:
+        _source_store.close()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import json
@@ -11,7 +12,8 @@ logger = logging.getLogger(__name__)
 
 # Local imports
 from codewiki.src.be.dependency_analyzer import DependencyGraphBuilder
-from codewiki.src.be.llm_services import call_llm, get_token_tracker
+from codewiki.src.be.dependency_analyzer.utils.source_store import close_source_store
+from codewiki.src.be.llm_services import acall_llm, get_llm_gateway, get_token_tracker
 from codewiki.src.be.prompt_template import (
     REPO_OVERVIEW_PROMPT,
     MODULE_OVERVIEW_PROMPT,
@@ -25,6 +27,13 @@ from codewiki.src.config import (
 )
 from codewiki.src.file_manager import file_manager
 from codewiki.src.be.agent_orchestrator import AgentOrchestrator
+from codewiki.src.be.incremental import (
+    apply_incremental_plan,
+    get_changed_files,
+    get_head_commit,
+    load_previous_commit,
+    plan_incremental_update,
+)
 
 
 class DocumentationGenerator:
@@ -46,7 +55,8 @@ class DocumentationGenerator:
                 "main_model": self.config.main_model,
                 "generator_version": "1.0.0",
                 "repo_path": self.config.repo_path,
-                "commit_id": self.commit_id
+                # Recorded so `--incremental` can diff against it on the next run
+                "commit_id": self.commit_id or get_head_commit(self.config.repo_path)
             },
             "statistics": {
                 "total_components": len(components),
@@ -72,6 +82,46 @@ class DocumentationGenerator:
         file_manager.save_json(metadata, metadata_path)
 
     
+    def prepare_incremental_update(self, working_dir: str, components: Dict[str, Any],
+                                   leaf_nodes: List[str]) -> bool:
+        """
+        Invalidate only the docs affected by changes since the last documented commit.
+
+        Returns True if module_tree.json was updated in place and existing docs should
+        be reused, False if the caller should fall back to a full run.
+        """
+        module_tree_path = os.path.join(working_dir, MODULE_TREE_FILENAME)
+        first_module_tree_path = os.path.join(working_dir, FIRST_MODULE_TREE_FILENAME)
+
+        base_commit = load_previous_commit(working_dir)
+        if not base_commit:
+            logger.warning("[INCREMENTAL] No commit_id in metadata.json, running full generation")
+            return False
+        if not os.path.exists(module_tree_path) or not os.path.exists(first_module_tree_path):
+            logger.warning("[INCREMENTAL] No module tree from a previous run, running full generation")
+            return False
+
+        changed_files = get_changed_files(self.config.repo_path, base_commit)
+        if changed_files is None:
+            logger.warning(f"[INCREMENTAL] Could not diff against {base_commit}, running full generation")
+            return False
+
+        module_tree = file_manager.load_json(module_tree_path)
+        first_module_tree = file_manager.load_json(first_module_tree_path)
+        plan, updated_tree = plan_incremental_update(
+            module_tree, components, leaf_nodes, changed_files, base_commit, first_module_tree
+        )
+
+        logger.info(f"[INCREMENTAL] {len(changed_files)} file(s) changed since {base_commit[:12]}")
+        logger.info(f"[INCREMENTAL] Components: +{len(plan.added_components)} added, -{len(plan.removed_components)} removed")
+        logger.info(f"[INCREMENTAL] Affected modules ({len(plan.affected_modules)}): {plan.affected_modules[:10]}{'...' if len(plan.affected_modules) > 10 else ''}")
+        if plan.unplaced_components:
+            logger.warning(f"[INCREMENTAL] {len(plan.unplaced_components)} new component(s) match no existing module; "
+                           f"delete {FIRST_MODULE_TREE_FILENAME} and rerun to re-cluster: {plan.unplaced_components[:5]}")
+
+        apply_incremental_plan(plan, updated_tree, working_dir)
+        return True
+
     def get_processing_order(self, module_tree: Dict[str, Any], parent_path: List[str] = []) -> List[tuple[List[str], str]]:
         """Get the processing order using topological sort (leaf modules first)."""
         processing_order = []
@@ -378,7 +428,7 @@ This is a quick overview generated from the module structure. Detailed documenta
             logger.info(f"[STAGE 3] Generating parent documentation for '{module_name}'...")
             logger.info(f"[STAGE 3] Prompt size: {len(prompt)} chars")
             parent_docs_start = time.time()
-            parent_docs = call_llm(prompt, self.config)
+            parent_docs = await acall_llm(prompt, self.config)
             parent_docs_duration = time.time() - parent_docs_start
             logger.info(f"[STAGE 3] LLM call completed in {parent_docs_duration:.1f}s, response length: {len(parent_docs)} chars")
             
@@ -448,11 +498,14 @@ This is a quick overview generated from the module structure. Detailed documenta
             tracker.set_stage("Stage 2: Module Clustering")
             
             logger.info(f"[STAGE 2: MODULE CLUSTERING] Checking for cached module tree...")
+            incremental = False
             if os.path.exists(first_module_tree_path):
                 logger.info(f"[STAGE 2] Module tree found at {first_module_tree_path}")
                 try:
                     module_tree = file_manager.load_json(first_module_tree_path)
                     logger.info(f"[STAGE 2] Loaded cached module tree: {len(module_tree)} modules")
+                    if self.config.incremental:
+                        incremental = self.prepare_incremental_update(working_dir, components, leaf_nodes)
                 except Exception as e:
                     logger.error(f"[STAGE 2] Failed to load cached module tree: {e}")
                     logger.info(f"[STAGE 2] Will regenerate...")
@@ -464,7 +517,8 @@ This is a quick overview generated from the module structure. Detailed documenta
             if module_tree is None:
                 logger.info(f"[STAGE 2] Starting module clustering...")
                 try:
-                    module_tree = cluster_modules(leaf_nodes, components, self.config)
+                    # Clustering makes blocking LLM calls; keep them off the event loop
+                    module_tree = await asyncio.to_thread(cluster_modules, leaf_nodes, components, self.config)
                     logger.info(f"[STAGE 2] Clustering complete: {len(module_tree)} modules created")
                     
                     if len(module_tree) == 0:
@@ -486,12 +540,16 @@ This is a quick overview generated from the module structure. Detailed documenta
                     logger.error(f"[STAGE 2] Traceback: {traceback.format_exc()}")
                     raise
             
-            try:
-                file_manager.save_json(module_tree, module_tree_path)
-                logger.info(f"[STAGE 2] Saved module tree to {module_tree_path}")
-            except Exception as e:
-                logger.error(f"[STAGE 2] Failed to save module tree to {module_tree_path}: {e}")
-                raise
+            if incremental:
+                module_tree = file_manager.load_json(module_tree_path)
+                logger.info(f"[STAGE 2] Reusing module tree at {module_tree_path}")
+            else:
+                try:
+                    file_manager.save_json(module_tree, module_tree_path)
+                    logger.info(f"[STAGE 2] Saved module tree to {module_tree_path}")
+                except Exception as e:
+                    logger.error(f"[STAGE 2] Failed to save module tree to {module_tree_path}: {e}")
+                    raise
             
             logger.info(f"[STAGE 2: MODULE CLUSTERING] COMPLETE - Grouped components into {len(module_tree)} modules")
             if len(module_tree) > 0:
@@ -502,7 +560,8 @@ This is a quick overview generated from the module structure. Detailed documenta
             working_dir = os.path.abspath(self.config.docs_dir)
             overview_path = os.path.join(working_dir, OVERVIEW_FILENAME)
             
-            if not os.path.exists(overview_path) and len(module_tree) > 0:
+            # Incremental runs regenerate the real overview, so a placeholder would mask it
+            if not incremental and not os.path.exists(overview_path) and len(module_tree) > 0:
                 try:
                     logger.info("🚀 Generating low-latency overview (top-level structure only)...")
                     # Generate a quick overview based on module tree structure only
@@ -542,4 +601,7 @@ This is a quick overview generated from the module structure. Detailed documenta
         except Exception as e:
             logger.error(f"Documentation generation failed: {str(e)}")
             logger.error(f"Traceback: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            await get_llm_gateway(self.config).aclose()
+            close_source_store()
\ No newline at end of file
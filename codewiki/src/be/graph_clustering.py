@@ -0,0 +1,338 @@
+"""
+Graph-based module clustering for Stage 2.
+
+LLM clustering sends every leaf component's name to the cluster model. On large
+repositories the prompt has to be truncated, or the run falls back to
+directory modules. Here the module hierarchy comes from the dependency graph
+instead.
+
+1. Files are the nodes. Two files are linked with the number of dependencies
+   between their components. Each file is also linked to its neighbours in the
+   same directory, and each directory to its parent directory, so files without
+   calls still group by location.
+2. Louvain community detection (`dependency_analyzer.communities`) partitions
+   the files at several levels of granularity.
+3. The coarsest level that splits the files gives the top-level modules. A
+   module over `MAX_TOKEN_PER_MODULE` is split by the next finer level, or by
+   subdirectory once the levels run out.
+
+The cluster model is then called once, with a compact summary of every module,
+only to name and describe them. Without a usable answer, modules are named
+after the directory holding most of their components.
+"""
+
+import json
+import logging
+import posixpath
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from codewiki.src.be.dependency_analyzer.communities import WeightedGraph, louvain_levels
+from codewiki.src.be.dependency_analyzer.models.core import Node
+from codewiki.src.be.llm_services import call_llm
+from codewiki.src.be.prompt_template import format_name_clusters_prompt
+from codewiki.src.be.token_accounting import token_bounds
+from codewiki.src.be.utils import accountant, count_tokens, module_file_blocks, module_file_token_counts
+from codewiki.src.config import MAX_DEPTH, MAX_TOKEN_PER_MODULE, MIN_COMPONENTS_FOR_CLUSTERING, Config
+
+logger = logging.getLogger(__name__)
+
+# Edge weights of the file graph, relative to one dependency between two files
+DIRECTORY_AFFINITY = 1.0    # consecutive files of a directory
+PARENT_AFFINITY = 0.5       # a directory's first file and its parent directory's first file
+
+# Per module in the naming prompt
+SAMPLE_FILES = 3
+SAMPLE_COMPONENTS = 8
+
+
+def _directory(path: str) -> str:
+    return posixpath.dirname(path.replace("\\", "/"))
+
+
+def build_file_graph(
+    components: Dict[str, Node], files: Optional[Set[str]] = None
+) -> Tuple[List[str], WeightedGraph]:
+    """
+    Weighted undirected graph over the files of the components.
+
+    Args:
+        components: All components; their `depends_on` sets give the call edges
+        files: Only include these relative paths (None includes every file)
+
+    Returns:
+        (relative paths in order of first component, adjacency list of weights)
+    """
+    paths: List[str] = []
+    file_index: Dict[str, int] = {}
+    component_file: Dict[str, int] = {}
+    for comp_id, component in components.items():
+        path = component.relative_path
+        if files is not None and path not in files:
+            continue
+        i = file_index.get(path)
+        if i is None:
+            i = file_index[path] = len(paths)
+            paths.append(path)
+        component_file[comp_id] = i
+
+    graph: WeightedGraph = [{} for _ in paths]
+
+    def link(a: int, b: int, weight: float) -> None:
+        graph[a][b] = graph[a].get(b, 0.0) + weight
+        graph[b][a] = graph[b].get(a, 0.0) + weight
+
+    for comp_id, source in component_file.items():
+        for dep in components[comp_id].depends_on:
+            target = component_file.get(dep)
+            if target is not None and target != source:
+                link(source, target, 1.0)
+
+    by_directory: Dict[str, List[int]] = {}
+    for i, path in enumerate(paths):
+        by_directory.setdefault(_directory(path), []).append(i)
+    for members in by_directory.values():
+        members.sort(key=lambda i: paths[i])
+        for a, b in zip(members, members[1:]):
+            link(a, b, DIRECTORY_AFFINITY)
+    for directory, members in by_directory.items():
+        parent = directory
+        while parent:
+            parent = _directory(parent)
+            if parent in by_directory:
+                link(members[0], by_directory[parent][0], PARENT_AFFINITY)
+                break
+    return paths, graph
+
+
+class _ModuleBuilder:
+    """Turns the Louvain levels of a file graph into a module tree of leaf components."""
+
+    def __init__(self, leaf_nodes: List[str], components: Dict[str, Node], paths: List[str], levels: List[List[int]]):
+        self.components = components
+        self.paths = paths
+        self.levels = levels
+        file_index = {path: i for i, path in enumerate(paths)}
+        # File -> its leaf components, in leaf order
+        self.file_leaves: Dict[int, List[str]] = {}
+        for leaf in leaf_nodes:
+            if leaf in components:
+                i = file_index.get(components[leaf].relative_path)
+                if i is not None:
+                    self.file_leaves.setdefault(i, []).append(leaf)
+        self._file_tokens: Dict[int, int] = {}
+        self._file_sizes: Dict[int, int] = {}
+
+    def _file_block(self, i: int) -> str:
+        """The file's block in a module prompt, as `count_module_tokens` counts it."""
+        return module_file_blocks(self.file_leaves[i], self.components)[0]
+
+    def file_tokens(self, i: int) -> int:
+        """Tokens the file adds to a module prompt."""
+        tokens = self._file_tokens.get(i)
+        if tokens is None:
+            tokens = self._file_tokens[i] = module_file_token_counts(self.file_leaves[i], self.components)[0]
+        return tokens
+
+    def _over_budget(self, files: List[int]) -> bool:
+        """Whether the files' prompt is over `MAX_TOKEN_PER_MODULE`, encoding them only when it is close."""
+        if all(self.components[self.file_leaves[i][0]].file_tokens is not None for i in files):
+            # Counted in Stage 1: exact, without reading the files
+            return sum(self.file_tokens(i) for i in files) > MAX_TOKEN_PER_MODULE
+        unsized = [i for i in files if i not in self._file_sizes]
+        for i in unsized:
+            self._file_sizes[i] = len(self._file_block(i).encode("utf-8", "surrogatepass"))
+        lower, upper = token_bounds(sum(self._file_sizes[i] for i in files))
+        if upper < MAX_TOKEN_PER_MODULE or lower > MAX_TOKEN_PER_MODULE:
+            return lower > MAX_TOKEN_PER_MODULE
+        uncounted = [i for i in files if i not in self._file_tokens]
+        for i, tokens in zip(uncounted, accountant.count_batch([self._file_block(i) for i in uncounted])):
+            self._file_tokens[i] = tokens
+        return sum(self.file_tokens(i) for i in files) > MAX_TOKEN_PER_MODULE
+
+    def _split(self, files: List[int], level: int) -> Tuple[int, List[List[int]]]:
+        """Split files by the coarsest Louvain level below `level` that separates them, else by directory."""
+        for below in range(min(level, len(self.levels)) - 1, -1, -1):
+            labels = self.levels[below]
+            groups: Dict[int, List[int]] = {}
+            for i in files:
+                groups.setdefault(labels[i], []).append(i)
+            if len(groups) > 1:
+                merged = self._merge_small(list(groups.values()))
+                if len(merged) > 1:
+                    return below, merged
+        return 0, self._split_by_directory(files)
+
+    def _split_by_directory(self, files: List[int]) -> List[List[int]]:
+        directories = [self.paths[i].replace("\\", "/").split("/")[:-1] for i in files]
+        common = posixpath.commonprefix(directories) if directories else []
+        groups: Dict[str, List[int]] = {}
+        for i, parts in zip(files, directories):
+            groups.setdefault(parts[len(common)] if len(parts) > len(common) else "", []).append(i)
+        return list(groups.values()) if len(groups) > 1 else [files]
+
+    def _leaf_count(self, files: List[int]) -> int:
+        return sum(len(self.file_leaves[i]) for i in files)
+
+    def _merge_small(self, groups: List[List[int]]) -> List[List[int]]:
+        """Fold groups too small to be a module into the group sharing the most of their directory."""
+        large = [group for group in groups if self._leaf_count(group) >= MIN_COMPONENTS_FOR_CLUSTERING]
+        if not large:
+            return groups
+        for group in groups:
+            if self._leaf_count(group) >= MIN_COMPONENTS_FOR_CLUSTERING:
+                continue
+            directory = self.paths[group[0]].replace("\\", "/").split("/")[:-1]
+            best, best_shared = large[0], -1
+            for candidate in large:
+                shared = len(posixpath.commonprefix([directory, self.paths[candidate[0]].replace("\\", "/").split("/")[:-1]]))
+                if shared > best_shared:
+                    best, best_shared = candidate, shared
+            best.extend(group)
+        return large
+
+    def _module(self, files: List[int], level: int, depth: int) -> Dict[str, Any]:
+        files.sort()
+        leaves = [leaf for i in files for leaf in self.file_leaves[i]]
+        module: Dict[str, Any] = {
+            "path": self._common_directory(files),
+            "components": leaves,
+            "children": [],
+        }
+        if (depth < MAX_DEPTH and len(leaves) >= MIN_COMPONENTS_FOR_CLUSTERING and len(files) > 1
+                and self._over_budget(files)):
+            child_level, groups = self._split(files, level)
+            if len(groups) > 1:
+                module["children"] = [self._module(group, child_level, depth + 1) for group in groups]
+        return module
+
+    def _common_directory(self, files: List[int]) -> str:
+        directories = [self.paths[i].replace("\\", "/").split("/")[:-1] for i in files]
+        return "/".join(posixpath.commonprefix(directories))
+
+    def build(self) -> List[Dict[str, Any]]:
+        """Top-level modules, each with its `children` as a list of modules."""
+        files = sorted(self.file_leaves)
+        if not files:
+            return []
+        level, groups = self._split(files, len(self.levels))
+        return [self._module(group, level, 1) for group in groups]
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"[^0-9a-zA-Z]+", "_", name).strip("_").lower()
+
+
+def _number_modules(modules: List[Dict[str, Any]], prefix: str = "m") -> List[Tuple[str, Dict[str, Any], int]]:
+    """(id, module, depth) for every module, parents before children; ids are "m1", "m1.2", ..."""
+    numbered = []
+    for n, module in enumerate(modules, 1):
+        module_id = f"{prefix}{n}"
+        numbered.append((module_id, module, module_id.count(".")))
+        numbered.extend(_number_modules(module["children"], f"{module_id}."))
+    return numbered
+
+
+def _main_directories(module: Dict[str, Any], components: Dict[str, Node]) -> List[str]:
+    """Directories of the module's leaf components, most leaves first."""
+    counts: Dict[str, int] = {}
+    for leaf in module["components"]:
+        directory = _directory(components[leaf].relative_path)
+        counts[directory] = counts.get(directory, 0) + 1
+    return sorted(counts, key=lambda directory: -counts[directory])
+
+
+def _summarize(module_id: str, module: Dict[str, Any], depth: int, components: Dict[str, Node]) -> str:
+    files = list(dict.fromkeys(components[leaf].relative_path for leaf in module["components"]))
+    names = [leaf.rsplit(".", 1)[-1] for leaf in module["components"][:SAMPLE_COMPONENTS]]
+    directories = [directory or "." for directory in _main_directories(module, components)[:SAMPLE_FILES]]
+    indent = "  " * depth
+    more_files = f" (+{len(files) - SAMPLE_FILES} more)" if len(files) > SAMPLE_FILES else ""
+    return (
+        f"{indent}{module_id}: {len(module['components'])} components, mostly in {', '.join(directories)}\n"
+        f"{indent}  files: {', '.join(files[:SAMPLE_FILES])}{more_files}\n"
+        f"{indent}  components: {', '.join(names)}"
+    )
+
+
+def _request_names(
+    numbered: List[Tuple[str, Dict[str, Any], int]], components: Dict[str, Node], config: Config
+) -> Dict[str, Dict[str, str]]:
+    """Names and descriptions from one cluster model call; empty if the call or its answer fails."""
+    prompt = format_name_clusters_prompt(
+        "\n".join(_summarize(module_id, module, depth, components) for module_id, module, depth in numbered)
+    )
+    logger.info(f"[STAGE 2] Naming {len(numbered)} modules with one LLM call ({count_tokens(prompt)} prompt tokens)")
+    try:
+        response = call_llm(prompt, config, model=config.cluster_model)
+        content = response.split("<MODULE_NAMES>")[1].split("</MODULE_NAMES>")[0]
+        names = json.loads(content)
+        if not isinstance(names, dict):
+            raise ValueError(f"expected a JSON object, got {type(names).__name__}")
+        return {key: value for key, value in names.items() if isinstance(value, dict)}
+    except Exception as e:
+        logger.warning(f"[STAGE 2] Module naming failed ({type(e).__name__}: {e}), naming modules after their directories")
+        return {}
+
+
+def _to_tree(
+    modules: List[Dict[str, Any]], labels: Dict[int, Tuple[str, str]], top_level: bool
+) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    for module in modules:
+        name, description = labels[id(module)]
+        info: Dict[str, Any] = {}
+        if top_level:
+            info["path"] = module["path"]
+        info["components"] = module["components"]
+        if description:
+            info["description"] = description
+        info["children"] = _to_tree(module["children"], labels, False)
+        tree[name] = info
+    return tree
+
+
+def cluster_modules_by_graph(
+    leaf_nodes: List[str],
+    components: Dict[str, Node],
+    config: Config,
+    current_module_name: str = None,
+) -> Dict[str, Any]:
+    """
+    Build the module tree of the leaf nodes from the dependency graph.
+
+    Returns:
+        Module tree in the format `cluster_modules` returns (top-level modules have
+        a "path"), with a "description" per module when the cluster model gave one
+    """
+    start = time.time()
+    files = {components[leaf].relative_path for leaf in leaf_nodes if leaf in components}
+    # Below the root, only the files of this module take part
+    paths, graph = build_file_graph(components, files if current_module_name is not None else None)
+    levels = louvain_levels(graph)
+    modules = _ModuleBuilder(leaf_nodes, components, paths, levels).build()
+    logger.info(
+        f"[STAGE 2] Graph clustering: {len(paths)} files, {len(levels)} Louvain levels, "
+        f"{len(modules)} top-level modules in {time.time() - start:.1f}s"
+    )
+    if not modules:
+        return {}
+
+    numbered = _number_modules(modules)
+    names = _request_names(numbered, components, config)
+    labels: Dict[int, Tuple[str, str]] = {}
+    used: Set[str] = set()
+    for module_id, module, _ in numbered:
+        answer = names.get(module_id, {})
+        name = (_snake_case(str(answer.get("name", "")))
+                or _snake_case(_main_directories(module, components)[0]) or "main")
+        unique, n = name, 2
+        while unique in used:
+            unique, n = f"{name}_{n}", n + 1
+        used.add(unique)
+        labels[id(module)] = (unique, str(answer.get("description", "")))
+
+    module_tree = _to_tree(modules, labels, True)
+    logger.info(f"[STAGE 2] Graph clustering complete: {len(numbered)} modules in {time.time() - start:.1f}s")
+    return module_tree
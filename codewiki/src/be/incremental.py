@@ -0,0 +1,264 @@
+"""
+Incremental documentation regeneration.
+
+Uses git to find the files changed since the commit recorded in metadata.json,
+maps them to components and to the modules in module_tree.json that contain
+them, and removes only the stale module docs (plus their ancestors' overviews
+and the repository overview). Stage 3 already skips any module whose docs
+exist, so the next run regenerates exactly the stale pages and reuses the rest.
+"""
+
+import logging
+import os
+import subprocess
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from codewiki.src.config import (
+    FIRST_MODULE_TREE_FILENAME,
+    MODULE_TREE_FILENAME,
+    OVERVIEW_FILENAME,
+)
+from codewiki.src.file_manager import file_manager
+
+logger = logging.getLogger(__name__)
+
+
+GIT_TIMEOUT_SECONDS = 60
+
+
+@dataclass
+class IncrementalPlan:
+    """Outcome of mapping changed files onto an existing module tree."""
+    base_commit: str
+    changed_files: Set[str]
+    affected_modules: List[str] = field(default_factory=list)  # "a/b/c" module keys
+    stale_docs: List[str] = field(default_factory=list)        # doc filenames to regenerate
+    added_components: List[str] = field(default_factory=list)
+    removed_components: List[str] = field(default_factory=list)
+    unplaced_components: List[str] = field(default_factory=list)
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def load_previous_commit(working_dir: str) -> Optional[str]:
+    """Read the commit id recorded by the previous run's metadata.json."""
+    metadata = file_manager.load_json(os.path.join(working_dir, "metadata.json"))
+    if not metadata:
+        return None
+    return (metadata.get("generation_info") or {}).get("commit_id") or None
+
+
+def get_head_commit(repo_path: str) -> Optional[str]:
+    """Return the commit checked out in repo_path, or None outside a git repository."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=GIT_TIMEOUT_SECONDS
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def get_changed_files(repo_path: str, since_commit: str) -> Optional[Set[str]]:
+    """
+    List files changed since a commit, relative to repo_path.
+
+    Covers commits since `since_commit`, uncommitted edits to tracked files and new
+    untracked files, since Stage 1 analyzes the working tree. Renames count as a
+    deletion plus an addition.
+
+    Returns:
+        Set of changed paths, or None if git could not answer (not a repository,
+        unknown commit, git missing)
+    """
+    commands = [
+        ["git", "-C", repo_path, "diff", "--name-only", "--no-renames", "--relative", since_commit],
+        ["git", "-C", repo_path, "ls-files", "--others", "--exclude-standard"],
+    ]
+    changed = set()
+    for cmd in commands:
+        try:
+            result = subprocess.run(
+                cmd, capture_output=True, text=True, check=True, timeout=GIT_TIMEOUT_SECONDS
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            stderr = getattr(e, "stderr", "") or ""
+            logger.warning(f"[INCREMENTAL] git command failed ({' '.join(cmd[3:])}): {e} {stderr.strip()}")
+            return None
+        changed.update(_normalize_path(line) for line in result.stdout.splitlines() if line.strip())
+    return changed
+
+
+def _walk_modules(tree: Dict[str, Any], path: Optional[List[str]] = None):
+    """Yield (module_path, module_info) for every module, parents before children."""
+    for module_name, module_info in tree.items():
+        module_path = (path or []) + [module_name]
+        yield module_path, module_info
+        children = module_info.get("children")
+        if isinstance(children, dict) and children:
+            yield from _walk_modules(children, module_path)
+
+
+def _get_module(tree: Dict[str, Any], module_path: List[str]) -> Optional[Dict[str, Any]]:
+    module_info = None
+    level = tree
+    for part in module_path:
+        if not isinstance(level, dict) or part not in level:
+            return None
+        module_info = level[part]
+        level = module_info.get("children") or {}
+    return module_info
+
+
+def _place_new_component(
+    tree: Dict[str, Any], component_id: str, relative_path: str, file_to_module: Dict[str, List[str]]
+) -> Optional[List[str]]:
+    """
+    Pick the module a new component belongs to: the module already holding a
+    component from the same file, otherwise the deepest module whose path
+    contains the file.
+    """
+    if relative_path in file_to_module:
+        return file_to_module[relative_path]
+
+    best_path, best_depth = None, -1
+    for module_path, module_info in _walk_modules(tree):
+        module_dir = _normalize_path(module_info.get("path") or "")
+        if module_dir in ("", "."):
+            continue
+        if relative_path == module_dir or relative_path.startswith(module_dir + "/"):
+            if len(module_path) > best_depth:
+                best_path, best_depth = module_path, len(module_path)
+    return best_path
+
+
+def plan_incremental_update(
+    module_tree: Dict[str, Any],
+    components: Dict[str, Any],
+    leaf_nodes: List[str],
+    changed_files: Set[str],
+    base_commit: str,
+    first_module_tree: Optional[Dict[str, Any]] = None,
+) -> Tuple[IncrementalPlan, Dict[str, Any]]:
+    """
+    Map changed files onto the module tree.
+
+    Args:
+        module_tree: Module tree from the previous run
+        components: Components from this run's Stage 1
+        leaf_nodes: Leaf nodes from this run's Stage 1
+        changed_files: Paths changed since base_commit
+        base_commit: Commit the existing docs were generated from
+        first_module_tree: Clustering output; affected modules get their children
+            reset to it so sub-modules the agent created are planned afresh
+
+    Returns:
+        (plan, updated_module_tree) where the updated tree drops removed components
+        and places new leaf components into their modules
+    """
+    plan = IncrementalPlan(base_commit=base_commit, changed_files=set(changed_files))
+    tree = deepcopy(module_tree)
+
+    def component_file(component_id: str) -> Optional[str]:
+        component = components.get(component_id)
+        if component is None:
+            return None
+        return _normalize_path(component.relative_path)
+
+    affected: Set[Tuple[str, ...]] = set()
+    placed: Set[str] = set()
+    file_to_module: Dict[str, List[str]] = {}
+
+    for module_path, module_info in _walk_modules(tree):
+        kept = []
+        for component_id in module_info.get("components", []):
+            rel_path = component_file(component_id)
+            if rel_path is None:
+                # Component disappeared (file deleted, class renamed or removed)
+                affected.add(tuple(module_path))
+                if component_id not in plan.removed_components:
+                    plan.removed_components.append(component_id)
+                continue
+            if rel_path in changed_files:
+                affected.add(tuple(module_path))
+            kept.append(component_id)
+            placed.add(component_id)
+            # Deepest module wins since children are visited after parents
+            file_to_module[rel_path] = module_path
+        module_info["components"] = kept
+
+    for component_id in leaf_nodes:
+        if component_id in placed:
+            continue
+        rel_path = component_file(component_id)
+        if rel_path is None or rel_path not in changed_files:
+            continue
+        target_path = _place_new_component(tree, component_id, rel_path, file_to_module)
+        if target_path is None:
+            plan.unplaced_components.append(component_id)
+            continue
+        # Add to the target module and every ancestor that lists its children's components
+        for depth in range(1, len(target_path) + 1):
+            ancestor = _get_module(tree, target_path[:depth])
+            if ancestor is not None and (depth == len(target_path) or ancestor.get("components")):
+                if component_id not in ancestor.setdefault("components", []):
+                    ancestor["components"].append(component_id)
+        affected.add(tuple(target_path))
+        plan.added_components.append(component_id)
+
+    stale_docs = []
+    for module_path in sorted(affected):
+        plan.affected_modules.append("/".join(module_path))
+        # The module itself plus every ancestor overview built from it
+        for depth in range(1, len(module_path) + 1):
+            stale_docs.append(f"{module_path[depth - 1]}.md")
+        # Sub-module docs the agent split this module into are stale as well
+        module_info = _get_module(tree, list(module_path)) or {}
+        for child_path, _ in _walk_modules(module_info.get("children") or {}):
+            stale_docs.append(f"{child_path[-1]}.md")
+    if first_module_tree is not None:
+        for module_path in sorted(affected, key=len):
+            module_info = _get_module(tree, list(module_path))
+            if module_info is None:
+                continue
+            original = _get_module(first_module_tree, list(module_path))
+            if original is None or not original.get("children"):
+                module_info["children"] = {}
+    if affected:
+        stale_docs.append(OVERVIEW_FILENAME)
+    plan.stale_docs = list(dict.fromkeys(stale_docs))
+
+    return plan, tree
+
+
+def apply_incremental_plan(plan: IncrementalPlan, module_tree: Dict[str, Any], working_dir: str) -> None:
+    """Delete stale docs and save the updated module trees so Stage 3 regenerates them."""
+    removed = 0
+    for doc_name in plan.stale_docs:
+        doc_path = os.path.join(working_dir, doc_name)
+        if os.path.exists(doc_path):
+            os.remove(doc_path)
+            removed += 1
+    logger.info(f"[INCREMENTAL] Removed {removed} stale doc(s) for regeneration")
+
+    file_manager.save_json(module_tree, os.path.join(working_dir, MODULE_TREE_FILENAME))
+
+    # Keep the clustering output in sync so the processing order sees new/removed components
+    first_module_tree_path = os.path.join(working_dir, FIRST_MODULE_TREE_FILENAME)
+    first_module_tree = file_manager.load_json(first_module_tree_path)
+    if first_module_tree:
+        removed_ids = set(plan.removed_components)
+        for module_path, module_info in _walk_modules(first_module_tree):
+            updated = _get_module(module_tree, module_path)
+            if updated is not None:
+                module_info["components"] = list(updated.get("components", []))
+            elif removed_ids:
+                module_info["components"] = [
+                    c for c in module_info.get("components", []) if c not in removed_ids
+                ]
+        file_manager.save_json(first_module_tree, first_module_tree_path)
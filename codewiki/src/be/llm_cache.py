@@ -0,0 +1,342 @@
+"""
+Persistent LLM response cache.
+
+Responses are stored in a local SQLite file, keyed by a hash of the endpoint,
+model, temperature, prompt and tool schemas. A re-run that sends byte-identical
+requests, such as a job restarted after a crash in Stage 3, replays every
+completed call from disk instead of the provider.
+
+Both LLM paths go through it:
+
+- `call_llm` caches the response text of a plain prompt.
+- Agent runs use `CachedModel`, which wraps each pydantic-ai model and caches
+  every model request of a run. The prompt is the message history, and the tool
+  schemas are the request's tool and output definitions. Tools still execute on
+  replay, so their side effects (written documentation files) happen as before;
+  only the model's answers come from disk.
+
+Identical requests issued concurrently share one in-flight call, whether or not
+the result is stored. A cache shared by many runs, such as the web app's, is
+bounded with `evict`.
+
+Modes (`--llm-cache`):
+
+- `off`: no cache.
+- `read`: serve stored responses; misses go to the provider and are not stored.
+- `readwrite`: serve stored responses and store new ones.
+- `replay-only`: serve stored responses; a miss raises `LLMCacheMissError`
+  without calling the provider.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import ModelRequestParameters
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.usage import RequestUsage
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MODES = ("off", "read", "readwrite", "replay-only")
+
+# Part of every key; bump when the key or response encoding changes
+CACHE_VERSION = "2"
+
+# Message fields that differ between runs of the same conversation
+_VOLATILE_FIELDS = frozenset({
+    "timestamp", "run_id", "usage", "provider_response_id", "provider_details",
+})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+_request_parameters_adapter = TypeAdapter(ModelRequestParameters)
+
+
+class LLMCacheMissError(RuntimeError):
+    """A request had no stored response in `replay-only` mode."""
+
+
+@dataclass
+class LLMCacheEvictionStats:
+    """Result of one `LLMResponseCache.evict` pass."""
+    removed: int = 0
+    removed_bytes: int = 0
+    remaining: int = 0
+    remaining_bytes: int = 0
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class LLMResponseCache:
+    """SQLite-backed response store with in-flight sharing of identical requests."""
+
+    def __init__(self, path: str, mode: str = "readwrite"):
+        if mode not in LLM_CACHE_MODES or mode == "off":
+            raise ValueError(f"Invalid LLM cache mode: {mode!r}")
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        with self._lock:
+            self._connection()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """The open connection, reopened after `close`; call with `_lock` held."""
+        if self._conn is None:
+            # Agent requests and clustering calls arrive from different threads
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def request_key(
+        model: str, temperature: Optional[float], prompt: str, tool_schema: str = "", base_url: Optional[str] = None
+    ) -> str:
+        """Cache key of one request; the same model name behind another endpoint is another model."""
+        tools_hash = hashlib.sha256(tool_schema.encode("utf-8")).hexdigest() if tool_schema else ""
+        payload = _canonical_json({
+            "version": CACHE_VERSION,
+            "base_url": (base_url or "").rstrip("/"),
+            "model": model,
+            "temperature": temperature,
+            "prompt": prompt,
+            "tools": tools_hash,
+        })
+        return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, model: str, response: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created) VALUES (?, ?, ?, ?)",
+                (key, model, response, time.time()),
+            )
+            conn.commit()
+
+    def _claim(self, key: str) -> Tuple[Optional[str], Optional[Future], bool]:
+        """(stored response, in-flight future, whether this caller makes the call)."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return None, future, False
+            # Leaders store before leaving `_in_flight`, so this lookup sees their result
+            response = self._lookup(key)
+            if response is not None:
+                self.hits += 1
+                return response, None, False
+            if self.mode == "replay-only":
+                raise LLMCacheMissError(f"No stored LLM response for request {key[:12]} (replay-only mode)")
+            self.misses += 1
+            future = self._in_flight[key] = Future()
+            return None, future, True
+
+    def _settle(self, key: str, model: str, future: Future, response: Optional[str], error: Optional[BaseException]) -> None:
+        try:
+            if error is None and self.mode == "readwrite":
+                self._store(key, model, response)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            if error is None:
+                future.set_result(response)
+            else:
+                future.set_exception(error)
+
+    def get_or_call(self, key: str, model: str, call: Callable[[], str]) -> str:
+        """The stored response for `key`, or the result of `call`, shared with concurrent callers."""
+        response, future, leader = self._claim(key)
+        if response is not None:
+            return response
+        if not leader:
+            return future.result()
+        try:
+            response = call()
+        except BaseException as e:
+            self._settle(key, model, future, None, e)
+            raise
+        self._settle(key, model, future, response, None)
+        return response
+
+    async def aget_or_call(self, key: str, model: str, call: Callable[[], Awaitable[str]]) -> str:
+        """Async `get_or_call`; waiting on another caller's request does not block the event loop."""
+        response, future, leader = self._claim(key)
+        if response is not None:
+            return response
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            response = await call()
+        except BaseException as e:
+            self._settle(key, model, future, None, e)
+            raise
+        self._settle(key, model, future, response, None)
+        return response
+
+    def evict(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> LLMCacheEvictionStats:
+        """
+        Remove responses stored longer than `max_age_seconds` ago, then the oldest
+        ones until the stored keys and responses total at most `max_bytes`.
+
+        Safe while other runs use the file: a removed response is just a miss for
+        them. Freed pages are reused by later writes rather than returned to the
+        file system.
+        """
+        stats = LLMCacheEvictionStats()
+        size = "length(key) + length(CAST(response AS BLOB))"
+        with self._lock:
+            conn = self._connection()
+            before_count, before_bytes = conn.execute(f"SELECT count(*), coalesce(sum({size}), 0) FROM responses").fetchone()
+            if max_age_seconds is not None:
+                conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - max_age_seconds,))
+            if max_bytes is not None:
+                # Running total from the newest response; drop everything past the budget
+                conn.execute(
+                    f"""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, sum({size}) OVER (ORDER BY created DESC, key) AS total FROM responses
+                        ) WHERE total > ?
+                    )
+                    """,
+                    (max_bytes,),
+                )
+            conn.commit()
+            stats.remaining, stats.remaining_bytes = conn.execute(
+                f"SELECT count(*), coalesce(sum({size}), 0) FROM responses"
+            ).fetchone()
+        stats.removed = before_count - stats.remaining
+        stats.removed_bytes = before_bytes - stats.remaining_bytes
+        return stats
+
+    def close(self) -> None:
+        """Close the connection; the next lookup or store reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedModel(WrapperModel):
+    """A pydantic-ai model whose requests go through an `LLMResponseCache`."""
+
+    def __init__(self, wrapped, cache: LLMResponseCache):
+        super().__init__(wrapped)
+        self.cache = cache
+
+    def _key(
+        self,
+        messages: List[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> str:
+        settings, parameters = self.prepare_request(model_settings, model_request_parameters)
+        settings = dict(settings or {})
+        temperature = settings.pop("temperature", None)
+        prompt = _canonical_json(_strip_volatile(ModelMessagesTypeAdapter.dump_python(messages, mode="json")))
+        tool_schema = _canonical_json({
+            "parameters": _request_parameters_adapter.dump_python(parameters, mode="json"),
+            "settings": settings,
+        })
+        return self.cache.request_key(self.model_name, temperature, prompt, tool_schema, self.base_url)
+
+    async def request(
+        self,
+        messages: List[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        key = self._key(messages, model_settings, model_request_parameters)
+        called = False
+
+        async def call() -> str:
+            nonlocal called
+            called = True
+            response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+            return ModelMessagesTypeAdapter.dump_json([response]).decode("utf-8")
+
+        stored = await self.cache.aget_or_call(key, self.model_name, call)
+        response = ModelMessagesTypeAdapter.validate_json(stored)[0]
+        response.run_id = None
+        if not called:
+            # Stored or shared answers cost nothing here; keep them out of run usage
+            response.usage = RequestUsage()
+            logger.debug(f"[LLM] Cache hit for {self.model_name} agent request")
+        return response
+
+
+_caches: Dict[Tuple[str, str], LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(config) -> Optional[LLMResponseCache]:
+    """
+    The process-wide cache for `config`, or None when caching is off.
+
+    Caches stay open until `close_llm_caches`.
+    """
+    mode = getattr(config, "llm_cache", "off")
+    path = getattr(config, "llm_cache_path", None)
+    if mode == "off" or not path:
+        return None
+    key = (os.path.abspath(path), mode)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = LLMResponseCache(path, mode)
+            logger.info(f"[LLM] Response cache: {path} (mode={mode})")
+        return cache
+
+
+def close_llm_caches() -> None:
+    """
+    Close and forget every process-wide cache, e.g. when a web job finishes.
+    Models still holding one reopen its connection on their next request.
+    """
+    with _caches_lock:
+        caches = list(_caches.values())
+        _caches.clear()
+    for cache in caches:
+        cache.close()
@@ -1,17 +1,22 @@
 """
 LLM service factory for creating configured LLM clients.
 """
+import asyncio
+import concurrent.futures
 import os
 import logging
+import threading
 import time
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.models.openai import OpenAIModelSettings
 from pydantic_ai.models.fallback import FallbackModel
 from pydantic_ai.models import Model
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 # Try to import Gemini support (use GoogleModel, not deprecated GeminiModel)
 try:
@@ -35,7 +40,9 @@ try:
 except ImportError:
     GENAI_AVAILABLE = False
 
-from codewiki.src.config import Config
+from codewiki.src.config import Config, LLM_MAX_CONNECTIONS
+from codewiki.src.be.llm_cache import CachedModel, get_llm_cache
+from codewiki.src.be.rate_limiter import RateLimitedModel, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -173,8 +180,8 @@ def _is_gemini_model(model_name: str) -> bool:
     return 'gemini' in model_name.lower()
 
 
-def create_main_model(config: Config) -> Model:
-    """Create the main LLM model from configuration."""
+def create_main_model(config: Config, openai_client: Optional[AsyncOpenAI] = None) -> Model:
+    """Create the main LLM model from configuration, optionally on a shared client."""
     
     # Native Gemini support - use pydantic_ai's GoogleModel
     if _is_gemini_model(config.main_model) and GEMINI_AVAILABLE:
@@ -188,7 +195,10 @@ def create_main_model(config: Config) -> Model:
     
     # OpenAI or OpenAI-compatible endpoint
     os.environ['OPENAI_API_KEY'] = config.llm_api_key
-    provider = OpenAIProvider(base_url=config.llm_base_url, api_key=config.llm_api_key)
+    if openai_client is not None:
+        provider = OpenAIProvider(openai_client=openai_client)
+    else:
+        provider = OpenAIProvider(base_url=config.llm_base_url, api_key=config.llm_api_key)
     max_tokens = 16384 if 'gpt-4o' in config.main_model.lower() else 32768
     
     return OpenAIModel(
@@ -201,8 +211,8 @@ def create_main_model(config: Config) -> Model:
     )
 
 
-def create_fallback_model(config: Config) -> Model:
-    """Create the fallback LLM model from configuration."""
+def create_fallback_model(config: Config, openai_client: Optional[AsyncOpenAI] = None) -> Model:
+    """Create the fallback LLM model from configuration, optionally on a shared client."""
     
     # Native Gemini support
     if _is_gemini_model(config.fallback_model) and GEMINI_AVAILABLE:
@@ -215,7 +225,10 @@ def create_fallback_model(config: Config) -> Model:
     
     # OpenAI or OpenAI-compatible endpoint
     os.environ['OPENAI_API_KEY'] = config.llm_api_key
-    provider = OpenAIProvider(base_url=config.llm_base_url, api_key=config.llm_api_key)
+    if openai_client is not None:
+        provider = OpenAIProvider(openai_client=openai_client)
+    else:
+        provider = OpenAIProvider(base_url=config.llm_base_url, api_key=config.llm_api_key)
     max_tokens = 16384 if 'gpt-4o' in config.fallback_model.lower() else 32768
     
     return OpenAIModel(
@@ -228,85 +241,302 @@ def create_fallback_model(config: Config) -> Model:
     )
 
 
-def create_fallback_models(config: Config) -> FallbackModel:
+def create_fallback_models(config: Config, openai_client: Optional[AsyncOpenAI] = None) -> FallbackModel:
     """Create fallback models chain from configuration."""
-    main = create_main_model(config)
-    fallback = create_fallback_model(config)
+    main = RateLimitedModel(create_main_model(config, openai_client), config)
+    fallback = RateLimitedModel(create_fallback_model(config, openai_client), config)
+    # Cached answers are served before rate limiting, so replays use no quota
+    cache = get_llm_cache(config)
+    if cache is not None:
+        main, fallback = CachedModel(main, cache), CachedModel(fallback, cache)
     return FallbackModel(main, fallback)
 
 
-def create_openai_client(config: Config) -> OpenAI:
-    """Create OpenAI client from configuration."""
-    return OpenAI(
-        base_url=config.llm_base_url,
-        api_key=config.llm_api_key
+def _pooled_http_client() -> httpx.AsyncClient:
+    """An HTTP client whose keep-alive connections are reused across requests."""
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        )
     )
 
 
-def _call_gemini_native(
-    prompt: str,
-    config: Config,
-    model: str,
-    temperature: float
-) -> str:
-    """Call Gemini LLM using native Google Generative AI client."""
-    from codewiki.src.be.utils import count_tokens
+# =============================================================================
+# LLM GATEWAY - Long-lived clients and models shared by every LLM caller
+# =============================================================================
+
+class LLMGateway:
+    """
+    Long-lived LLM clients for one endpoint and model configuration.
+    
+    Plain prompts (clustering, overviews) run on the gateway's own event loop,
+    in a background thread, over one pooled `AsyncOpenAI` client; a native Gemini
+    model object is built once per model name. Sync callers wait on that loop
+    from their thread, and async callers await it, so neither opens a client per
+    call or blocks the run's event loop on network I/O.
     
-    tracker = get_token_tracker()
-    prompt_tokens_estimated = count_tokens(prompt)
+    Agent runs execute on the caller's event loop, so their pydantic-ai models
+    (providers and pooled clients) are built once per loop and reused by every
+    agent and sub-agent of the run. `aclose` releases the current loop's models.
     
-    logger.info(f"[LLM] Using native Gemini API for {model}")
+    Both kinds of request are admitted by the model's process-wide rate limiter
+    (see `rate_limiter`), which also retries rate-limited and transient failures.
+    """
     
-    # Prefer GEMINI_API_KEY env var, fallback to config
-    api_key = os.getenv('GEMINI_API_KEY') or config.llm_api_key
-    genai.configure(api_key=api_key)
-    genai_model = genai.GenerativeModel(model)
+    def __init__(self, config: Config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncOpenAI] = None
+        self._gemini_models: Dict[str, Any] = {}
+        self._agent_models: Dict[Optional[asyncio.AbstractEventLoop], Tuple[FallbackModel, AsyncOpenAI]] = {}
     
-    llm_start = time.time()
-    try:
-        response = genai_model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=32768
+    def _submit(self, coro) -> concurrent.futures.Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+                self._thread.start()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Synchronous LLM call from the gateway's own event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def complete(self, prompt: str, model: str, temperature: float) -> str:
+        """Send one prompt and wait for the response text."""
+        return self._submit(self._complete(prompt, model, temperature)).result()
+    
+    async def acomplete(self, prompt: str, model: str, temperature: float) -> str:
+        """Send one prompt without blocking the calling event loop."""
+        return await asyncio.wrap_future(self._submit(self._complete(prompt, model, temperature)))
+    
+    async def _complete(self, prompt: str, model: str, temperature: float) -> str:
+        from codewiki.src.be.utils import accountant
+        
+        # Use native Gemini if available
+        if _is_gemini_model(model) and GENAI_AVAILABLE:
+            send = lambda: self._complete_gemini(prompt, model, temperature)
+        else:
+            send = lambda: self._complete_openai(prompt, model, temperature)
+        
+        prompt_tokens = accountant.count(prompt)
+        
+        def usage(response_text: str) -> Tuple[Optional[int], int]:
+            output_tokens = accountant.estimate(response_text or "")
+            return prompt_tokens + output_tokens, output_tokens
+        
+        return await get_rate_limiter(self.config, model).run(send, prompt_tokens, usage)
+    
+    def agent_models(self) -> FallbackModel:
+        """The main/fallback model chain for agents on the running event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            entry = self._agent_models.get(loop)
+            if entry is None:
+                client = AsyncOpenAI(
+                    base_url=self.config.llm_base_url,
+                    api_key=self.config.llm_api_key,
+                    http_client=_pooled_http_client(),
+                    max_retries=0  # Retried by the rate limiter
+                )
+                entry = self._agent_models[loop] = (create_fallback_models(self.config, client), client)
+            return entry[0]
+    
+    async def aclose(self) -> None:
+        """Close the agent models' connections for the running event loop."""
+        with self._lock:
+            entry = self._agent_models.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].close()
+    
+    async def _complete_gemini(self, prompt: str, model: str, temperature: float) -> str:
+        """Call Gemini LLM using native Google Generative AI client."""
+        from codewiki.src.be.utils import count_tokens
+        
+        tracker = get_token_tracker()
+        prompt_tokens_estimated = count_tokens(prompt)
+        
+        logger.info(f"[LLM] Using native Gemini API for {model}")
+        
+        genai_model = self._gemini_models.get(model)
+        if genai_model is None:
+            # Prefer GEMINI_API_KEY env var, fallback to config
+            api_key = os.getenv('GEMINI_API_KEY') or self.config.llm_api_key
+            genai.configure(api_key=api_key)
+            genai_model = self._gemini_models[model] = genai.GenerativeModel(model)
+        
+        llm_start = time.time()
+        try:
+            response = await genai_model.generate_content_async(
+                prompt,
+                generation_config=genai.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=32768
+                )
             )
-        )
-        llm_duration = time.time() - llm_start
+            llm_duration = time.time() - llm_start
+            
+            response_text = response.text
+            
+            # Get token counts from usage metadata if available
+            if hasattr(response, 'usage_metadata') and response.usage_metadata:
+                actual_prompt_tokens = response.usage_metadata.prompt_token_count
+                actual_completion_tokens = response.usage_metadata.candidates_token_count
+            else:
+                actual_prompt_tokens = prompt_tokens_estimated
+                actual_completion_tokens = count_tokens(response_text)
+            
+            stats = LLMCallStats(
+                model=model,
+                prompt_tokens=actual_prompt_tokens,
+                completion_tokens=actual_completion_tokens,
+                duration_seconds=llm_duration,
+                success=True
+            )
+            tracker.add_call(stats)
+            
+            return response_text
+            
+        except Exception as e:
+            llm_duration = time.time() - llm_start
+            logger.error(f"[LLM] Gemini API error: {type(e).__name__}: {str(e)}")
+            stats = LLMCallStats(
+                model=model,
+                prompt_tokens=prompt_tokens_estimated,
+                completion_tokens=0,
+                duration_seconds=llm_duration,
+                success=False,
+                error=str(e)
+            )
+            tracker.add_call(stats)
+            raise
+    
+    async def _complete_openai(self, prompt: str, model: str, temperature: float) -> str:
+        """Call an OpenAI-compatible endpoint over the pooled client and track token usage."""
+        from codewiki.src.be.utils import count_tokens
         
-        response_text = response.text
+        tracker = get_token_tracker()
         
-        # Get token counts from usage metadata if available
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            actual_prompt_tokens = response.usage_metadata.prompt_token_count
-            actual_completion_tokens = response.usage_metadata.candidates_token_count
-        else:
-            actual_prompt_tokens = prompt_tokens_estimated
-            actual_completion_tokens = count_tokens(response_text)
+        # Calculate prompt token count
+        prompt_tokens_estimated = count_tokens(prompt)
+        logger.info(f"[LLM] Preparing LLM call: model={model}, prompt_tokens={prompt_tokens_estimated:,}, temperature={temperature}")
         
-        stats = LLMCallStats(
-            model=model,
-            prompt_tokens=actual_prompt_tokens,
-            completion_tokens=actual_completion_tokens,
-            duration_seconds=llm_duration,
-            success=True
-        )
-        tracker.add_call(stats)
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                base_url=self.config.llm_base_url,
+                api_key=self.config.llm_api_key,
+                http_client=_pooled_http_client(),
+                max_retries=0  # Retried by the rate limiter
+            )
+        # gpt-4o supports max 16384 tokens, other models may support more
+        max_tokens = 16384 if 'gpt-4o' in model.lower() else 32768
+        logger.info(f"[LLM] Max tokens: {max_tokens}")
         
-        return response_text
+        llm_start = time.time()
+        try:
+            logger.info(f"[LLM] Sending request to LLM API...")
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            llm_duration = time.time() - llm_start
+            
+            # Extract response content
+            response_content = response.choices[0].message.content
+            
+            # Get actual token counts from API response (more accurate)
+            if hasattr(response, 'usage') and response.usage:
+                actual_prompt_tokens = response.usage.prompt_tokens
+                actual_completion_tokens = response.usage.completion_tokens
+            else:
+                # Fall back to estimation
+                actual_prompt_tokens = prompt_tokens_estimated
+                actual_completion_tokens = count_tokens(response_content)
+            
+            # Track the call
+            stats = LLMCallStats(
+                model=model,
+                prompt_tokens=actual_prompt_tokens,
+                completion_tokens=actual_completion_tokens,
+                duration_seconds=llm_duration,
+                success=True
+            )
+            tracker.add_call(stats)
+            
+            logger.info(f"[LLM] LLM call completed in {llm_duration:.1f}s")
+            logger.info(f"[LLM] Response: {len(response_content)} chars, {actual_completion_tokens:,} tokens")
+            
+        except Exception as e:
+            llm_duration = time.time() - llm_start
+            error_msg = str(e)
+            error_type = type(e).__name__
+            
+            # Track the failed call (still costs money for prompt tokens!)
+            stats = LLMCallStats(
+                model=model,
+                prompt_tokens=prompt_tokens_estimated,  # We still sent these
+                completion_tokens=0,
+                duration_seconds=llm_duration,
+                success=False,
+                error=f"{error_type}: {error_msg[:100]}"
+            )
+            tracker.add_call(stats)
+            
+            logger.error(f"[LLM] LLM call FAILED after {llm_duration:.1f}s: {error_type}: {error_msg}")
+            
+            # Detect specific error types
+            if "429" in error_msg or "rate limit" in error_msg.lower() or "RateLimitError" in error_type:
+                logger.error(f"[LLM] RATE LIMIT DETECTED!")
+            elif "context_length_exceeded" in error_msg.lower() or "context length" in error_msg.lower():
+                logger.error(f"[LLM] CONTEXT LENGTH EXCEEDED!")
+                logger.error(f"[LLM]   - Prompt tokens: {prompt_tokens_estimated:,}")
+                logger.error(f"[LLM]   - Max context: 128,000 (gpt-4o)")
+            elif "401" in error_msg or "authentication" in error_msg.lower():
+                logger.error(f"[LLM] AUTHENTICATION ERROR!")
+            elif "timeout" in error_msg.lower():
+                logger.error(f"[LLM] TIMEOUT ERROR!")
+            
+            import traceback
+            logger.error(f"[LLM] Traceback: {traceback.format_exc()}")
+            raise
         
-    except Exception as e:
-        llm_duration = time.time() - llm_start
-        logger.error(f"[LLM] Gemini API error: {type(e).__name__}: {str(e)}")
-        stats = LLMCallStats(
-            model=model,
-            prompt_tokens=prompt_tokens_estimated,
-            completion_tokens=0,
-            duration_seconds=llm_duration,
-            success=False,
-            error=str(e)
-        )
-        tracker.add_call(stats)
-        raise
+        # Also track in old metrics system for compatibility
+        try:
+            from codewiki.src.utils.metrics import get_metrics_collector
+            metrics = get_metrics_collector().get_current()
+            if metrics and hasattr(metrics, 'stages') and metrics.stages:
+                latest_stage = list(metrics.stages.values())[-1] if metrics.stages else None
+                if latest_stage:
+                    latest_stage.tokens_used += stats.total_tokens
+        except Exception:
+            pass  # Non-critical
+        
+        return response_content
+
+
+_gateways: Dict[Tuple, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_llm_gateway(config: Config) -> LLMGateway:
+    """The process-wide gateway for `config`'s endpoint, models, cache and rate limits."""
+    key = (
+        config.llm_base_url, config.llm_api_key, config.main_model, config.fallback_model,
+        getattr(config, 'llm_cache', 'off'), getattr(config, 'llm_cache_path', None),
+        getattr(config, 'llm_rate_limits', ''),
+    )
+    with _gateways_lock:
+        gateway = _gateways.get(key)
+        if gateway is None:
+            gateway = _gateways[key] = LLMGateway(config)
+        return gateway
 
 
 def call_llm(
@@ -316,7 +546,9 @@ def call_llm(
     temperature: float = 0.0
 ) -> str:
     """
-    Call LLM with the given prompt.
+    Call LLM with the given prompt, waiting for the response.
+    
+    Safe to call from worker threads; async code should use `acall_llm`.
     
     Args:
         prompt: The prompt to send
@@ -327,105 +559,60 @@ def call_llm(
     Returns:
         LLM response text
     """
-    from codewiki.src.be.utils import count_tokens
+    if model is None:
+        model = config.main_model
+    
+    cache = get_llm_cache(config)
+    if cache is None:
+        return _call_llm_uncached(prompt, config, model, temperature)
     
-    tracker = get_token_tracker()
+    called = False
     
+    def call() -> str:
+        nonlocal called
+        called = True
+        return _call_llm_uncached(prompt, config, model, temperature)
+    
+    key = cache.request_key(model, temperature, prompt, base_url=config.llm_base_url)
+    response_content = cache.get_or_call(key, model, call)
+    if not called:
+        logger.info(f"[LLM] Cache hit: model={model}, {len(response_content)} chars")
+    return response_content
+
+
+async def acall_llm(
+    prompt: str,
+    config: Config,
+    model: str = None,
+    temperature: float = 0.0
+) -> str:
+    """Async `call_llm`: the request runs on the LLM gateway without blocking the event loop."""
     if model is None:
         model = config.main_model
     
-    # Use native Gemini if available
-    if _is_gemini_model(model) and GENAI_AVAILABLE:
-        return _call_gemini_native(prompt, config, model, temperature)
+    cache = get_llm_cache(config)
+    if cache is None:
+        return await _acall_llm_uncached(prompt, config, model, temperature)
     
-    # Calculate prompt token count
-    prompt_tokens_estimated = count_tokens(prompt)
-    logger.info(f"[LLM] Preparing LLM call: model={model}, prompt_tokens={prompt_tokens_estimated:,}, temperature={temperature}")
+    called = False
     
-    client = create_openai_client(config)
-    # gpt-4o supports max 16384 tokens, other models may support more
-    max_tokens = 16384 if 'gpt-4o' in model.lower() else 32768
-    logger.info(f"[LLM] Max tokens: {max_tokens}")
+    async def call() -> str:
+        nonlocal called
+        called = True
+        return await _acall_llm_uncached(prompt, config, model, temperature)
     
-    llm_start = time.time()
-    try:
-        logger.info(f"[LLM] Sending request to LLM API...")
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        llm_duration = time.time() - llm_start
-        
-        # Extract response content
-        response_content = response.choices[0].message.content
-        
-        # Get actual token counts from API response (more accurate)
-        if hasattr(response, 'usage') and response.usage:
-            actual_prompt_tokens = response.usage.prompt_tokens
-            actual_completion_tokens = response.usage.completion_tokens
-        else:
-            # Fall back to estimation
-            actual_prompt_tokens = prompt_tokens_estimated
-            actual_completion_tokens = count_tokens(response_content)
-        
-        # Track the call
-        stats = LLMCallStats(
-            model=model,
-            prompt_tokens=actual_prompt_tokens,
-            completion_tokens=actual_completion_tokens,
-            duration_seconds=llm_duration,
-            success=True
-        )
-        tracker.add_call(stats)
-        
-        logger.info(f"[LLM] LLM call completed in {llm_duration:.1f}s")
-        logger.info(f"[LLM] Response: {len(response_content)} chars, {actual_completion_tokens:,} tokens")
-        
-    except Exception as e:
-        llm_duration = time.time() - llm_start
-        error_msg = str(e)
-        error_type = type(e).__name__
-        
-        # Track the failed call (still costs money for prompt tokens!)
-        stats = LLMCallStats(
-            model=model,
-            prompt_tokens=prompt_tokens_estimated,  # We still sent these
-            completion_tokens=0,
-            duration_seconds=llm_duration,
-            success=False,
-            error=f"{error_type}: {error_msg[:100]}"
-        )
-        tracker.add_call(stats)
-        
-        logger.error(f"[LLM] LLM call FAILED after {llm_duration:.1f}s: {error_type}: {error_msg}")
-        
-        # Detect specific error types
-        if "429" in error_msg or "rate limit" in error_msg.lower() or "RateLimitError" in error_type:
-            logger.error(f"[LLM] RATE LIMIT DETECTED!")
-        elif "context_length_exceeded" in error_msg.lower() or "context length" in error_msg.lower():
-            logger.error(f"[LLM] CONTEXT LENGTH EXCEEDED!")
-            logger.error(f"[LLM]   - Prompt tokens: {prompt_tokens_estimated:,}")
-            logger.error(f"[LLM]   - Max context: 128,000 (gpt-4o)")
-        elif "401" in error_msg or "authentication" in error_msg.lower():
-            logger.error(f"[LLM] AUTHENTICATION ERROR!")
-        elif "timeout" in error_msg.lower():
-            logger.error(f"[LLM] TIMEOUT ERROR!")
-        
-        import traceback
-        logger.error(f"[LLM] Traceback: {traceback.format_exc()}")
-        raise
-    
-    # Also track in old metrics system for compatibility
-    try:
-        from codewiki.src.utils.metrics import get_metrics_collector
-        metrics = get_metrics_collector().get_current()
-        if metrics and hasattr(metrics, 'stages') and metrics.stages:
-            latest_stage = list(metrics.stages.values())[-1] if metrics.stages else None
-            if latest_stage:
-                latest_stage.tokens_used += stats.total_tokens
-    except Exception:
-        pass  # Non-critical
-    
-    return response_content
\ No newline at end of file
+    key = cache.request_key(model, temperature, prompt, base_url=config.llm_base_url)
+    response_content = await cache.aget_or_call(key, model, call)
+    if not called:
+        logger.info(f"[LLM] Cache hit: model={model}, {len(response_content)} chars")
+    return response_content
+
+
+def _call_llm_uncached(prompt: str, config: Config, model: str, temperature: float) -> str:
+    """Send one prompt to the provider through the gateway."""
+    return get_llm_gateway(config).complete(prompt, model, temperature)
+
+
+async def _acall_llm_uncached(prompt: str, config: Config, model: str, temperature: float) -> str:
+    """Async `_call_llm_uncached`."""
+    return await get_llm_gateway(config).acomplete(prompt, model, temperature)
@@ -22,11 +22,20 @@ logger = logging.getLogger(__name__)
 
 # Local imports
 from codewiki.src.be.documentation_generator import DocumentationGenerator
+from codewiki.src.be.llm_cache import LLM_CACHE_MODES
 from codewiki.src.config import (
     Config,
 )
 
 
+def non_negative_int(value: str) -> int:
+    """argparse type for counts where 0 has a meaning of its own (e.g. "one per CPU")."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -38,6 +47,23 @@ def parse_arguments() -> argparse.Namespace:
         required=True,
         help='Path to the repository'
     )
+    parser.add_argument(
+        '--parse-workers',
+        type=non_negative_int,
+        default=None,
+        help='Number of parser processes for dependency analysis (0 = one per CPU, 1 = sequential)'
+    )
+    parser.add_argument(
+        '--llm-cache',
+        choices=LLM_CACHE_MODES,
+        default=None,
+        help='LLM response cache: off, read (no new entries), readwrite, or replay-only (fail on a miss)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Regenerate only docs affected by git changes since the last run'
+    )
     
     return parser.parse_args()
 
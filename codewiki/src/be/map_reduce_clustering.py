@@ -0,0 +1,300 @@
+"""
+Map-reduce module clustering for Stage 2.
+
+When the component list of one clustering level does not fit in a single
+cluster prompt, or the grouped answer would not fit in the model's output,
+the level is clustered in chunks instead of truncating the list.
+
+1. Map: the leaf nodes are split, whole files at a time, into chunks whose
+   component list fits both budgets. Chunks are clustered concurrently with
+   the usual cluster prompt. A chunk whose answer is truncated or unreadable
+   is split in half and retried; a single file that still fails gets one
+   module per directory.
+2. Reduce: one call merges the partial modules of all chunks. It only sees
+   their names, paths and a few components each. Without a usable answer,
+   partial modules with the same name are merged.
+
+Every leaf node ends up in exactly one module. A component listed twice keeps
+its first module. Components the model left out join the module holding most
+of their file, or else of their closest directory.
+"""
+
+import ast
+import logging
+import posixpath
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from codewiki.src.be.dependency_analyzer.models.core import Node
+from codewiki.src.be.llm_services import call_llm
+from codewiki.src.be.prompt_template import format_cluster_prompt, format_reduce_clusters_prompt
+from codewiki.src.be.token_accounting import pack
+from codewiki.src.be.utils import accountant, count_tokens
+from codewiki.src.config import MAX_CLUSTERING_PROMPT_TOKENS, MAX_LLM_OUTPUT_TOKENS, Config
+
+logger = logging.getLogger(__name__)
+
+# Share of the output budget a chunk's component list may use: the answer repeats
+# every component name, plus module names and JSON around them
+OUTPUT_SHARE = 0.5
+MIN_CHUNK_TOKENS = 1_000
+# Components shown per partial module in the reduce prompt
+SAMPLE_COMPONENTS = 5
+
+ModuleTree = Dict[str, Dict[str, Any]]
+# (name, path, leaf nodes) of a module found in one chunk
+PartialModule = Tuple[str, str, List[str]]
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"[^0-9a-zA-Z]+", "_", name).strip("_").lower()
+
+
+def _directory(component: Node) -> str:
+    return posixpath.dirname(component.relative_path.replace("\\", "/"))
+
+
+def _component_list(leaf_nodes: List[str], components: Dict[str, Node]) -> str:
+    """Leaf nodes grouped by file, as `format_potential_core_components` lists them."""
+    by_file: Dict[str, List[str]] = defaultdict(list)
+    for leaf in leaf_nodes:
+        by_file[components[leaf].relative_path].append(leaf)
+    return "".join(
+        f"# {path}\n" + "".join(f"\t{leaf}\n" for leaf in by_file[path]) for path in sorted(by_file)
+    )
+
+
+def chunk_leaf_nodes(leaf_nodes: List[str], components: Dict[str, Node], budget: int) -> List[List[str]]:
+    """
+    Split leaf nodes into chunks whose component list stays within `budget` tokens.
+
+    Files are kept whole and in path order, so neighbouring files share a chunk.
+    A file whose own list is over budget is split evenly.
+    """
+    by_file: Dict[str, List[str]] = defaultdict(list)
+    for leaf in leaf_nodes:
+        if leaf in components:
+            by_file[components[leaf].relative_path].append(leaf)
+
+    paths = sorted(by_file)
+    file_counts = accountant.count_batch([_component_list(by_file[path], components) for path in paths])
+    pieces: List[List[str]] = []
+    piece_counts: List[int] = []
+    for path, tokens in zip(paths, file_counts):
+        leaves = by_file[path]
+        parts = -(-tokens // budget)
+        size = -(-len(leaves) // parts)
+        for start in range(0, len(leaves), size):
+            piece = leaves[start:start + size]
+            pieces.append(piece)
+            piece_counts.append(tokens * len(piece) // len(leaves))
+    return [[leaf for piece in pieces[start:end] for leaf in piece] for start, end in pack(piece_counts, budget)]
+
+
+def _parse_tagged_dict(response: str, tag: str) -> Optional[Dict[str, Any]]:
+    """The dict literal between `<tag>` and `</tag>`, or None if it is missing or cut off."""
+    if f"<{tag}>" not in response or f"</{tag}>" not in response:
+        return None
+    content = response.split(f"<{tag}>")[1].split(f"</{tag}>")[0]
+    try:
+        parsed = ast.literal_eval(content.strip())
+    except (SyntaxError, ValueError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _directory_partials(chunk: List[str], components: Dict[str, Node]) -> List[PartialModule]:
+    by_directory: Dict[str, List[str]] = defaultdict(list)
+    for leaf in chunk:
+        by_directory[_directory(components[leaf])].append(leaf)
+    return [(_snake_case(directory) or "main", directory, leaves) for directory, leaves in by_directory.items()]
+
+
+def _cluster_chunk(
+    chunk: List[str],
+    components: Dict[str, Node],
+    config: Config,
+    current_module_tree: Dict[str, Any],
+    current_module_name: Optional[str],
+) -> List[PartialModule]:
+    """Map step: partial modules of one chunk."""
+    prompt = format_cluster_prompt(_component_list(chunk, components), current_module_tree, current_module_name)
+    try:
+        grouped = _parse_tagged_dict(call_llm(prompt, config, model=config.cluster_model), "GROUPED_COMPONENTS")
+    except Exception as e:
+        logger.error(f"[STAGE 2] Chunk of {len(chunk)} components failed: {type(e).__name__}: {e}")
+        return _directory_partials(chunk, components)
+
+    if grouped is None:
+        files = list(dict.fromkeys(components[leaf].relative_path for leaf in chunk))
+        if len(files) < 2:
+            logger.warning(f"[STAGE 2] Unreadable answer for a single-file chunk ({files[0]}), grouping by directory")
+            return _directory_partials(chunk, components)
+        # Truncated or malformed: a smaller chunk gets a shorter answer
+        first_half = set(files[:len(files) // 2])
+        logger.warning(f"[STAGE 2] Unreadable answer for a chunk of {len(files)} files, retrying as two chunks")
+        return [
+            partial
+            for half in ([leaf for leaf in chunk if components[leaf].relative_path in first_half],
+                         [leaf for leaf in chunk if components[leaf].relative_path not in first_half])
+            for partial in _cluster_chunk(half, components, config, current_module_tree, current_module_name)
+        ]
+
+    in_chunk = set(chunk)
+    partials = []
+    for name, info in grouped.items():
+        if not isinstance(info, dict):
+            continue
+        leaves = [leaf for leaf in info.get("components", []) if isinstance(leaf, str) and leaf in in_chunk]
+        if leaves:
+            partials.append((str(name), str(info.get("path", "")), leaves))
+    return partials
+
+
+def _reduce(
+    partials: List[PartialModule], config: Config, current_module_name: Optional[str]
+) -> List[Tuple[str, str, List[int]]]:
+    """Reduce step: (name, path, indexes of merged partial modules) of every final module."""
+    lines = []
+    for i, (name, path, leaves) in enumerate(partials, 1):
+        sample = ", ".join(leaf.rsplit(".", 1)[-1] for leaf in leaves[:SAMPLE_COMPONENTS])
+        lines.append(f"p{i}: {name} (path '{path or '.'}', {len(leaves)} components: {sample})")
+    prompt = format_reduce_clusters_prompt("\n".join(lines), current_module_name)
+
+    merged = None
+    if accountant.count_within([prompt], MAX_CLUSTERING_PROMPT_TOKENS) <= MAX_CLUSTERING_PROMPT_TOKENS:
+        try:
+            merged = _parse_tagged_dict(call_llm(prompt, config, model=config.cluster_model), "MERGED_MODULES")
+        except Exception as e:
+            logger.error(f"[STAGE 2] Reduce call failed: {type(e).__name__}: {e}")
+    else:
+        logger.warning(f"[STAGE 2] {len(partials)} partial modules are too many to reduce in one call")
+    if merged is None:
+        logger.warning(f"[STAGE 2] No usable reduce answer, merging partial modules by name")
+        merged = {}
+
+    groups: List[Tuple[str, str, List[int]]] = []
+    used = set()
+    for name, info in merged.items():
+        if not isinstance(info, dict):
+            continue
+        parts = []
+        for part in info.get("parts", []):
+            index = int(part[1:]) - 1 if isinstance(part, str) and part[1:].isdigit() else -1
+            if 0 <= index < len(partials) and index not in used:
+                used.add(index)
+                parts.append(index)
+        if parts:
+            groups.append((str(name), str(info.get("path", "")), parts))
+
+    # Partial modules the answer left out join a final module of the same name
+    by_name = {_snake_case(name): group for name, _, group in groups}
+    for index, (name, path, _) in enumerate(partials):
+        if index in used:
+            continue
+        group = by_name.get(_snake_case(name))
+        if group is None:
+            group = by_name[_snake_case(name)] = []
+            groups.append((name, path, group))
+        group.append(index)
+    return groups
+
+
+def _place_missing(
+    module_tree: ModuleTree, missing: List[str], components: Dict[str, Node]
+) -> None:
+    """Add leaf nodes no module listed to the module holding most of their file or directory."""
+    file_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    directory_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for name, info in module_tree.items():
+        for leaf in info["components"]:
+            file_counts[components[leaf].relative_path][name] += 1
+            directory_counts[_directory(components[leaf])][name] += 1
+    largest = max(module_tree, key=lambda name: len(module_tree[name]["components"]))
+
+    for leaf in missing:
+        counts = file_counts.get(components[leaf].relative_path)
+        directory = _directory(components[leaf])
+        while not counts:
+            counts = directory_counts.get(directory)
+            if not directory:
+                break
+            directory = posixpath.dirname(directory)
+        name = max(counts, key=lambda name: counts[name]) if counts else largest
+        module_tree[name]["components"].append(leaf)
+
+
+def cluster_modules_map_reduce(
+    leaf_nodes: List[str],
+    components: Dict[str, Node],
+    config: Config,
+    current_module_tree: Dict[str, Any] = None,
+    current_module_name: str = None,
+) -> ModuleTree:
+    """
+    Cluster one level of leaf nodes in concurrent chunks and merge the results.
+
+    Returns:
+        Module tree in the format of the cluster model's answer
+        (`{name: {"path": ..., "components": [...]}}`), empty if there are no leaf nodes
+    """
+    start = time.time()
+    current_module_tree = current_module_tree or {}
+    leaf_nodes = [leaf for leaf in leaf_nodes if leaf in components]
+    if not leaf_nodes:
+        return {}
+
+    overhead = count_tokens(format_cluster_prompt("", current_module_tree, current_module_name))
+    budget = max(MIN_CHUNK_TOKENS, min(MAX_CLUSTERING_PROMPT_TOKENS - overhead, int(MAX_LLM_OUTPUT_TOKENS * OUTPUT_SHARE)))
+    chunks = chunk_leaf_nodes(leaf_nodes, components, budget)
+    workers = max(1, min(config.cluster_map_workers, len(chunks)))
+    logger.info(
+        f"[STAGE 2] Map-reduce clustering: {len(leaf_nodes)} leaf nodes in {len(chunks)} chunks "
+        f"of <= {budget} tokens, {workers} workers"
+    )
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda chunk: _cluster_chunk(chunk, components, config, current_module_tree, current_module_name),
+            chunks,
+        ))
+    partials = [partial for result in results for partial in result]
+    logger.info(f"[STAGE 2] Map step: {len(partials)} partial modules in {time.time() - start:.1f}s")
+
+    module_tree: ModuleTree = {}
+    assigned = set()
+    if len(chunks) > 1:
+        groups = _reduce(partials, config, current_module_name)
+    else:
+        groups = [(name, path, [index]) for index, (name, path, _) in enumerate(partials)]
+    for name, path, parts in groups:
+        leaves = []
+        for index in parts:
+            for leaf in partials[index][2]:
+                if leaf not in assigned:
+                    assigned.add(leaf)
+                    leaves.append(leaf)
+        if not leaves:
+            continue
+        base = _snake_case(name) or _snake_case(path) or "main"
+        unique, n = base, 2
+        while unique in module_tree:
+            unique, n = f"{base}_{n}", n + 1
+        module_tree[unique] = {"path": path, "components": leaves}
+
+    missing = [leaf for leaf in leaf_nodes if leaf not in assigned]
+    if missing:
+        if module_tree:
+            _place_missing(module_tree, missing, components)
+            logger.info(f"[STAGE 2] {len(missing)} leaf nodes left out by the cluster model joined their file's module")
+        else:
+            for name, path, leaves in _directory_partials(missing, components):
+                module_tree.setdefault(name, {"path": path, "components": []})["components"].extend(leaves)
+
+    logger.info(
+        f"[STAGE 2] Map-reduce clustering complete: {len(module_tree)} modules from "
+        f"{len(chunks)} chunks in {time.time() - start:.1f}s"
+    )
+    return module_tree
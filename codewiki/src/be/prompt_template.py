@@ -314,6 +314,56 @@ Rules:
 - DO NOT include any reasoning, explanation, or text before the <GROUPED_COMPONENTS> tag
 """.strip()
 
+NAME_CLUSTERS_PROMPT = """
+The components of a repository have been grouped into modules by their call graph and directory structure. For each module below you get its id, its main directories, its files and a sample of its core components. Sub-modules are listed under their parent module.
+
+<MODULES>
+{modules}
+</MODULES>
+
+IMPORTANT: You MUST output the <MODULE_NAMES> tag FIRST, BEFORE any reasoning or explanation.
+Give every module a name and a one-sentence description of what it does.
+
+Your response MUST start immediately with:
+<MODULE_NAMES>
+{{
+    "m1": {{"name": "module_name_1", "description": "What the module does."}},
+    "m1.1": {{"name": "submodule_name_1", "description": "What the sub-module does."}}
+}}
+</MODULE_NAMES>
+
+Rules:
+- Use every module id exactly once
+- Use snake_case names that describe the functionality, not just the directory
+- Names must be unique across all modules
+- DO NOT include any reasoning, explanation, or text before the <MODULE_NAMES> tag
+""".strip()
+
+REDUCE_CLUSTERS_PROMPT = """
+The components of a repository were too many to group in one pass, so they were split into chunks and each chunk was grouped into partial modules. Partial modules of different chunks may describe the same part of the repository. For each partial module below you get its id, its name, its path and a sample of its components.
+
+<PARTIAL_MODULES>
+{partial_modules}
+</PARTIAL_MODULES>
+
+IMPORTANT: You MUST output the <MERGED_MODULES> tag FIRST, BEFORE any reasoning or explanation.
+Merge the partial modules into the final modules of the {scope}.
+
+Your response MUST start immediately with:
+<MERGED_MODULES>
+{{
+    "module_name_1": {{"path": "path/to/module", "parts": ["p1", "p4"]}},
+    "module_name_2": {{"path": "path/to/other/module", "parts": ["p2"]}}
+}}
+</MERGED_MODULES>
+
+Rules:
+- Use every partial module id exactly once
+- Merge partial modules that cover the same directory or functionality
+- Use snake_case for module names
+- DO NOT include any reasoning, explanation, or text before the <MERGED_MODULES> tag
+""".strip()
+
 FILTER_FOLDERS_PROMPT = """
 Here is the list of relative paths of files, folders in 2-depth of project {project_name}:
 ```
@@ -483,9 +533,10 @@ def format_user_prompt(module_name: str, core_component_ids: list[str], componen
                 core_component_codes += f"Lines {component.start_line}-{component.end_line}\n"
             core_component_codes += f"```{lang}\n"
             
-            # Use component.source_code instead of reading entire file
-            if hasattr(component, 'source_code') and component.source_code:
-                core_component_codes += component.source_code
+            # Use the component's own source (read on demand) instead of the entire file
+            source_code = component.get_source_code() if hasattr(component, 'get_source_code') else ""
+            if source_code:
+                core_component_codes += source_code
             else:
                 core_component_codes += f"# Source code not available for {component_id}\n"
             
@@ -524,4 +575,19 @@ def format_cluster_prompt(potential_core_components: str, module_tree: dict[str,
     if module_tree == {}:
         return CLUSTER_REPO_PROMPT.format(potential_core_components=potential_core_components)
     else:
-        return CLUSTER_MODULE_PROMPT.format(potential_core_components=potential_core_components, module_tree=formatted_module_tree, module_name=module_name)
\ No newline at end of file
+        return CLUSTER_MODULE_PROMPT.format(potential_core_components=potential_core_components, module_tree=formatted_module_tree, module_name=module_name)
+
+
+def format_name_clusters_prompt(modules: str) -> str:
+    """
+    Format the prompt asking for names and descriptions of graph-clustered modules.
+    """
+    return NAME_CLUSTERS_PROMPT.format(modules=modules)
+
+
+def format_reduce_clusters_prompt(partial_modules: str, module_name: str = None) -> str:
+    """
+    Format the prompt merging the partial modules of chunked clustering.
+    """
+    scope = f"module {module_name}" if module_name else "repository"
+    return REDUCE_CLUSTERS_PROMPT.format(partial_modules=partial_modules, scope=scope)
\ No newline at end of file
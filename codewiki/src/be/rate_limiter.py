@@ -0,0 +1,352 @@
+"""
+Process-wide adaptive rate limiting for LLM requests.
+
+Every request to a model is admitted by that model's `ModelRateLimiter`, shared
+by all threads and event loops of the process: clustering calls on the LLM
+gateway's loop and agent requests on the run's loop draw from the same quota.
+
+Admission has three parts:
+
+- Concurrency: at most `limit` requests are in flight. The limit adapts AIMD
+  style. Each success adds `1 / limit` (about one more slot per round of
+  requests), a 429 halves it (once per `DECREASE_COOLDOWN`, so one burst of
+  rejections counts as one congestion signal), and a rise of the recent
+  seconds-per-output-token average well above its long-run average shrinks
+  it by `LATENCY_DECREASE`.
+- Requests per minute and tokens per minute: token buckets refilled at the
+  configured rate, holding `BURST_SECONDS` worth of quota so a full minute's
+  allowance is not spent in one burst. A request reserves its prompt tokens
+  up front and is charged its output tokens when it completes; a reservation
+  larger than the bucket waits for the deficit to refill instead of failing.
+- Back-off: after a 429 no request to the model starts before the provider's
+  `Retry-After`, or an exponential delay with jitter.
+
+Rate-limited and transient (5xx, connection, timeout) failures are retried
+here, up to `LLM_MAX_RETRIES` times, so clients are created without their own
+retries and every attempt is visible to the limiter.
+
+Limits come from `Config.llm_rate_limits`, a comma separated list of
+`model=RPM/TPM` entries; `*` sets the default and 0 means unlimited, e.g.
+`*=500/200000,gpt-4o-mini=5000/2000000`.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import ModelRequestParameters
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from codewiki.src.config import (
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BURST_SECONDS = 10.0
+DECREASE_COOLDOWN = 2.0
+# Seconds per output token: fast and slow moving averages
+LATENCY_FAST_WEIGHT = 0.3
+LATENCY_SLOW_WEIGHT = 0.02
+LATENCY_INFLATION = 2.0
+LATENCY_DECREASE = 0.9
+# Back-off after a rejection when the provider gives no Retry-After
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse `model=RPM/TPM,...` into {model: (rpm, tpm)}; `*` is the default."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model, sep, values = entry.rpartition("=")
+        rpm, slash, tpm = values.partition("/")
+        if not sep or not model.strip() or not slash:
+            raise ValueError(f"Invalid rate limit {entry!r}; expected model=RPM/TPM")
+        limits[model.strip()] = (int(rpm), int(tpm))
+    return limits
+
+
+def classify_error(error: BaseException) -> Tuple[Optional[str], Optional[float]]:
+    """
+    ('rate_limited' | 'transient' | None, Retry-After seconds) of an LLM call failure.
+
+    Looks through the exception chain, since pydantic-ai re-raises provider
+    errors as `ModelHTTPError` from the original.
+    """
+    chain = []
+    while error is not None and all(error is not seen for seen in chain):
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    for error in chain:
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        name = type(error).__name__
+        if status == 429 or name in ("RateLimitError", "ResourceExhausted"):
+            return "rate_limited", _retry_after(chain)
+        if (isinstance(status, int) and status >= 500) or name in (
+            "APIConnectionError", "APITimeoutError", "InternalServerError",
+            "ServiceUnavailable", "DeadlineExceeded",
+        ):
+            return "transient", _retry_after(chain)
+    return None, None
+
+
+def _retry_after(chain) -> Optional[float]:
+    for error in chain:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if headers and headers.get("retry-after") is not None:
+            try:
+                return max(0.0, float(headers.get("retry-after")))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class TokenBucket:
+    """Reservation-based bucket refilled at `per_minute / 60` per second."""
+
+    def __init__(self, per_minute: int):
+        self.configure(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def configure(self, per_minute: int) -> None:
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` and return how long to wait until it is covered; 0 when unlimited."""
+        if self.per_minute <= 0:
+            return 0.0
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) `amount` after the fact."""
+        if self.per_minute > 0:
+            self.level = min(self.capacity, self.level - amount)
+
+
+@dataclass
+class _Permit:
+    reserved_tokens: int
+    started: float
+
+
+class ModelRateLimiter:
+    """RPM/TPM buckets and AIMD concurrency for one model, shared process-wide."""
+
+    def __init__(self, model: str, rpm: int = 0, tpm: int = 0,
+                 initial_concurrency: int = LLM_INITIAL_CONCURRENCY,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(max(1, initial_concurrency), self.max_concurrency))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        # Waiters from any thread or event loop, woken in arrival order
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._last_decrease = float("-inf")
+        self._fast_latency: Optional[float] = None
+        self._slow_latency: Optional[float] = None
+        self.rejections = 0
+
+    def configure(self, rpm: int, tpm: int) -> None:
+        with self._lock:
+            if (rpm, tpm) != (self.requests.per_minute, self.tokens.per_minute):
+                self.requests.configure(rpm)
+                self.tokens.configure(tpm)
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < int(self.limit) and not self._waiters:
+                self.in_flight += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+                    raise
+            # The slot was handed over as we were cancelled; pass it on
+            self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_locked()
+
+    def _wake_locked(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            loop, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def acquire(self, prompt_tokens: int) -> _Permit:
+        """Wait for a concurrency slot, then for request and token quota."""
+        await self._acquire_slot()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                delay = max(
+                    self.blocked_until - now,
+                    self.requests.reserve(1, now),
+                    self.tokens.reserve(prompt_tokens, now),
+                )
+            if delay > 0:
+                logger.debug(f"[RATE LIMIT] {self.model}: waiting {delay:.2f}s for quota")
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._release_slot()
+            raise
+        return _Permit(reserved_tokens=prompt_tokens, started=time.monotonic())
+
+    def release(self, permit: _Permit, outcome: Optional[str],
+                used_tokens: Optional[int] = None, output_tokens: int = 0,
+                retry_after: Optional[float] = None, attempt: int = 0) -> None:
+        """Settle a request: reconcile token use, adapt the limit, free the slot."""
+        now = time.monotonic()
+        with self._lock:
+            if used_tokens is not None:
+                self.tokens.adjust(used_tokens - permit.reserved_tokens)
+            if outcome is None:
+                self._on_success(now - permit.started, output_tokens)
+            elif outcome == "rate_limited":
+                self.rejections += 1
+                self._decrease(0.5, now)
+                backoff = retry_after if retry_after is not None else _backoff(attempt)
+                self.blocked_until = max(self.blocked_until, now + backoff)
+                logger.warning(f"[RATE LIMIT] {self.model}: 429, concurrency limit {self.limit:.1f}, "
+                               f"pausing {backoff:.1f}s")
+            self.in_flight -= 1
+            self._wake_locked()
+
+    def _on_success(self, latency: float, output_tokens: int) -> None:
+        per_token = latency / max(1, output_tokens)
+        if self._fast_latency is None:
+            self._fast_latency = self._slow_latency = per_token
+        else:
+            self._fast_latency += LATENCY_FAST_WEIGHT * (per_token - self._fast_latency)
+            self._slow_latency += LATENCY_SLOW_WEIGHT * (per_token - self._slow_latency)
+        if self._fast_latency > LATENCY_INFLATION * self._slow_latency:
+            self._decrease(LATENCY_DECREASE, time.monotonic())
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, factor: float, now: float) -> None:
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit * factor)
+
+    async def run(self, call: Callable[[], Awaitable[T]], prompt_tokens: int,
+                  usage: Callable[[T], Tuple[Optional[int], int]] = lambda result: (None, 0)) -> T:
+        """
+        Admit and run `call`, retrying rate-limited and transient failures.
+
+        `usage(result)` gives (total tokens used, output tokens) to settle the
+        reservation and feed the latency signal.
+        """
+        attempt = 0
+        while True:
+            permit = await self.acquire(prompt_tokens)
+            try:
+                result = await call()
+            except Exception as e:
+                outcome, retry_after = classify_error(e)
+                self.release(permit, outcome or "error", used_tokens=None,
+                             retry_after=retry_after, attempt=attempt)
+                if outcome is None or attempt >= LLM_MAX_RETRIES:
+                    raise
+                if outcome == "transient":
+                    await asyncio.sleep(retry_after if retry_after is not None else _backoff(attempt))
+                attempt += 1
+                logger.warning(f"[RATE LIMIT] {self.model}: retrying after {type(e).__name__} "
+                               f"(attempt {attempt}/{LLM_MAX_RETRIES})")
+                continue
+            except BaseException:
+                self.release(permit, "error")
+                raise
+            used_tokens, output_tokens = usage(result)
+            self.release(permit, None, used_tokens=used_tokens, output_tokens=output_tokens)
+            return result
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _backoff(attempt: int) -> float:
+    delay = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config, model: str) -> ModelRateLimiter:
+    """The process-wide limiter of `model`, with limits from `config.llm_rate_limits`."""
+    limits = parse_rate_limits(getattr(config, "llm_rate_limits", ""))
+    rpm, tpm = limits.get(model, limits.get("*", (0, 0)))
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = _limiters[model] = ModelRateLimiter(model, rpm, tpm)
+            return limiter
+    limiter.configure(rpm, tpm)
+    return limiter
+
+
+class RateLimitedModel(WrapperModel):
+    """A pydantic-ai model whose requests are admitted by the model's rate limiter."""
+
+    def __init__(self, wrapped, config):
+        super().__init__(wrapped)
+        self.limiter = get_rate_limiter(config, self.model_name)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        from codewiki.src.be.token_accounting import get_token_accountant
+
+        # Sized from the serialized history; reconciled with reported usage afterwards
+        prompt_tokens = get_token_accountant().estimate(ModelMessagesTypeAdapter.dump_json(messages).decode("utf-8"))
+
+        def usage(response: ModelResponse) -> Tuple[Optional[int], int]:
+            used = response.usage.input_tokens + response.usage.output_tokens
+            return (used or None), response.usage.output_tokens
+
+        return await self.limiter.run(
+            lambda: self.wrapped.request(messages, model_settings, model_request_parameters),
+            prompt_tokens,
+            usage,
+        )
@@ -2,7 +2,8 @@ import re
 from pathlib import Path
 from typing import List, Tuple
 import logging
-import tiktoken
+
+from codewiki.src.be.token_accounting import get_token_accountant
 
 
 logger = logging.getLogger(__name__)
@@ -26,18 +27,17 @@ def is_complex_module(components: dict[str, any], core_component_ids: list[str])
 # ---------------------- Token Counting ---------------------
 # ------------------------------------------------------------
 
-enc = tiktoken.encoding_for_model("gpt-4")
+accountant = get_token_accountant()
+enc = accountant.encoding
 
 def count_tokens(text: str) -> int:
     """
-    Count the number of tokens in a text.
+    Count the number of tokens in a text (memoized, see `token_accounting`).
     """
-    length = len(enc.encode(text))
-    # logger.debug(f"Number of tokens: {length}")
-    return length
+    return accountant.count(text)
 
 
-def count_module_tokens(component_ids: list[str], components: dict[str, any]) -> int:
+def count_module_tokens(component_ids: list[str], components: dict[str, any], limit: int = None) -> int:
     """
     Count tokens for a set of components using full file contents.
     
@@ -48,12 +48,23 @@ def count_module_tokens(component_ids: list[str], components: dict[str, any]) ->
     Args:
         component_ids: List of component IDs to count tokens for
         components: Dictionary mapping component IDs to component objects
+        limit: Budget the count is compared with; a count clearly under or
+            over it is estimated from the content size instead of encoded
         
     Returns:
         Number of tokens for the full file contents
     """
-    from codewiki.src.file_manager import file_manager
-    
+    grouped = _group_by_file(component_ids, components)
+    if grouped and all(components[comp_ids[0]].file_tokens is not None for comp_ids in grouped.values()):
+        # Stage 1 counted every file: only the short per-file headers are encoded
+        return sum(module_file_token_counts(component_ids, components))
+    blocks = module_file_blocks(component_ids, components)
+    if limit is None:
+        return sum(accountant.count_batch(blocks))
+    return accountant.count_within(blocks, limit)
+
+
+def _group_by_file(component_ids: list[str], components: dict[str, any]) -> dict[str, list[str]]:
     # Group components by file path (same logic as format_user_prompt)
     grouped: dict[str, list[str]] = {}
     for comp_id in component_ids:
@@ -63,22 +74,63 @@ def count_module_tokens(component_ids: list[str], components: dict[str, any]) ->
         if path not in grouped:
             grouped[path] = []
         grouped[path].append(comp_id)
+    return grouped
+
+
+def _file_header(path: str, comp_ids_in_file: list[str]) -> str:
+    header = f"# File: {path}\n\n"
+    header += f"## Core Components in this file:\n"
+    for comp_id in comp_ids_in_file:
+        header += f"- {comp_id}\n"
+    return header + "\n## File Content:\n"
+
+
+def module_file_blocks(component_ids: list[str], components: dict[str, any]) -> list[str]:
+    """
+    Per-file prompt blocks of a set of components, in first-component order.
     
-    # Build content string using full files (same as format_user_prompt)
-    content = ""
-    for path, comp_ids_in_file in grouped.items():
-        content += f"# File: {path}\n\n"
-        content += f"## Core Components in this file:\n"
-        for comp_id in comp_ids_in_file:
-            content += f"- {comp_id}\n"
-        content += "\n## File Content:\n"
+    Counted separately, each block's count is cached and shared between every
+    module that contains the same file with the same components.
+    """
+    from codewiki.src.file_manager import file_manager
+    
+    # Build content using full files (same as format_user_prompt)
+    blocks = []
+    for path, comp_ids_in_file in _group_by_file(component_ids, components).items():
+        content = _file_header(path, comp_ids_in_file)
         try:
             content += file_manager.load_text(components[comp_ids_in_file[0]].file_path)
         except (FileNotFoundError, IOError):
             pass
         content += "\n\n"
+        blocks.append(content)
     
-    return count_tokens(content)
+    return blocks
+
+
+def module_file_token_counts(component_ids: list[str], components: dict[str, any]) -> list[int]:
+    """
+    Token counts of `module_file_blocks`, without reading files whose count
+    Stage 1 recorded (`Node.file_tokens`).
+    
+    A block's count is its header's plus the file's, so it can differ from
+    encoding the block by a token where the header meets the file content.
+    """
+    grouped = _group_by_file(component_ids, components)
+    headers = [_file_header(path, comp_ids) + "\n\n" for path, comp_ids in grouped.items()]
+    counts = accountant.count_batch(headers)
+    unannotated = []
+    for i, comp_ids in enumerate(grouped.values()):
+        file_tokens = components[comp_ids[0]].file_tokens
+        if file_tokens is None:
+            unannotated.append(i)
+        else:
+            counts[i] += file_tokens
+    if unannotated:
+        blocks = module_file_blocks(component_ids, components)
+        for i, tokens in zip(unannotated, accountant.count_batch([blocks[i] for i in unannotated])):
+            counts[i] = tokens
+    return counts
 
 
 # ------------------------------------------------------------
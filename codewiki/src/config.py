@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 import argparse
 import os
 import sys
@@ -8,6 +9,8 @@ load_dotenv()
 # Constants
 OUTPUT_BASE_DIR = 'output'
 DEPENDENCY_GRAPHS_DIR = 'dependency_graphs'
+PARSE_CACHE_DIR = 'parse_cache'
+LLM_CACHE_FILENAME = 'llm_cache.db'
 DOCS_DIR = 'docs'
 FIRST_MODULE_TREE_FILENAME = 'first_module_tree.json'
 MODULE_TREE_FILENAME = 'module_tree.json'
@@ -24,9 +27,13 @@ MAX_TOKEN_PER_MODULE = 32_768           # Paper: 32768 tokens per leaf module
 MAX_TOKEN_PER_LEAF_MODULE = 16_000      # Threshold for sub-module delegation in Stage 4
 MIN_COMPONENTS_FOR_CLUSTERING = 3       # Don't try to cluster fewer than this many components
                                         # Fixes infinite nesting bug when 2 components have large files
+# From this many leaf components, modules come from community detection on the dependency
+# graph and the cluster model only names them; 0 always clusters with the LLM
+GRAPH_CLUSTERING_MIN_COMPONENTS = int(os.getenv('GRAPH_CLUSTERING_MIN_COMPONENTS', '2000'))
 
 # LLM Context Thresholds
 MAX_CLUSTERING_PROMPT_TOKENS = 100_000  # Max tokens for clustering prompt before chunking
+CLUSTER_MAP_WORKERS = int(os.getenv('CLUSTER_MAP_WORKERS', '4'))  # Concurrent cluster calls for chunked prompts
 MAX_LLM_CONTEXT = 128_000               # GPT-4o context window (use 200K for Claude/Kimi)
 MAX_LLM_OUTPUT_TOKENS = 16_384          # GPT-4o max output tokens
 
@@ -36,6 +43,21 @@ BEHEMOTH_REPO_COMPONENT_THRESHOLD = 2000 # Use on-demand loading above this
 MAX_MODULE_TREE_TOKENS = 10_000         # Max tokens for module tree in prompt
                                         # If exceeded, switch to summaries + tools
 
+# Dependency Analysis Parallelism (Stage 1)
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '0'))  # Parser processes; 0 = one per CPU, 1 = sequential
+MIN_FILES_FOR_PARALLEL_PARSE = 500      # Below this, process pool startup costs more than it saves
+# Above this many components, Stage 1 results go to a disk-backed SQLite store; 0 keeps them in memory
+ANALYSIS_STORE_COMPONENT_THRESHOLD = int(os.getenv('ANALYSIS_STORE_COMPONENT_THRESHOLD', str(BEHEMOTH_REPO_COMPONENT_THRESHOLD)))
+# Repositories with at least this many code files are analyzed in shards (workspace
+# packages / top-level directories) whose results are cached as a unit; 0 disables sharding
+SHARD_MIN_FILES = int(os.getenv('SHARD_MIN_FILES', '2000'))
+SHARD_MAX_FILES = 250                   # Larger shards are split by subdirectory
+
+# Per-file Parse Budgets (Stage 1) - 0 disables a limit
+MAX_PARSE_FILE_BYTES = int(os.getenv('MAX_PARSE_FILE_BYTES', str(2 * 1024 * 1024)))  # Skip larger files
+MAX_PARSE_FILE_LINES = int(os.getenv('MAX_PARSE_FILE_LINES', '50000'))  # Skip longer files
+MAX_PARSE_SECONDS = float(os.getenv('MAX_PARSE_SECONDS', '30'))  # Abandon files that take longer to analyze
+
 # CLI context detection
 _CLI_CONTEXT = False
 
@@ -56,6 +78,15 @@ FALLBACK_MODEL_1 = os.getenv('FALLBACK_MODEL_1', 'glm-4p5')
 CLUSTER_MODEL = os.getenv('CLUSTER_MODEL', MAIN_MODEL)
 LLM_BASE_URL = os.getenv('LLM_BASE_URL', 'http://0.0.0.0:4000/')
 LLM_API_KEY = os.getenv('LLM_API_KEY', 'sk-1234')
+# Persistent LLM response cache: off, read, readwrite or replay-only (see be/llm_cache.py)
+LLM_CACHE = os.getenv('LLM_CACHE', 'readwrite')
+# Pooled HTTP connections per LLM client (shared by all concurrent calls of a run)
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '32'))
+# Per-model request/token quotas, e.g. "*=500/200000,gpt-4o-mini=5000/2000000" (RPM/TPM, 0 = unlimited)
+LLM_RATE_LIMITS = os.getenv('LLM_RATE_LIMITS', '')
+LLM_INITIAL_CONCURRENCY = int(os.getenv('LLM_INITIAL_CONCURRENCY', '4'))  # Adaptive in-flight limit per model
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))  # Retries of rate-limited or transient failures
 
 @dataclass
 class Config:
@@ -71,12 +102,28 @@ class Config:
     main_model: str
     cluster_model: str
     fallback_model: str = FALLBACK_MODEL_1
+    llm_cache: str = LLM_CACHE
+    llm_cache_path: Optional[str] = None  # None disables the LLM response cache
+    llm_rate_limits: str = LLM_RATE_LIMITS  # Per-model RPM/TPM quotas (see be/rate_limiter.py)
+    # Dependency analysis configuration
+    parse_workers: int = PARSE_WORKERS
+    parse_cache_dir: Optional[str] = None  # None disables the per-file parse cache
+    analysis_store_threshold: int = ANALYSIS_STORE_COMPONENT_THRESHOLD
+    shard_min_files: int = SHARD_MIN_FILES
+    # Stage 2: leaf components from which modules are clustered on the dependency graph
+    graph_clustering_min_components: int = GRAPH_CLUSTERING_MIN_COMPONENTS
+    # Stage 2: concurrent cluster calls when a clustering prompt is split into chunks
+    cluster_map_workers: int = CLUSTER_MAP_WORKERS
+    # Regenerate only docs affected by git changes since the last run
+    incremental: bool = False
     
     @classmethod
     def from_args(cls, args: argparse.Namespace) -> 'Config':
         """Create configuration from parsed arguments."""
         repo_name = os.path.basename(os.path.normpath(args.repo_path))
         sanitized_repo_name = ''.join(c if c.isalnum() else '_' for c in repo_name)
+        parse_workers = getattr(args, 'parse_workers', None)
+        llm_cache = getattr(args, 'llm_cache', None)
         
         return cls(
             repo_path=args.repo_path,
@@ -88,7 +135,12 @@ class Config:
             llm_api_key=LLM_API_KEY,
             main_model=MAIN_MODEL,
             cluster_model=CLUSTER_MODEL,
-            fallback_model=FALLBACK_MODEL_1
+            fallback_model=FALLBACK_MODEL_1,
+            parse_workers=PARSE_WORKERS if parse_workers is None else parse_workers,
+            parse_cache_dir=os.path.join(OUTPUT_BASE_DIR, PARSE_CACHE_DIR),
+            llm_cache=LLM_CACHE if llm_cache is None else llm_cache,
+            llm_cache_path=os.path.join(OUTPUT_BASE_DIR, LLM_CACHE_FILENAME),
+            incremental=getattr(args, 'incremental', False)
         )
     
     @classmethod
@@ -100,7 +152,10 @@ class Config:
         llm_api_key: str,
         main_model: str,
         cluster_model: str,
-        fallback_model: str = FALLBACK_MODEL_1
+        fallback_model: str = FALLBACK_MODEL_1,
+        parse_workers: int = PARSE_WORKERS,
+        llm_cache: str = LLM_CACHE,
+        incremental: bool = False
     ) -> 'Config':
         """
         Create configuration for CLI context.
@@ -113,6 +168,9 @@ class Config:
             main_model: Primary model
             cluster_model: Clustering model
             fallback_model: Fallback model
+            parse_workers: Parser processes for dependency analysis (0 = one per CPU)
+            llm_cache: LLM response cache mode (off, read, readwrite, replay-only)
+            incremental: Regenerate only docs affected by changes since the last run
             
         Returns:
             Config instance
@@ -130,5 +188,10 @@ class Config:
             llm_api_key=llm_api_key,
             main_model=main_model,
             cluster_model=cluster_model,
-            fallback_model=fallback_model
+            fallback_model=fallback_model,
+            parse_workers=parse_workers,
+            parse_cache_dir=os.path.join(base_output_dir, PARSE_CACHE_DIR),
+            llm_cache=llm_cache,
+            llm_cache_path=os.path.join(base_output_dir, LLM_CACHE_FILENAME),
+            incremental=incremental
         )
\ No newline at end of file
@@ -17,6 +17,9 @@ from typing import Dict
 from dataclasses import asdict
 
 from codewiki.src.be.documentation_generator import DocumentationGenerator
+from codewiki.src.be.llm_cache import LLMResponseCache, close_llm_caches
+from codewiki.src.be.dependency_analyzer.analysis.parse_cache import ParseCache
+from codewiki.src.be.dependency_analyzer.utils.source_store import close_source_store
 from codewiki.src.config import Config, MAIN_MODEL
 from .models import JobStatus
 from .cache_manager import CacheManager
@@ -36,6 +39,8 @@ class BackgroundWorker:
         self.processing_queue = Queue(maxsize=WebAppConfig.QUEUE_SIZE)
         self.job_status: Dict[str, JobStatus] = {}
         self.jobs_file = Path(WebAppConfig.CACHE_DIR) / "jobs.json"
+        self.last_parse_cache_eviction = 0.0
+        self.last_llm_cache_eviction = 0.0
         self.load_job_statuses()
     
     def start(self):
@@ -304,6 +309,8 @@ class BackgroundWorker:
                 args = argparse.Namespace(repo_path=temp_repo_dir)
                 config = Config.from_args(args)
                 config.docs_dir = os.path.join("output", "docs", f"{job_id}-docs")
+                config.parse_cache_dir = WebAppConfig.PARSE_CACHE_DIR
+                config.llm_cache_path = WebAppConfig.LLM_CACHE_PATH
                 config_duration = time.time() - config_start
                 
                 logger.info(f"[STAGE 0.4] Config created in {config_duration:.1f}s")
@@ -312,6 +319,8 @@ class BackgroundWorker:
                 logger.info(f"[STAGE 0.4]   - Output dir: {config.output_dir}")
                 logger.info(f"[STAGE 0.4]   - Docs dir: {config.docs_dir}")
                 logger.info(f"[STAGE 0.4]   - Dependency graph dir: {config.dependency_graph_dir}")
+                logger.info(f"[STAGE 0.4]   - Parse cache dir: {config.parse_cache_dir}")
+                logger.info(f"[STAGE 0.4]   - LLM cache: {config.llm_cache_path} (mode={config.llm_cache})")
                 logger.info(f"[STAGE 0.4]   - Max depth: {config.max_depth}")
                 logger.info(f"[STAGE 0.4]   - Main model: {config.main_model}")
                 logger.info(f"[STAGE 0.4]   - Cluster model: {config.cluster_model}")
@@ -445,4 +454,55 @@ class BackgroundWorker:
                 if 'temp_repo_dir' not in locals():
                     logger.info(f"[STAGE 0] No temporary directory to cleanup (not created)")
                 else:
-                    logger.info(f"[STAGE 0] No temporary directory to cleanup (does not exist): {temp_repo_dir if 'temp_repo_dir' in locals() else 'N/A'}")
\ No newline at end of file
+                    logger.info(f"[STAGE 0] No temporary directory to cleanup (does not exist): {temp_repo_dir if 'temp_repo_dir' in locals() else 'N/A'}")
+            
+            close_source_store()
+            self._evict_parse_cache()
+            close_llm_caches()
+            self._evict_llm_cache()
+    
+    def _evict_parse_cache(self):
+        """Trim the shared parse cache to its size and age limits, at most every few hours."""
+        now = time.time()
+        if now - self.last_parse_cache_eviction < WebAppConfig.PARSE_CACHE_EVICTION_HOURS * 3600:
+            return
+        self.last_parse_cache_eviction = now
+        
+        try:
+            stats = ParseCache(WebAppConfig.PARSE_CACHE_DIR).evict(
+                max_bytes=WebAppConfig.PARSE_CACHE_MAX_BYTES,
+                max_age_seconds=WebAppConfig.PARSE_CACHE_MAX_AGE_DAYS * 86400,
+            )
+            eviction_duration = time.time() - now
+            logger.info(
+                f"[STAGE 0] Parse cache eviction completed in {eviction_duration:.1f}s: "
+                f"removed {stats.removed} entries ({stats.removed_bytes} bytes), "
+                f"kept {stats.remaining} entries ({stats.remaining_bytes} bytes)"
+            )
+        except Exception as e:
+            logger.error(f"[STAGE 0] Parse cache eviction FAILED: {type(e).__name__}: {str(e)}")
+    
+    def _evict_llm_cache(self):
+        """Trim the shared LLM response cache to its size and age limits, at most every few hours."""
+        now = time.time()
+        if now - self.last_llm_cache_eviction < WebAppConfig.PARSE_CACHE_EVICTION_HOURS * 3600:
+            return
+        self.last_llm_cache_eviction = now
+        
+        try:
+            cache = LLMResponseCache(WebAppConfig.LLM_CACHE_PATH)
+            try:
+                stats = cache.evict(
+                    max_bytes=WebAppConfig.LLM_CACHE_MAX_BYTES,
+                    max_age_seconds=WebAppConfig.LLM_CACHE_MAX_AGE_DAYS * 86400,
+                )
+            finally:
+                cache.close()
+            eviction_duration = time.time() - now
+            logger.info(
+                f"[STAGE 0] LLM cache eviction completed in {eviction_duration:.1f}s: "
+                f"removed {stats.removed} responses ({stats.removed_bytes} bytes), "
+                f"kept {stats.remaining} responses ({stats.remaining_bytes} bytes)"
+            )
+        except Exception as e:
+            logger.error(f"[STAGE 0] LLM cache eviction FAILED: {type(e).__name__}: {str(e)}")
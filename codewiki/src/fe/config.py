@@ -21,6 +21,19 @@ class WebAppConfig:
     # Cache settings
     CACHE_EXPIRY_DAYS = 365
     
+    # Parse cache shared by all jobs: per-file analyzer results keyed by blob id,
+    # so forks and new commits of known repositories only parse new files
+    PARSE_CACHE_DIR = "./output/cache/parse_cache"
+    PARSE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+    PARSE_CACHE_MAX_AGE_DAYS = 30
+    PARSE_CACHE_EVICTION_HOURS = 6
+    
+    # LLM response cache shared by all jobs (see be/llm_cache.py), trimmed on
+    # the parse cache's schedule
+    LLM_CACHE_PATH = "./output/cache/llm_cache.db"
+    LLM_CACHE_MAX_BYTES = 1024 ** 3
+    LLM_CACHE_MAX_AGE_DAYS = 30
+    
     # Job cleanup settings
     JOB_CLEANUP_HOURS = 24000
     RETRY_COOLDOWN_MINUTES = 3
@@ -42,6 +42,9 @@ class RepoMetrics:
     time_to_first_overview: Optional[float] = None
     first_overview_file: Optional[str] = None
     
+    # Stage 1 parse profile summary (per-language file times, phase totals)
+    stage1_profile: Optional[Dict[str, Any]] = None
+    
     # Totals
     total_duration: Optional[float] = None
     total_tokens: int = 0
@@ -97,6 +100,7 @@ class RepoMetrics:
             },
             "time_to_first_overview": self.time_to_first_overview,
             "first_overview_file": self.first_overview_file,
+            "stage1_profile": self.stage1_profile,
             "total_duration": self.total_duration,
             "total_tokens": self.total_tokens,
             "total_files_created": self.total_files_created,
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Analysis Store Tests
+
+Checks that Stage 1 results streamed into the disk-backed analysis store resolve,
+deduplicate and save exactly like the in-memory path.
+
+Run with: python -m pytest tests/test_analysis_store.py -v
+"""
+
+import logging
+
+from codewiki.src.be.dependency_analyzer.analysis.analysis_store import StoredComponents
+from codewiki.src.be.dependency_analyzer.ast_parser import DependencyParser
+from codewiki.src.be.dependency_analyzer.topo_sort import available_component_types
+
+FILES = {
+    "pkg/__init__.py": "from pkg.models import Model\n",
+    "pkg/models.py": (
+        "class Base:\n"
+        "    def save(self):\n"
+        "        return self.validate()\n"
+        "    def validate(self):\n"
+        "        return True\n"
+        "\n"
+        "class Model(Base):\n"
+        "    def run(self):\n"
+        "        self.save()\n"
+        "        self.save()\n"
+        "        return helper()\n"
+        "\n"
+        "def helper():\n"
+        "    return Base()\n"
+    ),
+    "app/main.py": (
+        "from pkg import Model\n"
+        "from pkg.models import helper as make\n"
+        "\n"
+        "class App:\n"
+        "    def start(self):\n"
+        "        return Model().run(), make()\n"
+    ),
+}
+
+
+def _parse(repo, tmp_path, **kwargs):
+    logging.disable(logging.CRITICAL)
+    try:
+        parser = DependencyParser(str(repo), parse_workers=1, **kwargs)
+        components = parser.parse_repository()
+        output = tmp_path / f"graph_{'store' if kwargs else 'memory'}.json"
+        parser.save_dependency_graph(str(output))
+    finally:
+        logging.disable(logging.NOTSET)
+    return parser, components, output.read_text(encoding="utf-8")
+
+
+def test_store_matches_in_memory_analysis(tmp_path):
+    repo = tmp_path / "repo"
+    for relative_path, source in FILES.items():
+        path = repo / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+    memory_parser, memory, memory_json = _parse(repo, tmp_path)
+    store_parser, stored, stored_json = _parse(
+        repo, tmp_path, analysis_store_path=str(tmp_path / "analysis.db"), analysis_store_threshold=1
+    )
+
+    assert isinstance(stored, StoredComponents)
+    assert list(stored) == list(memory)
+    assert {k: v.model_dump() for k, v in stored.items()} == {k: v.model_dump() for k, v in memory.items()}
+    assert "app.main.App" in stored and "app.main.Missing" not in stored
+    assert "pkg.models.Model" in stored["app.main.App"].depends_on
+    assert store_parser.modules == memory_parser.modules
+    assert available_component_types(stored) == available_component_types(memory)
+    assert stored_json == memory_json
+
+
+def test_store_not_used_below_threshold(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "single.py").write_text("def only():\n    return 1\n")
+
+    _, components, _ = _parse(
+        repo, tmp_path, analysis_store_path=str(tmp_path / "analysis.db"), analysis_store_threshold=100
+    )
+
+    assert isinstance(components, dict)
+    assert not (tmp_path / "analysis.db").exists()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Centrality Ranking Tests
+
+Checks the centrality measures over the CSR graph and top-k selection.
+
+Run with: python -m pytest tests/test_centrality.py -v
+"""
+
+import pytest
+
+from codewiki.src.be.dependency_analyzer import centrality
+from codewiki.src.be.dependency_analyzer.graph_engine import CSRGraph
+
+
+def test_measures_and_top_k(monkeypatch):
+    # hub <-> a (mutual), b -> hub, c -> hub, c -> c (self-loop), d isolated
+    ids = ["hub", "a", "b", "c", "d"]
+    graph = CSRGraph.from_edges(ids, [(0, 1), (1, 0), (2, 0), (3, 0), (3, 3), (2, 0)])
+
+    assert graph.num_edges == 5
+    assert graph["b"] == {"hub"}
+    assert list(centrality.degree_centrality(graph)) == [3, 1, 1, 2, 0]
+    assert list(centrality.degree_centrality(graph, mode="in")) == [3, 1, 0, 1, 0]
+
+    ranks = centrality.pagerank(graph)
+    assert sum(ranks) == pytest.approx(1.0)
+    assert max(range(len(ids)), key=ranks.__getitem__) == 0
+
+    # On a chain the middle node lies on the most shortest paths
+    chain = CSRGraph.from_edges(["x", "y", "z"], [(0, 1), (1, 2)])
+    assert centrality.betweenness_centrality(chain) == [0.0, 1.0, 0.0]
+    # Too large for a traversal per sampled source
+    monkeypatch.setattr(centrality, "BETWEENNESS_MAX_NODES", 2)
+    with pytest.raises(ValueError):
+        centrality.betweenness_centrality(chain)
+
+    # Ties keep node order
+    assert centrality.top_k([1, 3, 3, 0, 2], 3) == [1, 2, 4]
+    assert centrality.most_central(graph, 2) == ["hub", "c"]
+    with pytest.raises(ValueError):
+        centrality.most_central(graph, 2, measure="unknown")
+
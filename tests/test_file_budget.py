@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Parse Budget Tests
+
+Checks that oversized, minified and generated files are screened before parsing
+and reported, and that the wall-clock limit interrupts a runaway analyzer without disturbing
+an enclosing timer, also when Stage 1 runs off the main thread.
+
+Run with: python -m pytest tests/test_file_budget.py -v
+"""
+
+import signal
+import threading
+import time
+
+import pytest
+
+from codewiki.src.be.dependency_analyzer.analysis import call_graph_analyzer, file_budget
+
+
+def _analyze(tmp_path, files, budget):
+    code_files = []
+    for path, text in files.items():
+        (tmp_path / path).write_text(text)
+        language = "javascript" if path.endswith(".js") else "python"
+        code_files.append({"path": path, "name": path, "extension": path[path.rfind("."):], "language": language})
+    analyzer = call_graph_analyzer.CallGraphAnalyzer(file_budget=budget)
+    return analyzer, analyzer.analyze_code_files(code_files, str(tmp_path))
+
+
+def test_budget_skips_and_reports_pathological_files(tmp_path):
+    files = {
+        "app.py": "def main():\n    helper()\n\ndef helper():\n    pass\n",
+        "bundle.js": "var a=function(){return 1};" * 400 + "\n",
+        "long.py": "x = 1\n" * 200,
+        "schema_pb2.py": "class Message:\n    def parse(self):\n        build()\n\ndef build():\n    pass\n",
+    }
+    budget = file_budget.FileBudget(max_lines=100)
+    analyzer, result = _analyze(tmp_path, files, budget)
+
+    report = {entry["path"]: entry["reason"] for entry in result["call_graph"]["skipped_files"]}
+    assert report == {"bundle.js": "minified", "long.py": "too_many_lines", "schema_pb2.py": "generated"}
+
+    # Generated files keep their components but contribute no call relationships
+    assert "schema_pb2.Message" in analyzer.functions
+    assert not any(rel.caller.startswith("schema_pb2.") for rel in analyzer.call_relationships)
+    assert ("app.main", "app.helper") in {(rel.caller, rel.callee) for rel in analyzer.call_relationships}
+
+
+def test_parse_deadline_interrupts_long_running_work():
+    with pytest.raises(file_budget.ParseTimeout):
+        with file_budget.parse_deadline(0.05):
+            while True:
+                pass
+
+    # No limit when disabled
+    with file_budget.parse_deadline(0):
+        pass
+
+
+class OuterTimeout(Exception):
+    pass
+
+
+def _outer_timeout(signum, frame):
+    raise OuterTimeout()
+
+
+def test_parse_deadline_keeps_an_enclosing_timer():
+    previous = signal.signal(signal.SIGALRM, _outer_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 5)
+        with pytest.raises(file_budget.ParseTimeout):
+            with file_budget.parse_deadline(0.05):
+                while True:
+                    pass
+        remaining, _ = signal.getitimer(signal.ITIMER_REAL)
+        assert 4 < remaining < 5
+        assert signal.getsignal(signal.SIGALRM) is _outer_timeout
+
+        # The enclosing deadline expiring mid-parse reaches its own handler
+        signal.setitimer(signal.ITIMER_REAL, 0.05)
+        with pytest.raises(file_budget.OuterDeadline) as raised:
+            with file_budget.parse_deadline(10):
+                while True:
+                    pass
+        assert isinstance(raised.value.error, OuterTimeout)
+        assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def test_parse_deadline_off_the_main_thread():
+    outcome = []
+
+    def parse():
+        # No signal can reach this thread: the work runs to completion
+        with file_budget.parse_deadline(0.01):
+            time.sleep(0.05)
+        outcome.append("done")
+
+    thread = threading.Thread(target=parse)
+    thread.start()
+    thread.join(5)
+    assert outcome == ["done"]
+
+
+def test_time_limit_applies_to_analysis_off_the_main_thread(tmp_path):
+    files = {
+        "big.py": "".join(f"def f{i}():\n    return f{i + 1}(g(h({i})))\n" for i in range(20000)),
+        "small.py": "def a():\n    return 1\n",
+    }
+    results = []
+
+    def analyze():
+        # Like the web worker: a background thread, too few files for a parallel parse
+        results.append(_analyze(tmp_path, files, file_budget.FileBudget(max_seconds=0.05)))
+
+    thread = threading.Thread(target=analyze)
+    thread.start()
+    thread.join(60)
+    _, result = results[0]
+    report = {entry["path"]: entry["reason"] for entry in result["call_graph"]["skipped_files"]}
+    assert report == {"big.py": "timeout"}
+    assert result["call_graph"]["total_functions"] == 1
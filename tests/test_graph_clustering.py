@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Graph Clustering Tests
+
+Checks Louvain communities on a small graph and that the file graph of a toy
+repository groups files by their calls before their directories.
+
+Run with: python -m pytest tests/test_graph_clustering.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.communities import louvain_levels
+from codewiki.src.be.dependency_analyzer.models.core import Node
+from codewiki.src.be.graph_clustering import _ModuleBuilder, build_file_graph
+
+
+def _clique(graph, nodes):
+    for a in nodes:
+        for b in nodes:
+            if a != b:
+                graph[a][b] = 1.0
+
+
+def test_louvain_separates_two_cliques():
+    graph = [{} for _ in range(8)]
+    _clique(graph, range(4))
+    _clique(graph, range(4, 8))
+    graph[3][4] = graph[4][3] = 1.0
+
+    levels = louvain_levels(graph)
+    assert levels[-1] == [0, 0, 0, 0, 1, 1, 1, 1]
+    assert louvain_levels(graph) == levels
+    assert louvain_levels([{} for _ in range(3)]) == []
+
+
+def test_files_group_by_calls_across_directories(monkeypatch):
+    # api/ and db/ files call each other in pairs; each pair should share a module
+    components = {}
+    for pair in ("users", "orders", "billing"):
+        for directory, callee in (("api", "db"), ("db", None)):
+            component_id = f"{directory}.{pair}.handle"
+            depends_on = {f"{callee}.{pair}.handle"} if callee else set()
+            for n in range(3):
+                # Several calls per pair so they outweigh directory affinity
+                depends_on |= {f"{callee}.{pair}.handle{n}"} if callee else set()
+            components[component_id] = Node(
+                id=component_id, name="handle", component_type="function",
+                file_path=f"/repo/{directory}/{pair}.py", relative_path=f"{directory}/{pair}.py",
+                depends_on=depends_on,
+            )
+            for n in range(3):
+                helper = f"{directory}.{pair}.handle{n}"
+                components[helper] = Node(
+                    id=helper, name=f"handle{n}", component_type="function",
+                    file_path=f"/repo/{directory}/{pair}.py", relative_path=f"{directory}/{pair}.py",
+                )
+
+    paths, graph = build_file_graph(components)
+    levels = louvain_levels(graph)
+    community = {path: levels[0][i] for i, path in enumerate(paths)}
+    for pair in ("users", "orders", "billing"):
+        assert community[f"api/{pair}.py"] == community[f"db/{pair}.py"]
+
+    builder = _ModuleBuilder(list(components), components, paths, levels)
+    monkeypatch.setattr(builder, "file_tokens", lambda i: 0)
+    modules = builder.build()
+    assert sorted(leaf for module in modules for leaf in module["components"]) == sorted(components)
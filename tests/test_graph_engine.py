@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Graph Engine Tests
+
+Checks the CSR dependency graph and the topo_sort utilities that run on it.
+
+Run with: python -m pytest tests/test_graph_engine.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer import graph_engine, topo_sort
+CSRGraph = graph_engine.CSRGraph
+
+
+class _Component:
+    def __init__(self, depends_on, component_type="class"):
+        self.depends_on = set(depends_on)
+        self.component_type = component_type
+
+
+def test_from_components_keeps_only_internal_edges():
+    components = {
+        "a.A": _Component({"a.B", "external.X"}),
+        "a.B": _Component({"a.C"}),
+        "a.C": _Component(set()),
+    }
+    graph = CSRGraph.from_components(components)
+
+    assert len(graph) == 3
+    assert graph.num_edges == 2
+    assert graph["a.A"] == {"a.B"}
+    assert graph.to_dict() == {"a.A": {"a.B"}, "a.B": {"a.C"}, "a.C": set()}
+    assert list(graph.in_degrees()) == [0, 1, 1]
+
+
+def test_from_adjacency_adds_missing_targets():
+    graph = CSRGraph.from_adjacency({"x": {"y"}})
+    assert list(graph) == ["x", "y"]
+    assert graph["y"] == frozenset()
+
+
+def test_resolve_cycles_breaks_cycle_without_touching_input():
+    adjacency = {"a": {"b"}, "b": {"a"}, "c": {"a"}}
+    graph = CSRGraph.from_adjacency(adjacency)
+
+    assert sorted(map(sorted, topo_sort.detect_cycles(graph))) == [["a", "b"]]
+    acyclic = topo_sort.resolve_cycles(graph)
+
+    assert acyclic.num_edges == graph.num_edges - 1
+    assert topo_sort.detect_cycles(acyclic) == []
+    assert graph.to_dict() == adjacency
+
+
+def test_dependency_first_dfs_orders_dependencies_first():
+    graph = CSRGraph.from_adjacency({"app": {"service", "util"}, "service": {"util"}, "util": set()})
+    assert topo_sort.dependency_first_dfs(graph) == ["util", "service", "app"]
+
+
+def test_topological_sort_puts_dependencies_first():
+    adjacency = {"app": {"service", "util"}, "service": {"util", "log"}, "util": {"log"}, "log": set()}
+    order = topo_sort.topological_sort(adjacency)
+
+    assert sorted(order) == sorted(adjacency)
+    position = {node: i for i, node in enumerate(order)}
+    for node, deps in adjacency.items():
+        assert all(position[dep] < position[node] for dep in deps)
+
+
+def test_deep_chain_does_not_hit_recursion_limit():
+    depth = 50_000
+    adjacency = {f"n{i}": {f"n{i + 1}"} for i in range(depth)}
+    adjacency[f"n{depth - 1}"] = {"n0"}
+    graph = CSRGraph.from_adjacency(adjacency)
+
+    cycles = topo_sort.detect_cycles(graph)
+    assert len(cycles) == 1 and len(cycles[0]) == depth
+
+    chain = graph.without_edges({(depth - 1, 0)})
+    assert topo_sort.topological_sort(chain)[0] == f"n{depth - 1}"
+    assert topo_sort.dependency_first_dfs(chain)[-1] == "n0"
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Header Index Tests
+
+Checks that calls from C/C++ files into APIs declared by the headers they include
+resolve to those APIs' definitions, in memory and through the analysis store, and
+that names no included header declares are not matched across the repository.
+
+Run with: python -m pytest tests/test_header_index.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.ast_parser import DependencyParser
+
+FILES = {
+    "include/util/mem.h": "int mem_alloc(int n);\n",
+    "include/util/str.h": '#include "mem.h"\nint str_len(const char *s);\n',
+    "src/util/mem.c": "int mem_alloc(int n) { return n; }\n",
+    "src/util/str.c": '#include "util/str.h"\nint str_len(const char *s) { return 0; }\n',
+    # Same-named function closer to the caller, but not declared by its headers
+    "app/other.c": "int str_len(const char *s) { return 1; }\n",
+    "app/main.cpp": (
+        '#include <utility>\n#include "util/str.h"\n'
+        'int run() { int a = 1, b = 2; std::swap(a, b); swap(a, b); mem_alloc(3); return str_len("x"); }\n'
+    ),
+    # Only a library header is included
+    "app/tool.cpp": "#include <utility>\nvoid step(int &a, int &b) { swap(a, b); }\n",
+    # Defines a name the standard library also provides
+    "lib/other.cpp": "void swap(int &a, int &b) { int t = a; a = b; b = t; }\n",
+}
+
+
+def test_calls_resolve_through_included_headers(tmp_path):
+    repo = tmp_path / "repo"
+    for relative_path, source in FILES.items():
+        path = repo / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+    in_memory = DependencyParser(str(repo), parse_workers=1).parse_repository()
+    stored = DependencyParser(
+        str(repo), parse_workers=1,
+        analysis_store_path=str(tmp_path / "analysis.db"), analysis_store_threshold=1,
+    ).parse_repository()
+
+    for components in (in_memory, stored):
+        depends_on = components["app.main.run"].depends_on
+        assert "src.util.str.str_len" in depends_on
+        # Declared by a header that str.h includes
+        assert "src.util.mem.mem_alloc" in depends_on
+        assert "app.other.str_len" not in depends_on
+        # Not declared by any included header: a library call, not an edge across the repository
+        assert "lib.other.swap" not in depends_on
+        assert "lib.other.swap" not in components["app.tool.step"].depends_on
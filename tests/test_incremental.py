@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Incremental Regeneration Tests
+
+Checks that files changed since the last documented commit are mapped to the
+modules (and ancestor overviews) whose docs must be regenerated.
+
+Run with: python -m pytest tests/test_incremental.py -v
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from codewiki.src.be import incremental
+from codewiki.src.be.dependency_analyzer.models import core
+
+
+def _component(component_id: str, relative_path: str):
+    return core.Node(
+        id=component_id,
+        name=component_id.rsplit(".", 1)[-1],
+        component_type="class",
+        file_path=f"/repo/{relative_path}",
+        relative_path=relative_path,
+    )
+
+
+def _module_tree():
+    return {
+        "api": {
+            "path": "src/api",
+            "components": ["src.api.routes.Router", "src.api.auth.Auth"],
+            "children": {
+                "routes": {"path": "src/api/routes.py", "components": ["src.api.routes.Router"], "children": {}},
+                "auth": {"path": "src/api/auth.py", "components": ["src.api.auth.Auth"], "children": {}},
+            },
+        },
+        "storage": {"path": "src/storage", "components": ["src.storage.db.Database"], "children": {}},
+    }
+
+
+def test_changed_file_marks_module_and_ancestors_stale():
+    components = {
+        "src.api.routes.Router": _component("src.api.routes.Router", "src/api/routes.py"),
+        "src.api.auth.Auth": _component("src.api.auth.Auth", "src/api/auth.py"),
+        "src.storage.db.Database": _component("src.storage.db.Database", "src/storage/db.py"),
+    }
+    plan, tree = incremental.plan_incremental_update(
+        _module_tree(), components, list(components), {"src/api/auth.py", "README.md"}, "abc123"
+    )
+
+    assert plan.affected_modules == ["api", "api/auth"]
+    assert set(plan.stale_docs) == {"api.md", "auth.md", "routes.md", "overview.md"}
+    assert "storage.md" not in plan.stale_docs
+    assert tree == _module_tree()
+
+
+def test_removed_and_added_components_update_tree():
+    components = {
+        "src.api.routes.Router": _component("src.api.routes.Router", "src/api/routes.py"),
+        "src.storage.db.Database": _component("src.storage.db.Database", "src/storage/db.py"),
+        "src.storage.cache.Cache": _component("src.storage.cache.Cache", "src/storage/cache.py"),
+    }
+    plan, tree = incremental.plan_incremental_update(
+        _module_tree(), components, list(components),
+        {"src/api/auth.py", "src/storage/cache.py"}, "abc123",
+    )
+
+    assert plan.removed_components == ["src.api.auth.Auth"]
+    assert plan.added_components == ["src.storage.cache.Cache"]
+    assert tree["api"]["children"]["auth"]["components"] == []
+    assert tree["storage"]["components"] == ["src.storage.db.Database", "src.storage.cache.Cache"]
+    assert "storage.md" in plan.stale_docs
+
+
+def test_no_changes_keeps_all_docs():
+    components = {
+        "src.api.routes.Router": _component("src.api.routes.Router", "src/api/routes.py"),
+        "src.api.auth.Auth": _component("src.api.auth.Auth", "src/api/auth.py"),
+        "src.storage.db.Database": _component("src.storage.db.Database", "src/storage/db.py"),
+    }
+    plan, _ = incremental.plan_incremental_update(_module_tree(), components, list(components), set(), "abc123")
+    assert plan.affected_modules == []
+    assert plan.stale_docs == []
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_get_changed_files_includes_uncommitted_and_untracked(tmp_path):
+    def git(*args):
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "test")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "b.py").write_text("y = 1\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+    base = incremental.get_head_commit(str(tmp_path))
+
+    (tmp_path / "a.py").write_text("x = 2\n")
+    (tmp_path / "c.py").write_text("z = 1\n")
+
+    assert incremental.get_changed_files(str(tmp_path), base) == {"a.py", "c.py"}
+    assert incremental.get_changed_files(str(tmp_path), "0" * 40) is None
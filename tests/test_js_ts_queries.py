@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+JavaScript/TypeScript Query Extraction Tests
+
+Checks that the query-driven analyzers attribute calls, type references and
+JSDoc types to the enclosing top-level declaration.
+
+Run with: python -m pytest tests/test_js_ts_queries.py -v
+"""
+
+import pytest
+
+pytest.importorskip("tree_sitter_typescript")
+pytest.importorskip("tree_sitter_javascript")
+
+from codewiki.src.be.dependency_analyzer.analyzers.javascript import analyze_javascript_file_treesitter
+from codewiki.src.be.dependency_analyzer.analyzers.typescript import analyze_typescript_file_treesitter
+
+
+def _edges(relationships):
+    return {(rel.caller, rel.callee) for rel in relationships}
+
+
+def test_typescript_references_attributed_to_top_level(tmp_path):
+    source = (
+        "export interface Options { parent?: Options }\n"
+        "export class Service extends Base {\n"
+        "  run(options: Options) { return helper(new Store()); }\n"
+        "}\n"
+        "function helper(value: Store) {\n"
+        "  const inner = () => format(value);\n"
+        "  return inner();\n"
+        "}\n"
+    )
+    nodes, relationships = analyze_typescript_file_treesitter(
+        str(tmp_path / "src/app.ts"), source, str(tmp_path)
+    )
+
+    ids = [node.id for node in nodes]
+    assert {"src.app.Options", "src.app.Service", "src.app.helper"} <= set(ids)
+    assert "src.app.inner" not in ids
+    edges = _edges(relationships)
+    assert ("src.app.Service", "src.app.Options") in edges
+    assert ("src.app.Service", "src.app.helper") in edges
+    assert ("src.app.Service", "src.app.Store") in edges
+    assert ("src.app.helper", "src.app.Store") in edges
+    assert ("src.app.helper", "src.app.format") in edges
+    # The nested arrow function is not a component, so its calls belong to helper
+    assert not any(caller == "src.app.inner" for caller, _ in edges)
+
+
+def test_javascript_calls_and_jsdoc_types(tmp_path):
+    source = (
+        "class Service extends Base {\n"
+        "  run() { return load(); }\n"
+        "}\n"
+        "/** @param {Options} options */\n"
+        "function load(options) {\n"
+        "  return fetchAll(options);\n"
+        "}\n"
+        "const handler = async () => { await load(); };\n"
+    )
+    nodes, relationships = analyze_javascript_file_treesitter(
+        str(tmp_path / "lib.js"), source, str(tmp_path)
+    )
+
+    assert [node.id for node in nodes] == ["lib.Service", "lib.load", "lib.handler"]
+    assert _edges(relationships) >= {
+        ("lib.Service", "lib.Base"),
+        ("lib.Service", "lib.load"),
+        ("lib.load", "lib.fetchAll"),
+        ("lib.handler", "lib.load"),
+    }
+    # JSDoc types above a declaration are attributed to the enclosing caller only
+    assert ("lib.load", "lib.Options") not in _edges(relationships)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache Tests
+
+Checks that identical concurrent prompts share one provider call, that a later
+run replays stored responses for both `call_llm` and agent runs (tools still
+execute), how each cache mode treats misses, and how a shared cache is keyed
+per endpoint, evicted and closed.
+
+Run with: python -m pytest tests/test_llm_cache.py -v
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+
+from codewiki.src.be import llm_services
+from codewiki.src.be import llm_cache
+from codewiki.src.be.llm_cache import CachedModel, LLMCacheMissError, LLMResponseCache
+
+
+def _config(tmp_path, mode):
+    # A distinct path per mode gives each its own process-wide cache
+    return SimpleNamespace(main_model="main", llm_base_url="http://llm.invalid/v1",
+                           llm_cache=mode, llm_cache_path=str(tmp_path / "llm_cache.db"))
+
+
+def test_call_llm_shares_and_replays(tmp_path, monkeypatch):
+    calls = []
+
+    def provider(prompt, config, model, temperature):
+        calls.append(prompt)
+        time.sleep(0.2)
+        return f"answer to {prompt}"
+
+    monkeypatch.setattr(llm_services, "_call_llm_uncached", provider)
+    config = _config(tmp_path / "rw", "readwrite")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm_services.call_llm("same", config)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer to same"] * 4
+    assert calls == ["same"]
+
+    # A fresh cache on the same file (a re-run) replays without the provider
+    replay = LLMResponseCache(config.llm_cache_path, "replay-only")
+    key = replay.request_key("main", 0.0, "same", base_url=config.llm_base_url)
+    assert replay.get_or_call(key, "main", lambda: pytest.fail("provider called")) == "answer to same"
+    with pytest.raises(LLMCacheMissError):
+        replay.get_or_call(replay.request_key("main", 0.5, "same"), "main", lambda: "x")
+
+    read_only = LLMResponseCache(str(tmp_path / "ro.db"), "read")
+    key = read_only.request_key("main", 0.0, "new")
+    assert read_only.get_or_call(key, "main", lambda: "first") == "first"
+    assert read_only.get_or_call(key, "main", lambda: "second") == "second"
+
+
+def _agent(model, tool_calls):
+    agent = Agent(model)
+
+    @agent.tool_plain
+    def write_doc(name: str) -> str:
+        tool_calls.append(name)
+        return f"wrote {name}"
+
+    return agent
+
+
+def test_agent_requests_replay_and_tools_run(tmp_path):
+    model_calls = []
+
+    def respond(messages, info):
+        model_calls.append(len(messages))
+        if any(isinstance(part, ToolReturnPart) for message in messages for part in message.parts):
+            return ModelResponse(parts=[TextPart("done")])
+        return ModelResponse(parts=[ToolCallPart("write_doc", {"name": "core.md"})])
+
+    path = str(tmp_path / "llm_cache.db")
+    tool_calls = []
+    first = _agent(CachedModel(FunctionModel(respond), LLMResponseCache(path, "readwrite")), tool_calls)
+    assert first.run_sync("document core").output == "done"
+    assert model_calls == [1, 3]
+
+    replayed = _agent(CachedModel(FunctionModel(respond), LLMResponseCache(path, "replay-only")), tool_calls)
+    result = replayed.run_sync("document core")
+    assert result.output == "done"
+    assert model_calls == [1, 3]
+    assert tool_calls == ["core.md", "core.md"]
+    assert result.usage().output_tokens == 0
+
+    # A different tool schema is a different request
+    other = Agent(CachedModel(FunctionModel(respond), LLMResponseCache(path, "replay-only")))
+    with pytest.raises(LLMCacheMissError):
+        other.run_sync("document core")
+
+
+def test_endpoints_eviction_and_closing(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"))
+    keys = [cache.request_key("main", 0.0, "p", base_url=url) for url in ("http://a/v1", "http://b/v1", "http://a/v1/")]
+    assert keys[0] != keys[1]
+    assert keys[0] == keys[2]
+
+    for key in keys[:2]:
+        cache.get_or_call(key, "main", lambda: "x" * 100)
+    # Only the newest response (64-character key, 100-byte answer) fits
+    stats = cache.evict(max_bytes=200)
+    assert (stats.removed, stats.remaining) == (1, 1)
+    assert cache.get_or_call(keys[1], "main", lambda: pytest.fail("provider called")) == "x" * 100
+    assert cache.evict(max_age_seconds=-1).remaining == 0
+
+    # Closing drops the registry entry; a model still holding the cache reopens it
+    config = _config(tmp_path, "readwrite")
+    shared = llm_cache.get_llm_cache(config)
+    llm_cache.close_llm_caches()
+    assert llm_cache.get_llm_cache(config) is not shared
+    assert shared.get_or_call(keys[0], "main", lambda: "again") == "again"
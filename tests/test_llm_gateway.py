@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+LLM Gateway Tests
+
+Checks that sync and async callers share one pooled client, that awaiting a
+response leaves the event loop free, and that agent models are built once per
+event loop. Requests go to an in-process HTTP transport.
+
+Run with: python -m pytest tests/test_llm_gateway.py -v
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from codewiki.src.be import llm_services
+
+
+async def _chat_completion(request: httpx.Request) -> httpx.Response:
+    prompt = json.loads(request.content)["messages"][0]["content"]
+    await asyncio.sleep(0.1)
+    return httpx.Response(200, json={
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": f"echo {prompt}"}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    })
+
+
+def test_callers_share_one_client_without_blocking(monkeypatch):
+    clients = []
+
+    def pooled_http_client():
+        clients.append(httpx.AsyncClient(transport=httpx.MockTransport(_chat_completion)))
+        return clients[-1]
+
+    monkeypatch.setattr(llm_services, "_pooled_http_client", pooled_http_client)
+    config = SimpleNamespace(
+        llm_base_url="http://gateway-test.invalid/v1", llm_api_key="key",
+        main_model="gpt-4o", fallback_model="gpt-4o", llm_cache="off",
+    )
+
+    assert llm_services.call_llm("sync", config) == "echo sync"
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.monotonic()
+        answers = await asyncio.gather(*(llm_services.acall_llm(f"p{i}", config) for i in range(4)))
+        elapsed = time.monotonic() - start
+        beat.cancel()
+        gateway = llm_services.get_llm_gateway(config)
+        same_models = gateway.agent_models() is gateway.agent_models()
+        await gateway.aclose()
+        return answers, ticks, elapsed, same_models
+
+    answers, ticks, elapsed, same_models = asyncio.run(run())
+    assert answers == [f"echo p{i}" for i in range(4)]
+    # The four 0.1s requests overlapped, and the loop kept running while they waited
+    assert elapsed < 0.35
+    assert ticks >= 5
+    assert same_models
+    # One client for plain prompts, one for the agent models of the run's loop
+    assert len(clients) == 2
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Map-Reduce Clustering Tests
+
+Checks that chunked clustering covers every leaf node exactly once when the
+cluster model truncates, duplicates and drops components, with a scripted
+model in place of the LLM.
+
+Run with: python -m pytest tests/test_map_reduce_clustering.py -v
+"""
+
+import re
+import threading
+from types import SimpleNamespace
+
+from codewiki.src.be import map_reduce_clustering
+from codewiki.src.be.dependency_analyzer.models.core import Node
+
+DIRECTORIES = ("api", "core", "db", "web")
+
+
+def _components():
+    components = {}
+    for directory in DIRECTORIES:
+        for n in range(10):
+            for name in ("load", "save", "check"):
+                component_id = f"{directory}.file{n}.{name}"
+                components[component_id] = Node(
+                    id=component_id, name=name, component_type="function",
+                    file_path=f"/repo/{directory}/file{n}.py", relative_path=f"{directory}/file{n}.py",
+                )
+    return components
+
+
+class ScriptedModel:
+    """Groups components by directory; truncates its first answer, repeats and drops components."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, prompt, config, model=None):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if "<PARTIAL_MODULES>" in prompt:
+            parts = {}
+            for part, path in re.findall(r"^(p\d+): \S+ \(path '([^']*)'", prompt, re.M):
+                parts.setdefault(path, []).append(part)
+            merged = {f"{path}_module": {"path": path, "parts": ids} for path, ids in parts.items()}
+            return f"<MERGED_MODULES>\n{merged!r}\n</MERGED_MODULES>"
+
+        leaves = re.findall(r"^\t(\S+)$", prompt, re.M)
+        if first and len(leaves) > 3:
+            return "<GROUPED_COMPONENTS>\n{'api': {'path': 'api', 'components': ['api.fi"
+        groups = {}
+        for leaf in leaves[1:]:
+            groups.setdefault(leaf.split(".")[0], []).append(leaf)
+        grouped = {directory: {"path": directory, "components": members + members[:1]}
+                   for directory, members in groups.items()}
+        return f"<GROUPED_COMPONENTS>\n{grouped!r}\n</GROUPED_COMPONENTS>"
+
+
+def test_every_leaf_lands_in_one_module(monkeypatch):
+    components = _components()
+    model = ScriptedModel()
+    monkeypatch.setattr(map_reduce_clustering, "call_llm", model)
+    monkeypatch.setattr(map_reduce_clustering, "MAX_LLM_OUTPUT_TOKENS", 400)
+    monkeypatch.setattr(map_reduce_clustering, "MIN_CHUNK_TOKENS", 1)
+    config = SimpleNamespace(cluster_model="cluster", cluster_map_workers=3)
+
+    module_tree = map_reduce_clustering.cluster_modules_map_reduce(list(components), components, config)
+
+    assert sorted(module_tree) == [f"{directory}_module" for directory in DIRECTORIES]
+    placed = [leaf for info in module_tree.values() for leaf in info["components"]]
+    assert sorted(placed) == sorted(components)
+    for directory in DIRECTORIES:
+        assert all(leaf.startswith(directory + ".") for leaf in module_tree[f"{directory}_module"]["components"])
+
+
+def test_chunks_keep_files_whole():
+    components = _components()
+    chunks = map_reduce_clustering.chunk_leaf_nodes(list(components), components, budget=60)
+    assert len(chunks) > 1
+    assert sorted(leaf for chunk in chunks for leaf in chunk) == sorted(components)
+    file_chunk = {}
+    for i, chunk in enumerate(chunks):
+        for leaf in chunk:
+            assert file_chunk.setdefault(components[leaf].relative_path, i) == i
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Parallel Parsing Tests
+
+Checks that Stage 1 produces the same call graph whether files are parsed
+sequentially or across a process pool, and that pool results stream into the
+analysis store instead of piling up in the parent.
+
+Run with: python -m pytest tests/test_parallel_parsing.py -v
+"""
+
+from pathlib import Path
+
+from codewiki.src.be.dependency_analyzer.analysis import call_graph_analyzer
+
+
+def _write_repo(root: Path, file_count: int) -> list:
+    """Create a small Python package with cross-file calls."""
+    code_files = []
+    for i in range(file_count):
+        path = root / "pkg" / f"mod_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            f"class Widget{i}:\n"
+            f"    def render(self):\n"
+            f"        return helper_{(i + 1) % file_count}()\n"
+            f"\n"
+            f"def helper_{i}():\n"
+            f"    return Widget{i}().render()\n"
+        )
+        code_files.append({
+            "path": f"pkg/mod_{i}.py",
+            "name": path.name,
+            "extension": ".py",
+            "language": "python",
+        })
+    return code_files
+
+
+def test_parallel_matches_sequential(tmp_path, monkeypatch):
+    """Process pool results merge into the same functions and relationships, in the same order."""
+    monkeypatch.setattr("codewiki.src.config.MIN_FILES_FOR_PARALLEL_PARSE", 1)
+    code_files = _write_repo(tmp_path, 12)
+
+    sequential = call_graph_analyzer.CallGraphAnalyzer(parse_workers=1)
+    parallel = call_graph_analyzer.CallGraphAnalyzer(parse_workers=3)
+    seq_result = sequential.analyze_code_files(code_files, str(tmp_path))
+    par_result = parallel.analyze_code_files(code_files, str(tmp_path))
+
+    assert par_result["functions"] == seq_result["functions"]
+    assert par_result["relationships"] == seq_result["relationships"]
+    assert par_result["call_graph"]["files_analyzed"] == 12
+
+
+def test_parallel_results_stream_into_store(tmp_path, monkeypatch):
+    """Batches are merged and flushed while later ones are still being submitted."""
+    monkeypatch.setattr("codewiki.src.config.MIN_FILES_FOR_PARALLEL_PARSE", 1)
+    monkeypatch.setattr(call_graph_analyzer, "STORE_FLUSH_COMPONENTS", 8)
+    code_files = _write_repo(tmp_path, 40)
+
+    submitted = []
+
+    class CountingExecutor(call_graph_analyzer.ProcessPoolExecutor):
+        def submit(self, *args, **kwargs):
+            submitted.append(args[0])
+            return super().submit(*args, **kwargs)
+
+    monkeypatch.setattr(call_graph_analyzer, "ProcessPoolExecutor", CountingExecutor)
+    analyzer = call_graph_analyzer.CallGraphAnalyzer(
+        parse_workers=2, store_threshold=5, store_path=str(tmp_path / "analysis.db")
+    )
+    buffered = []
+    submitted_at_first_spill = []
+    spill = analyzer._maybe_spill_to_store
+
+    def recording_spill():
+        buffered.append(len(analyzer.functions))
+        if analyzer.store is None:
+            submitted_at_first_spill[:] = [len(submitted)]
+        spill()
+
+    monkeypatch.setattr(analyzer, "_maybe_spill_to_store", recording_spill)
+    result = analyzer.analyze_code_files(code_files, str(tmp_path))
+
+    # Two components per file: the buffer never holds more than one file past a flush
+    assert max(buffered) < 8 + 2
+    assert submitted_at_first_spill[0] < len(submitted)
+    assert result["call_graph"]["total_functions"] == 2 * 40
+    result["analysis_store"].close()
+
+
+def test_small_repos_stay_sequential():
+    """Below the file threshold the pool is not worth starting."""
+    analyzer = call_graph_analyzer.CallGraphAnalyzer(parse_workers=8)
+    assert analyzer._resolve_parse_workers(3) == 1
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Parse Cache Tests
+
+Checks that unchanged files are served from the Stage 1 parse cache and
+produce the same call graph as a fresh parse.
+
+Run with: python -m pytest tests/test_parse_cache.py -v
+"""
+
+import os
+import time
+
+from pathlib import Path
+
+from codewiki.src.be.dependency_analyzer.analysis import call_graph_analyzer
+ParseCache = call_graph_analyzer.ParseCache
+
+
+def _write_repo(root: Path) -> list:
+    """Create two Python modules where one calls into the other."""
+    (root / "pkg").mkdir(parents=True, exist_ok=True)
+    (root / "pkg" / "core.py").write_text(
+        "class Engine:\n"
+        "    def start(self):\n"
+        "        return 1\n"
+    )
+    (root / "pkg" / "app.py").write_text(
+        "from pkg.core import Engine\n"
+        "\n"
+        "def main():\n"
+        "    return Engine().start()\n"
+    )
+    return [
+        {"path": f"pkg/{name}", "name": name, "extension": ".py", "language": "python"}
+        for name in ("core.py", "app.py")
+    ]
+
+
+def test_second_run_hits_cache(tmp_path):
+    """A repeat run with unchanged files is served entirely from cache with identical output."""
+    repo = tmp_path / "repo"
+    code_files = _write_repo(repo)
+    cache_dir = str(tmp_path / "cache")
+
+    first = call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir)
+    first_result = first.analyze_code_files(code_files, str(repo))
+    assert first_result["call_graph"]["parse_cache"]["misses"] == 2
+    assert first_result["call_graph"]["parse_cache"]["writes"] == 2
+
+    second = call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir)
+    second_result = second.analyze_code_files(code_files, str(repo))
+    assert second_result["call_graph"]["parse_cache"]["hits"] == 2
+    assert second_result["call_graph"]["parse_cache"]["misses"] == 0
+
+    assert second_result["functions"] == first_result["functions"]
+    assert second_result["relationships"] == first_result["relationships"]
+
+
+def test_changed_file_is_reparsed(tmp_path):
+    """Editing a file invalidates only that file's entry."""
+    repo = tmp_path / "repo"
+    code_files = _write_repo(repo)
+    cache_dir = str(tmp_path / "cache")
+    call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir).analyze_code_files(
+        code_files, str(repo)
+    )
+
+    (repo / "pkg" / "core.py").write_text(
+        "class Engine:\n"
+        "    def start(self):\n"
+        "        return 2\n"
+        "\n"
+        "class Gearbox:\n"
+        "    pass\n"
+    )
+    result = call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir).analyze_code_files(
+        code_files, str(repo)
+    )
+    assert result["call_graph"]["parse_cache"]["hits"] == 1
+    assert result["call_graph"]["parse_cache"]["misses"] == 1
+    assert any(func["name"] == "Gearbox" for func in result["functions"])
+
+
+def test_cache_shared_across_repositories(tmp_path):
+    """A copy of a file under other directories of the same depth is served from the cache."""
+    cache_dir = str(tmp_path / "cache")
+    call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir).analyze_code_files(
+        _write_repo(tmp_path / "repo"), str(tmp_path / "repo")
+    )
+
+    fork = tmp_path / "fork"
+    (fork / "vendor").mkdir(parents=True)
+    (fork / "vendor" / "core.py").write_text((tmp_path / "repo" / "pkg" / "core.py").read_text())
+    code_files = [{"path": "vendor/core.py", "name": "core.py", "extension": ".py", "language": "python"}]
+
+    cached = call_graph_analyzer.CallGraphAnalyzer(parse_cache_dir=cache_dir).analyze_code_files(code_files, str(fork))
+    fresh = call_graph_analyzer.CallGraphAnalyzer().analyze_code_files(code_files, str(fork))
+
+    assert cached["call_graph"]["parse_cache"]["hits"] == 1
+    assert cached["functions"] == fresh["functions"]
+    assert cached["relationships"] == fresh["relationships"]
+    assert {func["id"] for func in cached["functions"]} == {"vendor.core.Engine"}
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    """Entries past the maximum age go first, then the least recently used ones."""
+    cache = ParseCache(str(tmp_path / "cache"))
+    now = time.time()
+    for age_days, key in ((60, "aa" + "0" * 62), (2, "bb" + "0" * 62), (1, "cc" + "0" * 62)):
+        cache.put(key, [], [])
+        path = cache._entry_path(key)
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+    entry_size = os.path.getsize(cache._entry_path("cc" + "0" * 62))
+
+    stats = cache.evict(max_bytes=entry_size, max_age_seconds=30 * 86400)
+
+    assert stats.removed == 2
+    assert stats.remaining == 1 and stats.remaining_bytes == entry_size
+    assert cache.get("cc" + "0" * 62, "x.py") is not None
+    assert cache.get("bb" + "0" * 62, "x.py") is None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Stage 1 Parse Profile Tests
+
+Checks the per-language timing report and that the call graph analyzer records
+phase timings for every analyzed file.
+
+Run with: python -m pytest tests/test_parse_profile.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.analysis.call_graph_analyzer import CallGraphAnalyzer
+from codewiki.src.be.dependency_analyzer.analysis.parse_profile import (
+    SLOWEST_FILES,
+    FileTiming,
+    build_profile_report,
+    percentile,
+    summarize_profile,
+)
+
+
+def test_profile_report_aggregates_per_language():
+    timings = [FileTiming(f"src/m{i}.py", "python", read=0.001, parse=0.01 * i, extract=0.02, total=0.01 * i + 0.021)
+               for i in range(1, 101)]
+    timings.append(FileTiming("web/app.ts", "typescript", total=0.5, parse=0.4, extract=0.1))
+    timings.append(FileTiming("web/cached.ts", "typescript", total=0.001, cached=True))
+
+    report = build_profile_report(timings, resolve_seconds=1.5, wall_seconds=3.0)
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+    assert percentile([], 0.95) == 0.0
+    python = report["languages"]["python"]
+    assert python["files"] == 100 and python["cache_hits"] == 0
+    assert python["parse"]["p50"] == 0.5 and python["parse"]["p95"] == 0.95 and python["parse"]["max"] == 1.0
+    typescript = report["languages"]["typescript"]
+    # Cache hits are counted but left out of the distributions
+    assert typescript["cache_hits"] == 1 and typescript["total"]["p50"] == 0.5
+    assert report["totals"]["resolve"] == 1.5
+    assert len(report["slowest_files"]) == SLOWEST_FILES
+    assert report["slowest_files"][0]["path"] == "src/m100.py"
+    assert summarize_profile(report)["slowest_file"] == "src/m100.py"
+
+
+def test_analyzer_records_file_timings(tmp_path):
+    (tmp_path / "a.py").write_text("def f():\n    return g()\n\ndef g():\n    return 1\n")
+    (tmp_path / "b.py").write_text("class C:\n    def m(self):\n        return 2\n")
+    code_files = [
+        {"path": name, "name": name, "extension": ".py", "language": "python"} for name in ("a.py", "b.py")
+    ]
+
+    result = CallGraphAnalyzer(parse_workers=1).analyze_code_files(code_files, str(tmp_path))
+
+    profile = result["call_graph"]["profile"]
+    assert profile["files"] == 2
+    assert list(profile["languages"]) == ["python"]
+    for entry in profile["slowest_files"]:
+        assert entry["parse"] > 0
+        assert entry["total"] >= entry["read"] + entry["parse"] + entry["extract"]
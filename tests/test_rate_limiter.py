@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Tests
+
+Checks that 429s halve the adaptive concurrency limit once per burst and are
+retried after Retry-After, that the in-flight count never exceeds the limit,
+and that token quotas pace requests.
+
+Run with: python -m pytest tests/test_rate_limiter.py -v
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from pydantic_ai.exceptions import ModelHTTPError
+
+from codewiki.src.be import rate_limiter
+from codewiki.src.be.rate_limiter import ModelRateLimiter, classify_error, parse_rate_limits
+
+
+class Throttled(Exception):
+    status_code = 429
+    response = SimpleNamespace(headers={"retry-after": "0.05"})
+
+
+def test_rejections_back_off_and_are_retried():
+    limiter = ModelRateLimiter("model", initial_concurrency=8, max_concurrency=8)
+    state = {"in_flight": 0, "peak": 0, "rejected": 0}
+
+    async def call():
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01)
+            if state["rejected"] < 6:
+                state["rejected"] += 1
+                raise Throttled()
+            return "ok"
+        finally:
+            state["in_flight"] -= 1
+
+    async def run():
+        start = time.monotonic()
+        results = await asyncio.gather(*(limiter.run(call, prompt_tokens=10) for _ in range(8)))
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == ["ok"] * 8
+    assert limiter.rejections == 6
+    # Six simultaneous rejections are one congestion signal; successes then grow the limit back
+    assert 4 <= limiter.limit < 6
+    assert state["peak"] <= 8
+    assert elapsed >= 0.05
+    assert limiter.in_flight == 0
+
+
+def test_token_quota_paces_requests(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BURST_SECONDS", 0.1)
+    # 1000 tokens per second, 100 at once
+    limiter = ModelRateLimiter("model", tpm=60_000)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.run(lambda: asyncio.sleep(0, "ok"), prompt_tokens=100)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_limits_and_errors_are_recognised():
+    assert parse_rate_limits("*=500/200000, gpt-4o-mini=5000/2000000") == {
+        "*": (500, 200_000), "gpt-4o-mini": (5000, 2_000_000),
+    }
+    try:
+        raise ModelHTTPError(status_code=429, model_name="m") from Throttled()
+    except ModelHTTPError as e:
+        assert classify_error(e) == ("rate_limited", 0.05)
+    assert classify_error(ModelHTTPError(status_code=503, model_name="m"))[0] == "transient"
+    assert classify_error(ValueError("bad answer")) == (None, None)
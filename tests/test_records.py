@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Record Tests
+
+Checks that the slotted analyzer records convert to exactly what the pydantic
+models dump, with the same keys in the same order, and that interning leaves
+their values unchanged. The parse cache, analysis store and shard entries all
+store these dicts.
+
+Run with: python -m pytest tests/test_records.py -v
+"""
+
+import sys
+from dataclasses import fields
+
+from codewiki.src.be.dependency_analyzer.models.core import CallRelationship, Node
+from codewiki.src.be.dependency_analyzer.models.records import CallRecord, ComponentRecord
+
+
+def _fresh(text):
+    # Built at run time so the string is not already interned as a literal
+    return "".join(list(text))
+
+
+COMPONENT = {
+    "id": "pkg.models.Model.run",
+    "name": "run",
+    "component_type": _fresh("method"),
+    "file_path": _fresh("/repo/pkg/models.py"),
+    "relative_path": _fresh("pkg/models.py"),
+    "source_code": "def run(self):\n    return 1",
+    "start_byte": 10,
+    "end_byte": 38,
+    "start_line": 2,
+    "end_line": 3,
+    "has_docstring": True,
+    "docstring": "Run the model.",
+    "parameters": ["self"],
+    "node_type": _fresh("method"),
+    "base_classes": ["Base"],
+    "class_name": _fresh("Model"),
+    "display_name": "Model.run",
+    "component_id": "pkg.models.Model.run",
+    "source_tokens": 9,
+    "file_tokens": 120,
+}
+
+
+def test_component_record_matches_node():
+    # Every Node field but depends_on (filled in after resolution), in order
+    assert [field.name for field in fields(ComponentRecord)] == [
+        name for name in Node.model_fields if name != "depends_on"
+    ]
+
+    for values in (COMPONENT, {key: COMPONENT[key] for key in list(COMPONENT)[:5]}):
+        record = ComponentRecord(**values)
+        expected = Node(**values).model_dump()
+        assert list(record.to_dict()) == list(expected)
+        assert record.to_dict() == expected
+        assert record.to_node().model_dump() == expected
+
+    record = ComponentRecord(**COMPONENT)
+    for name in ("component_type", "file_path", "relative_path", "node_type", "class_name"):
+        assert getattr(record, name) == COMPONENT[name]
+        assert getattr(record, name) is sys.intern(COMPONENT[name])
+    assert ComponentRecord(**{**COMPONENT, "node_type": None}).node_type is None
+
+
+def test_call_record_matches_call_relationship():
+    assert [field.name for field in fields(CallRecord)] == list(CallRelationship.model_fields)
+
+    for values in (
+        {"caller": _fresh("pkg.app.main"), "callee": _fresh("pkg.models.Model.run"), "call_line": 7, "is_resolved": True},
+        {"caller": _fresh("pkg.app.main"), "callee": _fresh("print")},
+    ):
+        record = CallRecord(**values)
+        expected = CallRelationship(**values).model_dump()
+        assert list(record.to_dict()) == list(expected)
+        assert record.to_dict() == expected
+        assert record.to_model().model_dump() == expected
+        assert record.caller is sys.intern(values["caller"])
+        assert record.callee is sys.intern(values["callee"])
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Repository Walker Tests
+
+Checks file discovery: compiled exclude/include patterns, .gitignore handling and
+pruning of ignored directories.
+
+Run with: python -m pytest tests/test_repo_walker.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.analysis import repo_analyzer
+from codewiki.src.be.dependency_analyzer.utils import ignore_matcher
+
+
+def _files(tree):
+    if tree["type"] == "file":
+        return [tree["path"]]
+    return [path for child in tree["children"] for path in _files(child)]
+
+
+def _write(root, files):
+    for path in files:
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("x = 1\n")
+
+
+def test_path_matcher_keeps_pattern_semantics():
+    matcher = ignore_matcher.PathMatcher(["*.pyc", "bin/", "src/legacy", "vendor"])
+    assert matcher.matches("pkg/mod.pyc", "mod.pyc")
+    assert matcher.matches("a/vendor/lib.py", "lib.py")
+    assert matcher.matches("src/legacy/old.py", "old.py")
+    assert matcher.matches("binary.py", "binary.py")
+    assert not matcher.matches("src/app.py", "app.py")
+
+
+def test_walker_honors_nested_gitignore(tmp_path):
+    _write(tmp_path, [
+        "app.py",
+        "local.py",
+        "generated/out.py",
+        "pkg/core.py",
+        "pkg/scratch_1.py",
+        "pkg/scratch_keep.py",
+        "pkg/sub/local.py",
+    ])
+    (tmp_path / ".gitignore").write_text("# build output\n/local.py\ngenerated/\n")
+    (tmp_path / "pkg" / ".gitignore").write_text("scratch_*.py\n!scratch_keep.py\n")
+
+    tree = repo_analyzer.RepoAnalyzer().analyze_repository_structure(str(tmp_path))["file_tree"]
+    assert _files(tree) == ["app.py", "pkg/core.py", "pkg/scratch_keep.py", "pkg/sub/local.py"]
+
+    unfiltered = repo_analyzer.RepoAnalyzer(respect_gitignore=False)._build_file_tree(str(tmp_path))
+    assert "generated/out.py" in _files(unfiltered)
+
+
+def test_walker_prunes_excluded_directories(tmp_path):
+    _write(tmp_path, ["src/main.py", "node_modules/dep/index.js", "docs/readme.bin"])
+    tree = repo_analyzer.RepoAnalyzer()._build_file_tree(str(tmp_path))
+    assert _files(tree) == ["src/main.py"]
+    assert [child["name"] for child in tree["children"]] == ["src"]
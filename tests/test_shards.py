@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Sharded Analysis Tests
+
+Checks shard planning for monorepos and that a sharded analysis, fresh, served
+from the shard cache or run across a process pool, produces the same call graph as
+analyzing the repository whole.
+
+Run with: python -m pytest tests/test_shards.py -v
+"""
+
+import json
+
+from codewiki.src.be.dependency_analyzer.analysis.call_graph_analyzer import CallGraphAnalyzer
+from codewiki.src.be.dependency_analyzer.analysis.shards import find_workspace_roots, plan_shards
+
+FILES = {
+    "packages/core/src/engine.js": (
+        "export class Engine {\n"
+        "  start() { return helper(); }\n"
+        "}\n"
+        "export function helper() { return 1; }\n"
+    ),
+    "packages/web/src/app.js": (
+        "import { Engine } from '../../core/src/engine';\n"
+        "export function main() { return new Engine().start(); }\n"
+    ),
+    "tools/build.py": "from lib.util import fmt\n\ndef build():\n    return fmt()\n",
+    "lib/util.py": "def fmt():\n    return ''\n",
+    "setup.py": "def setup_all():\n    return 0\n",
+}
+
+
+def _write_repo(root):
+    for relative_path, source in FILES.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+    (root / "package.json").write_text(json.dumps({"workspaces": ["packages/*"]}))
+    extensions = {".js": "javascript", ".py": "python"}
+    return [
+        {"path": path, "name": path.rsplit("/", 1)[-1], "extension": path[path.rfind("."):],
+         "language": extensions[path[path.rfind("."):]]}
+        for path in sorted(FILES)
+    ]
+
+
+def test_plan_shards(tmp_path):
+    code_files = _write_repo(tmp_path)
+
+    assert find_workspace_roots(str(tmp_path)) == ["packages/core", "packages/web"]
+    shards = plan_shards(code_files, str(tmp_path), max_files=1000)
+    assert [(shard.name, len(shard.files)) for shard in shards] == [
+        ("lib", 1), ("packages/core", 1), ("packages/web", 1), ("", 1), ("tools", 1),
+    ]
+    assert [f for shard in shards for f in shard.files] == code_files
+
+    # Oversized groups are split by their next directory level
+    nested = [{"path": f"src/{d}/m{i}.py", "language": "python"} for d in ("a", "b") for i in range(3)]
+    assert [shard.name for shard in plan_shards(nested, str(tmp_path), max_files=4)] == ["src/a", "src/b"]
+
+
+def test_sharded_analysis_matches_whole_repository(tmp_path):
+    repo = tmp_path / "repo"
+    code_files = _write_repo(repo)
+    cache_dir = str(tmp_path / "cache")
+
+    whole = CallGraphAnalyzer(parse_workers=1).analyze_code_files(code_files, str(repo))
+    sharded = CallGraphAnalyzer(parse_workers=1, shard_min_files=1, parse_cache_dir=cache_dir)
+    fresh = sharded.analyze_code_files(code_files, str(repo))
+    cached = sharded.analyze_code_files(code_files, str(repo))
+
+    for result in (fresh, cached):
+        assert result["functions"] == whole["functions"]
+        assert result["relationships"] == whole["relationships"]
+    assert fresh["call_graph"]["parse_cache"]["shard_misses"] == 5
+    assert cached["call_graph"]["parse_cache"]["shard_hits"] == 5
+    # Cross-shard calls resolve through the merged symbol tables
+    edges = {(rel["caller"], rel["callee"]) for rel in cached["relationships"] if rel["is_resolved"]}
+    assert ("tools.build.build", "lib.util.fmt") in edges
+
+
+def test_pooled_shards_merge_in_file_order(tmp_path, monkeypatch):
+    monkeypatch.setattr("codewiki.src.config.MIN_FILES_FOR_PARALLEL_PARSE", 1)
+    repo = tmp_path / "repo"
+    code_files = _write_repo(repo)
+
+    whole = CallGraphAnalyzer(parse_workers=1).analyze_code_files(code_files, str(repo))
+    pooled = CallGraphAnalyzer(parse_workers=3, shard_min_files=1).analyze_code_files(code_files, str(repo))
+
+    assert pooled["functions"] == whole["functions"]
+    assert pooled["relationships"] == whole["relationships"]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Source Bytes Tests
+
+Checks that byte-level slicing used by the tree-sitter analyzers returns the
+same text as the previous decode-then-splitlines approach.
+
+Run with: python -m pytest tests/test_source_bytes.py -v
+"""
+
+import pytest
+
+from codewiki.src.be.dependency_analyzer.utils import source_bytes
+SourceBytes = source_bytes.SourceBytes
+
+
+SAMPLES = [
+    "int main() {\n    return 0;\n}\n",
+    "class A {\r\n  int x;\r\n}\r\n",
+    "// naïve ünïcode ✓\nfn() {}\nlast line without newline",
+    "",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_lines_match_splitlines(text):
+    """Row slices equal the old `"\\n".join(content.splitlines()[a:b + 1])`."""
+    source = SourceBytes(text.encode("utf8"))
+    expected_lines = text.replace("\r\n", "\n").splitlines()
+    for start in range(len(expected_lines) + 1):
+        for end in range(start, len(expected_lines) + 1):
+            assert source.lines(start, end) == "\n".join(expected_lines[start:end + 1])
+
+
+def test_text_slices_by_byte_offset():
+    """Byte offsets past multi-byte characters decode correctly."""
+    text = "ü = helper()"
+    data = text.encode("utf8")
+    source = SourceBytes(data)
+    start = data.index(b"helper")
+    assert source.text(start, start + len("helper")) == "helper"
+    assert source.decode() == text
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Source Store Tests
+
+Checks that components keep byte offsets instead of source strings, that the
+memory-mapped store reads back exactly the text the analyzers extracted, and
+that it follows a path to a new file when the old one is replaced.
+
+Run with: python -m pytest tests/test_source_store.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.utils import source_store
+from codewiki.src.be.dependency_analyzer.analysis import call_graph_analyzer
+
+
+def test_locate_source_requires_verbatim_match():
+    data = "x = 1\ndef f():\n    return 'ü'\n".encode("utf8")
+    snippet = "def f():\n    return 'ü'"
+    start, end = source_store.locate_source(data, snippet, start_line=2, line_starts=[0, 6, 15])
+    assert data[start:end].decode("utf8") == snippet
+
+    assert source_store.locate_source(data, "def g():", 2) is None
+    assert source_store.locate_source(b"a\r\nb\r\n", "a\nb", 1) is None
+
+
+def test_store_reads_ranges_and_handles_missing_files(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_bytes(b"abc\ndef\n")
+    store = source_store.SourceStore(max_open=1)
+    assert store.read(str(path), 4, 7) == "def"
+    assert store.read(str(tmp_path / "missing.py"), 0, 3) == ""
+    assert store.read(str(path), 0, 3) == "abc"
+    store.close()
+
+
+def test_store_remaps_replaced_files(tmp_path, monkeypatch):
+    path = tmp_path / "mod.py"
+    path.write_bytes(b"def old():\n")
+    store = source_store.SourceStore()
+    assert store.read(str(path), 0, 10) == "def old():"
+
+    # A re-clone to the same directory: same path, new file
+    path.unlink()
+    path.write_bytes(b"def new():\n")
+    assert store.read(str(path), 0, 10) == "def new():"
+
+    # A missing file is retried once it exists
+    missing = tmp_path / "later.py"
+    assert store.read(str(missing), 0, 3) == ""
+    missing.write_bytes(b"abc")
+    assert store.read(str(missing), 0, 3) == "abc"
+
+    monkeypatch.setattr(source_store, "_source_store", store)
+    source_store.close_source_store()
+    assert not store._maps
+    assert store.read(str(path), 4, 7) == "new"
+    store.close()
+
+
+def test_analyzed_components_read_source_on_demand(tmp_path):
+    (tmp_path / "core.py").write_text(
+        "class Engine:\n"
+        "    def start(self):\n"
+        "        return 1\n"
+    )
+    code_files = [{"path": "core.py", "name": "core.py", "extension": ".py", "language": "python"}]
+    analyzer = call_graph_analyzer.CallGraphAnalyzer()
+    analyzer.analyze_code_files(code_files, str(tmp_path))
+
+    engine = next(func for func in analyzer.functions.values() if func.name == "Engine")
+    assert engine.source_code is None
+    assert engine.start_byte is not None
+    assert engine.get_source_code() == "class Engine:\n    def start(self):\n        return 1"
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Token Accounting Tests
+
+Checks that memoized, batched and bounded counting agree with plain tiktoken
+counts, and that budget packing matches a greedy scan.
+
+Run with: python -m pytest tests/test_token_accounting.py -v
+"""
+
+import tiktoken
+
+from codewiki.src.be.token_accounting import TokenAccountant, pack
+
+ENCODING = tiktoken.encoding_for_model("gpt-4")
+
+TEXTS = [
+    "def f(x):\n    return x + 1\n" * 100,
+    "int main(void) { return 0; }\n" * 200,
+    "short text <|endoftext|>",
+    "naïve façade — 東京 " * 80,
+]
+
+
+def test_counts_match_tiktoken_and_are_memoized():
+    accountant = TokenAccountant(ENCODING)
+    expected = [len(ENCODING.encode_ordinary(text)) for text in TEXTS]
+
+    assert [accountant.count(text) for text in TEXTS] == expected
+    assert accountant.count_batch(TEXTS, num_threads=2) == expected
+    assert accountant.count_batch(TEXTS, num_threads=1) == expected
+    # The three long texts were encoded once, then served from the cache
+    assert accountant.misses == 3
+    assert accountant.hits == 6
+
+
+def test_count_within_is_exact_near_the_limit():
+    accountant = TokenAccountant(ENCODING)
+    exact = sum(accountant.count_batch(TEXTS))
+    for limit in (1, 10, exact - 1, exact, exact + 1, 100 * exact):
+        total = accountant.count_within(TEXTS, limit)
+        assert (total > limit) == (exact > limit)
+        assert (total >= limit) == (exact >= limit)
+    # Decided from the size alone: limits 1, 10 and 100 * exact
+    assert accountant.estimated == 3
+
+
+def test_pack_matches_greedy_scan():
+    counts = [5, 3, 9, 40, 1, 1, 12, 7, 0, 8]
+    for limit in (1, 8, 10, 20, 100):
+        runs, start, used = [], 0, 0
+        for i, count in enumerate(counts):
+            if i > start and used + count > limit:
+                runs.append((start, i))
+                start, used = i, 0
+            used += count
+        runs.append((start, len(counts)))
+        assert pack(counts, limit) == runs
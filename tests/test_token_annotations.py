@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Token Annotation Tests
+
+Checks that Stage 1 records per-file and per-component token counts, in memory
+and through the analysis store, and that module token counts then come from
+those annotations without reading the files.
+
+Run with: python -m pytest tests/test_token_annotations.py -v
+"""
+
+from codewiki.src.be.dependency_analyzer.ast_parser import DependencyParser
+from codewiki.src.be.utils import accountant, count_module_tokens, module_file_blocks
+
+FILES = {
+    "pkg/shapes.py": (
+        "class Square:\n"
+        "    def __init__(self, side):\n"
+        "        self.side = side\n\n"
+        "    def area(self):\n"
+        "        return self.side ** 2\n\n\n"
+        "def describe(shape):\n"
+        "    return f'{type(shape).__name__} of area {shape.area()}'\n"
+    ),
+    "src/util.c": "int add(int a, int b) { return a + b; }\n\nint twice(int a) { return add(a, a); }\n",
+}
+
+
+def test_stage1_records_token_counts(tmp_path):
+    repo = tmp_path / "repo"
+    for relative_path, source in FILES.items():
+        path = repo / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+    in_memory = DependencyParser(str(repo), parse_workers=1).parse_repository()
+    stored = DependencyParser(
+        str(repo), parse_workers=1,
+        analysis_store_path=str(tmp_path / "analysis.db"), analysis_store_threshold=1,
+    ).parse_repository()
+
+    for components in (in_memory, stored):
+        assert len(components) >= 4
+        for component in components.values():
+            assert component.file_tokens == accountant.count(FILES[component.relative_path])
+            assert abs(component.source_tokens - accountant.count(component.get_source_code())) <= 1
+
+    ids = list(in_memory)
+    expected = sum(accountant.count_batch(module_file_blocks(ids, in_memory)))
+    # Annotated counts need no file contents
+    for relative_path in FILES:
+        (repo / relative_path).unlink()
+    assert abs(count_module_tokens(ids, in_memory) - expected) <= len(FILES)